@@ -0,0 +1,80 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmarks the construction, override and export of experiment configs.
+
+Reports the mean time of building the configs of the given experiments,
+overriding them with `--params_override`, locking them and exporting them with
+`as_dict`, like `train_utils.parse_configuration` does for every trial.
+
+Example usage, from the root of the repository:
+
+python -m official.common.config_benchmark \
+  --experiments=retinanet_resnetfpn_coco,maskrcnn_resnetfpn_coco
+"""
+
+import timeit
+from typing import Callable
+
+from absl import app
+from absl import flags
+from absl import logging
+
+from official.common import lazy_registry_imports  # pylint: disable=unused-import
+from official.core import exp_factory
+from official.modeling.hyperparams import params_dict
+
+_EXPERIMENTS = flags.DEFINE_list(
+    'experiments', ['retinanet_resnetfpn_coco', 'maskrcnn_resnetfpn_coco'],
+    'Names of the experiments to benchmark.')
+_PARAMS_OVERRIDE = flags.DEFINE_string(
+    'params_override',
+    'trainer.train_steps=100,trainer.validation_interval=10',
+    'The override string applied to the configs.')
+_NUM_RUNS = flags.DEFINE_integer('num_runs', 20, 'Number of runs per stage.')
+
+
+def time_fn(fn: Callable[[], None], num_runs: int) -> float:
+  """Returns the mean wall time of `fn` in milliseconds."""
+  return timeit.timeit(fn, number=num_runs) / num_runs * 1000
+
+
+def benchmark_experiment(experiment: str, params_override: str,
+                         num_runs: int):
+  """Returns the mean times in milliseconds of each stage of an experiment."""
+  # Resolves the lazy registration and warms up the caches.
+  config = exp_factory.get_exp_config(experiment)
+  # Overriding with the same values and locking again leave the config
+  # unchanged, so they are timed on the same config.
+  return {
+      'construction': time_fn(
+          lambda: exp_factory.get_exp_config(experiment), num_runs),
+      'override': time_fn(
+          lambda: params_dict.override_params_dict(
+              config, params_override, is_strict=True), num_runs),
+      'as_dict': time_fn(config.as_dict, num_runs),
+      'lock': time_fn(config.lock, num_runs),
+  }
+
+
+def main(_):
+  for experiment in _EXPERIMENTS.value:
+    times = benchmark_experiment(experiment, _PARAMS_OVERRIDE.value,
+                                 _NUM_RUNS.value)
+    logging.info('%s: %s', experiment,
+                 ', '.join(f'{k} {v:.2f} ms' for k, v in times.items()))
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,193 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Generates the index of registered experiments and tasks.
+
+The index maps experiment names and task configs to the modules that register
+them, so that `lazy_registry_imports` can register them without importing
+these modules. The modules are found by parsing the sources of the given
+packages, without importing them.
+
+Usage, from the root of the repository:
+
+python -m official.common.generate_registry_index \
+  --output=official/common/registry_index.py
+"""
+
+import ast
+import os
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+from absl import app
+from absl import flags
+from absl import logging
+
+# The modules imported by `registry_imports`.
+DEFAULT_PACKAGES = (
+    'official.vision.configs',
+    'official.vision.tasks',
+    'official.nlp.configs',
+    'official.nlp.tasks',
+    'official.utils.testing.mock_task',
+)
+
+_HEADER = '''# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Index of the registered experiments and tasks.
+
+Generated by official/common/generate_registry_index.py. Do not edit.
+"""
+'''
+
+_OUTPUT = flags.DEFINE_string('output', None, 'Path of the generated index.')
+_PACKAGES = flags.DEFINE_list('packages', list(DEFAULT_PACKAGES),
+                              'Packages or modules to index.')
+
+
+def _module_files(root_dir: str, package: str) -> Iterator[Tuple[str, str]]:
+  """Yields the names and paths of the non-test modules of `package`."""
+  path = os.path.join(root_dir, *package.split('.'))
+  if os.path.isfile(path + '.py'):
+    yield package, path + '.py'
+    return
+  for dirpath, _, filenames in sorted(os.walk(path)):
+    for filename in sorted(filenames):
+      if not filename.endswith('.py') or filename.endswith('_test.py'):
+        continue
+      module_path = os.path.relpath(os.path.join(dirpath, filename), root_dir)
+      module = module_path[:-len('.py')].replace(os.sep, '.')
+      if module.endswith('.__init__'):
+        module = module[:-len('.__init__')]
+      yield module, os.path.join(dirpath, filename)
+
+
+def _dotted_name(node: ast.AST) -> Optional[str]:
+  if isinstance(node, ast.Name):
+    return node.id
+  if isinstance(node, ast.Attribute):
+    value = _dotted_name(node.value)
+    return value and f'{value}.{node.attr}'
+  return None
+
+
+def _module_names(module: str, tree: ast.Module) -> Dict[str, str]:
+  """Returns the qualified names of the top-level names of a module."""
+  names = {}
+  for node in tree.body:
+    if isinstance(node, ast.Import):
+      for alias in node.names:
+        if alias.asname:
+          names[alias.asname] = alias.name
+        else:
+          head = alias.name.split('.')[0]
+          names[head] = head
+    elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+      for alias in node.names:
+        names[alias.asname or alias.name] = f'{node.module}.{alias.name}'
+    elif isinstance(node, ast.ClassDef):
+      names[node.name] = f'{module}.{node.name}'
+  return names
+
+
+def _registrations(module: str, source: str):
+  """Yields the experiment names and task config names registered in source."""
+  tree = ast.parse(source)
+  names = None
+  for node in ast.walk(tree):
+    if not (isinstance(node, ast.Call) and node.args):
+      continue
+    function = _dotted_name(node.func) or ''
+    if function.endswith('register_config_factory'):
+      if (isinstance(node.args[0], ast.Constant) and
+          isinstance(node.args[0].value, str)):
+        yield 'experiment', node.args[0].value
+      else:
+        logging.warning('Skipping a non-literal experiment name in %s.',
+                        module)
+    elif function.endswith('register_task_cls'):
+      config_name = _dotted_name(node.args[0])
+      if names is None:
+        names = _module_names(module, tree)
+      head, _, tail = (config_name or '').partition('.')
+      if head in names:
+        yield 'task', '.'.join(filter(None, [names[head], tail]))
+      else:
+        logging.warning('Skipping an unresolved task config in %s.', module)
+
+
+def build_index(
+    root_dir: str, packages: Sequence[str] = DEFAULT_PACKAGES
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+  """Returns the modules of the experiments and of the tasks of `packages`.
+
+  Args:
+    root_dir: The root directory of the `official` package.
+    packages: The packages or modules to index.
+
+  Returns:
+    A dictionary from experiment names to modules, and a dictionary from the
+    qualified names of task configs to the modules that register their tasks.
+
+  Raises:
+    ValueError: if an experiment or a task is registered by multiple modules.
+  """
+  index = {'experiment': {}, 'task': {}}
+  for package in packages:
+    for module, path in _module_files(root_dir, package):
+      with open(path) as f:
+        source = f.read()
+      for kind, name in _registrations(module, source):
+        if index[kind].get(name, module) != module:
+          raise ValueError(f'The {kind} {name} is registered by both '
+                           f'{index[kind][name]} and {module}.')
+        index[kind][name] = module
+  return index['experiment'], index['task']
+
+
+def format_index(experiments: Dict[str, str], tasks: Dict[str, str]) -> str:
+  """Returns the source of the index module."""
+  lines = [_HEADER, '# pylint: disable=line-too-long', 'EXPERIMENTS = {']
+  lines.extend(f'    {name!r}: {experiments[name]!r},'
+               for name in sorted(experiments))
+  lines.extend(['}', '', 'TASKS = {'])
+  lines.extend(f'    {name!r}: {tasks[name]!r},' for name in sorted(tasks))
+  lines.append('}')
+  return '\n'.join(lines) + '\n'
+
+
+def main(_):
+  root_dir = os.path.dirname(
+      os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+  experiments, tasks = build_index(root_dir, _PACKAGES.value)
+  with open(_OUTPUT.value, 'w') as f:
+    f.write(format_index(experiments, tasks))
+  logging.info('Indexed %d experiments and %d tasks in %s.', len(experiments),
+               len(tasks), _OUTPUT.value)
+
+
+if __name__ == '__main__':
+  flags.mark_flag_as_required('output')
+  app.run(main)
@@ -0,0 +1,62 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for generate_registry_index."""
+
+import os
+
+import tensorflow as tf, tf_keras
+
+from official.common import generate_registry_index
+
+_ROOT_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class GenerateRegistryIndexTest(tf.test.TestCase):
+
+  def test_index_is_up_to_date(self):
+    experiments, tasks = generate_registry_index.build_index(_ROOT_DIR)
+    with open(os.path.join(_ROOT_DIR, 'official', 'common',
+                           'registry_index.py')) as f:
+      index = f.read()
+    self.assertEqual(
+        index, generate_registry_index.format_index(experiments, tasks),
+        'Run `python -m official.common.generate_registry_index '
+        '--output=official/common/registry_index.py` to update the index.')
+
+  def test_build_index(self):
+    root_dir = self.create_tempdir()
+    root_dir.create_file(
+        'pkg/configs.py', 'import dataclasses\n'
+        'from official.core import exp_factory\n\n'
+        'class MyTaskConfig:\n  pass\n\n'
+        '@exp_factory.register_config_factory("my/experiment")\n'
+        'def my_experiment():\n  pass\n')
+    root_dir.create_file(
+        'pkg/tasks/my_task.py', 'from official.core import task_factory\n'
+        'from pkg import configs as exp_cfg\n\n'
+        '@task_factory.register_task_cls(exp_cfg.MyTaskConfig)\n'
+        'class MyTask:\n  pass\n')
+    root_dir.create_file('pkg/tasks/my_task_test.py',
+                         '@exp_factory.register_config_factory("test")\n'
+                         'def f():\n  pass\n')
+    experiments, tasks = generate_registry_index.build_index(
+        root_dir.full_path, ['pkg'])
+    self.assertEqual(experiments, {'my/experiment': 'pkg.configs'})
+    self.assertEqual(tasks, {'pkg.configs.MyTaskConfig': 'pkg.tasks.my_task'})
+
+
+if __name__ == '__main__':
+  tf.test.main()
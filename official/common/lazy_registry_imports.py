@@ -0,0 +1,36 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Lazy registration of the experiments and tasks of `registry_imports`.
+
+Importing this module registers the experiments and tasks listed in
+`registry_index` without importing their modules. A module is only imported
+when one of its experiments or tasks is looked up, so binaries do not pay for
+importing every model of the Model Garden at startup.
+
+Regenerate the index after adding or moving experiments or tasks:
+
+python -m official.common.generate_registry_index \
+  --output=official/common/registry_index.py
+"""
+
+from official.common import registry_index
+from official.core import exp_factory
+from official.core import task_factory
+
+for _name, _module in registry_index.EXPERIMENTS.items():
+  exp_factory.register_lazy_config_factory(_name, _module)
+
+for _name, _module in registry_index.TASKS.items():
+  task_factory.register_lazy_task_cls(_name, _module)
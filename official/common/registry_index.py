@@ -0,0 +1,79 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Index of the registered experiments and tasks.
+
+Generated by official/common/generate_registry_index.py. Do not edit.
+"""
+
+# pylint: disable=line-too-long
+EXPERIMENTS = {
+    'bert/pretraining': 'official.nlp.configs.pretraining_experiments',
+    'bert/pretraining_dynamic': 'official.nlp.configs.pretraining_experiments',
+    'bert/sentence_prediction': 'official.nlp.configs.finetuning_experiments',
+    'bert/sentence_prediction_text': 'official.nlp.configs.finetuning_experiments',
+    'bert/squad': 'official.nlp.configs.finetuning_experiments',
+    'bert/tagging': 'official.nlp.configs.finetuning_experiments',
+    'bert/text_wiki_pretraining': 'official.nlp.configs.pretraining_experiments',
+    'cascadercnn_spinenet_coco': 'official.vision.configs.maskrcnn',
+    'deit_imagenet_pretrain': 'official.vision.configs.image_classification',
+    'electra/pretraining': 'official.nlp.configs.pretraining_experiments',
+    'fasterrcnn_resnetfpn_coco': 'official.vision.configs.maskrcnn',
+    'image_classification': 'official.vision.configs.image_classification',
+    'maskrcnn_mobilenet_coco': 'official.vision.configs.maskrcnn',
+    'maskrcnn_resnetfpn_coco': 'official.vision.configs.maskrcnn',
+    'maskrcnn_spinenet_coco': 'official.vision.configs.maskrcnn',
+    'mnv2_deeplabv3_cityscapes': 'official.vision.configs.semantic_segmentation',
+    'mnv2_deeplabv3_pascal': 'official.vision.configs.semantic_segmentation',
+    'mnv2_deeplabv3plus_cityscapes': 'official.vision.configs.semantic_segmentation',
+    'mobilenet_imagenet': 'official.vision.configs.image_classification',
+    'mock': 'official.utils.testing.mock_task',
+    'resnet_imagenet': 'official.vision.configs.image_classification',
+    'resnet_rs_imagenet': 'official.vision.configs.image_classification',
+    'retinanet': 'official.vision.configs.retinanet',
+    'retinanet_mobile_coco': 'official.vision.configs.retinanet',
+    'retinanet_resnetfpn_coco': 'official.vision.configs.retinanet',
+    'retinanet_spinenet_coco': 'official.vision.configs.retinanet',
+    'revnet_imagenet': 'official.vision.configs.image_classification',
+    'seg_deeplabv3_pascal': 'official.vision.configs.semantic_segmentation',
+    'seg_deeplabv3plus_cityscapes': 'official.vision.configs.semantic_segmentation',
+    'seg_deeplabv3plus_pascal': 'official.vision.configs.semantic_segmentation',
+    'seg_resnetfpn_pascal': 'official.vision.configs.semantic_segmentation',
+    'semantic_segmentation': 'official.vision.configs.semantic_segmentation',
+    'video_classification': 'official.vision.configs.video_classification',
+    'video_classification_kinetics400': 'official.vision.configs.video_classification',
+    'video_classification_kinetics600': 'official.vision.configs.video_classification',
+    'video_classification_kinetics700': 'official.vision.configs.video_classification',
+    'video_classification_kinetics700_2020': 'official.vision.configs.video_classification',
+    'video_classification_ucf101': 'official.vision.configs.video_classification',
+    'vit_imagenet_finetune': 'official.vision.configs.image_classification',
+    'vit_imagenet_pretrain': 'official.vision.configs.image_classification',
+    'wmt_transformer/large': 'official.nlp.configs.wmt_transformer_experiments',
+}
+
+TASKS = {
+    'official.nlp.tasks.dual_encoder.DualEncoderConfig': 'official.nlp.tasks.dual_encoder',
+    'official.nlp.tasks.electra_task.ElectraPretrainConfig': 'official.nlp.tasks.electra_task',
+    'official.nlp.tasks.masked_lm.MaskedLMConfig': 'official.nlp.tasks.masked_lm',
+    'official.nlp.tasks.question_answering.QuestionAnsweringConfig': 'official.nlp.tasks.question_answering',
+    'official.nlp.tasks.question_answering.XLNetQuestionAnsweringConfig': 'official.nlp.tasks.question_answering',
+    'official.nlp.tasks.sentence_prediction.SentencePredictionConfig': 'official.nlp.tasks.sentence_prediction',
+    'official.nlp.tasks.tagging.TaggingConfig': 'official.nlp.tasks.tagging',
+    'official.nlp.tasks.translation.TranslationConfig': 'official.nlp.tasks.translation',
+    'official.vision.configs.image_classification.ImageClassificationTask': 'official.vision.tasks.image_classification',
+    'official.vision.configs.maskrcnn.MaskRCNNTask': 'official.vision.tasks.maskrcnn',
+    'official.vision.configs.retinanet.RetinaNetTask': 'official.vision.tasks.retinanet',
+    'official.vision.configs.semantic_segmentation.SemanticSegmentationTask': 'official.vision.tasks.semantic_segmentation',
+    'official.vision.configs.video_classification.VideoClassificationTask': 'official.vision.tasks.video_classification',
+}
@@ -0,0 +1,93 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmarks the startup time and memory of the training binaries.
+
+Runs every binary and imports every module in a fresh Python process, and
+reports the wall time and the peak resident set size of the process. The
+binaries are run with `--helpshort`, so only their imports are measured.
+
+Example usage, from the root of the repository:
+
+python -m official.common.startup_benchmark \
+  --binaries=official.vision.train,official.nlp.train \
+  --imports=official.common.registry_imports,official.common.lazy_registry_imports
+"""
+
+import os
+import subprocess
+import sys
+import time
+from typing import Container, Sequence, Tuple
+
+from absl import app
+from absl import flags
+from absl import logging
+import numpy as np
+
+_BINARIES = flags.DEFINE_list(
+    'binaries', ['official.vision.train', 'official.nlp.train'],
+    'Modules of the binaries to run with `--helpshort`.')
+_IMPORTS = flags.DEFINE_list(
+    'imports', [
+        'official.common.registry_imports',
+        'official.common.lazy_registry_imports'
+    ], 'Modules to import.')
+_NUM_RUNS = flags.DEFINE_integer('num_runs', 3, 'Number of runs per command.')
+
+
+def run_command(
+    command: Sequence[str],
+    exit_codes: Container[int] = (0,)) -> Tuple[float, float]:
+  """Returns the wall time in seconds and the peak RSS in MB of a command."""
+  start = time.perf_counter()
+  process = subprocess.Popen(
+      command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+  _, status, rusage = os.wait4(process.pid, 0)
+  elapsed = time.perf_counter() - start
+  process.returncode = os.waitstatus_to_exitcode(status)
+  if process.returncode not in exit_codes:
+    raise RuntimeError(
+        f'{" ".join(command)} failed with exit code {process.returncode}.')
+  # `ru_maxrss` is in kilobytes on Linux.
+  return elapsed, rusage.ru_maxrss / 1024
+
+
+def benchmark(command: Sequence[str],
+              num_runs: int,
+              exit_codes: Container[int] = (0,)) -> Tuple[float, float]:
+  """Returns the median wall time and peak RSS of `num_runs` runs."""
+  results = np.array(
+      [run_command(command, exit_codes) for _ in range(num_runs)])
+  return tuple(np.median(results, axis=0))
+
+
+def main(_):
+  # absl exits with code 1 after printing the help.
+  commands = [(binary, [sys.executable, '-m', binary, '--helpshort'], (0, 1))
+              for binary in _BINARIES.value]
+  commands.extend(
+      (f'import {module}', [sys.executable, '-c', f'import {module}'], (0,))
+      for module in _IMPORTS.value)
+  for name, command, exit_codes in commands:
+    try:
+      seconds, rss_mb = benchmark(command, _NUM_RUNS.value, exit_codes)
+    except RuntimeError as e:
+      logging.error('%s', e)
+      continue
+    logging.info('%s: %.2f s, peak RSS %.1f MB', name, seconds, rss_mb)
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -42,6 +42,9 @@ class Task(tf.Module, metaclass=abc.ABCMeta):
   # Special keys in train/validate step returned logs.
   loss = "loss"
 
+  # An optional `grad_utils.GradientAllReducer` used by `train_step`.
+  _gradient_allreducer = None
+
   def __init__(self,
                params,
                logging_dir: Optional[str] = None,
@@ -69,6 +72,18 @@ class Task(tf.Module, metaclass=abc.ABCMeta):
   def logging_dir(self) -> str:
     return self._logging_dir
 
+  @property
+  def gradient_allreducer(self):
+    """The `GradientAllReducer` of `train_step`, or None for implicit allreduce.
+
+    The trainer builds the allreducer under the strategy scope before training.
+    """
+    return self._gradient_allreducer
+
+  @gradient_allreducer.setter
+  def gradient_allreducer(self, gradient_allreducer):
+    self._gradient_allreducer = gradient_allreducer
+
   @classmethod
   def create_optimizer(cls, optimizer_config: OptimizationConfig,
                        runtime_config: Optional[RuntimeConfig] = None,
@@ -269,7 +284,12 @@ class Task(tf.Module, metaclass=abc.ABCMeta):
     if isinstance(optimizer,
                   tf_keras.mixed_precision.LossScaleOptimizer):
       grads = optimizer.get_unscaled_gradients(grads)
-    optimizer.apply_gradients(list(zip(grads, tvars)))
+    if self.gradient_allreducer is not None:
+      grads, tvars = self.gradient_allreducer(list(zip(grads, tvars)))
+      optimizer.apply_gradients(
+          list(zip(grads, tvars)), experimental_aggregate_gradients=False)
+    else:
+      optimizer.apply_gradients(list(zip(grads, tvars)))
     logs = {self.loss: loss}
     if metrics:
       self.process_metrics(metrics, labels, outputs)
@@ -341,6 +361,31 @@ class Task(tf.Module, metaclass=abc.ABCMeta):
     """
     pass
 
+  def merge_aggregated_logs(self, state, other_state):
+    """Optional merge of two states returned by `aggregate_logs`.
+
+    Tasks that implement this function support sharded evaluation: with
+    `MultiWorkerMirroredStrategy`, every worker aggregates the logs of its own
+    shard of the validation data, and the states of all workers are merged on
+    the chief with a tree reduction (see official/core/sharded_eval.py). Only
+    the chief calls `reduce_aggregated_logs` on the merged state, and the
+    resulting metrics are broadcast to the other workers.
+
+    To support merging, `aggregate_logs` must keep all aggregated values in the
+    returned state instead of e.g. in metric objects of the task, and the state
+    must be picklable. Ideally, the state is compact, such as the sufficient
+    statistics of the metrics instead of the raw outputs.
+
+    Args:
+      state: A state returned by `aggregate_logs`.
+      other_state: Another state returned by `aggregate_logs`.
+
+    Returns:
+      The merged state.
+    """
+    raise NotImplementedError(
+        f'{type(self).__name__} does not support merging aggregated logs.')
+
   def reduce_aggregated_logs(self,
                              aggregated_logs,
                              global_step: Optional[tf.Tensor] = None):
@@ -18,6 +18,7 @@ The base trainer implements the Orbit `StandardTrainable` and
 `StandardEvaluable` interfaces. Trainers inside this project should be
 interchangable and independent on model architectures and tasks.
 """
+import contextlib
 import functools
 from typing import Union, Optional
 from absl import logging
@@ -27,6 +28,7 @@ import tensorflow as tf, tf_keras
 
 from official.core import base_task
 from official.core import config_definitions
+from official.core import sharded_eval
 from official.modeling import optimization
 
 ExperimentConfig = config_definitions.ExperimentConfig
@@ -123,6 +125,126 @@ class _AsyncTrainer(orbit.StandardTrainer, orbit.StandardEvaluator):
                                                   *args, **kwargs)
 
 
+class _GradientAccumulator(tf.Module):
+  """Accumulates the gradients that a task applies over micro-batches.
+
+  Tasks apply their gradients with `optimizer.apply_gradients` inside
+  `train_step`. Within `accumulate()`, these calls only add the gradients to
+  per-replica accumulator variables. Within `apply()`, the gradients are
+  averaged with the accumulated ones and applied by the optimizer, which
+  allreduces them, and the accumulators are reset. This works with every task
+  without changes to its `train_step`.
+
+  If the task has a `gradient_allreducer`, it is disabled within `accumulate()`
+  and averages the gradients before allreducing them within `apply()`, so the
+  gradients are only allreduced once per optimizer update.
+  """
+
+  def __init__(self, optimizer, num_micro_batches: int, task: base_task.Task):
+    super().__init__(name="gradient_accumulator")
+    self._optimizer = optimizer
+    self._num_micro_batches = num_micro_batches
+    self._task = task
+    self._accumulators = None
+
+  @property
+  def num_micro_batches(self):
+    return self._num_micro_batches
+
+  def build(self, variables):
+    """Creates an accumulator for each variable, if not created yet."""
+    if self._accumulators is not None:
+      return
+    if not variables:
+      raise ValueError(
+          "Gradient accumulation requires the model to be built before "
+          "training, but it has no trainable variables.")
+    # The accumulators are local to every replica: the gradients are only
+    # allreduced once they are applied.
+    self._accumulators = {
+        var.ref(): tf.Variable(
+            tf.zeros(var.shape, var.dtype),
+            trainable=False,
+            synchronization=tf.VariableSynchronization.ON_READ,
+            aggregation=tf.VariableAggregation.SUM,
+            name="gradient_accumulator_%d" % i)
+        for i, var in enumerate(variables)
+    }
+
+  def _accumulator(self, var):
+    if var.ref() not in self._accumulators:
+      raise ValueError(
+          "Gradient accumulation only supports gradients of the model's "
+          "trainable variables, got a gradient for %s." % var.name)
+    return self._accumulators[var.ref()]
+
+  def _average(self, grads_and_vars):
+    """Averages the gradients with the accumulated ones and resets them."""
+    averaged_grads_and_vars = []
+    for grad, var in grads_and_vars:
+      if grad is not None:
+        accumulator = self._accumulator(var)
+        grad = (tf.convert_to_tensor(grad) +
+                accumulator.read_value()) / self._num_micro_batches
+        accumulator.assign(tf.zeros_like(grad))
+      averaged_grads_and_vars.append((grad, var))
+    return averaged_grads_and_vars
+
+  @contextlib.contextmanager
+  def _replace_apply_gradients(self, apply_gradients):
+    self._optimizer.apply_gradients = apply_gradients
+    try:
+      yield
+    finally:
+      del self._optimizer.apply_gradients
+
+  @contextlib.contextmanager
+  def _replace_gradient_allreducer(self, gradient_allreducer):
+    task_gradient_allreducer = self._task.gradient_allreducer
+    self._task.gradient_allreducer = gradient_allreducer
+    try:
+      yield
+    finally:
+      self._task.gradient_allreducer = task_gradient_allreducer
+
+  @contextlib.contextmanager
+  def accumulate(self):
+    """Returns a context in which applied gradients are only accumulated."""
+
+    def apply_gradients(grads_and_vars, *args, **kwargs):
+      del args, kwargs
+      for grad, var in grads_and_vars:
+        if grad is not None:
+          self._accumulator(var).assign_add(tf.convert_to_tensor(grad))
+
+    with self._replace_apply_gradients(apply_gradients):
+      with self._replace_gradient_allreducer(None):
+        yield
+
+  @contextlib.contextmanager
+  def apply(self):
+    """Returns a context in which the averaged gradients are applied."""
+    gradient_allreducer = self._task.gradient_allreducer
+    if gradient_allreducer is not None:
+
+      def allreduce(grads_and_vars, *args, **kwargs):
+        return gradient_allreducer(
+            self._average(grads_and_vars), *args, **kwargs)
+
+      with self._replace_gradient_allreducer(allreduce):
+        yield
+      return
+
+    optimizer_apply_gradients = self._optimizer.apply_gradients
+
+    def apply_gradients(grads_and_vars, *args, **kwargs):
+      return optimizer_apply_gradients(
+          self._average(grads_and_vars), *args, **kwargs)
+
+    with self._replace_apply_gradients(apply_gradients):
+      yield
+
+
 def get_runtime_options(config: ExperimentConfig):
   """Get tf.distribute.RunOptions from config."""
   xla_options = {}
@@ -214,6 +336,16 @@ class Trainer(_AsyncTrainer):
 
     self.init_async()
 
+    self._gradient_accumulator = None
+    if train and config.trainer.gradient_accumulation_steps > 1:
+      if self._is_async:
+        raise ValueError(
+            "Gradient accumulation is not supported with ParameterServerStrategy."
+        )
+      self._gradient_accumulator = _GradientAccumulator(
+          self.optimizer, config.trainer.gradient_accumulation_steps,
+          self.task)
+
     if train:
       self._train_metrics = self.task.build_metrics(
           training=True) + model_metrics
@@ -227,7 +359,15 @@ class Trainer(_AsyncTrainer):
               use_tf_function=config.trainer.train_tf_function,
               use_tpu_summary_optimization=config.trainer.allow_tpu_summary))
 
+    self._eval_state_reducer = None
     if evaluate:
+      if (type(task).merge_aggregated_logs is not
+          base_task.Task.merge_aggregated_logs and
+          isinstance(self._strategy,
+                     tf.distribute.MultiWorkerMirroredStrategy)):
+        eval_state_reducer = sharded_eval.WorkerTreeReducer(self._strategy)
+        if eval_state_reducer.num_workers > 1:
+          self._eval_state_reducer = eval_state_reducer
       self._validation_metrics = self.task.build_metrics(
           training=False) + model_metrics
       validation_dataset = validation_dataset or self.distribute_dataset(
@@ -339,9 +479,21 @@ class Trainer(_AsyncTrainer):
     """Accesses the checkpoint exporter."""
     return self._checkpoint_exporter
 
+  def train_loop_begin(self):
+    """See base class."""
+    if self._gradient_accumulator is not None:
+      with self.strategy.scope():
+        self._gradient_accumulator.build(self.model.trainable_variables)
+    if self.task.gradient_allreducer is not None:
+      with self.strategy.scope():
+        self.task.gradient_allreducer.build(self.model.trainable_variables)
+
   def train_loop_end(self):
     """See base class."""
     self.join()
+    if isinstance(self.optimizer, optimization.ExponentialMovingAverage
+                 ) and self.optimizer.offload_to_host:
+      self.optimizer.update_host_average()
     logs = {}
     for metric in self.train_metrics + [self.train_loss]:
       logs[metric.name] = metric.result()
@@ -383,7 +535,7 @@ class Trainer(_AsyncTrainer):
   def train_step(self, iterator):
     """See base class."""
 
-    def step_fn(inputs):
+    def step_fn(inputs, increment_global_step=True):
       if self.config.runtime.enable_xla and (self.config.runtime.num_gpus > 0):
         task_train_step = tf.function(self.task.train_step, jit_compile=True)
       else:
@@ -394,10 +546,26 @@ class Trainer(_AsyncTrainer):
           optimizer=self.optimizer,
           metrics=self.train_metrics)
       self._train_loss.update_state(logs[self.task.loss])
-      self.global_step.assign_add(1)
-
+      if increment_global_step:
+        self.global_step.assign_add(1)
+
+    if self._gradient_accumulator is None:
+      inputs = self.next_train_inputs(iterator)
+      self.strategy.run(step_fn, args=(inputs,), options=self._runtime_options)
+      return
+
+    # Runs all micro-batches but the last one without applying gradients. The
+    # global step counts optimizer updates.
+    for _ in tf.range(self._gradient_accumulator.num_micro_batches - 1):
+      inputs = self.next_train_inputs(iterator)
+      with self._gradient_accumulator.accumulate():
+        self.strategy.run(
+            functools.partial(step_fn, increment_global_step=False),
+            args=(inputs,),
+            options=self._runtime_options)
     inputs = self.next_train_inputs(iterator)
-    self.strategy.run(step_fn, args=(inputs,), options=self._runtime_options)
+    with self._gradient_accumulator.apply():
+      self.strategy.run(step_fn, args=(inputs,), options=self._runtime_options)
 
   def eval_begin(self):
     """Sets up metrics."""
@@ -474,14 +642,29 @@ class Trainer(_AsyncTrainer):
       # `self.validation_loss` metric was not updated, because the validation
       # loss was not returned from the task's `validation_step` method.
       logging.info("The task did not report validation loss.")
-    if aggregated_logs:
+    if self._eval_state_reducer is not None:
+      # Every worker aggregated the logs of its own shard, and only the chief
+      # computes the metrics from the merged state.
+      aggregated_logs = self._eval_state_reducer.reduce(
+          aggregated_logs, self.task.merge_aggregated_logs)
+      metrics = {}
+      if aggregated_logs:
+        metrics = self.task.reduce_aggregated_logs(
+            aggregated_logs, global_step=self.global_step)
+      logs.update(self._eval_state_reducer.broadcast(metrics))
+    elif aggregated_logs:
       metrics = self.task.reduce_aggregated_logs(
           aggregated_logs, global_step=self.global_step)
       logs.update(metrics)
 
     if self._checkpoint_exporter:
+      export_kwargs = {}
+      if isinstance(self.optimizer, optimization.ExponentialMovingAverage):
+        # The saved training checkpoint holds the regular weights instead of
+        # the swapped in average weights, so it cannot be reused for export.
+        export_kwargs["reuse_saved_checkpoint"] = False
       self._checkpoint_exporter.maybe_export_checkpoint(
-          self.checkpoint, logs, self.global_step.numpy())
+          self.checkpoint, logs, self.global_step.numpy(), **export_kwargs)
       metric_name = self.config.trainer.best_checkpoint_eval_metric
       logs["best_" +
            metric_name] = self._checkpoint_exporter.best_ckpt_logs[metric_name]
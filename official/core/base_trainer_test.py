@@ -29,6 +29,8 @@ from tensorflow.python.distribute import strategy_combinations
 from official.core import base_trainer as trainer_lib
 from official.core import config_definitions as cfg
 from official.core import train_lib
+from official.modeling import grad_utils
+from official.modeling import optimization
 from official.utils.testing import mock_task
 
 TPU_TEST = 'test_tpu' in sys.argv[0]
@@ -291,6 +293,101 @@ class TrainerTest(tf.test.TestCase, parameterized.TestCase):
       self.assertEqual(logs['counter'], 5. * distribution.num_replicas_in_sync)
       self.assertNotIn('validation_loss', logs)
 
+  @combinations.generate(all_strategy_combinations())
+  def test_trainer_gradient_accumulation(self, distribution):
+
+    class MockTaskWithRangeInputs(mock_task.MockTask):
+
+      def __init__(self, batch_size):
+        super().__init__()
+        self._batch_size = batch_size
+
+      def build_inputs(self, params):
+
+        def generate_data(i):
+          x = tf.fill([2], tf.cast(i, tf.float32))
+          label = tf.zeros([1], dtype=tf.int32)
+          return x, label
+
+        dataset = tf.data.Dataset.range(100).map(generate_data)
+        return dataset.batch(self._batch_size, drop_remainder=True)
+
+    accumulation_config = cfg.ExperimentConfig(**self._config.as_dict())
+    accumulation_config.trainer.gradient_accumulation_steps = 2
+    with distribution.scope():
+      accumulation_trainer = self.create_test_trainer(
+          accumulation_config, task=MockTaskWithRangeInputs(batch_size=2))
+      # Two micro-batches of 2 examples are equivalent to a batch of 4.
+      trainer = self.create_test_trainer(
+          self._config, task=MockTaskWithRangeInputs(batch_size=4))
+    trainer.model.set_weights(accumulation_trainer.model.get_weights())
+
+    logs = accumulation_trainer.train(tf.convert_to_tensor(3, dtype=tf.int32))
+    trainer.train(tf.convert_to_tensor(3, dtype=tf.int32))
+
+    self.assertIn('training_loss', logs)
+    self.assertEqual(accumulation_trainer.global_step.numpy(), 3)
+    self.assertEqual(accumulation_trainer.optimizer.iterations.numpy(), 3)
+    self.assertAllClose(accumulation_trainer.model.get_weights(),
+                        trainer.model.get_weights())
+
+  @combinations.generate(all_strategy_combinations())
+  def test_trainer_gradient_allreducer(self, distribution):
+    with distribution.scope():
+      allreducer_task = mock_task.MockTask()
+      allreducer_task.gradient_allreducer = grad_utils.GradientAllReducer(
+          bucket_bytes=4, compression='bfloat16', collect_timings=True)
+      allreducer_trainer = self.create_test_trainer(
+          self._config, task=allreducer_task)
+      trainer = self.create_test_trainer(self._config)
+    trainer.model.set_weights(allreducer_trainer.model.get_weights())
+
+    allreducer_trainer.train(tf.convert_to_tensor(2, dtype=tf.int32))
+    trainer.train(tf.convert_to_tensor(2, dtype=tf.int32))
+
+    self.assertLen(allreducer_task.gradient_allreducer.bucket_timings(),
+                   len(trainer.model.trainable_variables))
+    self.assertAllClose(allreducer_trainer.model.get_weights(),
+                        trainer.model.get_weights())
+
+  @combinations.generate(all_strategy_combinations())
+  def test_trainer_gradient_accumulation_with_allreducer(self, distribution):
+
+    class CountingGradientAllReducer(grad_utils.GradientAllReducer):
+
+      def __init__(self):
+        super().__init__(bucket_bytes=4)
+        self.num_calls = 0
+
+      def __call__(self, grads_and_vars, bytes_per_pack=0):
+        self.num_calls += 1
+        return super().__call__(grads_and_vars, bytes_per_pack)
+
+    accumulation_config = cfg.ExperimentConfig(**self._config.as_dict())
+    accumulation_config.trainer.gradient_accumulation_steps = 2
+    with distribution.scope():
+      allreducer_task = mock_task.MockTask()
+      allreducer_task.gradient_allreducer = CountingGradientAllReducer()
+      allreducer_trainer = self.create_test_trainer(
+          accumulation_config, task=allreducer_task)
+      trainer = self.create_test_trainer(accumulation_config)
+      no_accumulation_task = mock_task.MockTask()
+      no_accumulation_task.gradient_allreducer = CountingGradientAllReducer()
+      no_accumulation_trainer = self.create_test_trainer(
+          self._config, task=no_accumulation_task)
+    trainer.model.set_weights(allreducer_trainer.model.get_weights())
+
+    allreducer_trainer.train(tf.convert_to_tensor(3, dtype=tf.int32))
+    trainer.train(tf.convert_to_tensor(3, dtype=tf.int32))
+    no_accumulation_trainer.train(tf.convert_to_tensor(3, dtype=tf.int32))
+
+    # The gradients of the micro-batches are only allreduced once they are
+    # applied, as without accumulation.
+    self.assertEqual(allreducer_task.gradient_allreducer.num_calls,
+                     no_accumulation_task.gradient_allreducer.num_calls)
+    self.assertAllClose(allreducer_trainer.model.get_weights(),
+                        trainer.model.get_weights())
+
   @combinations.generate(
       combinations.combine(
           mixed_precision_dtype=['float32', 'bfloat16', 'float16'],
@@ -346,6 +443,38 @@ class TrainerTest(tf.test.TestCase, parameterized.TestCase):
     self.assertTrue(
         tf.io.gfile.exists(os.path.join(model_dir, 'best_ckpt', 'info.json')))
 
+  @parameterized.parameters(
+      {},
+      {'offload_to_host': True},
+      {'average_dtype': 'bfloat16', 'update_interval': 2},
+  )
+  def test_trainer_with_ema(self, **ema_config):
+    config = cfg.ExperimentConfig(
+        trainer=cfg.TrainerConfig(
+            optimizer_config=cfg.OptimizationConfig({
+                'optimizer': {
+                    'type': 'sgd'
+                },
+                'learning_rate': {
+                    'type': 'constant'
+                },
+                'ema': ema_config,
+            })))
+    # Weights can only be swapped under a strategy.
+    with tf.distribute.OneDeviceStrategy('/cpu:0').scope():
+      trainer = self.create_test_trainer(config)
+      self.assertIsInstance(trainer.optimizer,
+                            optimization.ExponentialMovingAverage)
+      weights = trainer.model.get_weights()
+      trainer.train(tf.convert_to_tensor(4, dtype=tf.int32))
+      trained_weights = trainer.model.get_weights()
+      self.assertNotAllClose(weights, trained_weights)
+
+      logs = trainer.evaluate(tf.convert_to_tensor(1, dtype=tf.int32))
+    self.assertIn('validation_loss', logs)
+    # The trained weights are swapped back after evaluating the averages.
+    self.assertAllClose(trainer.model.get_weights(), trained_weights)
+
   def test_model_with_compiled_loss(self):
     task = mock_task.MockTask()
     model = task.build_model()
@@ -244,9 +244,23 @@ class TrainerConfig(base_config.Config):
     best_checkpoint_metric_comp: for exporting the best checkpoint, how the
       trainer should compare the evaluation metrics. This can be either `higher`
       (higher the better) or `lower` (lower the better).
+    best_checkpoint_max_to_keep: for exporting the best checkpoint, the number
+      of best checkpoints to keep. The checkpoint state of the export directory
+      points to the best one.
     validation_summary_subdir: A 'str', sub directory for saving eval summary.
     preemption_on_demand_checkpoint: whether or not to save on-demand
       checkpoints after a preemption.
+    checkpoint_manifest: whether the trainer records the completed checkpoints
+      in a manifest in `model_dir`, and continuous evaluators wait for new
+      checkpoints in the manifest instead of polling `model_dir`. With a
+      `SavedModelCheckpointManager`, the SavedModel exports are recorded in a
+      separate manifest. It must be set for both the trainer and the evaluator
+      jobs.
+    gradient_accumulation_steps: number of micro-batches whose gradients are
+      averaged before they are applied. Every training step consumes this many
+      batches of `train_data.global_batch_size`, so the effective batch size is
+      multiplied by this number while the memory use is unchanged. The global
+      step, `train_steps` and the intervals count optimizer updates.
   """
   optimizer_config: OptimizationConfig = dataclasses.field(
       default_factory=OptimizationConfig
@@ -273,6 +287,7 @@ class TrainerConfig(base_config.Config):
   best_checkpoint_export_subdir: str = ""
   best_checkpoint_eval_metric: str = ""
   best_checkpoint_metric_comp: str = "higher"
+  best_checkpoint_max_to_keep: int = 1
   # Blowup recovery.
   loss_upper_bound: float = 1e6
   recovery_begin_steps: int = 0  # Enforcing the loss bound after these steps.
@@ -283,6 +298,10 @@ class TrainerConfig(base_config.Config):
   validation_summary_subdir: str = "validation"
   # Preemption on-demand checkpoint.
   preemption_on_demand_checkpoint: bool = True  # copybara-replace
+  # Checkpoint discovery of continuous evaluators.
+  checkpoint_manifest: bool = False
+  # Gradient accumulation.
+  gradient_accumulation_steps: int = 1
 
 
 @dataclasses.dataclass
@@ -26,6 +26,11 @@ def register_config_factory(name):
   return registry.register(_REGISTERED_CONFIGS, name)
 
 
+def register_lazy_config_factory(name, module_name):
+  """Registers a config factory method of a module to import on lookup."""
+  registry.register_lazy(_REGISTERED_CONFIGS, name, module_name)
+
+
 def get_exp_config(exp_name: str) -> cfg.ExperimentConfig:
   """Looks up the `ExperimentConfig` according to the `exp_name`."""
   exp_creater = registry.lookup(_REGISTERED_CONFIGS, exp_name)
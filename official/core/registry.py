@@ -14,6 +14,53 @@
 
 """Registry utility."""
 
+import importlib
+
+
+class LazyEntry:
+  """A registered function or class in a module that is not imported yet.
+
+  The module is imported when the entry is looked up, and is expected to
+  register the actual function or class under the same key.
+  """
+
+  def __init__(self, registered_collection, reg_key, module_name):
+    self._registered_collection = registered_collection
+    self._reg_key = reg_key
+    self.module_name = module_name
+
+  def resolve(self):
+    """Imports the module and returns the registered function or class."""
+    importlib.import_module(self.module_name)
+    fn_or_cls = _lookup_entry(self._registered_collection, self._reg_key)
+    if isinstance(fn_or_cls, LazyEntry):
+      raise LookupError(
+          f"Module {self.module_name} does not register {self._reg_key}.")
+    return fn_or_cls
+
+  def __call__(self, *args, **kwargs):
+    return self.resolve()(*args, **kwargs)
+
+  def __repr__(self):
+    return f"LazyEntry({self._reg_key!r}, {self.module_name!r})"
+
+
+def _leaf_collection(registered_collection, reg_key):
+  """Returns the collection and the key of the leaf of `reg_key`."""
+  if not isinstance(reg_key, str):
+    return registered_collection, reg_key
+  hierarchy = reg_key.split("/")
+  collection = registered_collection
+  for h_idx, entry_name in enumerate(hierarchy[:-1]):
+    if entry_name not in collection:
+      collection[entry_name] = {}
+    collection = collection[entry_name]
+    if not isinstance(collection, dict):
+      raise KeyError(
+          "Collection path {} at position {} already registered as "
+          "a function or class.".format(entry_name, h_idx))
+  return collection, hierarchy[-1]
+
 
 def register(registered_collection, reg_key):
   """Register decorated function or class to collection.
@@ -37,23 +84,9 @@ def register(registered_collection, reg_key):
   """
   def decorator(fn_or_cls):
     """Put fn_or_cls in the dictionary."""
-    if isinstance(reg_key, str):
-      hierarchy = reg_key.split("/")
-      collection = registered_collection
-      for h_idx, entry_name in enumerate(hierarchy[:-1]):
-        if entry_name not in collection:
-          collection[entry_name] = {}
-        collection = collection[entry_name]
-        if not isinstance(collection, dict):
-          raise KeyError(
-              "Collection path {} at position {} already registered as "
-              "a function or class.".format(entry_name, h_idx))
-      leaf_reg_key = hierarchy[-1]
-    else:
-      collection = registered_collection
-      leaf_reg_key = reg_key
-
-    if leaf_reg_key in collection:
+    collection, leaf_reg_key = _leaf_collection(registered_collection, reg_key)
+    if leaf_reg_key in collection and not isinstance(
+        collection[leaf_reg_key], LazyEntry):
       raise KeyError("Function or class {} registered multiple times.".format(
           leaf_reg_key))
 
@@ -62,6 +95,28 @@ def register(registered_collection, reg_key):
   return decorator
 
 
+def register_lazy(registered_collection, reg_key, module_name):
+  """Registers a function or class that is defined in a module to import later.
+
+  The module is imported by the first lookup() of reg_key, and needs to
+  register the function or class under reg_key with register(). This avoids
+  importing all modules with registrations, e.g. of all experiments, when only
+  one of them is used.
+
+  Args:
+    registered_collection: a dictionary. The lazy entry will be put into this
+      collection.
+    reg_key: The key for retrieving the registered function or class, see
+      register().
+    module_name: The name of the module that registers reg_key.
+  """
+  collection, leaf_reg_key = _leaf_collection(registered_collection, reg_key)
+  # Keeps functions or classes that are already registered.
+  if leaf_reg_key not in collection:
+    collection[leaf_reg_key] = LazyEntry(registered_collection, reg_key,
+                                         module_name)
+
+
 def lookup(registered_collection, reg_key):
   """Lookup and return decorated function or class in the collection.
 
@@ -77,10 +132,19 @@ def lookup(registered_collection, reg_key):
     reg_key: The key for retrieving the registered function or class. If reg_key
       is a string, it can be hierarchical like my_model/my_exp/my_config_0
   Returns:
-    The registered function or class.
+    The registered function or class. The module of an entry registered with
+    register_lazy() is imported first.
   Raises:
     LookupError: when reg_key cannot be found.
   """
+  collection = _lookup_entry(registered_collection, reg_key)
+  if isinstance(collection, LazyEntry):
+    return collection.resolve()
+  return collection
+
+
+def _lookup_entry(registered_collection, reg_key):
+  """Returns the entry of reg_key, without resolving lazy entries."""
   if isinstance(reg_key, str):
     hierarchy = reg_key.split("/")
     collection = registered_collection
@@ -91,7 +155,6 @@ def lookup(registered_collection, reg_key):
             f"registered. Please make sure the {entry_name} and its library is "
             "imported and linked to the trainer binary.")
       collection = collection[entry_name]
-    return collection
   else:
     if reg_key not in registered_collection:
       raise LookupError(
@@ -99,3 +162,4 @@ def lookup(registered_collection, reg_key):
           f"registered. Please make sure the {reg_key} and its library is "
           "imported and linked to the trainer binary.")
     return registered_collection[reg_key]
+  return collection
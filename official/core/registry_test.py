@@ -14,8 +14,13 @@
 
 """Tests for registry."""
 
+import sys
+import textwrap
+
 import tensorflow as tf, tf_keras
+from official.core import exp_factory
 from official.core import registry
+from official.core import task_factory
 
 
 class RegistryTest(tf.test.TestCase):
@@ -83,6 +88,63 @@ class RegistryTest(tf.test.TestCase):
     with self.assertRaises(LookupError):
       registry.lookup(collection, 'non-exist')
 
+  def test_register_lazy(self):
+    collection = {}
+    registry.register_lazy(collection, 'functions/func_0', 'os')
+
+    # The module does not register the function.
+    with self.assertRaisesRegex(LookupError, 'does not register'):
+      registry.lookup(collection, 'functions/func_0')
+
+    @registry.register(collection, 'functions/func_0')
+    def func_test0():
+      pass
+
+    self.assertEqual(registry.lookup(collection, 'functions/func_0'),
+                     func_test0)
+    # Registered functions are not replaced by lazy entries.
+    registry.register_lazy(collection, 'functions/func_0', 'os')
+    self.assertEqual(registry.lookup(collection, 'functions/func_0'),
+                     func_test0)
+
+  def test_register_lazy_experiment_and_task(self):
+    module_dir = self.create_tempdir()
+    module_dir.create_file(
+        'lazy_registry_test_module.py',
+        textwrap.dedent("""
+            import dataclasses
+            from official.core import config_definitions as cfg
+            from official.core import exp_factory
+            from official.core import task_factory
+
+
+            @dataclasses.dataclass
+            class LazyTaskConfig(cfg.TaskConfig):
+              pass
+
+
+            @task_factory.register_task_cls(LazyTaskConfig)
+            def lazy_task(task_config):
+              return task_config
+
+
+            @exp_factory.register_config_factory('lazy_test/experiment')
+            def lazy_experiment():
+              return cfg.ExperimentConfig(task=LazyTaskConfig())
+            """))
+    sys.path.insert(0, module_dir.full_path)
+    self.addCleanup(sys.path.remove, module_dir.full_path)
+    module_name = 'lazy_registry_test_module'
+    exp_factory.register_lazy_config_factory('lazy_test/experiment',
+                                             module_name)
+    task_factory.register_lazy_task_cls(f'{module_name}.LazyTaskConfig',
+                                        module_name)
+    self.assertNotIn(module_name, sys.modules)
+
+    config = exp_factory.get_exp_config('lazy_test/experiment')
+    self.assertIn(module_name, sys.modules)
+    self.assertEqual(task_factory.get_task(config.task), config.task)
+
 
 if __name__ == '__main__':
   tf.test.main()
@@ -14,15 +14,24 @@
 
 """Custom checkpoint manager that also exports saved models."""
 
+import collections
+from concurrent import futures
 import os
 import re
+import threading
 import time
 from typing import Callable, List, Mapping, Optional, Union
 
 from absl import logging
+import orbit
 import tensorflow as tf, tf_keras
 
 SAVED_MODULES_PATH_SUFFIX = 'saved_modules'
+_TEMP_SUFFIX = '_temp'
+_SNAPSHOT_SUFFIX = '_variables_snapshot'
+# The filename of the manifest of the SavedModel exports. It differs from the
+# filename of the checkpoint manifest, which is in the same directory.
+SAVEDMODELS_MANIFEST_FILENAME = 'savedmodels_manifest'
 
 
 def make_saved_modules_directory_name(checkpoint_name: str) -> str:
@@ -30,7 +39,17 @@ def make_saved_modules_directory_name(checkpoint_name: str) -> str:
 
 
 class SavedModelCheckpointManager(tf.train.CheckpointManager):
-  """A CheckpointManager that also exports `SavedModel`s."""
+  """A CheckpointManager that also exports `SavedModel`s.
+
+  With `async_export=True`, `save` only copies the variables of the modules to
+  export to host memory, and the `SavedModel`s are written by a background
+  thread. Every `SavedModel` is first written into a temporary directory, its
+  variables are replaced by the snapshot taken at `save` time, and the
+  directory is then renamed, so readers only ever see complete `SavedModel`s
+  that match their checkpoint. At most `max_in_flight_exports` exports are
+  pending; `save` waits for the oldest one otherwise. Call `sync` to wait for
+  all pending exports.
+  """
 
   def __init__(self,
                checkpoint: tf.train.Checkpoint,
@@ -41,8 +60,35 @@ class SavedModelCheckpointManager(tf.train.CheckpointManager):
                checkpoint_name: str = 'ckpt',
                step_counter: Optional[tf.Variable] = None,
                checkpoint_interval: Optional[int] = None,
-               init_fn: Optional[Callable[[], None]] = None):
-    """See base class."""
+               init_fn: Optional[Callable[[], None]] = None,
+               async_export: bool = False,
+               max_in_flight_exports: int = 1,
+               savedmodels_manifest: Optional[
+                   orbit.utils.CheckpointManifest] = None):
+    """See base class.
+
+    Args:
+      checkpoint: See base class.
+      directory: See base class.
+      max_to_keep: See base class.
+      modules_to_export: A mapping from names to the modules that are exported
+        as `SavedModel`s whenever a checkpoint is saved.
+      keep_checkpoint_every_n_hours: See base class.
+      checkpoint_name: See base class.
+      step_counter: See base class.
+      checkpoint_interval: See base class.
+      init_fn: See base class.
+      async_export: Whether to write the `SavedModel`s in a background thread.
+      max_in_flight_exports: The maximum number of pending background exports.
+      savedmodels_manifest: An optional `orbit.utils.CheckpointManifest` in
+        `directory`, named `SAVEDMODELS_MANIFEST_FILENAME` by convention. If
+        provided, every complete SavedModel export is recorded in it, and
+        `wait_for_new_savedmodel` and `savedmodels_iterator` read the manifest
+        instead of listing the directory.
+    """
+    if max_in_flight_exports < 1:
+      raise ValueError('max_in_flight_exports must be positive, got %d.' %
+                       max_in_flight_exports)
     super().__init__(
         checkpoint=checkpoint,
         directory=directory,
@@ -54,6 +100,13 @@ class SavedModelCheckpointManager(tf.train.CheckpointManager):
         init_fn=init_fn)
     self._modules_to_export = modules_to_export
     self._savedmodels = self.get_existing_savedmodels()
+    self._async_export = async_export
+    self._max_in_flight_exports = max_in_flight_exports
+    self._pending_exports = collections.deque()
+    self._export_executor = None
+    self._snapshot_checkpoints = {}
+    self._savedmodels_lock = threading.Lock()
+    self._savedmodels_manifest = savedmodels_manifest
 
   def save(self,
            checkpoint_number: Optional[int] = None,
@@ -70,38 +123,129 @@ class SavedModelCheckpointManager(tf.train.CheckpointManager):
       logging.info('Skip saving SavedModel due to empty modules_to_export.')
       return checkpoint_path
 
+    if self._async_export:
+      self._export_asynchronously(checkpoint_path)
+    else:
+      self._export_savedmodels(checkpoint_path)
+      self._update_savedmodels()
+    return checkpoint_path
+
+  def _take_snapshots(self, saved_modules_directory_tmp: str):
+    """Copies the variables of the modules to export to host memory.
+
+    The snapshots are written by the async checkpointing of
+    `tf.train.Checkpoint`, which copies the variables to host memory before it
+    returns.
+
+    Args:
+      saved_modules_directory_tmp: The temporary directory of the export.
+
+    Returns:
+      A mapping from module names to the checkpoints that write the snapshots
+      and the prefixes of the written snapshots.
+    """
+    options = tf.train.CheckpointOptions(
+        experimental_enable_async_checkpoint=True)
+    snapshots = {}
+    for model_name, model in self._modules_to_export.items():
+      if getattr(model, 'saved_model_signatures', None) is None:
+        continue
+      if model_name not in self._snapshot_checkpoints:
+        # The root of the checkpoint is the module, as in the SavedModel, so
+        # both have the same checkpoint keys.
+        self._snapshot_checkpoints[model_name] = tf.train.Checkpoint(
+            root=model)
+      checkpoint = self._snapshot_checkpoints[model_name]
+      prefix = os.path.join(saved_modules_directory_tmp,
+                            model_name + _SNAPSHOT_SUFFIX, 'variables')
+      checkpoint.write(prefix, options=options)
+      snapshots[model_name] = (checkpoint, prefix)
+    return snapshots
+
+  def _export_savedmodels(self, checkpoint_path: str, snapshots=None):
+    """Exports the modules for the checkpoint at `checkpoint_path`.
+
+    Args:
+      checkpoint_path: The path of the checkpoint that just got written.
+      snapshots: An optional mapping from module names to the checkpoints and
+        prefixes of their variables snapshots, see `_take_snapshots`. If
+        provided, the variables of the exported `SavedModel`s are replaced by
+        the snapshots.
+    """
     # Save the models for the checkpoint that just got written.
     saved_modules_directory = make_saved_modules_directory_name(checkpoint_path)
     # Atomic export of SavedModel. Write into a temporary direcotory and then
     # rename as the final direcotory after finishing the writing.
     # This can avoid trying to read an unfinished savedmodel.
-    saved_modules_directory_tmp = saved_modules_directory + '_temp'
+    saved_modules_directory_tmp = saved_modules_directory + _TEMP_SUFFIX
     for model_name, model in self._modules_to_export.items():
       signatures = getattr(model, 'saved_model_signatures', None)
       if signatures is not None:
+        export_dir = os.path.join(saved_modules_directory_tmp, model_name)
         tf.saved_model.save(
             obj=model,
-            export_dir=os.path.join(saved_modules_directory_tmp, model_name),
+            export_dir=export_dir,
             signatures=signatures)
+        if snapshots and model_name in snapshots:
+          checkpoint, prefix = snapshots[model_name]
+          checkpoint.sync()
+          variables_dir = os.path.join(export_dir, 'variables')
+          tf.io.gfile.rmtree(variables_dir)
+          tf.io.gfile.rename(os.path.dirname(prefix), variables_dir)
     if tf.io.gfile.exists(saved_modules_directory_tmp):
       tf.io.gfile.rename(saved_modules_directory_tmp, saved_modules_directory)
+      if self._savedmodels_manifest is not None:
+        self._savedmodels_manifest.append(saved_modules_directory)
+
+  def _update_savedmodels(self):
+    """Updates the managed SavedModels and deletes the unmanaged ones."""
+    with self._savedmodels_lock:
+      saved_modules_directories_to_keep = [
+          make_saved_modules_directory_name(ckpt) for ckpt in self.checkpoints
+      ]
+      existing_saved_modules_dirs = self.get_existing_savedmodels()
+
+      savedmodels = []
+      # Keep savedmodels in the same order as checkpoints (from oldest to
+      # newest).
+      for saved_modules_dir_to_keep in saved_modules_directories_to_keep:
+        if saved_modules_dir_to_keep in existing_saved_modules_dirs:
+          savedmodels.append(saved_modules_dir_to_keep)
+      self._savedmodels = savedmodels
+
+      for existing_saved_modules_dir in existing_saved_modules_dirs:
+        if existing_saved_modules_dir not in self._savedmodels:
+          tf.io.gfile.rmtree(existing_saved_modules_dir)
+
+  def _export_asynchronously(self, checkpoint_path: str):
+    """Snapshots the modules and exports them in a background thread."""
+    while len(self._pending_exports) >= self._max_in_flight_exports:
+      self._pending_exports.popleft().result()
+    if self._export_executor is None:
+      self._export_executor = futures.ThreadPoolExecutor(
+          max_workers=1, thread_name_prefix='savedmodel_export')
+    saved_modules_directory_tmp = make_saved_modules_directory_name(
+        checkpoint_path) + _TEMP_SUFFIX
+    snapshots = self._take_snapshots(saved_modules_directory_tmp)
+
+    def export():
+      if checkpoint_path in self.checkpoints:
+        self._export_savedmodels(checkpoint_path, snapshots)
+      else:
+        # The checkpoint was deleted while the export was pending.
+        for checkpoint, _ in snapshots.values():
+          checkpoint.sync()
+        if tf.io.gfile.exists(saved_modules_directory_tmp):
+          tf.io.gfile.rmtree(saved_modules_directory_tmp)
+      self._update_savedmodels()
 
-    saved_modules_directories_to_keep = [
-        make_saved_modules_directory_name(ckpt) for ckpt in self.checkpoints
-    ]
-    existing_saved_modules_dirs = self.get_existing_savedmodels()
-
-    self._savedmodels = []
-    # Keep savedmodels in the same order as checkpoints (from oldest to newest).
-    for saved_modules_dir_to_keep in saved_modules_directories_to_keep:
-      if saved_modules_dir_to_keep in existing_saved_modules_dirs:
-        self._savedmodels.append(saved_modules_dir_to_keep)
-
-    for existing_saved_modules_dir in existing_saved_modules_dirs:
-      if existing_saved_modules_dir not in self._savedmodels:
-        tf.io.gfile.rmtree(existing_saved_modules_dir)
+    self._pending_exports.append(self._export_executor.submit(export))
 
-    return checkpoint_path
+  def sync(self):
+    """Waits for the pending checkpoint writes and SavedModel exports."""
+    super().sync()
+    while self._pending_exports:
+      self._pending_exports.popleft().result()
 
   def get_existing_savedmodels(self) -> List[str]:
     """Gets a list of all existing SavedModel paths in `directory`.
@@ -140,6 +284,16 @@ class SavedModelCheckpointManager(tf.train.CheckpointManager):
     """
     return self._savedmodels
 
+  @property
+  def savedmodels_manifest(self) -> Optional[orbit.utils.CheckpointManifest]:
+    """The manifest of the SavedModel exports, if any."""
+    return self._savedmodels_manifest
+
+  @savedmodels_manifest.setter
+  def savedmodels_manifest(
+      self, manifest: Optional[orbit.utils.CheckpointManifest]):
+    self._savedmodels_manifest = manifest
+
   @property
   def modules_to_export(self) -> Union[Mapping[str, tf.Module], None]:
     return self._modules_to_export
@@ -232,6 +386,10 @@ class SavedModelCheckpointManager(tf.train.CheckpointManager):
       last_savedmodel_number = self.get_savedmodel_number_from_path(
           last_savedmodel)
 
+    if self._savedmodels_manifest is not None:
+      return self._wait_for_new_savedmodel_in_manifest(last_savedmodel_number,
+                                                       stop_time)
+
     while True:
       if stop_time is not None and time.time() + seconds_to_sleep > stop_time:
         return None
@@ -256,3 +414,36 @@ class SavedModelCheckpointManager(tf.train.CheckpointManager):
         return savedmodel_path
       else:
         time.sleep(seconds_to_sleep)
+
+  def _wait_for_new_savedmodel_in_manifest(
+      self, last_savedmodel_number: int,
+      stop_time: Optional[float]) -> Union[str, None]:
+    """Waits until a new savedmodel is recorded in the manifest.
+
+    Like `tf.train.checkpoints_iterator`, only the latest of the savedmodels
+    recorded since the last call is returned. Savedmodels that were already
+    deleted by `max_to_keep` are skipped.
+
+    Args:
+      last_savedmodel_number: The number of the last savedmodel used, or -1.
+      stop_time: The time at which to stop waiting, or `None`.
+
+    Returns:
+      A new savedmodel path, or None if the timeout was reached.
+    """
+    while True:
+      timeout = None
+      if stop_time is not None:
+        timeout = max(stop_time - time.time(), 0.)
+      savedmodel_paths = self._savedmodels_manifest.wait_for_new_checkpoints(
+          timeout=timeout)
+      if savedmodel_paths is None:
+        return None
+      for savedmodel_path in reversed(savedmodel_paths):
+        savedmodel_number = self.get_savedmodel_number_from_path(
+            savedmodel_path)
+        if (savedmodel_number is not None and
+            savedmodel_number > last_savedmodel_number and
+            tf.io.gfile.exists(savedmodel_path)):
+          logging.info('Found new savedmodel at %s', savedmodel_path)
+          return savedmodel_path
@@ -14,8 +14,9 @@
 
 import os
 import time
-from typing import Iterable
+from typing import Iterable, Optional
 
+import orbit
 import tensorflow as tf, tf_keras
 
 from official.core import savedmodel_checkpoint_manager
@@ -48,11 +49,16 @@ class _ModelForTest(tf_keras.Model):
 
 class CheckpointManagerTest(tf.test.TestCase):
 
-  def _create_manager(self, max_to_keep: int = 1) -> tf.train.CheckpointManager:
+  def _create_manager(self,
+                      max_to_keep: int = 1,
+                      directory: Optional[str] = None,
+                      **kwargs) -> tf.train.CheckpointManager:
     """Sets up SavedModelCheckpointManager object.
 
     Args:
       max_to_keep: max number of savedmodels to keep.
+      directory: the directory of the manager, defaults to the test temp dir.
+      **kwargs: other arguments of the manager.
 
     Returns:
       created savedmodel manager.
@@ -64,9 +70,10 @@ class CheckpointManagerTest(tf.test.TestCase):
     checkpoint = tf.train.Checkpoint()
     manager = savedmodel_checkpoint_manager.SavedModelCheckpointManager(
         checkpoint=checkpoint,
-        directory=self.get_temp_dir(),
+        directory=directory or self.get_temp_dir(),
         max_to_keep=max_to_keep,
-        modules_to_export=models)
+        modules_to_export=models,
+        **kwargs)
     return manager
 
   def test_max_to_keep(self):
@@ -81,6 +88,50 @@ class CheckpointManagerTest(tf.test.TestCase):
     self.assertTrue(_models_exist(second_path, models.keys()))
     self.assertFalse(_models_exist(first_path, models.keys()))
 
+  def test_async_export_uses_variables_at_save_time(self):
+    manager = self._create_manager(
+        max_to_keep=2, async_export=True, max_in_flight_exports=2)
+    model = manager.modules_to_export['model_1']
+    inputs = tf.ones([1, 16])
+    model(inputs)  # Builds the model.
+    expected_outputs = []
+    paths = []
+    for value in (1.0, 2.0):
+      for variable in model.variables:
+        variable.assign(tf.fill(variable.shape, value))
+      expected_outputs.append(model(inputs))
+      paths.append(manager.save())
+    # Training goes on while the models are exported.
+    for variable in model.variables:
+      variable.assign(tf.zeros_like(variable))
+    manager.sync()
+
+    self.assertEqual(
+        manager.savedmodels,
+        [savedmodel_checkpoint_manager.make_saved_modules_directory_name(path)
+         for path in paths])
+    for savedmodel, expected in zip(manager.savedmodels, expected_outputs):
+      loaded = tf.saved_model.load(os.path.join(savedmodel, 'model_1'))
+      outputs = loaded.signatures['serving_default'](inputs=inputs)
+      self.assertAllClose(list(outputs.values())[0], expected)
+    # No temporary directories are left.
+    self.assertCountEqual(
+        tf.io.gfile.glob(os.path.join(self.get_temp_dir(), '*saved_modules*')),
+        manager.savedmodels)
+
+  def test_async_export_max_to_keep(self):
+    manager = self._create_manager(async_export=True)
+    models = manager.modules_to_export
+    first_path = manager.save()
+    second_path = manager.save()
+    manager.sync()
+
+    self.assertEqual(
+        savedmodel_checkpoint_manager.make_saved_modules_directory_name(
+            second_path), manager.latest_savedmodel)
+    self.assertTrue(_models_exist(second_path, models.keys()))
+    self.assertFalse(_models_exist(first_path, models.keys()))
+
   def test_returns_none_after_timeout(self):
     manager = self._create_manager()
     start = time.time()
@@ -120,6 +171,38 @@ class CheckpointManagerTest(tf.test.TestCase):
     self.assertEqual([], results)
     self.assertEqual(4, timeout_fn_calls[0])
 
+  def _create_manager_with_manifest(self, max_to_keep: int):
+    directory = self.create_tempdir().full_path
+    manifest = orbit.utils.CheckpointManifest(
+        directory,
+        filename=savedmodel_checkpoint_manager.SAVEDMODELS_MANIFEST_FILENAME,
+        poll_interval_secs=0.1)
+    return self._create_manager(
+        max_to_keep=max_to_keep,
+        directory=directory,
+        savedmodels_manifest=manifest)
+
+  def test_saved_model_iterator_with_manifest(self):
+    manager = self._create_manager_with_manifest(max_to_keep=2)
+    for checkpoint_number in (1, 2, 3):
+      self.assertIsNotNone(manager.save(checkpoint_number=checkpoint_number))
+
+    # Like without a manifest, only the latest savedmodel is yielded.
+    savedmodels = list(manager.savedmodels_iterator(timeout=0.5))
+    self.assertEqual(savedmodels, [manager.latest_savedmodel])
+
+  def test_wait_for_new_savedmodel_with_manifest_skips_deleted(self):
+    manager = self._create_manager_with_manifest(max_to_keep=2)
+    self.assertIsNotNone(manager.save(checkpoint_number=1))
+    self.assertIsNotNone(manager.save(checkpoint_number=2))
+    first_savedmodel, second_savedmodel = manager.savedmodels
+    tf.io.gfile.rmtree(second_savedmodel)
+
+    self.assertEqual(
+        manager.wait_for_new_savedmodel(None, timeout=0.5), first_savedmodel)
+    self.assertIsNone(
+        manager.wait_for_new_savedmodel(first_savedmodel, timeout=0.5))
+
 
 if __name__ == '__main__':
   tf.test.main()
@@ -0,0 +1,186 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Utilities for sharded evaluation over multiple workers.
+
+With `tf.distribute.MultiWorkerMirroredStrategy`, every worker runs the eval
+loop on its own shard of the eval data and aggregates the outputs of its local
+replicas with `Task.aggregate_logs`. If the task can merge these states with
+`Task.merge_aggregated_logs`, the states of all workers are merged with a tree
+reduction to the chief, which is the only worker that computes the final
+metrics. Every worker only sends and receives its own state and those of at
+most log2(num_workers) peers, instead of gathering the outputs of all workers
+on one host.
+"""
+
+# pylint: disable=g-direct-tensorflow-import
+import itertools
+import pickle
+from typing import Any, Callable, List, Optional, Sequence
+
+import numpy as np
+import tensorflow as tf, tf_keras
+
+from tensorflow.python.ops import collective_ops
+
+# Keys of the collective ops of `WorkerTreeReducer`. They are offset from the
+# small keys used by the collective ops of the strategy.
+_GROUP_KEY_BASE = 1 << 24
+_INSTANCE_KEY_BASE = 1 << 24
+# Counts the calls of all reducers, since instance keys must be unique per
+# process.
+_call_ids = itertools.count()
+
+
+def tree_reduce(states: Sequence[Any], merge_fn: Callable[[Any, Any], Any]):
+  """Merges `states` pairwise in a balanced tree.
+
+  Args:
+    states: The states to merge. `None` states are skipped.
+    merge_fn: A function that merges two states into one.
+
+  Returns:
+    The merged state, or `None` if all states are `None`.
+  """
+  states = [state for state in states if state is not None]
+  if not states:
+    return None
+  while len(states) > 1:
+    merged = [
+        merge_fn(states[i], states[i + 1])
+        for i in range(0, len(states) - 1, 2)
+    ]
+    if len(states) % 2:
+      merged.append(states[-1])
+    states = merged
+  return states[0]
+
+
+def _worker_tasks(
+    cluster_resolver: tf.distribute.cluster_resolver.ClusterResolver
+) -> List[str]:
+  """Returns the `job/task` names of all workers, with the chief first."""
+  cluster_spec = cluster_resolver.cluster_spec().as_dict()
+  tasks = []
+  for job in ('chief', 'worker'):
+    num_tasks = len(cluster_spec.get(job, []))
+    tasks.extend(f'/job:{job}/replica:0/task:{i}' for i in range(num_tasks))
+  return tasks
+
+
+class WorkerTreeReducer:
+  """Merges Python states of all workers of a multi-worker strategy.
+
+  The states are pickled and exchanged between pairs of workers with
+  collective broadcasts. In round `r`, worker `i + 2**r` sends its state to
+  worker `i` for every `i` divisible by `2**(r + 1)`, so the chief holds the
+  merged state after `ceil(log2(num_workers))` rounds.
+
+  All workers need to call `reduce` and `broadcast` in the same order.
+  """
+
+  def __init__(self, strategy: tf.distribute.Strategy):
+    """Initializes the reducer.
+
+    Args:
+      strategy: A `tf.distribute.MultiWorkerMirroredStrategy`.
+    """
+    cluster_resolver = strategy.cluster_resolver
+    self._tasks = _worker_tasks(cluster_resolver)
+    self._rank = self._tasks.index(
+        f'/job:{cluster_resolver.task_type}/replica:0/task:'
+        f'{cluster_resolver.task_id}')
+    self._device = self._tasks[self._rank] + '/device:CPU:0'
+    self._call_id = 0
+
+  @property
+  def num_workers(self) -> int:
+    return len(self._tasks)
+
+  @property
+  def is_chief(self) -> bool:
+    return self._rank == 0
+
+  def _keys(self, group_key: int, message: int):
+    """Returns the keys of a message between a pair of workers."""
+    # The instance key is unique across calls, pairs and messages, and is the
+    # same on both workers of the pair.
+    num_groups = 2 * self.num_workers**2
+    return dict(
+        group_size=2,
+        group_key=_GROUP_KEY_BASE + group_key,
+        instance_key=_INSTANCE_KEY_BASE +
+        2 * (self._call_id * num_groups + group_key) + message)
+
+  def _send(self, value: Any, group_key: int):
+    data = pickle.dumps(value)
+    # Collective broadcasts do not support uint8, so the bytes are padded and
+    # sent as int32.
+    padded = np.frombuffer(data + bytes(-len(data) % 4), dtype=np.int32)
+    with tf.device(self._device):
+      collective_ops.broadcast_send_v2(
+          tf.constant([len(data)], tf.int64), **self._keys(group_key, 0))
+      collective_ops.broadcast_send_v2(
+          tf.constant(padded), **self._keys(group_key, 1))
+
+  def _recv(self, group_key: int) -> Any:
+    with tf.device(self._device):
+      length = collective_ops.broadcast_recv_v2(
+          [1], tf.int64, **self._keys(group_key, 0)).numpy()[0]
+      padded = collective_ops.broadcast_recv_v2(
+          tf.constant([(length + 3) // 4], tf.int32), tf.int32,
+          **self._keys(group_key, 1))
+    return pickle.loads(padded.numpy().tobytes()[:length])
+
+  def _rounds(self):
+    """Yields the group key and the pair of workers of every round."""
+    stride = 1
+    while stride < self.num_workers:
+      receiver = self._rank - self._rank % (2 * stride)
+      sender = receiver + stride
+      # The group of a pair is unique across rounds.
+      yield stride * self.num_workers + receiver, receiver, sender
+      stride *= 2
+
+  def reduce(self, state: Any,
+             merge_fn: Callable[[Any, Any], Any]) -> Optional[Any]:
+    """Merges the states of all workers on the chief.
+
+    Args:
+      state: The picklable state of this worker, or `None`.
+      merge_fn: A function that merges two states into one.
+
+    Returns:
+      The merged state on the chief, and `None` on the other workers.
+    """
+    self._call_id = next(_call_ids)
+    for group_key, receiver, sender in self._rounds():
+      if self._rank == sender:
+        self._send(state, group_key)
+        return None
+      if self._rank == receiver and sender < self.num_workers:
+        state = tree_reduce([state, self._recv(group_key)], merge_fn)
+    return state
+
+  def broadcast(self, value: Any) -> Any:
+    """Returns the picklable `value` of the chief on all workers."""
+    self._call_id = next(_call_ids)
+    for group_key, receiver, sender in reversed(list(self._rounds())):
+      if sender >= self.num_workers:
+        continue
+      if self._rank == receiver:
+        self._send(value, group_key)
+      elif self._rank == sender:
+        value = self._recv(group_key)
+    return value
@@ -0,0 +1,209 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for official.core.sharded_eval."""
+import json
+import multiprocessing
+import os
+
+import numpy as np
+import portpicker
+import tensorflow as tf, tf_keras
+
+from official.core import base_trainer
+from official.core import config_definitions as cfg
+from official.core import sharded_eval
+from official.utils.testing import mock_task
+from official.vision.configs import retinanet as retinanet_cfg
+from official.vision.tasks import retinanet
+
+_NUM_WORKERS = 3
+_NUM_EVAL_STEPS = 2
+
+
+class MockShardedEvalTask(mock_task.MockTask):
+
+  def merge_aggregated_logs(self, state, other_state):
+    return {key: state[key] + other_state[key] for key in state}
+
+
+def _coco_step_outputs(shard_index, step):
+  """Returns the COCO metric outputs of an eval step of a shard."""
+  batch_size = 2
+  source_id = np.arange(batch_size) + batch_size * (
+      _NUM_EVAL_STEPS * shard_index + step)
+  boxes = np.tile(
+      np.array([[[10., 10., 50., 50.]]], np.float32), [batch_size, 1, 1])
+  # The detections of every other image are off, so that the AP depends on
+  # the detections of all shards.
+  offset = 30. * (source_id % 2)[:, None, None]
+  groundtruths = {
+      'source_id': tf.constant(source_id),
+      'height': tf.fill([batch_size], 100),
+      'width': tf.fill([batch_size], 100),
+      'num_detections': tf.ones([batch_size], tf.int32),
+      'boxes': tf.constant(boxes),
+      'classes': tf.ones([batch_size, 1], tf.int32),
+  }
+  predictions = {
+      'source_id': tf.constant(source_id),
+      'image_info': tf.constant(
+          [[[100., 100.], [100., 100.], [1., 1.], [0., 0.]]] * batch_size),
+      'num_detections': tf.ones([batch_size], tf.int32),
+      'detection_boxes': tf.constant(boxes + offset),
+      'detection_classes': tf.ones([batch_size, 1], tf.int32),
+      'detection_scores': tf.constant(
+          (0.9 - 0.1 * source_id[:, None]).astype(np.float32)),
+  }
+  return groundtruths, predictions
+
+
+def _aggregate_coco_logs(task, shard_indices):
+  """Returns the state of a RetinaNet task aggregated over shards."""
+  state = None
+  for shard_index in shard_indices:
+    for step in range(_NUM_EVAL_STEPS):
+      state = task.aggregate_logs(
+          state, {'coco_metric': _coco_step_outputs(shard_index, step)})
+  return state
+
+
+def _sharded_coco_eval(task_index, cluster_spec, results):
+  """Merges the COCO metric states of a RetinaNet task on one worker."""
+  os.environ['TF_CONFIG'] = json.dumps({
+      'cluster': cluster_spec,
+      'task': {'type': 'worker', 'index': task_index}
+  })
+  strategy = tf.distribute.MultiWorkerMirroredStrategy()
+  reducer = sharded_eval.WorkerTreeReducer(strategy)
+  task = retinanet.RetinaNetTask(retinanet_cfg.RetinaNetTask())
+  task.build_metrics(training=False)
+  state = reducer.reduce(
+      _aggregate_coco_logs(task, [task_index]), task.merge_aggregated_logs)
+  metrics = {}
+  if state:
+    metrics = {
+        key: float(value)
+        for key, value in task.reduce_aggregated_logs(state).items()
+    }
+  results.put((task_index, reducer.broadcast(metrics)))
+
+
+def _sharded_eval(task_index, cluster_spec, results):
+  """Merges states and runs a sharded evaluation on one worker."""
+  os.environ['TF_CONFIG'] = json.dumps({
+      'cluster': cluster_spec,
+      'task': {'type': 'worker', 'index': task_index}
+  })
+  strategy = tf.distribute.MultiWorkerMirroredStrategy()
+  reducer = sharded_eval.WorkerTreeReducer(strategy)
+  merged = reducer.reduce([task_index], lambda x, y: x + y)
+  broadcast = reducer.broadcast(
+      'chief' if reducer.is_chief else 'worker')
+
+  config = cfg.ExperimentConfig(
+      trainer=cfg.TrainerConfig(
+          optimizer_config=cfg.OptimizationConfig({
+              'optimizer': {
+                  'type': 'sgd'
+              },
+              'learning_rate': {
+                  'type': 'constant'
+              }
+          })))
+  with strategy.scope():
+    task = MockShardedEvalTask(config.task)
+    trainer = base_trainer.Trainer(
+        config,
+        task,
+        model=task.build_model(),
+        optimizer=task.create_optimizer(config.trainer.optimizer_config,
+                                        config.runtime))
+  logs = trainer.evaluate(tf.convert_to_tensor(_NUM_EVAL_STEPS))
+  results.put((task_index, (merged, broadcast, float(logs['counter']))))
+
+
+class ShardedEvalTest(tf.test.TestCase):
+
+  def test_tree_reduce(self):
+    merge_fn = lambda x, y: x + y
+    self.assertIsNone(sharded_eval.tree_reduce([], merge_fn))
+    self.assertIsNone(sharded_eval.tree_reduce([None, None], merge_fn))
+    self.assertEqual(sharded_eval.tree_reduce([[1]], merge_fn), [1])
+    self.assertEqual(
+        sharded_eval.tree_reduce([[1], None, [2], [3], [4], [5]], merge_fn),
+        [1, 2, 3, 4, 5])
+
+  def _run_workers(self, target):
+    """Runs `target` on every worker and returns their results."""
+    cluster_spec = {
+        'worker': [
+            'localhost:%d' % portpicker.pick_unused_port()
+            for _ in range(_NUM_WORKERS)
+        ]
+    }
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    workers = [
+        context.Process(target=target, args=(task_index, cluster_spec, results))
+        for task_index in range(_NUM_WORKERS)
+    ]
+    for worker in workers:
+      worker.start()
+    worker_results = dict(results.get(timeout=600) for _ in workers)
+    for worker in workers:
+      worker.join()
+    return worker_results
+
+  def test_multi_worker_sharded_eval(self):
+    worker_results = self._run_workers(_sharded_eval)
+
+    self.assertEqual(worker_results[0][0], [0, 1, 2])
+    for task_index in range(_NUM_WORKERS):
+      merged, broadcast, counter = worker_results[task_index]
+      if task_index:
+        self.assertIsNone(merged)
+      self.assertEqual(broadcast, 'chief')
+      # The counters of every eval step of every worker are merged.
+      self.assertEqual(counter, _NUM_WORKERS * _NUM_EVAL_STEPS)
+
+  def test_merge_coco_states_of_retinanet_task(self):
+    task = retinanet.RetinaNetTask(retinanet_cfg.RetinaNetTask())
+    task.build_metrics(training=False)
+    shard_states = [
+        _aggregate_coco_logs(task, [shard_index])
+        for shard_index in range(_NUM_WORKERS)
+    ]
+    merged = task.reduce_aggregated_logs(
+        sharded_eval.tree_reduce(shard_states, task.merge_aggregated_logs))
+    expected = task.reduce_aggregated_logs(
+        _aggregate_coco_logs(task, range(_NUM_WORKERS)))
+    self.assertAllClose(merged, expected)
+    self.assertNotAllClose(
+        task.reduce_aggregated_logs(shard_states[-1])['AP'], expected['AP'])
+
+  def test_multi_worker_sharded_coco_eval(self):
+    task = retinanet.RetinaNetTask(retinanet_cfg.RetinaNetTask())
+    task.build_metrics(training=False)
+    expected = task.reduce_aggregated_logs(
+        _aggregate_coco_logs(task, range(_NUM_WORKERS)))
+
+    worker_results = self._run_workers(_sharded_coco_eval)
+    for task_index in range(_NUM_WORKERS):
+      # Every worker gets the metrics of the detections of all workers.
+      self.assertAllClose(worker_results[task_index], expected)
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -14,9 +14,14 @@
 
 """A global factory to register and access all registered tasks."""
 
+import importlib
+
 from official.core import registry
 
 _REGISTERED_TASK_CLS = {}
+# Maps the qualified names of TaskConfig subclasses to the modules that
+# register their tasks.
+_LAZY_TASK_MODULES = {}
 
 
 # TODO(b/158741360): Add type annotations once pytype checks across modules.
@@ -55,6 +60,22 @@ def register_task_cls(task_config_cls):
   return registry.register(_REGISTERED_TASK_CLS, task_config_cls)
 
 
+def register_lazy_task_cls(task_config_cls_name, module_name):
+  """Registers the task of a TaskConfig in a module to import later.
+
+  Unlike register_task_cls(), this does not need the TaskConfig subclass, so
+  neither the module of the task nor the module of the config is imported
+  until the task is created.
+
+  Args:
+    task_config_cls_name: the qualified name of a subclass of TaskConfig, i.e.
+      `f'{task_config_cls.__module__}.{task_config_cls.__qualname__}'`.
+    module_name: the name of the module that registers the task with
+      register_task_cls().
+  """
+  _LAZY_TASK_MODULES[task_config_cls_name] = module_name
+
+
 def get_task(task_config, **kwargs):
   """Creates a Task (of suitable subclass type) from task_config."""
   # TODO(hongkuny): deprecate the task factory to use config.BUILDER.
@@ -66,5 +87,11 @@ def get_task(task_config, **kwargs):
 # The user-visible get_task() is defined after classes have been registered.
 # TODO(b/158741360): Add type annotations once pytype checks across modules.
 def get_task_cls(task_config_cls):
+  if task_config_cls not in _REGISTERED_TASK_CLS:
+    task_config_cls_name = (
+        f'{task_config_cls.__module__}.{task_config_cls.__qualname__}')
+    if task_config_cls_name in _LAZY_TASK_MODULES:
+      # Importing the module registers the task.
+      importlib.import_module(_LAZY_TASK_MODULES[task_config_cls_name])
   task_cls = registry.lookup(_REGISTERED_TASK_CLS, task_config_cls)
   return task_cls
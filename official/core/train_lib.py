@@ -28,6 +28,7 @@ from official.core import actions
 from official.core import base_task
 from official.core import base_trainer
 from official.core import config_definitions
+from official.core import savedmodel_checkpoint_manager
 from official.core import train_utils
 
 maybe_create_best_ckpt_exporter = train_utils.maybe_create_best_ckpt_exporter
@@ -226,6 +227,21 @@ class OrbitExperimentRunner:
     else:
       eval_summary_dir = None
 
+    checkpoint_manifest = None
+    if self.params.trainer.checkpoint_manifest and self.checkpoint_manager:
+      checkpoint_manifest = orbit.utils.CheckpointManifest(
+          self.checkpoint_manager.directory)
+      if (isinstance(self.checkpoint_manager,
+                     savedmodel_checkpoint_manager.SavedModelCheckpointManager)
+          and self.checkpoint_manager.savedmodels_manifest is None):
+        # The SavedModel exports are recorded in their own manifest, next to
+        # the checkpoint manifest.
+        self.checkpoint_manager.savedmodels_manifest = (
+            orbit.utils.CheckpointManifest(
+                self.checkpoint_manager.directory,
+                filename=savedmodel_checkpoint_manager
+                .SAVEDMODELS_MANIFEST_FILENAME))
+
     controller = controller_cls(
         strategy=self.strategy,
         trainer=trainer,
@@ -234,6 +250,7 @@ class OrbitExperimentRunner:
         steps_per_loop=self.params.trainer.steps_per_loop,
         checkpoint_manager=self.checkpoint_manager,
         enable_async_checkpointing=enable_async_checkpointing,
+        checkpoint_manifest=checkpoint_manifest,
         summary_dir=os.path.join(self.model_dir, 'train')
         if (save_summary)
         else None,
@@ -39,6 +39,8 @@ from official.modeling import hyperparams
 
 
 BEST_CHECKPOINT_NAME = 'best_ckpt'
+# The checkpoint name of the training checkpoint manager.
+TRAIN_CHECKPOINT_NAME = 'ckpt'
 
 
 def get_leaf_nested_dict(d: Dict[str, Any], keys: List[str]) -> Dict[str, Any]:
@@ -118,8 +120,13 @@ def maybe_create_best_ckpt_exporter(params: config_definitions.ExperimentConfig,
   metric_comp = params.trainer.best_checkpoint_metric_comp
   if data_dir and export_subdir and metric_name:
     best_ckpt_dir = os.path.join(data_dir, export_subdir)
-    best_ckpt_exporter = BestCheckpointExporter(best_ckpt_dir, metric_name,
-                                                metric_comp)
+    best_ckpt_exporter = BestCheckpointExporter(
+        best_ckpt_dir,
+        metric_name,
+        metric_comp,
+        max_to_keep=params.trainer.best_checkpoint_max_to_keep,
+        source_checkpoint_prefix=os.path.join(data_dir,
+                                              TRAIN_CHECKPOINT_NAME))
     logging.info(
         'Created the best checkpoint exporter. '
         'data_dir: %s, export_subdir: %s, metric_name: %s', data_dir,
@@ -130,14 +137,44 @@ def maybe_create_best_ckpt_exporter(params: config_definitions.ExperimentConfig,
   return best_ckpt_exporter
 
 
+def _is_local_path(path: str) -> bool:
+  return '://' not in path
+
+
+def _link_or_copy(source: str, destination: str):
+  """Hard-links `source` to `destination`, or copies it if that fails."""
+  if tf.io.gfile.exists(destination):
+    tf.io.gfile.remove(destination)
+  if _is_local_path(source) and _is_local_path(destination):
+    try:
+      os.link(source, destination)
+      return
+    except OSError as e:
+      logging.info('Copying %s since it cannot be hard-linked: %s', source, e)
+  tf.io.gfile.copy(source, destination, overwrite=True)
+
+
 class BestCheckpointExporter:
-  """Keeps track of the best result, and saves its checkpoint.
+  """Keeps track of the best results, and exports their checkpoints.
+
+  The checkpoints of the `max_to_keep` best results are kept under
+  `export_dir`, and the checkpoint state of `export_dir` points to the best one.
+  If the evaluated checkpoint was already saved by the training checkpoint
+  manager under `source_checkpoint_prefix`, its files are hard-linked into
+  `export_dir`, or copied if they are on different file systems, instead of
+  being written again. The hard links keep the checkpoint after the training
+  checkpoint manager deletes it.
 
   Orbit will support an API for checkpoint exporter. This class will be used
   together with orbit once this functionality is ready.
   """
 
-  def __init__(self, export_dir: str, metric_name: str, metric_comp: str):
+  def __init__(self,
+               export_dir: str,
+               metric_name: str,
+               metric_comp: str,
+               max_to_keep: int = 1,
+               source_checkpoint_prefix: Optional[str] = None):
     """Initialization.
 
     Args:
@@ -146,6 +183,9 @@ class BestCheckpointExporter:
         result is better. If eval_logs being passed to maybe_export_checkpoint
         is a nested dictionary, use `|` as a seperator for different layers.
       metric_comp: Indicates how to compare results. Either `lower` or `higher`.
+      max_to_keep: The number of best checkpoints to keep.
+      source_checkpoint_prefix: Optional prefix of the training checkpoints,
+        which are named `{source_checkpoint_prefix}-{global_step}`.
     """
     self._export_dir = export_dir
     self._metric_name = metric_name.split('|')
@@ -153,36 +193,121 @@ class BestCheckpointExporter:
     if self._metric_comp not in ('lower', 'higher'):
       raise ValueError('best checkpoint metric comp must be one of '
                        'higher, lower. Got: {}'.format(self._metric_comp))
+    if max_to_keep < 1:
+      raise ValueError(
+          'max_to_keep must be positive. Got: {}'.format(max_to_keep))
+    self._max_to_keep = max_to_keep
+    self._source_checkpoint_prefix = source_checkpoint_prefix
     tf.io.gfile.makedirs(os.path.dirname(self.best_ckpt_logs_path))
     self._best_ckpt_logs = self._maybe_load_best_eval_metric()
-    self._checkpoint_manager = None
-
-  def _get_checkpoint_manager(self, checkpoint):
-    """Gets an existing checkpoint manager or creates a new one."""
-    if self._checkpoint_manager is None or (self._checkpoint_manager.checkpoint
-                                            != checkpoint):
-      logging.info('Creates a new checkpoint manager.')
-      self._checkpoint_manager = tf.train.CheckpointManager(
-          checkpoint,
-          directory=self._export_dir,
-          max_to_keep=1,
-          checkpoint_name=BEST_CHECKPOINT_NAME)
-
-    return self._checkpoint_manager
-
-  def maybe_export_checkpoint(
-      self, checkpoint, eval_logs, global_step, write_logs=True) -> bool:
-    """Compare eval_logs with past eval_logs and export checkpoint if better."""
+    self._best_checkpoints = self._maybe_load_best_checkpoints()
+
+  def maybe_export_checkpoint(self,
+                              checkpoint,
+                              eval_logs,
+                              global_step,
+                              write_logs=True,
+                              reuse_saved_checkpoint=True) -> bool:
+    """Compare eval_logs with past eval_logs and export checkpoint if better.
+
+    Args:
+      checkpoint: The `tf.train.Checkpoint` of the evaluated weights.
+      eval_logs: The evaluation logs.
+      global_step: The global step of the evaluated weights.
+      write_logs: Whether to write the logs of a new best result to
+        `best_ckpt_logs_path`.
+      reuse_saved_checkpoint: Whether the training checkpoint of `global_step`
+        holds the evaluated weights and can be reused. This is not the case if
+        e.g. moving averages are swapped in for evaluation.
+
+    Returns:
+      Whether the result is the new best one. The checkpoint is also exported
+      if the result is among the `max_to_keep` best ones.
+    """
     logging.info('[BestCheckpointExporter] received eval_logs: %s, at step: %d',
                  eval_logs, global_step)
-    if self._best_ckpt_logs is None or self._new_metric_is_better(
-        self._best_ckpt_logs, eval_logs):
+    is_best = self._best_ckpt_logs is None or self._new_metric_is_better(
+        self._best_ckpt_logs, eval_logs)
+    value = self._metric_value(eval_logs)
+    best_checkpoints = [
+        c for c in self._best_checkpoints if c['global_step'] != global_step
+    ]
+    worst_kept = best_checkpoints[self._max_to_keep - 1:self._max_to_keep]
+    if not is_best and worst_kept and not self._is_better(
+        worst_kept[0]['metric'], value):
+      return False
+
+    export_path = os.path.join(self._export_dir,
+                               f'{BEST_CHECKPOINT_NAME}-{global_step}')
+    self._export(checkpoint, export_path, global_step, reuse_saved_checkpoint)
+    # The sort is stable, so ties are broken in favor of the new result.
+    best_checkpoints.insert(0, {
+        'checkpoint': os.path.basename(export_path),
+        'metric': value,
+        'global_step': int(global_step),
+    })
+    best_checkpoints.sort(
+        key=lambda c: c['metric'], reverse=self._metric_comp == 'higher')
+    for evicted in best_checkpoints[self._max_to_keep:]:
+      self._delete(os.path.join(self._export_dir, evicted['checkpoint']))
+    self._best_checkpoints = best_checkpoints[:self._max_to_keep]
+    self._write_best_checkpoints()
+
+    if is_best:
       self._best_ckpt_logs = eval_logs
       if write_logs:
         self.export_best_eval_metric(self._best_ckpt_logs, global_step)
-      self._get_checkpoint_manager(checkpoint).save()
-      return True
-    return False
+    return is_best
+
+  def _export(self, checkpoint, export_path, global_step,
+              reuse_saved_checkpoint):
+    """Links or copies the training checkpoint, or writes a new one."""
+    if reuse_saved_checkpoint and self._source_checkpoint_prefix:
+      source_path = f'{self._source_checkpoint_prefix}-{global_step}'
+      # The index file is written last, so the checkpoint is complete if it
+      # exists.
+      if tf.io.gfile.exists(source_path + '.index'):
+        for source_file in tf.io.gfile.glob(source_path + '.*'):
+          _link_or_copy(source_file,
+                        export_path + source_file[len(source_path):])
+        logging.info('[BestCheckpointExporter] exported %s from %s.',
+                     export_path, source_path)
+        return
+    checkpoint.write(export_path)
+    logging.info('[BestCheckpointExporter] wrote %s.', export_path)
+
+  def _delete(self, checkpoint_path):
+    for checkpoint_file in tf.io.gfile.glob(checkpoint_path + '.*'):
+      tf.io.gfile.remove(checkpoint_file)
+
+  def _write_best_checkpoints(self):
+    """Writes the best checkpoints and points the checkpoint state to them."""
+    with tf.io.gfile.GFile(self.best_checkpoints_path, 'w') as writer:
+      writer.write(json.dumps(self._best_checkpoints, indent=4) + '\n')
+    paths = [
+        os.path.join(self._export_dir, c['checkpoint'])
+        for c in self._best_checkpoints
+    ]
+    # The best checkpoint is the one returned by `tf.train.latest_checkpoint`.
+    tf.compat.v1.train.update_checkpoint_state(
+        self._export_dir,
+        model_checkpoint_path=paths[0],
+        all_model_checkpoint_paths=paths[::-1])
+
+  def _maybe_load_best_checkpoints(self):
+    """Loads the best checkpoints, or the best one of a previous version."""
+    if tf.io.gfile.exists(self.best_checkpoints_path):
+      with tf.io.gfile.GFile(self.best_checkpoints_path, 'r') as reader:
+        return json.loads(reader.read())
+    best_ckpt_path = self.best_ckpt_path
+    if self._best_ckpt_logs is None or best_ckpt_path is None:
+      return []
+    return [{
+        'checkpoint': os.path.basename(best_ckpt_path),
+        'metric': self._metric_value(self._best_ckpt_logs),
+        'global_step': int(self._best_ckpt_logs.get('best_ckpt_global_step',
+                                                    -1)),
+    }]
 
   def _maybe_load_best_eval_metric(self):
     if not tf.io.gfile.exists(self.best_ckpt_logs_path):
@@ -190,27 +315,27 @@ class BestCheckpointExporter:
     with tf.io.gfile.GFile(self.best_ckpt_logs_path, 'r') as reader:
       return json.loads(reader.read())
 
+  def _metric_value(self, logs) -> float:
+    return float(
+        orbit.utils.get_value(get_leaf_nested_dict(logs, self._metric_name)))
+
+  def _is_better(self, old_value: float, new_value: float) -> bool:
+    if self._metric_comp == 'higher':
+      return new_value > old_value
+    return new_value < old_value
+
   def _new_metric_is_better(self, old_logs, new_logs):
     """Check if the metric in new_logs is better than the metric in old_logs."""
-    old_value = float(
-        orbit.utils.get_value(
-            get_leaf_nested_dict(old_logs, self._metric_name)))
-    new_value = float(
-        orbit.utils.get_value(
-            get_leaf_nested_dict(new_logs, self._metric_name)))
+    old_value = self._metric_value(old_logs)
+    new_value = self._metric_value(new_logs)
 
     logging.info('[BestCheckpointExporter] comparing results. old: %f, new: %f',
                  old_value, new_value)
-    if self._metric_comp == 'higher':
-      if new_value > old_value:
-        logging.info('[BestCheckpointExporter] '
-                     'the new number is better since it is higher.')
-        return True
-    else:  # self._metric_comp == 'lower':
-      if new_value < old_value:
-        logging.info('[BestCheckpointExporter] '
-                     'the new number is better since it is lower.')
-        return True
+    if self._is_better(old_value, new_value):
+      logging.info('[BestCheckpointExporter] '
+                   'the new number is better since it is %s.',
+                   self._metric_comp)
+      return True
     return False
 
   def export_best_eval_metric(self, eval_logs, global_step):
@@ -235,6 +360,18 @@ class BestCheckpointExporter:
   def best_ckpt_logs_path(self):
     return os.path.join(self._export_dir, 'info.json')
 
+  @property
+  def best_checkpoints_path(self):
+    return os.path.join(self._export_dir, 'best_checkpoints.json')
+
+  @property
+  def best_checkpoints(self) -> List[str]:
+    """The paths of the kept best checkpoints, from best to worst."""
+    return [
+        os.path.join(self._export_dir, c['checkpoint'])
+        for c in self._best_checkpoints
+    ]
+
   @property
   def best_ckpt_path(self):
     """Returns the best ckpt path or None if there is no ckpt yet."""
@@ -143,7 +143,6 @@ class BestCheckpointExporterTest(tf.test.TestCase):
 
   def test_maybe_export(self):
     model_dir = self.create_tempdir().full_path
-    best_ckpt_path = os.path.join(model_dir, 'best_ckpt-1')
     metric_name = 'test_metric|metric_1'
     exporter = train_utils.BestCheckpointExporter(
         model_dir, metric_name, 'higher')
@@ -155,7 +154,7 @@ class BestCheckpointExporterTest(tf.test.TestCase):
       self.assertEqual(ret, True)
       v_2 = tf.Variable(2.0)
       checkpoint_2 = tf.train.Checkpoint(v=v_2)
-      checkpoint_2.restore(best_ckpt_path)
+      checkpoint_2.restore(exporter.best_ckpt_path)
       self.assertEqual(v_2.numpy(), 1.0)
 
     v = tf.Variable(3.0)
@@ -166,7 +165,7 @@ class BestCheckpointExporterTest(tf.test.TestCase):
       self.assertEqual(ret, True)
       v_2 = tf.Variable(2.0)
       checkpoint_2 = tf.train.Checkpoint(v=v_2)
-      checkpoint_2.restore(best_ckpt_path)
+      checkpoint_2.restore(exporter.best_ckpt_path)
       self.assertEqual(v_2.numpy(), 3.0)
 
     v = tf.Variable(5.0)
@@ -177,9 +176,94 @@ class BestCheckpointExporterTest(tf.test.TestCase):
       self.assertEqual(ret, False)
       v_2 = tf.Variable(2.0)
       checkpoint_2 = tf.train.Checkpoint(v=v_2)
-      checkpoint_2.restore(best_ckpt_path)
+      checkpoint_2.restore(exporter.best_ckpt_path)
       self.assertEqual(v_2.numpy(), 3.0)
 
+  def test_maybe_export_reuses_saved_checkpoint(self):
+    model_dir = self.create_tempdir().full_path
+    export_dir = os.path.join(model_dir, 'best_ckpt')
+    exporter = train_utils.BestCheckpointExporter(
+        export_dir,
+        'metric',
+        'higher',
+        source_checkpoint_prefix=os.path.join(model_dir, 'ckpt'))
+    v = tf.Variable(1.0)
+    checkpoint = tf.train.Checkpoint(v=v)
+    checkpoint.write(os.path.join(model_dir, 'ckpt-100'))
+    # The saved checkpoint is exported instead of the current weights.
+    v.assign(2.0)
+    self.assertTrue(
+        exporter.maybe_export_checkpoint(checkpoint, {'metric': 5.0}, 100))
+    self.assertEqual(exporter.best_ckpt_path,
+                     os.path.join(export_dir, 'best_ckpt-100'))
+    self.assertEqual(
+        os.stat(os.path.join(model_dir, 'ckpt-100.index')).st_ino,
+        os.stat(os.path.join(export_dir, 'best_ckpt-100.index')).st_ino)
+    checkpoint.restore(exporter.best_ckpt_path)
+    self.assertEqual(v.numpy(), 1.0)
+
+    # The weights are written if they differ from the saved checkpoint.
+    checkpoint.write(os.path.join(model_dir, 'ckpt-200'))
+    v.assign(3.0)
+    self.assertTrue(
+        exporter.maybe_export_checkpoint(
+            checkpoint, {'metric': 6.0}, 200, reuse_saved_checkpoint=False))
+    v.assign(0.0)
+    checkpoint.restore(exporter.best_ckpt_path)
+    self.assertEqual(v.numpy(), 3.0)
+
+    # The weights are written if there is no saved checkpoint.
+    v.assign(4.0)
+    self.assertTrue(
+        exporter.maybe_export_checkpoint(checkpoint, {'metric': 7.0}, 300))
+    v.assign(0.0)
+    checkpoint.restore(exporter.best_ckpt_path)
+    self.assertEqual(v.numpy(), 4.0)
+    self.assertFalse(
+        tf.io.gfile.glob(os.path.join(export_dir, 'best_ckpt-100*')))
+
+  def test_maybe_export_keeps_top_k(self):
+    export_dir = self.create_tempdir().full_path
+    exporter = train_utils.BestCheckpointExporter(
+        export_dir, 'metric', 'lower', max_to_keep=2)
+    v = tf.Variable(0.0)
+    checkpoint = tf.train.Checkpoint(v=v)
+    results = []
+    for step, metric in [(1, 5.0), (2, 3.0), (3, 4.0), (4, 6.0), (5, 1.0)]:
+      v.assign(float(step))
+      results.append(
+          exporter.maybe_export_checkpoint(checkpoint, {'metric': metric},
+                                           step))
+    self.assertEqual(results, [True, True, False, False, True])
+    self.assertEqual(exporter.best_checkpoints, [
+        os.path.join(export_dir, 'best_ckpt-5'),
+        os.path.join(export_dir, 'best_ckpt-2'),
+    ])
+    self.assertCountEqual(
+        [os.path.basename(f) for f in tf.io.gfile.glob(
+            os.path.join(export_dir, 'best_ckpt-*.index'))],
+        ['best_ckpt-2.index', 'best_ckpt-5.index'])
+    self.assertEqual(exporter.best_ckpt_path,
+                     os.path.join(export_dir, 'best_ckpt-5'))
+
+    # The best checkpoints are restored by a new exporter.
+    exporter = train_utils.BestCheckpointExporter(
+        export_dir, 'metric', 'lower', max_to_keep=2)
+    self.assertEqual(exporter.best_checkpoints, [
+        os.path.join(export_dir, 'best_ckpt-5'),
+        os.path.join(export_dir, 'best_ckpt-2'),
+    ])
+    v.assign(6.0)
+    self.assertFalse(
+        exporter.maybe_export_checkpoint(checkpoint, {'metric': 2.0}, 6))
+    self.assertFalse(
+        tf.io.gfile.exists(os.path.join(export_dir, 'best_ckpt-2.index')))
+    self.assertTrue(
+        tf.io.gfile.exists(os.path.join(export_dir, 'best_ckpt-6.index')))
+    v.assign(0.0)
+    checkpoint.restore(exporter.best_ckpt_path)
+    self.assertEqual(v.numpy(), 5.0)
+
   def test_export_best_eval_metric(self):
     model_dir = self.create_tempdir().full_path
     metric_name = 'test_metric|metric_1'
@@ -14,10 +14,15 @@
 
 """Some gradient util functions to help users writing custom training loop."""
 
+import functools
+import math
+
 from absl import logging
 
 import tensorflow as tf, tf_keras
 
+_COMPRESSIONS = (None, "float16", "bfloat16", "topk")
+
 
 def _filter_grads(grads_and_vars):
   """Filter out iterable with grad equal to None."""
@@ -74,6 +79,269 @@ def _filter_and_allreduce_gradients(grads_and_vars,
   return allreduced_grads, variables
 
 
+class GradientAllReducer(tf.Module):
+  """Allreduces gradients in size-bounded buckets with optional compression.
+
+  The gradients are grouped into buckets of at most `bucket_bytes` in reverse
+  variable order, and every bucket is allreduced by its own collective. The
+  gradients of the last layers are computed first in the backward pass, so
+  their allreduce can start while the gradients of the earlier layers are still
+  being computed.
+
+  Every bucket can be compressed before it is allreduced:
+    * "float16" or "bfloat16": the gradients are cast to half precision.
+    * "topk": every replica only sends the `topk_ratio` fraction of the values
+      with the largest magnitude, as values and indices. The values that are not
+      sent are kept in per-replica residuals and added to the gradients of the
+      next step (error feedback). The residuals are not updated in a step with
+      non-finite gradients on any replica, e.g. a loss scale overflow that the
+      `LossScaleOptimizer` skips, and the gradients should not be loss-scaled.
+
+  The "topk" compression and the timing instrumentation keep state in
+  variables, so `build` must be called under the distribution strategy scope
+  before the allreducer is used in a replica context.
+  """
+
+  def __init__(self,
+               bucket_bytes: int = 0,
+               compression=None,
+               topk_ratio: float = 0.01,
+               collect_timings: bool = False,
+               name: str = "gradient_allreducer"):
+    """Initializes the allreducer.
+
+    Args:
+      bucket_bytes: A non-negative integer. The maximum size of a bucket of
+        gradients in bytes. A gradient larger than `bucket_bytes` gets its own
+        bucket. If it's zero, all gradients are in one bucket.
+      compression: One of None, "float16", "bfloat16" and "topk".
+      topk_ratio: The fraction of the values of every bucket that is sent with
+        "topk" compression.
+      collect_timings: Whether to record the allreduce time of every bucket,
+        see `bucket_timings`.
+      name: The name of the module.
+    """
+    super().__init__(name=name)
+    if bucket_bytes < 0:
+      raise ValueError("bucket_bytes must be non-negative, got %d." %
+                       bucket_bytes)
+    if compression not in _COMPRESSIONS:
+      raise ValueError("Unsupported compression %r, must be one of %s." %
+                       (compression, _COMPRESSIONS))
+    if not 0 < topk_ratio <= 1:
+      raise ValueError("topk_ratio must be in (0, 1], got %f." % topk_ratio)
+    self._bucket_bytes = bucket_bytes
+    self._compression = compression
+    self._topk_ratio = topk_ratio
+    self._collect_timings = collect_timings
+    self._buckets = None
+    self._residuals = None
+    self._timings = None
+
+  @property
+  def compression(self):
+    return self._compression
+
+  @property
+  def requires_build(self) -> bool:
+    """Whether `build` must be called before the allreducer is used."""
+    return self._compression == "topk" or self._collect_timings
+
+  @property
+  def buckets(self):
+    """The lists of variables of the buckets, available after `build`."""
+    return self._buckets
+
+  def _make_buckets(self, variables):
+    """Groups `variables` into buckets in reverse order."""
+    buckets = []
+    bucket = []
+    bucket_bytes = 0
+    for var in reversed(variables):
+      var_bytes = var.shape.num_elements() * var.dtype.size
+      if bucket and self._bucket_bytes and (
+          bucket_bytes + var_bytes > self._bucket_bytes):
+        buckets.append(bucket)
+        bucket = []
+        bucket_bytes = 0
+      bucket.append(var)
+      bucket_bytes += var_bytes
+    if bucket:
+      buckets.append(bucket)
+    return buckets
+
+  def build(self, variables):
+    """Creates the buckets and the state variables, if not created yet."""
+    if self._buckets is not None:
+      return
+    self._buckets = self._make_buckets(list(variables))
+    # The residuals and the timings are local to every replica.
+    if self._compression == "topk":
+      self._residuals = [
+          tf.Variable(
+              tf.zeros([sum(v.shape.num_elements() for v in bucket)]),
+              trainable=False,
+              synchronization=tf.VariableSynchronization.ON_READ,
+              aggregation=tf.VariableAggregation.MEAN,
+              name="allreduce_residual_%d" % i)
+          for i, bucket in enumerate(self._buckets)
+      ]
+    if self._collect_timings:
+      self._timings = [
+          tf.Variable(
+              0.0,
+              dtype=tf.float64,
+              trainable=False,
+              synchronization=tf.VariableSynchronization.ON_READ,
+              aggregation=tf.VariableAggregation.MEAN,
+              name="allreduce_time_%d" % i)
+          for i in range(len(self._buckets))
+      ]
+
+  def bucket_timings(self):
+    """Returns the allreduce seconds of every bucket in the last step.
+
+    The timings are averaged over the replicas. They are measured from the time
+    all gradients of a bucket are computed until its allreduce is done, and
+    hence include the time the bucket waits for the previous collectives.
+    """
+    if self._timings is None:
+      raise ValueError("Timings are only collected with collect_timings=True "
+                       "after the allreducer is built.")
+    return {
+        "bucket_%d" % i: timing.read_value()
+        for i, timing in enumerate(self._timings)
+    }
+
+  def _allreduce_dense(self, grads, hints):
+    dtypes = [grad.dtype for grad in grads]
+    if self._compression in ("float16", "bfloat16"):
+      grads = [tf.cast(grad, self._compression) for grad in grads]
+    allreduced_grads = tf.distribute.get_strategy(  # pylint: disable=protected-access
+    ).extended._replica_ctx_all_reduce(tf.distribute.ReduceOp.SUM, grads, hints)
+    return [
+        tf.cast(grad, dtype) for grad, dtype in zip(allreduced_grads, dtypes)
+    ]
+
+  def _allreduce_topk(self, grads, residual, all_finite):
+    """Allreduces the largest values of the flattened bucket.
+
+    Args:
+      grads: The gradients of the bucket.
+      residual: The residual variable of the bucket.
+      all_finite: A boolean scalar tensor, whether the gradients of all buckets
+        of all replicas are finite.
+
+    Returns:
+      The allreduced gradients.
+    """
+    shapes = [tf.shape(grad) for grad in grads]
+    sizes = [grad.shape.num_elements() for grad in grads]
+    dtypes = [grad.dtype for grad in grads]
+    previous_residual = residual.read_value()
+    flat = tf.concat(
+        [tf.reshape(tf.cast(grad, tf.float32), [-1]) for grad in grads],
+        axis=0) + previous_residual
+    num_values = flat.shape[0]
+    k = max(1, int(math.ceil(self._topk_ratio * num_values)))
+    _, indices = tf.math.top_k(tf.abs(flat), k=k, sorted=False)
+    values = tf.gather(flat, indices)
+    # The update of a step with non-finite gradients is skipped, so the
+    # residual is kept. Sending NaNs makes every replica see the non-finite
+    # gradients, even if they are not among the largest values.
+    residual.assign(
+        tf.where(
+            all_finite,
+            tf.tensor_scatter_nd_update(flat, indices[:, tf.newaxis],
+                                        tf.zeros_like(values)),
+            previous_residual))
+    values = tf.where(
+        tf.reduce_all(tf.math.is_finite(flat)), values,
+        tf.fill(tf.shape(values), float("nan")))
+    replica_context = tf.distribute.get_replica_context()
+    all_values = replica_context.all_gather(values, axis=0)
+    all_indices = replica_context.all_gather(indices, axis=0)
+    # Duplicate indices of different replicas are summed.
+    reduced = tf.scatter_nd(all_indices[:, tf.newaxis], all_values,
+                            [num_values])
+    return [
+        tf.cast(tf.reshape(grad, shape), dtype) for grad, shape, dtype in zip(
+            tf.split(reduced, sizes), shapes, dtypes)
+    ]
+
+  def __call__(self, grads_and_vars, bytes_per_pack: int = 0):
+    """Filters None grads and then allreduces the gradients in buckets.
+
+    Args:
+      grads_and_vars: gradients and variables pairs.
+      bytes_per_pack: A non-negative integer. Breaks the collective of every
+        dense bucket into packs of certain size.
+
+    Returns:
+      pairs of allreduced non-None gradients and variables.
+    """
+    filtered_grads_and_vars = _filter_grads(grads_and_vars)
+    if self._buckets is None:
+      if self.requires_build:
+        raise ValueError(
+            "The allreducer must be built under the strategy scope before it "
+            "is used with topk compression or timings.")
+      buckets = self._make_buckets([v for _, v in filtered_grads_and_vars])
+    else:
+      buckets = self._buckets
+    grads_by_var = {var.ref(): grad for grad, var in filtered_grads_and_vars}
+    unknown_vars = set(grads_by_var) - set(
+        var.ref() for bucket in buckets for var in bucket)
+    if unknown_vars:
+      raise ValueError("Got gradients for variables that are not in the "
+                       "buckets: %s." % [ref.deref().name for ref in unknown_vars])
+    hints = tf.distribute.experimental.CommunicationOptions(
+        bytes_per_pack=bytes_per_pack)
+
+    if self._compression == "topk":
+      num_non_finite = tf.add_n([
+          tf.reduce_sum(tf.cast(
+              tf.logical_not(tf.math.is_finite(tf.cast(grad, tf.float32))),
+              tf.float32)) for grad, _ in filtered_grads_and_vars
+      ] + [tf.constant(0.0)])
+      all_finite = tf.equal(
+          tf.distribute.get_replica_context().all_reduce(
+              tf.distribute.ReduceOp.SUM, num_non_finite), 0.0)
+
+    allreduced_grads = {}
+    for i, bucket in enumerate(buckets):
+      if self._compression == "topk":
+        # All variables of a bucket share a residual, so missing gradients are
+        # treated as zeros.
+        bucket_vars = bucket
+        grads = [
+            tf.zeros_like(var) if grads_by_var.get(var.ref()) is None else
+            tf.convert_to_tensor(grads_by_var[var.ref()]) for var in bucket
+        ]
+      else:
+        bucket_vars = [var for var in bucket if var.ref() in grads_by_var]
+        grads = [grads_by_var[var.ref()] for var in bucket_vars]
+      if not grads:
+        continue
+      if self._timings is not None:
+        with tf.control_dependencies(grads):
+          start = tf.timestamp()
+      if self._compression == "topk":
+        reduced_grads = self._allreduce_topk(grads, self._residuals[i],
+                                             all_finite)
+      else:
+        reduced_grads = self._allreduce_dense(grads, hints)
+      if self._timings is not None:
+        with tf.control_dependencies(reduced_grads):
+          self._timings[i].assign(tf.timestamp() - start)
+      for var, grad in zip(bucket_vars, reduced_grads):
+        if var.ref() in grads_by_var:
+          allreduced_grads[var.ref()] = grad
+
+    variables = tuple(var for _, var in filtered_grads_and_vars)
+    return [allreduced_grads[var.ref()] for var in variables], variables
+
+
 def _run_callbacks(callbacks, grads_and_vars):
   for callback in callbacks:
     grads_and_vars = callback(grads_and_vars)
@@ -86,7 +354,8 @@ def minimize_using_explicit_allreduce(tape,
                                       trainable_variables,
                                       pre_allreduce_callbacks=None,
                                       post_allreduce_callbacks=None,
-                                      allreduce_bytes_per_pack=0):
+                                      allreduce_bytes_per_pack=0,
+                                      gradient_allreducer=None):
   """Minimizes loss for one step by updating `trainable_variables`.
 
   Minimizes loss for one step by updating `trainable_variables`.
@@ -115,7 +384,15 @@ def minimize_using_explicit_allreduce(tape,
       allreduce_bytes_per_pack: A non-negative integer. Breaks collective
         operations into packs of certain size. If it's zero, all gradients are
         in one pack.
+      gradient_allreducer: An optional `GradientAllReducer` that allreduces the
+        gradients in buckets with its own compression, instead of allreducing
+        them in one collective.
   """
+  if gradient_allreducer is not None:
+    allreduce_fn = functools.partial(
+        gradient_allreducer, bytes_per_pack=allreduce_bytes_per_pack)
+  else:
+    allreduce_fn = None
   if isinstance(optimizer,
                 tf_keras.mixed_precision.LossScaleOptimizer):
     # FP16 GPU code path
@@ -125,13 +402,25 @@ def minimize_using_explicit_allreduce(tape,
     grads_and_vars = zip(scaled_grads, trainable_variables)
     if pre_allreduce_callbacks:
       grads_and_vars = _run_callbacks(pre_allreduce_callbacks, grads_and_vars)
-    (allreduced_scaled_grads,
-     filtered_training_vars) = _filter_and_allreduce_gradients(
-         grads_and_vars,
-         allreduce_precision="float16",
-         bytes_per_pack=allreduce_bytes_per_pack)
-    allreduced_unscaled_grads = optimizer.get_unscaled_gradients(
-        allreduced_scaled_grads)
+    if allreduce_fn is not None and gradient_allreducer.compression == "topk":
+      # The top-k residuals are kept across steps, so they must not depend on
+      # the loss scale of a step.
+      grads, tvars = zip(*grads_and_vars)
+      (allreduced_unscaled_grads,
+       filtered_training_vars) = allreduce_fn(
+           zip(optimizer.get_unscaled_gradients(list(grads)), tvars))
+    else:
+      if allreduce_fn is not None:
+        (allreduced_scaled_grads,
+         filtered_training_vars) = allreduce_fn(grads_and_vars)
+      else:
+        (allreduced_scaled_grads,
+         filtered_training_vars) = _filter_and_allreduce_gradients(
+             grads_and_vars,
+             allreduce_precision="float16",
+             bytes_per_pack=allreduce_bytes_per_pack)
+      allreduced_unscaled_grads = optimizer.get_unscaled_gradients(
+          allreduced_scaled_grads)
     grads_and_vars = zip(allreduced_unscaled_grads, filtered_training_vars)
   else:
     # TPU or FP32 GPU code path
@@ -139,11 +428,15 @@ def minimize_using_explicit_allreduce(tape,
     grads_and_vars = zip(grads, trainable_variables)
     if pre_allreduce_callbacks:
       grads_and_vars = _run_callbacks(pre_allreduce_callbacks, grads_and_vars)
-    (allreduced_grads,
-     filtered_training_vars) = _filter_and_allreduce_gradients(
-         grads_and_vars,
-         allreduce_precision="float32",
-         bytes_per_pack=allreduce_bytes_per_pack)
+    if allreduce_fn is not None:
+      (allreduced_grads,
+       filtered_training_vars) = allreduce_fn(grads_and_vars)
+    else:
+      (allreduced_grads,
+       filtered_training_vars) = _filter_and_allreduce_gradients(
+           grads_and_vars,
+           allreduce_precision="float32",
+           bytes_per_pack=allreduce_bytes_per_pack)
     grads_and_vars = zip(allreduced_grads, filtered_training_vars)
   if post_allreduce_callbacks:
     grads_and_vars = _run_callbacks(post_allreduce_callbacks, grads_and_vars)
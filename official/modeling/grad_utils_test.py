@@ -14,12 +14,20 @@
 
 """Tests for grad_utils."""
 
+import json
+import multiprocessing
+import os
+
+from absl.testing import parameterized
+import numpy as np
+import portpicker
 import tensorflow as tf, tf_keras
+
 from official.modeling import grad_utils
 from official.modeling import performance
 
 
-class GradUtilsTest(tf.test.TestCase):
+class GradUtilsTest(tf.test.TestCase, parameterized.TestCase):
 
   def test_minimize(self):
 
@@ -64,6 +72,110 @@ class GradUtilsTest(tf.test.TestCase):
         pre_allreduce_callbacks=[_clip_by_global_norm],
         post_allreduce_callbacks=[_clip_by_global_norm])
 
+  def test_allreducer_buckets_in_reverse_order(self):
+    variables = [
+        tf.Variable(tf.zeros(shape), name='var_%d' % i)
+        for i, shape in enumerate([[4], [2, 2], [8], [1]])
+    ]
+    allreducer = grad_utils.GradientAllReducer(bucket_bytes=32)
+    allreducer.build(variables)
+    self.assertEqual(
+        [[v.name for v in bucket] for bucket in allreducer.buckets],
+        [['var_3:0'], ['var_2:0'], ['var_1:0', 'var_0:0']])
+
+  @parameterized.parameters(None, 'float16', 'bfloat16')
+  def test_minimize_with_allreducer(self, compression):
+    inputs = tf.constant([[1.0, 2.0], [3.0, 4.0]])
+    weights = []
+    for allreducer in (None,
+                       grad_utils.GradientAllReducer(
+                           bucket_bytes=8, compression=compression)):
+      model = tf_keras.layers.Dense(2, kernel_initializer='ones')
+      optimizer = tf_keras.optimizers.SGD(0.1)
+      with tf.GradientTape() as tape:
+        loss = tf.reduce_mean(model(inputs))
+      grad_utils.minimize_using_explicit_allreduce(
+          tape, optimizer, loss, model.trainable_variables,
+          gradient_allreducer=allreducer)
+      weights.append(model.get_weights())
+    self.assertAllClose(weights[0], weights[1])
+
+  def test_topk_error_feedback(self):
+    variables = [tf.Variable(tf.zeros([4])), tf.Variable(tf.zeros([2]))]
+    grads = [tf.constant([1.0, -5.0, 2.0, 0.5]), tf.constant([-3.0, 0.1])]
+    allreducer = grad_utils.GradientAllReducer(
+        compression='topk', topk_ratio=0.3, collect_timings=True)
+    allreducer.build(variables)
+
+    reduced_grads, _ = allreducer(zip(grads, variables))
+    self.assertAllClose(reduced_grads[0], [0.0, -5.0, 0.0, 0.0])
+    self.assertAllClose(reduced_grads[1], [-3.0, 0.0])
+    # The values that are not sent are added to the next gradients.
+    reduced_grads, _ = allreducer(zip(grads, variables))
+    self.assertAllClose(reduced_grads[0], [0.0, -5.0, 4.0, 0.0])
+    self.assertAllClose(reduced_grads[1], [0.0, 0.0])
+    self.assertEqual(list(allreducer.bucket_timings()), ['bucket_0'])
+    self.assertGreaterEqual(allreducer.bucket_timings()['bucket_0'], 0.0)
+
+  def test_topk_keeps_residual_on_overflow(self):
+    variables = [tf.Variable(tf.zeros([4])), tf.Variable(tf.zeros([2]))]
+    allreducer = grad_utils.GradientAllReducer(
+        compression='topk', topk_ratio=0.3)
+    allreducer.build(variables)
+    grads = [tf.constant([1.0, -5.0, 2.0, 0.5]), tf.constant([-3.0, 0.1])]
+    allreducer(zip(grads, variables))
+    residual = allreducer._residuals[0].numpy()
+
+    # The non-finite gradient is not among the largest values of its bucket.
+    overflow_grads = [tf.constant([1.0, -5.0, 2.0, np.nan]),
+                      tf.constant([-3.0, 0.1])]
+    reduced_grads, _ = allreducer(zip(overflow_grads, variables))
+    self.assertFalse(np.all(np.isfinite(reduced_grads[0])))
+    self.assertAllClose(allreducer._residuals[0], residual)
+
+    reduced_grads, _ = allreducer(zip(grads, variables))
+    self.assertAllClose(reduced_grads[0], [0.0, -5.0, 4.0, 0.0])
+
+  def test_minimize_with_topk_and_loss_scale(self):
+    performance.set_mixed_precision_policy(tf.float32)
+    inputs = tf.constant([[1.0, 2.0], [3.0, 4.0]])
+    model = tf_keras.layers.Dense(2, kernel_initializer='ones')
+    model.build((None, 2))
+    optimizer = performance.configure_optimizer(
+        tf_keras.optimizers.SGD(0.1), use_float16=True)
+    allreducer = grad_utils.GradientAllReducer(
+        compression='topk', topk_ratio=0.5)
+    allreducer.build(model.trainable_variables)
+
+    def train_step(scale):
+      with tf.GradientTape() as tape:
+        loss = tf.reduce_mean(model(inputs)) * scale
+      grad_utils.minimize_using_explicit_allreduce(
+          tape, optimizer, loss, model.trainable_variables,
+          gradient_allreducer=allreducer)
+
+    train_step(1.0)
+    # The residual holds the unsent unscaled gradients: the bias gradients
+    # [0.5, 0.5] and one of the kernel gradients 1.0.
+    self.assertAllClose(tf.reduce_sum(allreducer._residuals[0]), 2.0)
+    residual = allreducer._residuals[0].numpy()
+    weights = model.get_weights()
+    loss_scale = optimizer.loss_scale.numpy()
+
+    # The update of an overflow step is skipped, and so is the residual update.
+    train_step(np.inf)
+    self.assertLess(optimizer.loss_scale, loss_scale)
+    self.assertAllClose(allreducer._residuals[0], residual)
+    self.assertAllClose(model.get_weights(), weights)
+
+  def test_allreducer_requires_build(self):
+    variable = tf.Variable(tf.zeros([2]))
+    allreducer = grad_utils.GradientAllReducer(compression='topk')
+    with self.assertRaisesRegex(ValueError, 'must be built'):
+      allreducer([(tf.ones([2]), variable)])
+    with self.assertRaisesRegex(ValueError, 'Unsupported compression'):
+      grad_utils.GradientAllReducer(compression='int8')
+
   def test_set_mixed_precision_policy(self):
     performance.set_mixed_precision_policy(tf.float16)
     performance.set_mixed_precision_policy(tf.bfloat16)
@@ -73,5 +185,79 @@ class GradUtilsTest(tf.test.TestCase):
       performance.set_mixed_precision_policy(tf.int32)
 
 
+_COMPRESSIONS = (None, 'float16', 'bfloat16', 'topk')
+
+
+def _multi_worker_allreduce(task_index, cluster_spec, results):
+  """Allreduces gradients of every compression on one worker."""
+  os.environ['TF_CONFIG'] = json.dumps({
+      'cluster': cluster_spec,
+      'task': {'type': 'worker', 'index': task_index}
+  })
+  strategy = tf.distribute.MultiWorkerMirroredStrategy()
+  worker_results = {}
+  for compression in _COMPRESSIONS:
+    with strategy.scope():
+      variables = [tf.Variable(tf.zeros([3])), tf.Variable(tf.zeros([2, 2]))]
+      allreducer = grad_utils.GradientAllReducer(
+          bucket_bytes=12,
+          compression=compression,
+          topk_ratio=0.5,
+          collect_timings=True)
+      allreducer.build(variables)
+
+    @tf.function
+    def replica_fn(allreducer=allreducer, variables=variables):
+      grads = [
+          tf.fill([3], float(task_index + 1)),
+          tf.constant([[2.0, 0.0], [0.0, 0.0]])
+      ]
+      reduced_grads, _ = allreducer(zip(grads, variables))
+      return reduced_grads
+
+    reduced_grads = strategy.experimental_local_results(
+        strategy.run(replica_fn))[0]
+    worker_results[str(compression)] = (
+        [grad.numpy().tolist() for grad in reduced_grads],
+        len(allreducer.bucket_timings()))
+  results.put((task_index, worker_results))
+
+
+class GradientAllReducerMultiWorkerTest(tf.test.TestCase):
+
+  def test_multi_worker_cpu_allreduce(self):
+    cluster_spec = {
+        'worker': [
+            'localhost:%d' % portpicker.pick_unused_port() for _ in range(2)
+        ]
+    }
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target=_multi_worker_allreduce,
+            args=(task_index, cluster_spec, results))
+        for task_index in range(2)
+    ]
+    for worker in workers:
+      worker.start()
+    worker_results = dict(results.get(timeout=600) for _ in workers)
+    for worker in workers:
+      worker.join()
+
+    for compression in _COMPRESSIONS:
+      for task_index in range(2):
+        reduced_grads, num_timings = worker_results[task_index][str(
+            compression)]
+        self.assertLen(reduced_grads, 2)
+        self.assertEqual(num_timings, 2)
+        self.assertAllClose(reduced_grads[1], [[4.0, 0.0], [0.0, 0.0]])
+        if compression == 'topk':
+          # Every worker only sends 2 of its 3 equal values.
+          self.assertAllClose(np.sum(reduced_grads[0]), 6.0)
+        else:
+          self.assertAllClose(reduced_grads[0], [3.0, 3.0, 3.0])
+
+
 if __name__ == '__main__':
   tf.test.main()
@@ -19,6 +19,7 @@ import dataclasses
 import functools
 import inspect
 import typing
+import weakref
 from typing import Any, List, Mapping, Optional, Type, Union
 
 from absl import logging
@@ -30,6 +31,12 @@ from official.modeling.hyperparams import params_dict
 
 _BOUND = set()
 
+# The compiled field schemas of the Config classes. Resolving the type hints of
+# a class is slow, so the annotations and the subconfig types of the fields of
+# every class are only resolved once.
+_ANNOTATIONS = weakref.WeakKeyDictionary()
+_SUBCONFIG_TYPES = weakref.WeakKeyDictionary()
+
 
 def bind(config_cls):
   """Bind a class to config cls."""
@@ -102,12 +109,15 @@ class Config(params_dict.ParamsDict):
     Note: this is similar to dataclasses.__annotations__ except it also includes
       annotations from its parent classes.
     """
-    all_annotations = typing.get_type_hints(cls)
-    # Removes Config class annotation from the value, e.g., default_params,
-    # restrictions, etc.
-    for k in Config.__annotations__:
-      del all_annotations[k]
-    return all_annotations
+    annotations = _ANNOTATIONS.get(cls)
+    if annotations is None:
+      annotations = typing.get_type_hints(cls)
+      # Removes Config class annotation from the value, e.g., default_params,
+      # restrictions, etc.
+      for k in Config.__annotations__:
+        del annotations[k]
+      _ANNOTATIONS[cls] = annotations
+    return dict(annotations)
 
   @classmethod
   def _isvalidsequence(cls, v):
@@ -186,38 +196,39 @@ class Config(params_dict.ParamsDict):
       2) returns the element type if the annotation of `k` is List[SubType]
          or Tuple[SubType].
     """
-    if not subconfig_type:
-      subconfig_type = Config
+    field_types = _SUBCONFIG_TYPES.get(cls)
+    if field_types is None:
+      field_types = _SUBCONFIG_TYPES.setdefault(cls, {})
+    if k not in field_types:
+      field_types[k] = cls._resolve_subconfig_type(k)
+    return field_types[k] or subconfig_type or Config
 
+  @classmethod
+  def _resolve_subconfig_type(
+      cls, k) -> Optional[Type[params_dict.ParamsDict]]:
+    """Returns the subconfig type of the annotation of `k`, or None."""
     annotations = cls._get_annotations()
-    if k in annotations:
-      # Directly Config subtype.
-      type_annotation = annotations[k]
-      i = 0
-      # Loop for striping the Optional annotation.
-      traverse_in = True
-      while traverse_in:
-        i += 1
-        if (isinstance(type_annotation, type) and
-            issubclass(type_annotation, Config)):
-          subconfig_type = type_annotation
-          break
-        else:
-          # Check if the field is a sequence of subtypes.
-          field_type = typing.get_origin(type_annotation)
-          if (isinstance(field_type, type) and
-              issubclass(field_type, cls.SEQUENCE_TYPES)):
-            element_type = typing.get_args(type_annotation)[0]
-            subconfig_type = (
-                element_type if issubclass(element_type, params_dict.ParamsDict)
-                else subconfig_type)
-            break
-          elif _is_optional(type_annotation):
-            # Strip the `Optional` annotation and process the subtype.
-            type_annotation = typing.get_args(type_annotation)[0]
-            continue
-        traverse_in = False
-    return subconfig_type
+    if k not in annotations:
+      return None
+    # Directly Config subtype.
+    type_annotation = annotations[k]
+    # Loop for striping the Optional annotation.
+    while True:
+      if (isinstance(type_annotation, type) and
+          issubclass(type_annotation, Config)):
+        return type_annotation
+      # Check if the field is a sequence of subtypes.
+      field_type = typing.get_origin(type_annotation)
+      if (isinstance(field_type, type) and
+          issubclass(field_type, cls.SEQUENCE_TYPES)):
+        element_type = typing.get_args(type_annotation)[0]
+        return (element_type
+                if issubclass(element_type, params_dict.ParamsDict) else None)
+      elif _is_optional(type_annotation):
+        # Strip the `Optional` annotation and process the subtype.
+        type_annotation = typing.get_args(type_annotation)[0]
+        continue
+      return None
 
   def _set(self, k, v):
     """Overrides same method in ParamsDict.
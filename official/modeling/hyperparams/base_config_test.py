@@ -377,6 +377,20 @@ class BaseConfigTest(parameterized.TestCase, tf.test.TestCase):
     ):
       DumpConfig3().override({'restrictions': None})
 
+  def test_subconfig_type_of_overridden_annotation(self):
+
+    @dataclasses.dataclass
+    class ParentConfig(base_config.Config):
+      e: DumpConfig1 = dataclasses.field(default_factory=DumpConfig1)
+
+    @dataclasses.dataclass
+    class ChildConfig(ParentConfig):
+      e: DumpConfig2 = dataclasses.field(default_factory=DumpConfig2)
+
+    self.assertIsInstance(ParentConfig({'e': {'a': 2}}).e, DumpConfig1)
+    self.assertIsInstance(ChildConfig({'e': {'c': 3}}).e, DumpConfig2)
+    self.assertIsInstance(ParentConfig({'e': {'a': 2}}).e, DumpConfig1)
+
   def test_with_restrictions(self):
     restrictions = ['e.a<c']
     config = DumpConfig2(restrictions=restrictions)
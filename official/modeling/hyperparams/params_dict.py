@@ -16,6 +16,7 @@
 
 import collections
 import copy
+import functools
 import re
 
 import six
@@ -452,6 +453,27 @@ def nested_csv_str_to_json_str(csv_str):
   return '{' + ', '.join(formatted_entries) + '}'
 
 
+@functools.lru_cache(maxsize=256)
+def _parse_override_string(string):
+  """Parses a CSV, JSON or YAML override string, with caching.
+
+  Sweeps and parsers often apply the same override strings to many configs, so
+  the parsed values are cached. Strings that do not parse to a dict are paths
+  to YAML files, which are read by the caller every time.
+
+  Args:
+    string: a CSV, JSON or YAML string, or a path to a YAML file.
+
+  Returns:
+    The parsed value. It must not be modified.
+  """
+  try:
+    string = nested_csv_str_to_json_str(string)
+  except ValueError:
+    pass
+  return yaml.load(string, Loader=_LOADER)
+
+
 def override_params_dict(params, dict_or_string_or_yaml_file, is_strict):
   """Override a given ParamsDict using a dict, JSON/YAML/CSV string or YAML file.
 
@@ -481,14 +503,10 @@ def override_params_dict(params, dict_or_string_or_yaml_file, is_strict):
   if isinstance(dict_or_string_or_yaml_file, dict):
     params.override(dict_or_string_or_yaml_file, is_strict)
   elif isinstance(dict_or_string_or_yaml_file, six.string_types):
-    try:
-      dict_or_string_or_yaml_file = (
-          nested_csv_str_to_json_str(dict_or_string_or_yaml_file))
-    except ValueError:
-      pass
-    params_dict = yaml.load(dict_or_string_or_yaml_file, Loader=_LOADER)
+    params_dict = _parse_override_string(dict_or_string_or_yaml_file)
     if isinstance(params_dict, dict):
-      params.override(params_dict, is_strict)
+      # The parsed dict is cached, so it is copied before it can be modified.
+      params.override(copy.deepcopy(params_dict), is_strict)
     else:
       with tf.io.gfile.GFile(dict_or_string_or_yaml_file) as f:
         params.override(yaml.load(f, Loader=_LOADER), is_strict)
@@ -335,6 +335,18 @@ class ParamsDictIOTest(tf.test.TestCase):
     self.assertEqual(1e3, params.e)
     self.assertEqual(-1.5e-3, params.a)
 
+  def test_override_params_dict_using_same_string_twice(self):
+    override_csv_string = 'b.b2=[3,4]'
+    params1 = params_dict.override_params_dict(
+        params_dict.ParamsDict({'b': {'b2': [2, 3]}}), override_csv_string,
+        is_strict=True)
+    params1.b.b2.append(5)
+    params2 = params_dict.override_params_dict(
+        params_dict.ParamsDict({'b': {'b2': [2, 3]}}), override_csv_string,
+        is_strict=True)
+    self.assertEqual([3, 4, 5], params1.b.b2)
+    self.assertEqual([3, 4], params2.b.b2)
+
   def test_override_params_dict_using_yaml_file(self):
     params = params_dict.ParamsDict({
         'a': 1,
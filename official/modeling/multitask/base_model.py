@@ -40,6 +40,54 @@ class MultiTaskBaseModel(tf.Module):
     """Fetch a map of task name (string) to task model (tf_keras.Model)."""
     return self._sub_tasks
 
+  def encode(self, features, training=None):
+    """Optional function that runs the encoder shared by all sub-tasks.
+
+    It is only needed by fused train steps, which run the shared encoder once
+    on the concatenated features of all tasks.
+
+    Args:
+      features: the features of all tasks, concatenated along the batch
+        dimension. The other dimensions are zero-padded to the largest size
+        across the tasks.
+      training: whether the model is being trained.
+
+    Returns:
+      A nested structure of tensors whose first dimension is the batch.
+    """
+    raise NotImplementedError("encode() is not implemented.")
+
+  def decode(self, task_name, encoder_outputs, training=None):
+    """Optional function that runs the head of a sub-task.
+
+    Args:
+      task_name: the name of the sub-task.
+      encoder_outputs: the outputs of `encode` for the examples of the task.
+      training: whether the model is being trained.
+
+    Returns:
+      The outputs of the sub-task, as passed to its `build_losses`.
+    """
+    raise NotImplementedError("decode() is not implemented.")
+
+  def regularization_losses(self):
+    """Returns the regularization losses of all sub-tasks.
+
+    These are the `losses` of the sub-task models, i.e. their weight
+    regularization losses, and the activity regularization and `add_loss()`
+    losses of the latest calls of their layers, e.g. by `encode` and `decode`.
+    The losses of the layers shared by several sub-tasks, e.g. a shared
+    encoder, are only included once.
+    """
+    # A layer tracking all sub-task models visits every shared layer once when
+    # collecting the losses.
+    sub_task_models = tf_keras.layers.Layer()
+    sub_task_models.models = [
+        task_model for task_model in self._sub_tasks.values()
+        if isinstance(task_model, tf_keras.layers.Layer)
+    ]
+    return sub_task_models.losses
+
   def initialize(self):
     """Optional function that loads a pre-train checkpoint."""
     return
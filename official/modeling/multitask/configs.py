@@ -74,6 +74,12 @@ class MultiTaskTrainerConfig(cfg.TrainerConfig):
   task_sampler: TaskSamplingConfig = dataclasses.field(
       default_factory=lambda: TaskSamplingConfig(type="proportional")
   )
+  # Whether the interleaving trainer trains all tasks in every step on a mixed
+  # batch, with per-task sizes proportional to the task sampling distribution.
+  fuse_task_steps: bool = False
+  # The global size of the mixed batch. Defaults to the sum of the global batch
+  # sizes of the train data of the tasks.
+  fused_global_batch_size: Optional[int] = None
 
 
 @dataclasses.dataclass
@@ -13,8 +13,9 @@
 # limitations under the License.
 
 """Multitask trainer that interleaves each task's train step."""
-from typing import Union
+from typing import Dict, List, Optional, Sequence, Union
 import gin
+import numpy as np
 import orbit
 import tensorflow as tf, tf_keras
 from official.modeling.multitask import base_model
@@ -23,9 +24,93 @@ from official.modeling.multitask import multitask
 from official.modeling.multitask import task_sampler as sampler
 
 
+def _allocate_batch_sizes(probabilities: Sequence[float],
+                          batch_size: int) -> List[int]:
+  """Splits `batch_size` proportionally to `probabilities`.
+
+  The remainder of the rounded down sizes is given to the largest fractional
+  parts, so the sizes sum up to `batch_size`.
+
+  Args:
+    probabilities: the sampling probabilities of the tasks.
+    batch_size: the batch size to split.
+
+  Returns:
+    The batch size of every task.
+  """
+  exact_sizes = np.asarray(probabilities, dtype=np.float64) * batch_size
+  sizes = np.floor(exact_sizes).astype(np.int64)
+  remainder = batch_size - int(sizes.sum())
+  for i in np.argsort(sizes - exact_sizes, kind="stable")[:remainder]:
+    sizes[i] += 1
+  return [int(size) for size in sizes]
+
+
+def _concat_padded(features_list):
+  """Concatenates features along the batch dimension with zero padding.
+
+  Every tensor is zero-padded in its non-batch dimensions to the largest size
+  of the corresponding tensors of the other features.
+
+  Args:
+    features_list: nested structures of tensors with the same structure, ranks
+      and dtypes.
+
+  Returns:
+    The concatenated features.
+  """
+
+  def concat(*tensors):
+    shapes = [tensor.shape[1:] for tensor in tensors]
+    if all(shape.is_fully_defined() for shape in shapes):
+      target_shape = np.max([shape.as_list() for shape in shapes], axis=0)
+      paddings = [[[0, 0]] + [[0, int(target - size)]
+                              for target, size in zip(target_shape, shape)]
+                  for shape in shapes]
+    else:
+      shapes = [tf.shape(tensor)[1:] for tensor in tensors]
+      target_shape = tf.reduce_max(tf.stack(shapes), axis=0)
+      paddings = [
+          tf.pad(tf.stack([tf.zeros_like(shape), target_shape - shape],
+                          axis=1), [[1, 0], [0, 0]]) for shape in shapes
+      ]
+    return tf.concat(
+        [tf.pad(tensor, padding) for tensor, padding in zip(tensors, paddings)],
+        axis=0)
+
+  return tf.nest.map_structure(concat, *features_list)
+
+
+def _batch_size(features):
+  """Returns the static batch size of `features`, or the dynamic one."""
+  tensor = tf.nest.flatten(features)[0]
+  return tensor.shape[0] or tf.shape(tensor)[0]
+
+
+def _split_inputs(inputs):
+  """Returns the features and the labels of a task's inputs."""
+  if isinstance(inputs, tuple) and len(inputs) == 2:
+    return inputs
+  elif isinstance(inputs, dict):
+    return inputs, inputs
+  raise ValueError("The iterator output is neither a tuple nor a "
+                   "dictionary. It is not implemented to support "
+                   "such outputs.")
+
+
 @gin.configurable
 class MultiTaskInterleavingTrainer(base_trainer.MultiTaskBaseTrainer):
-  """MultiTask trainer that interleaves task update."""
+  """MultiTask trainer that interleaves task update.
+
+  By default, every step trains one task sampled from `task_sampler`. With
+  `fuse_task_steps`, every step instead trains all tasks on a mixed batch: the
+  batch of every task has a static size proportional to its sampling
+  probability, the shared encoder of the `base_model.MultiTaskBaseModel` runs
+  once on the concatenated batches, and the head of every task runs on the
+  encoder outputs of its examples. The losses of the tasks are weighted by
+  their share of the mixed batch, so the gradient is the one of the mean loss
+  over the mixed batch.
+  """
 
   def __init__(self,
                multi_task: multitask.MultiTask,
@@ -35,13 +120,52 @@ class MultiTaskInterleavingTrainer(base_trainer.MultiTaskBaseTrainer):
                                 tf_keras.optimizers.experimental.Optimizer,
                                 tf_keras.optimizers.legacy.Optimizer],
                task_sampler: sampler.TaskSampler,
-               trainer_options=None):
+               trainer_options=None,
+               fuse_task_steps: bool = False,
+               fused_global_batch_size: Optional[int] = None):
+    """Initializes the trainer.
+
+    Args:
+      multi_task: the tasks to train.
+      multi_task_model: the model of the tasks.
+      optimizer: the optimizer of the model.
+      task_sampler: the sampler of the task of every step. With
+        `fuse_task_steps`, it sets the share of every task in the mixed batch,
+        which is computed once from the distribution at the initial step.
+      trainer_options: the options of the orbit trainer.
+      fuse_task_steps: whether every step trains all tasks on a mixed batch.
+        `multi_task_model` needs to be a `base_model.MultiTaskBaseModel` that
+        implements `encode` and `decode`, and the features of all tasks need
+        to have the same structure.
+      fused_global_batch_size: the global size of the mixed batch. Defaults to
+        the sum of the global batch sizes of the train data of the tasks.
+    """
+    self._task_sampler = task_sampler
+    self._fused_batch_sizes = None
+    train_datasets = None
+    if fuse_task_steps:
+      if not isinstance(multi_task_model, base_model.MultiTaskBaseModel):
+        raise ValueError("Fused task steps need a MultiTaskBaseModel, found "
+                         f"{type(multi_task_model)}.")
+      for name, task_model in multi_task_model.sub_tasks.items():
+        if getattr(task_model, "compiled_loss", None):
+          raise ValueError("Fused task steps do not support compiled losses, "
+                           f"found one in the model of the task {name}.")
+      self._fused_batch_sizes = self._get_fused_batch_sizes(
+          multi_task, task_sampler, fused_global_batch_size)
+      strategy = tf.distribute.get_strategy()
+      train_datasets = {}
+      for name, task in multi_task.tasks.items():
+        data_config = task.task_config.train_data.replace(
+            global_batch_size=self._fused_batch_sizes[name])
+        train_datasets[name] = orbit.utils.make_distributed_dataset(
+            strategy, task.build_inputs, data_config)
     super().__init__(
         multi_task=multi_task,
         multi_task_model=multi_task_model,
         optimizer=optimizer,
-        trainer_options=trainer_options)
-    self._task_sampler = task_sampler
+        trainer_options=trainer_options,
+        train_datasets=train_datasets)
 
     # Build per task train step.
     def _get_task_step(task_name, task):
@@ -78,6 +202,39 @@ class MultiTaskInterleavingTrainer(base_trainer.MultiTaskBaseTrainer):
       multi_task_model.build()
       optimizer.build(multi_task_model.trainable_variables)
 
+  @staticmethod
+  def _get_fused_batch_sizes(
+      multi_task: multitask.MultiTask, task_sampler: sampler.TaskSampler,
+      global_batch_size: Optional[int]) -> Dict[str, int]:
+    """Returns the global batch size of every task in the mixed batch."""
+    if global_batch_size is None:
+      global_batch_size = sum(task.task_config.train_data.global_batch_size
+                              for task in multi_task.tasks.values())
+    num_replicas = tf.distribute.get_strategy().num_replicas_in_sync
+    if global_batch_size % num_replicas:
+      raise ValueError(
+          f"The fused global batch size {global_batch_size} is not divisible "
+          f"by the number of replicas {num_replicas}.")
+    cumulative_distribution = task_sampler.task_cumulative_distribution(
+        tf.constant(0, tf.int64)).numpy()
+    probabilities = np.diff(cumulative_distribution, prepend=0.0)
+    # Every replica gets the same share of every task.
+    sizes = _allocate_batch_sizes(probabilities,
+                                  global_batch_size // num_replicas)
+    batch_sizes = {}
+    for name, size in zip(multi_task.tasks, sizes):
+      if not size:
+        raise ValueError(
+            f"The task {name} has no example in the fused batch of "
+            f"{global_batch_size} examples. Increase the batch size.")
+      batch_sizes[name] = size * num_replicas
+    return batch_sizes
+
+  @property
+  def fused_batch_sizes(self) -> Optional[Dict[str, int]]:
+    """The global batch size of every task in a fused step, if fused."""
+    return self._fused_batch_sizes
+
   def task_step_counter(self, name):
     return self._task_step_counters[name]
 
@@ -90,7 +247,67 @@ class MultiTaskInterleavingTrainer(base_trainer.MultiTaskBaseTrainer):
 
     return _step_fn
 
+  def _fused_train_step(self, task_inputs):
+    """Runs one training step of all tasks on a mixed batch."""
+    names = list(self.multi_task.tasks)
+    features, labels = {}, {}
+    for name in names:
+      features[name], labels[name] = _split_inputs(task_inputs[name])
+    total_batch_size = sum(self._fused_batch_sizes.values())
+    with tf.GradientTape() as tape:
+      encoder_outputs = self.multi_task_model.encode(
+          _concat_padded([features[name] for name in names]), training=True)
+      split_outputs = [
+          tf.split(x, [_batch_size(features[name]) for name in names])
+          for x in tf.nest.flatten(encoder_outputs)
+      ]
+      total_loss = 0.0
+      for i, name in enumerate(names):
+        task = self.multi_task.tasks[name]
+        outputs = self.multi_task_model.decode(
+            name,
+            tf.nest.pack_sequence_as(encoder_outputs,
+                                     [x[i] for x in split_outputs]),
+            training=True)
+        task_loss = task.build_losses(labels[name], outputs)
+        total_loss += (self._fused_batch_sizes[name] / total_batch_size *
+                       task_loss)
+        self.training_losses[name].update_state(task_loss)
+        task.process_metrics(self.training_metrics[name], labels[name],
+                             outputs)
+      # The sub-task models are not called, so their regularization losses,
+      # including those of the `encode` and `decode` calls, are added once for
+      # the shared layers.
+      regularization_losses = self.multi_task_model.regularization_losses()
+      if regularization_losses:
+        total_loss += tf.add_n(regularization_losses)
+      # Scales loss as the default gradients allreduce performs sum inside
+      # the optimizer.
+      scaled_loss = total_loss / self.strategy.num_replicas_in_sync
+
+      # For mixed precision, when a LossScaleOptimizer is used, the loss is
+      # scaled to avoid numeric underflow.
+      if isinstance(self.optimizer,
+                    tf_keras.mixed_precision.LossScaleOptimizer):
+        scaled_loss = self.optimizer.get_scaled_loss(scaled_loss)
+    tvars = self.multi_task_model.trainable_variables
+    grads = tape.gradient(scaled_loss, tvars)
+    if isinstance(self.optimizer,
+                  tf_keras.mixed_precision.LossScaleOptimizer):
+      grads = self.optimizer.get_unscaled_gradients(grads)
+    self.optimizer.apply_gradients(list(zip(grads, tvars)))
+    self.training_losses["total_loss"].update_state(total_loss)
+    self.global_step.assign_add(1)
+    for name in names:
+      self.task_step_counter(name).assign_add(1)
+
   def train_step(self, iterator_map):
+    if self._fused_batch_sizes:
+      self._strategy.run(
+          self._fused_train_step,
+          args=(tf.nest.map_structure(next, iterator_map),))
+      return
+
     # Sample one task to train according to a multinomial distribution
     rn = tf.random.stateless_uniform(shape=[], seed=(0, self.global_step))
     cumulative_sample_distribution = self._task_sampler.task_cumulative_distribution(
@@ -112,7 +329,7 @@ class MultiTaskInterleavingTrainer(base_trainer.MultiTaskBaseTrainer):
     result = super().train_loop_end()
     # Interleaving training does not have a good semantic for `total_loss`. In
     # fact, it is always zero. To avoid confusion, we filter the `total_loss`
-    # from the result logs.
-    if 'total_loss' in result:
+    # from the result logs. Fused steps report the loss of the mixed batch.
+    if 'total_loss' in result and not self._fused_batch_sizes:
       result.pop('total_loss')
     return result
@@ -18,6 +18,7 @@ import tensorflow as tf, tf_keras
 
 from tensorflow.python.distribute import combinations
 from tensorflow.python.distribute import strategy_combinations
+from official.modeling.multitask import base_model
 from official.modeling.multitask import configs
 from official.modeling.multitask import interleaving_trainer
 from official.modeling.multitask import multitask
@@ -36,6 +37,72 @@ def all_strategy_combinations():
   )
 
 
+def mock_sequence_data(length, global_batch_size):
+  """Mock dataset of sequences of `length` features."""
+
+  def _generate_data(_):
+    x = tf.ones(shape=(length,), dtype=tf.float32)
+    label = tf.zeros([1], dtype=tf.int32)
+    return {"x": x}, label
+
+  dataset = tf.data.Dataset.range(1).repeat().map(_generate_data)
+  return dataset.batch(global_batch_size, drop_remainder=True)
+
+
+class MockSequenceFooTask(test_utils.MockFooTask):
+
+  def build_inputs(self, params):
+    return mock_sequence_data(2, params.global_batch_size)
+
+
+class MockSequenceBarTask(test_utils.MockBarTask):
+
+  def build_inputs(self, params):
+    return mock_sequence_data(3, params.global_batch_size)
+
+
+class MockSubTaskModel(tf_keras.Model):
+  """A mock model of a task with an encoder and a head."""
+
+  def __init__(self, encoder, head, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self._encoder = encoder
+    self._head = head
+    self.inputs = {"x": tf_keras.Input(shape=(3,), dtype=tf.float32)}
+
+  def call(self, inputs):  # pytype: disable=signature-mismatch  # overriding-parameter-count-checks
+    return self._head(self._encoder(inputs["x"]))
+
+
+class MockFusedMultiTaskModel(base_model.MultiTaskBaseModel):
+  """A mock model with an encoder shared by the foo and bar tasks."""
+
+  def __init__(self, *args, kernel_regularizer=None,
+               activity_regularizer=None, **kwargs):
+    self._encoder = tf_keras.layers.Dense(
+        4, kernel_regularizer=kernel_regularizer,
+        activity_regularizer=activity_regularizer)
+    self._heads = {
+        "foo": tf_keras.layers.Dense(1),
+        "bar": tf_keras.layers.Dense(1)
+    }
+    self.encoded_batch_sizes = []
+    super().__init__(*args, **kwargs)
+
+  def _instantiate_sub_tasks(self):
+    return {
+        name: MockSubTaskModel(self._encoder, head)
+        for name, head in self._heads.items()
+    }
+
+  def encode(self, features, training=None):
+    self.encoded_batch_sizes.append(features["x"].shape[0])
+    return self._encoder(features["x"])
+
+  def decode(self, task_name, encoder_outputs, training=None):
+    return self._heads[task_name](encoder_outputs)
+
+
 class InterleavingTrainerTest(tf.test.TestCase, parameterized.TestCase):
 
   @combinations.generate(all_strategy_combinations())
@@ -97,6 +164,104 @@ class InterleavingTrainerTest(tf.test.TestCase, parameterized.TestCase):
     foo_sampled_step = test_trainer.task_step_counter("foo").numpy()
     self.assertEqual(bar_sampled_step + foo_sampled_step, num_step)
 
+  @combinations.generate(all_strategy_combinations())
+  def test_fused_task_steps(self, distribution):
+    with distribution.scope():
+      tasks = [
+          MockSequenceFooTask(params=test_utils.FooConfig(), name="foo"),
+          MockSequenceBarTask(params=test_utils.BarConfig(), name="bar")
+      ]
+      test_multitask = multitask.MultiTask(
+          tasks=tasks, task_weights={"foo": 3.0, "bar": 1.0})
+      test_optimizer = tf_keras.optimizers.SGD(0.1)
+      model = MockFusedMultiTaskModel()
+      sampler = task_sampler.ProportionalTaskSampler(
+          task_weights=test_multitask.task_weights)
+      test_trainer = interleaving_trainer.MultiTaskInterleavingTrainer(
+          multi_task=test_multitask,
+          multi_task_model=model,
+          optimizer=test_optimizer,
+          task_sampler=sampler,
+          fuse_task_steps=True,
+          fused_global_batch_size=8)
+      self.assertEqual(test_trainer.fused_batch_sizes, {"foo": 6, "bar": 2})
+      results = test_trainer.train(tf.convert_to_tensor(5, dtype=tf.int32))
+    self.assertContainsSubset(["training_loss", "foo_acc"],
+                              results["foo"].keys())
+    self.assertContainsSubset(["training_loss", "bar_acc"],
+                              results["bar"].keys())
+    self.assertIn("total_loss", results)
+    self.assertEqual(test_trainer.global_step.numpy(), 5)
+    self.assertEqual(test_trainer.task_step_counter("foo").numpy(), 5)
+    self.assertEqual(test_trainer.task_step_counter("bar").numpy(), 5)
+    # The shared encoder runs once per step on the mixed batch of a replica.
+    self.assertEqual(model.encoded_batch_sizes[-1],
+                     8 // distribution.num_replicas_in_sync)
+
+  def test_fused_task_steps_with_regularization_and_loss_scale(self):
+    tasks = [
+        MockSequenceFooTask(params=test_utils.FooConfig(), name="foo"),
+        MockSequenceBarTask(params=test_utils.BarConfig(), name="bar")
+    ]
+    test_multitask = multitask.MultiTask(
+        tasks=tasks, task_weights={"foo": 3.0, "bar": 1.0})
+    test_optimizer = tf_keras.mixed_precision.LossScaleOptimizer(
+        tf_keras.optimizers.SGD(0.1))
+    model = MockFusedMultiTaskModel(
+        kernel_regularizer=tf_keras.regularizers.l2(1.0))
+    sampler = task_sampler.ProportionalTaskSampler(
+        task_weights=test_multitask.task_weights)
+    test_trainer = interleaving_trainer.MultiTaskInterleavingTrainer(
+        multi_task=test_multitask,
+        multi_task_model=model,
+        optimizer=test_optimizer,
+        task_sampler=sampler,
+        fuse_task_steps=True,
+        fused_global_batch_size=8)
+    # The encoder is shared by both tasks, but is only regularized once.
+    regularization_losses = model.regularization_losses()
+    self.assertLen(regularization_losses, 1)
+    regularization_loss = regularization_losses[0].numpy()
+    results = test_trainer.train(tf.convert_to_tensor(1, dtype=tf.int32))
+    self.assertAllClose(
+        results["total_loss"]["training_loss"],
+        0.75 * results["foo"]["training_loss"] +
+        0.25 * results["bar"]["training_loss"] + regularization_loss)
+    self.assertEqual(test_trainer.global_step.numpy(), 1)
+
+  def test_regularization_losses_include_activity_losses(self):
+    model = MockFusedMultiTaskModel(
+        kernel_regularizer=tf_keras.regularizers.l2(1.0),
+        activity_regularizer=tf_keras.regularizers.l2(0.5))
+    encoder_outputs = model.encode({"x": tf.ones((2, 3))})
+    for name in ("foo", "bar"):
+      model.decode(name, encoder_outputs)
+    regularization_losses = model.regularization_losses()
+    # The kernel and activity losses of the shared encoder are added once.
+    self.assertLen(regularization_losses, 2)
+    self.assertAllClose(
+        tf.add_n(regularization_losses),
+        tf.reduce_sum(tf.square(model._encoder.kernel)) +
+        0.5 * tf.reduce_sum(tf.square(encoder_outputs)) / 2)
+
+  def test_fused_task_steps_without_enough_examples(self):
+    tasks = [
+        MockSequenceFooTask(params=test_utils.FooConfig(), name="foo"),
+        MockSequenceBarTask(params=test_utils.BarConfig(), name="bar")
+    ]
+    test_multitask = multitask.MultiTask(
+        tasks=tasks, task_weights={"foo": 9.0, "bar": 1.0})
+    sampler = task_sampler.ProportionalTaskSampler(
+        task_weights=test_multitask.task_weights)
+    with self.assertRaisesRegex(ValueError, "The task bar has no example"):
+      interleaving_trainer.MultiTaskInterleavingTrainer(
+          multi_task=test_multitask,
+          multi_task_model=MockFusedMultiTaskModel(),
+          optimizer=tf_keras.optimizers.SGD(0.1),
+          task_sampler=sampler,
+          fuse_task_steps=True,
+          fused_global_batch_size=4)
+
 
 if __name__ == "__main__":
   tf.test.main()
@@ -83,7 +83,11 @@ def run_experiment(
     if params.trainer.trainer_type == 'interleaving':
       sampler = task_sampler.get_task_sampler(params.trainer.task_sampler,
                                               task.task_weights)
-      kwargs.update(dict(task_sampler=sampler))
+      kwargs.update(
+          dict(
+              task_sampler=sampler,
+              fuse_task_steps=params.trainer.fuse_task_steps,
+              fused_global_batch_size=params.trainer.fused_global_batch_size))
     if trainer is None:
       trainer = TRAINERS[params.trainer.trainer_type](
           **kwargs) if is_training else None
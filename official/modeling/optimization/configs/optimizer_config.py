@@ -256,12 +256,22 @@ class EMAConfig(BaseOptimizerConfig):
     average_decay: 'float', average decay value.
     start_step: 'int', start step to apply moving average.
     dynamic_decay: 'bool', whether to apply dynamic decay or not.
+    update_interval: 'int', number of optimizer updates between updates of the
+      moving averages, which then use the decay `average_decay**k`.
+    average_dtype: 'str', optional reduced precision dtype of the moving
+      averages on the devices, e.g. 'bfloat16'. The updates are stochastically
+      rounded to this dtype.
+    offload_to_host: 'bool', whether to keep the moving averages in host memory
+      and update them at the end of the train loops.
   """
   name: str = "ExponentialMovingAverage"
   trainable_weights_only: bool = True
   average_decay: float = 0.99
   start_step: int = 0
   dynamic_decay: bool = True
+  update_interval: int = 1
+  average_dtype: Optional[str] = None
+  offload_to_host: bool = False
 
 
 @dataclasses.dataclass
@@ -16,10 +16,45 @@
 
 from typing import List, Optional
 
+import numpy as np
 import tensorflow as tf, tf_keras
 
 # pylint: disable=protected-access
 
+# The number of explicit mantissa bits of the reduced precision dtypes whose
+# averages are stochastically rounded.
+_MANTISSA_BITS = {tf.bfloat16: 7, tf.float16: 10}
+
+
+def stochastic_round(value: tf.Tensor, dtype: tf.DType) -> tf.Tensor:
+  """Casts a float32 `value` to `dtype` with stochastic rounding.
+
+  The value is rounded up in magnitude with a probability proportional to its
+  distance to the lower representable value, so that the rounding is unbiased
+  and small updates of a reduced precision value are not always lost.
+
+  Args:
+    value: A float32 tensor.
+    dtype: The dtype to cast to. Dtypes other than bfloat16 and float16 are
+      cast with the default rounding to nearest.
+
+  Returns:
+    The rounded tensor of dtype `dtype`.
+  """
+  dtype = tf.as_dtype(dtype)
+  if value.dtype != tf.float32 or dtype not in _MANTISSA_BITS:
+    return tf.cast(value, dtype)
+  num_dropped_bits = 23 - _MANTISSA_BITS[dtype]
+  # Adding noise to the dropped mantissa bits of the float32 representation and
+  # truncating them rounds the magnitude up with the probability of the
+  # remainder. The truncated value is representable in `dtype`, except for
+  # float16 values out of its normal range that are then rounded to nearest.
+  noise = tf.random.uniform(
+      tf.shape(value), maxval=2**num_dropped_bits, dtype=tf.int32)
+  bits = tf.bitwise.bitwise_and(
+      tf.bitcast(value, tf.int32) + noise, -2**num_dropped_bits)
+  return tf.cast(tf.bitcast(bits, tf.float32), dtype)
+
 
 def maybe_merge_call(fn, strategy, *args, **kwargs):
   """Maybe invoke `fn` via `merge_call` which may or may not be fulfilled.
@@ -48,6 +83,38 @@ def maybe_merge_call(fn, strategy, *args, **kwargs):
     return fn(strategy, *args, **kwargs)
 
 
+class _HostAverages(tf.__internal__.tracking.Trackable):
+  """Checkpointable moving averages that are kept in host memory."""
+
+  def __init__(self, averages: List[np.ndarray], step: int = 0):
+    self.averages = averages
+    # The optimizer step of the last update.
+    self.step = step
+
+  def _serialize_to_tensors(self):
+    tensors = {
+        'average_%d' % i: tf.constant(average)
+        for i, average in enumerate(self.averages)
+    }
+    tensors['step'] = tf.constant(self.step, tf.int64)
+    return tensors
+
+  def _restore_from_tensors(self, restored_tensors):
+    for i in range(len(self.averages)):
+      self.averages[i] = restored_tensors['average_%d' % i].numpy()
+    self.step = int(restored_tensors['step'].numpy())
+
+  def _copy_trackable_to_cpu(self, object_map):
+    # The averages are already in host memory, they are only copied so that
+    # async checkpointing is not affected by later updates.
+    copies = [np.copy(average) for average in self.averages]
+    if self in object_map:
+      object_map[self].averages = copies
+      object_map[self].step = self.step
+    else:
+      object_map[self] = _HostAverages(copies, self.step)
+
+
 class ExponentialMovingAverage(tf_keras.optimizers.legacy.Optimizer):
   """Optimizer that computes an exponential moving average of the variables.
 
@@ -71,6 +138,20 @@ class ExponentialMovingAverage(tf_keras.optimizers.legacy.Optimizer):
   # Test eval the model here
   opt.swap_weights()
   ```
+
+  By default, the averages are float32 copies of the weights on the same
+  devices, which doubles the accelerator memory of the weights. Two modes reduce
+  it:
+    * `average_dtype`: the averages are kept on the devices in a reduced
+      precision such as bfloat16, while the update is computed in float32 and
+      stochastically rounded, so that updates smaller than the precision of
+      the averages are not lost.
+    * `offload_to_host`: the averages are kept in host memory and updated by
+      `update_host_average`, which the trainer calls at the end of every train
+      loop, with the decay of all the steps since the previous update.
+  With `update_interval` k, the averages are only updated every k steps with
+  the decay `decay**k`, which is a good approximation if the weights change
+  slowly over k steps.
   """
 
   def __init__(self,
@@ -79,6 +160,9 @@ class ExponentialMovingAverage(tf_keras.optimizers.legacy.Optimizer):
                average_decay: float = 0.99,
                start_step: int = 0,
                dynamic_decay: bool = True,
+               update_interval: int = 1,
+               average_dtype: Optional[str] = None,
+               offload_to_host: bool = False,
                name: str = 'ExponentialMovingAverage',
                **kwargs):
     """Construct a new ExponentialMovingAverage optimizer.
@@ -96,20 +180,41 @@ class ExponentialMovingAverage(tf_keras.optimizers.legacy.Optimizer):
         of optimizer updates. Decay will start at 0.1 and gradually increase
         up to `average_decay` after each optimizer update. This behavior is
         similar to `tf.train.ExponentialMovingAverage` in TF 1.x.
+      update_interval: int. The number of optimizer updates between updates of
+        the moving averages. With `offload_to_host`, the averages are updated
+        at the end of the first train loop after this many updates.
+      average_dtype: Optional dtype of the moving averages on the devices, e.g.
+        'bfloat16'. Defaults to the dtype of the weights.
+      offload_to_host: bool. Whether to keep the moving averages in host memory
+        instead of on the devices.
       name: Optional name for the operations created when applying
         gradients. Defaults to "moving_average".
       **kwargs: keyword arguments. Allowed to be {`clipnorm`,
         `clipvalue`, `lr`, `decay`}.
     """
     super().__init__(name, **kwargs)
+    if update_interval < 1:
+      raise ValueError(
+          f'update_interval must be positive, got {update_interval}.')
+    if offload_to_host and average_dtype is not None:
+      raise ValueError(
+          'average_dtype is not supported with offload_to_host, the host '
+          'averages always have the dtypes of the weights.')
     self._average_decay = average_decay
     self._trainable_weights_only = trainable_weights_only
     self._start_step = tf.constant(start_step, tf.float32)
     self._dynamic_decay = dynamic_decay
+    self._update_interval = update_interval
+    self._average_dtype = average_dtype
+    self._offload_to_host = offload_to_host
     self._optimizer = optimizer
     self._track_trackable(self._optimizer, 'ema_base_optimizer')
     self._average_weights = None
     self._model_weights = None
+    self._host_averages = None
+    # Full precision weights of the model while the reduced precision or host
+    # averages are swapped in.
+    self._swapped_weights = None
 
   def shadow_copy(self, model: tf_keras.Model):
     """Creates shadow variables for the given model weights."""
@@ -118,6 +223,23 @@ class ExponentialMovingAverage(tf_keras.optimizers.legacy.Optimizer):
       self._model_weights = model.trainable_variables
     else:
       self._model_weights = model.variables
+    if self._offload_to_host:
+      # The averages start from the current weights, so that the model is
+      # not swapped with zeros before the first update.
+      self._host_averages = _HostAverages(
+          [np.array(var.numpy()) for var in self._model_weights])
+      self._track_trackable(self._host_averages, 'host_averages')
+      self._average_weights = self._host_averages.averages
+      return
+    if self._average_dtype is not None:
+      self._average_weights = [
+          self.add_weight(
+              'average_%d' % i,
+              shape=var.shape,
+              dtype=tf.as_dtype(self._average_dtype),
+              initializer='zeros') for i, var in enumerate(self._model_weights)
+      ]
+      return
     for var in self._model_weights:
       self.add_slot(var, 'average', initializer='zeros')
 
@@ -130,36 +252,111 @@ class ExponentialMovingAverage(tf_keras.optimizers.legacy.Optimizer):
     """Whether this optimizer has created shadow variables."""
     return self._model_weights is not None and self._average_weights is not None
 
+  @property
+  def offload_to_host(self) -> bool:
+    return self._offload_to_host
+
   def _create_slots(self, var_list):
     self._optimizer._create_slots(var_list=var_list)  # pylint: disable=protected-access
 
   def apply_gradients(self, grads_and_vars, name: Optional[str] = None):
     result = self._optimizer.apply_gradients(grads_and_vars, name)
-    maybe_merge_call(self.update_average, tf.distribute.get_strategy())
+    if not self._offload_to_host:
+      maybe_merge_call(self.update_average, tf.distribute.get_strategy())
     return result
 
-  @tf.function
-  def update_average(self, strategy):
-    # Compute current decay value.
-    step = tf.cast(self.iterations, tf.float32)
+  def _decay(self, step):
+    """Returns the decay of the update at `step`."""
     if step < self._start_step:
-      decay = tf.constant(0., tf.float32)
+      return tf.constant(0., tf.float32)
     elif self._dynamic_decay:
       decay = step - self._start_step
-      decay = tf.minimum(self._average_decay, (1. + decay) / (10. + decay))
+      return tf.minimum(self._average_decay, (1. + decay) / (10. + decay))
     else:
-      decay = self._average_decay
+      return tf.constant(self._average_decay, tf.float32)
+
+  @tf.function
+  def update_average(self, strategy):
+    # Corrects the decay for the skipped updates.
+    decay = self._decay(tf.cast(self.iterations, tf.float32))**(
+        self._update_interval)
 
     def _apply_moving(average, normal):
-      diff = average - normal
-      average.assign_sub(tf.cast(1.0 - decay, average.dtype) * diff)
+      if self._average_dtype is None:
+        average.assign_sub(tf.cast(1.0 - decay, average.dtype) *
+                           (average - normal))
+        return average
+      # Reduced precision averages are updated in float32 and stochastically
+      # rounded, as rounding to nearest drops the updates smaller than half
+      # of the precision, e.g. the averages stop short of constant weights.
+      full_precision_average = tf.cast(average, tf.float32)
+      average.assign(
+          stochastic_round(
+              full_precision_average - (1.0 - decay) *
+              (full_precision_average - tf.cast(normal, tf.float32)),
+              average.dtype))
       return average
 
-    # Update moving average with the latest value.
-    for average, normal in zip(self._average_weights, self._model_weights):
-      strategy.extended.update(
-          average, _apply_moving, args=(normal,), group=False
-      )
+    def _update():
+      # Update moving average with the latest value.
+      for average, normal in zip(self._average_weights, self._model_weights):
+        strategy.extended.update(
+            average, _apply_moving, args=(normal,), group=False
+        )
+
+    if self._update_interval == 1:
+      _update()
+    elif self.iterations % self._update_interval == 0:
+      _update()
+
+  def update_host_average(self, force: bool = False):
+    """Updates the host averages with the decay of all steps since the last.
+
+    This must be called in a cross-replica context outside of `tf.function`,
+    e.g. at the end of every train loop, and only copies the weights to host
+    memory every `update_interval` steps.
+
+    Args:
+      force: Whether to update the averages with all the steps since the last
+        update, even if there are fewer than `update_interval` of them.
+    """
+    if not self._offload_to_host:
+      raise ValueError('Host averages are only kept with offload_to_host.')
+    if self._swapped_weights is not None:
+      raise ValueError('The host averages cannot be updated while swapped.')
+    step = int(self.iterations.numpy())
+    last_step = self._host_averages.step
+    if step == last_step or (not force and
+                             step - last_step < self._update_interval):
+      return
+    # The product of the decays of every step since the last update.
+    steps = np.arange(last_step + 1, step + 1, dtype=np.float64)
+    start_step = float(self._start_step)
+    if self._dynamic_decay:
+      decays = np.minimum(self._average_decay, (1. + steps - start_step) /
+                          (10. + steps - start_step))
+    else:
+      decays = np.full_like(steps, self._average_decay)
+    decay = np.prod(np.where(steps < start_step, 0., decays))
+    self._host_averages.step = step
+    averages = self._host_averages.averages
+    for i, var in enumerate(self._model_weights):
+      averages[i] = decay * averages[i] + (1.0 - decay) * var.numpy()
+
+  def _swap_weights_with_full_precision_copy(self):
+    """Swaps the reduced precision or host averages into the model.
+
+    The model weights are kept in host memory in full precision while the
+    averages are swapped in, instead of being stored in the averages.
+    """
+    if self._swapped_weights is None:
+      self._swapped_weights = [var.numpy() for var in self._model_weights]
+      for var, average in zip(self._model_weights, self._average_weights):
+        var.assign(tf.cast(average, var.dtype))
+    else:
+      for var, weights in zip(self._model_weights, self._swapped_weights):
+        var.assign(weights)
+      self._swapped_weights = None
 
   def swap_weights(self):
     """Swap the average and moving weights.
@@ -169,7 +366,13 @@ class ExponentialMovingAverage(tf_keras.optimizers.legacy.Optimizer):
     keeping a copy of the original model weights. Swapping twice will return
     the original weights.
     """
-    if tf.distribute.in_cross_replica_context():
+    if tf.distribute.in_cross_replica_context() and (
+        self._offload_to_host or self._average_dtype is not None):
+      if self._offload_to_host and self._swapped_weights is None:
+        # Catches up with the steps since the last update of the averages.
+        self.update_host_average(force=True)
+      self._swap_weights_with_full_precision_copy()
+    elif tf.distribute.in_cross_replica_context():
       strategy = tf.distribute.get_strategy()
       strategy.run(self._swap_weights, args=())
     else:
@@ -223,6 +426,18 @@ class ExponentialMovingAverage(tf_keras.optimizers.legacy.Optimizer):
       assign_op: The op corresponding to the assignment operation of
         variables to their average.
     """
+    if self._offload_to_host and tf.executing_eagerly():
+      self.update_host_average(force=True)
+    if self._offload_to_host or self._average_dtype is not None:
+      averages = {
+          var.ref(): average
+          for var, average in zip(self._model_weights, self._average_weights)
+      }
+      return tf.group([
+          var.assign(tf.cast(averages[var.ref()], var.dtype))
+          for var in var_list
+          if var.trainable
+      ])
     assign_op = tf.group([
         var.assign(self.get_slot(var, 'average')) for var in var_list
         if var.trainable
@@ -283,6 +498,9 @@ class ExponentialMovingAverage(tf_keras.optimizers.legacy.Optimizer):
         'average_decay': self._average_decay,
         'start_step': self._start_step,
         'dynamic_decay': self._dynamic_decay,
+        'update_interval': self._update_interval,
+        'average_dtype': self._average_dtype,
+        'offload_to_host': self._offload_to_host,
     }
     base_config = super(ExponentialMovingAverage, self).get_config()
     return dict(list(base_config.items()) + list(config.items()))
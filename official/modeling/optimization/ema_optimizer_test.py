@@ -0,0 +1,162 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ema_optimizer."""
+
+import os
+
+import numpy as np
+import tensorflow as tf, tf_keras
+
+from official.modeling.optimization import ema_optimizer
+
+
+class EMAOptimizerTest(tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self._strategy = tf.distribute.OneDeviceStrategy('/cpu:0')
+
+  def _create(self, **kwargs):
+    with self._strategy.scope():
+      model = tf_keras.Sequential(
+          [tf_keras.layers.Dense(1, use_bias=False, kernel_initializer='ones')])
+      model.build((None, 1))
+      optimizer = ema_optimizer.ExponentialMovingAverage(
+          tf_keras.optimizers.legacy.SGD(0.1),
+          average_decay=0.5,
+          dynamic_decay=False,
+          **kwargs)
+      optimizer.shadow_copy(model)
+    return model, optimizer
+
+  def _train(self, model, optimizer, num_steps):
+
+    @tf.function
+    def train_step():
+      # The gradient of the kernel is always 1.
+      grads = [tf.ones_like(model.trainable_variables[0])]
+      optimizer.apply_gradients(zip(grads, model.trainable_variables))
+
+    for _ in range(num_steps):
+      self._strategy.run(train_step)
+
+  def _average_weights(self, model, optimizer):
+    with self._strategy.scope():
+      optimizer.swap_weights()
+      average = model.get_weights()[0]
+      optimizer.swap_weights()
+    return average
+
+  def test_update_interval(self):
+    model, optimizer = self._create(update_interval=2)
+    self._train(model, optimizer, 1)
+    self.assertAllClose(self._average_weights(model, optimizer), [[0.0]])
+    self._train(model, optimizer, 1)
+    # The average is updated once with the decay 0.5**2.
+    self.assertAllClose(self._average_weights(model, optimizer),
+                        [[0.75 * 0.8]])
+    self.assertAllClose(model.get_weights()[0], [[0.8]])
+
+  def test_reduced_precision_average(self):
+    model, optimizer = self._create(average_dtype='bfloat16')
+    self.assertEqual(optimizer._average_weights[0].dtype, tf.bfloat16)
+    self._train(model, optimizer, 2)
+    # 0.5 * (0.5 * 0.9) + 0.5 * 0.8 in bfloat16.
+    self.assertAllClose(
+        self._average_weights(model, optimizer), [[0.625]], atol=1e-2)
+    # Swapping keeps the full precision weights.
+    self.assertAllClose(model.get_weights()[0], [[0.8]], atol=1e-7)
+
+  def test_reduced_precision_average_converges(self):
+    tf.random.set_seed(0)
+    with self._strategy.scope():
+      model = tf_keras.Sequential(
+          [tf_keras.layers.Dense(1, use_bias=False, kernel_initializer='ones')])
+      model.build((None, 1))
+      # The weights stay 1.0 with a zero learning rate.
+      optimizer = ema_optimizer.ExponentialMovingAverage(
+          tf_keras.optimizers.legacy.SGD(0.0),
+          average_decay=0.99,
+          dynamic_decay=False,
+          average_dtype='bfloat16')
+      optimizer.shadow_copy(model)
+    self._train(model, optimizer, 1000)
+    # In float32 the average is 1 - 0.99**1000. Rounding to nearest in
+    # bfloat16 stops at about 0.8, when the updates are below half the
+    # precision.
+    self.assertAllClose(
+        self._average_weights(model, optimizer), [[1.0]], atol=5e-3)
+
+  def test_stochastic_round(self):
+    tf.random.set_seed(0)
+    value = tf.constant([1.0 + 2**-9, -1.0 - 2**-9, 1.5, 0.0])
+    rounded = tf.cast(
+        ema_optimizer.stochastic_round(
+            tf.tile(value[tf.newaxis], [10000, 1]), tf.bfloat16), tf.float32)
+    # The values are rounded to one of the two closest bfloat16 values, and
+    # are unbiased on average.
+    self.assertAllInSet(rounded[:, 0], [1.0, 1.0 + 2**-7])
+    self.assertAllInSet(rounded[:, 1], [-1.0, -1.0 - 2**-7])
+    self.assertAllClose(tf.reduce_mean(rounded, axis=0), value, atol=5e-4)
+    self.assertEqual(
+        ema_optimizer.stochastic_round(value, tf.float32).dtype, tf.float32)
+
+  def test_offload_to_host(self):
+    model, optimizer = self._create(offload_to_host=True)
+    self.assertIsInstance(optimizer._average_weights[0], np.ndarray)
+    self._train(model, optimizer, 2)
+    optimizer.update_host_average()
+    # The averages start from the initial weights, and both steps are
+    # averaged at once with the decay 0.5**2.
+    self.assertAllClose(self._average_weights(model, optimizer),
+                        [[0.25 + 0.75 * 0.8]])
+    self.assertAllClose(model.get_weights()[0], [[0.8]])
+
+    checkpoint_path = tf.train.Checkpoint(optimizer=optimizer).save(
+        os.path.join(self.get_temp_dir(), 'ckpt'))
+    restored_model, restored_optimizer = self._create(offload_to_host=True)
+    tf.train.Checkpoint(optimizer=restored_optimizer).restore(
+        checkpoint_path).expect_partial()
+    self.assertAllClose(
+        self._average_weights(restored_model, restored_optimizer),
+        [[0.25 + 0.75 * 0.8]])
+    self.assertEqual(restored_optimizer._host_averages.step, 2)
+
+  def test_offload_to_host_swap_before_update_interval(self):
+    model, optimizer = self._create(offload_to_host=True, update_interval=10)
+    # The averages are the initial weights before any step.
+    self.assertAllClose(self._average_weights(model, optimizer), [[1.0]])
+    self._train(model, optimizer, 3)
+    optimizer.update_host_average()
+    self.assertEqual(optimizer._host_averages.step, 0)
+    # Swapping catches up with the 3 steps at once with the decay 0.5**3.
+    self.assertAllClose(self._average_weights(model, optimizer),
+                        [[0.125 + 0.875 * 0.7]])
+    self.assertEqual(optimizer._host_averages.step, 3)
+    self.assertAllClose(model.get_weights()[0], [[0.7]])
+
+  def test_invalid_arguments(self):
+    with self.assertRaisesRegex(ValueError, 'update_interval'):
+      ema_optimizer.ExponentialMovingAverage(
+          tf_keras.optimizers.legacy.SGD(0.1), update_interval=0)
+    with self.assertRaisesRegex(ValueError, 'offload_to_host'):
+      ema_optimizer.ExponentialMovingAverage(
+          tf_keras.optimizers.legacy.SGD(0.1),
+          average_dtype='bfloat16',
+          offload_to_host=True)
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -201,6 +201,9 @@ class DeepMaskRCNNModel(maskrcnn_model.MaskRCNNModel):
             self.mask_roi_aligner._config_dict['crop_size'] *  # pylint:disable=protected-access
             self.mask_head._config_dict['upsample_factor']  # pylint:disable=protected-access
         )
+        if gt_masks.dtype == tf.uint8:
+          # The parser's `mask_dtype='uint8'` quantizes the masks to [0, 255].
+          gt_masks = tf.cast(gt_masks, tf.float32) / 255.0
         gt_masks = resize_as(source=gt_masks, size=mask_size)
 
         logging.info('Using GT class and mask targets.')
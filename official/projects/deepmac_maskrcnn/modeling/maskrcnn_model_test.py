@@ -138,6 +138,31 @@ class MaskRCNNModelTest(parameterized.TestCase, tf.test.TestCase):
       self.assertIn('num_detections', results)
       self.assertIn('detection_masks', results)
 
+  def test_quantized_gt_masks(self):
+    image_size = (256, 256)
+    images = np.random.rand(2, image_size[0], image_size[1], 3)
+    image_shape = np.array([[224, 100], [100, 224]])
+    model, anchor_boxes = construct_model_and_anchors(
+        image_size, use_gt_boxes_for_masks=True)
+
+    gt_boxes = tf.zeros((2, 16, 4), dtype=tf.float32)
+    gt_classes = tf.zeros((2, 16), dtype=tf.int32)
+    gt_masks = np.round(np.random.rand(2, 16, 32, 32) * 255.0) / 255.0
+    mask_targets = []
+    for masks in (gt_masks.astype(np.float32),
+                  np.round(gt_masks * 255.0).astype(np.uint8)):
+      results = model(images.astype(np.uint8),
+                      image_shape,
+                      anchor_boxes,
+                      gt_boxes,
+                      gt_classes,
+                      tf.constant(masks),
+                      training=True)
+      mask_targets.append(results['mask_targets'])
+
+    self.assertDTypeEqual(mask_targets[1], np.float32)
+    self.assertAllClose(mask_targets[1], mask_targets[0])
+
   @parameterized.parameters(
       [(1, 5), (1, 10), (1, 15), (2, 5), (2, 10), (2, 15)]
   )
@@ -108,6 +108,7 @@ class Parser(maskrcnn_input.Parser):
                max_num_instances=100,
                outer_boxes_scale=1.0,
                mask_crop_size=112,
+               mask_dtype='float32',
                segmentation_resize_eval_groundtruth=True,
                segmentation_groundtruth_padded_size=None,
                segmentation_ignore_label=255,
@@ -150,6 +151,8 @@ class Parser(maskrcnn_input.Parser):
       outer_boxes_scale: a float to scale up the bounding boxes to generate
         more inclusive masks. The scale is expected to be >=1.0.
       mask_crop_size: the size which groundtruth mask is cropped to.
+      mask_dtype: `str`, data type of the cropped training masks. One of
+        {`float32`, `uint8`}.
       segmentation_resize_eval_groundtruth: `bool`, if True, eval groundtruth
         masks are resized to output_size.
       segmentation_groundtruth_padded_size: `Tensor` or `list` for [height,
@@ -184,6 +187,7 @@ class Parser(maskrcnn_input.Parser):
         include_mask=True,
         outer_boxes_scale=outer_boxes_scale,
         mask_crop_size=mask_crop_size,
+        mask_dtype=mask_dtype,
         dtype=dtype,
     )
 
@@ -180,6 +180,7 @@ class PanopticMaskRCNNTask(maskrcnn.MaskRCNNTask):
         max_num_instances=params.parser.max_num_instances,
         outer_boxes_scale=self.task_config.model.outer_boxes_scale,
         mask_crop_size=params.parser.mask_crop_size,
+        mask_dtype=params.parser.mask_dtype,
         segmentation_resize_eval_groundtruth=params.parser
         .segmentation_resize_eval_groundtruth,
         segmentation_groundtruth_padded_size=params.parser
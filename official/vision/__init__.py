@@ -12,7 +12,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Vision package definition."""
+"""Vision package definition.
+
+The vision experiments and tasks are registered lazily, so that importing this
+package, e.g. to run `official.vision.train`, does not import all vision
+models. The `configs` and `tasks` subpackages are imported on first access.
+"""
+import importlib
+
 # pylint: disable=unused-import
-from official.vision import configs
-from official.vision import tasks
+from official.common import lazy_registry_imports
+# pylint: enable=unused-import
+
+_LAZY_SUBPACKAGES = ('configs', 'tasks')
+
+
+def __getattr__(name):
+  if name in _LAZY_SUBPACKAGES:
+    return importlib.import_module(f'{__name__}.{name}')
+  raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -180,6 +180,23 @@ class PseudoLabelDataConfig(cfg.DataConfig):
   randaug_magnitude: Optional[int] = 10
 
 
+@dataclasses.dataclass
+class TestTimeAugmentation(hyperparams.Config):
+  """Multi-scale and flip test-time augmentation (TTA) for detection.
+
+  All views run as one batch of the model input size, so views with a scale
+  larger than 1.0 are cropped at the bottom and right. Evaluation losses are
+  computed on the first view, i.e. `scales[0]` without flip.
+  """
+  enabled: bool = False
+  scales: List[float] = dataclasses.field(default_factory=lambda: [1.0])
+  # If set, every scale is also run horizontally flipped.
+  horizontal_flip: bool = True
+  # `nms` or `wbf` (weighted box fusion).
+  merge_method: str = 'wbf'
+  merge_iou_threshold: float = 0.55
+
+
 @dataclasses.dataclass
 class TFLitePostProcessingConfig(hyperparams.Config):
   """TFLite Post Processing config for inference."""
@@ -46,6 +46,9 @@ class Parser(hyperparams.Config):
   rpn_batch_size_per_im: int = 256
   rpn_fg_fraction: float = 0.5
   mask_crop_size: int = 112
+  # One of `float32` or `uint8`; `uint8` quantizes the mask patches to shrink
+  # the input pipeline output.
+  mask_dtype: str = 'float32'
   pad: bool = True  # Only support `pad = True`.
   keep_aspect_ratio: bool = True  # Only support `keep_aspect_ratio = True`.
 
@@ -148,9 +151,12 @@ class DetectionGenerator(hyperparams.Config):
   pre_nms_score_threshold: float = 0.05
   nms_iou_threshold: float = 0.5
   max_num_detections: int = 100
-  nms_version: str = 'v2'  # `v2`, `v1`, `batched`
+  nms_version: str = 'v2'  # `v2`, `v1`, `batched` or `auto`
   use_cpu_nms: bool = False
   soft_nms_sigma: Optional[float] = None  # Only works when nms_version='v1'.
+  # Only works when nms_version='auto'. One of `tiled`, `offset` or
+  # `class_agnostic`; selected by device when None.
+  nms_backend: Optional[str] = None
   use_sigmoid_probability: bool = False
 
 
@@ -262,6 +268,11 @@ class MaskRCNNTask(cfg.TaskConfig):
   # TODO(crisnv) Add paper link when available.
   freeze_backbone: bool = False
 
+  # Test-time augmentation used in evaluation and export.
+  test_time_augmentation: common.TestTimeAugmentation = dataclasses.field(
+      default_factory=common.TestTimeAugmentation
+  )
+
 
 COCO_INPUT_PATH_BASE = 'coco'
 
@@ -141,9 +141,12 @@ class DetectionGenerator(hyperparams.Config):
   pre_nms_score_threshold: float = 0.05
   nms_iou_threshold: float = 0.5
   max_num_detections: int = 100
-  nms_version: str = 'v2'  # `v2`, `v1`, `batched`, or `tflite`.
+  nms_version: str = 'v2'  # `v2`, `v1`, `batched`, `tflite` or `auto`.
   use_cpu_nms: bool = False
   soft_nms_sigma: Optional[float] = None  # Only works when nms_version='v1'.
+  # Only works when nms_version='auto'. One of `tiled`, `offset` or
+  # `class_agnostic`; selected by device when None.
+  nms_backend: Optional[str] = None
 
   # When nms_version = `tflite`, values from tflite_post_processing need to be
   # specified. They are compatible with the input arguments used by TFLite
@@ -153,7 +156,7 @@ class DetectionGenerator(hyperparams.Config):
   )
   # Return decoded boxes/scores even if apply_nms is set `True`.
   return_decoded: Optional[bool] = None
-  # Only works when nms_version='v2'.
+  # Only works when nms_version='v2' or 'auto'.
   use_class_agnostic_nms: Optional[bool] = False
   # Weights or scales when encode and decode boxes coordinates. For Faster RCNN,
   # the open-source implementation recommends using [10.0, 10.0, 5.0, 5.0].
@@ -220,6 +223,11 @@ class RetinaNetTask(cfg.TaskConfig):
   # Sets maximum number of boxes to be evaluated by coco eval api.
   max_num_eval_detections: int = 100
 
+  # Test-time augmentation used in evaluation and export.
+  test_time_augmentation: common.TestTimeAugmentation = dataclasses.field(
+      default_factory=common.TestTimeAugmentation
+  )
+
 
 @exp_factory.register_config_factory('retinanet')
 def retinanet() -> cfg.ExperimentConfig:
@@ -66,6 +66,12 @@ class DataConfig(cfg.DataConfig):
   image_field_key: str = 'image/encoded'
   label_field_key: str = 'clip/label/index'
   input_image_format: str = 'jpeg'
+  # Number of frames decoded in parallel; None uses the `tf.map_fn` default.
+  decode_parallel_iterations: Optional[int] = None
+  # If True and `cache` is enabled, caches the decoded frames downscaled to
+  # `min_image_size` instead of the parsed clips, so that temporal sampling and
+  # augmentation stay random across epochs.
+  cache_decoded_frames: bool = False
 
 
 def kinetics400(is_training):
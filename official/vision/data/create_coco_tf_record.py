@@ -73,8 +73,12 @@ flags.DEFINE_string('output_file_prefix', '/tmp/train', 'Path to output file')
 flags.DEFINE_integer('num_shards', 32, 'Number of shards for output file.')
 _NUM_PROCESSES = flags.DEFINE_integer(
     'num_processes', None,
-    ('Number of parallel processes to use. '
-     'If set to 0, disables multi-processing.'))
+    ('Number of parallel processes to use. Each process converts and writes '
+     'whole output shards. If set to 0, disables multi-processing.'))
+_RESUME = flags.DEFINE_boolean(
+    'resume', False,
+    'Whether to keep the output shards written by a previous, interrupted run '
+    'with the same flags instead of converting them again.')
 
 
 FLAGS = flags.FLAGS
@@ -476,7 +480,8 @@ def _create_tf_record_from_coco_annotations(images_info_file,
                                             panoptic_masks_dir=None,
                                             panoptic_annotations_file=None,
                                             include_panoptic_masks=False,
-                                            include_masks=False):
+                                            include_masks=False,
+                                            resume=False):
   """Loads COCO annotation json files and converts to tf.Record format.
 
   Args:
@@ -497,6 +502,8 @@ def _create_tf_record_from_coco_annotations(images_info_file,
       and 'instance_mask', which is required by the panoptic quality evaluator.
     include_masks: Whether to include instance segmentations masks
       (PNG encoded) in the result. default: False.
+    resume: Whether to keep the output shards that were completely written by a
+      previous, interrupted call instead of converting them again.
   """
 
   logging.info('writing to output path: %s', output_path)
@@ -532,7 +539,7 @@ def _create_tf_record_from_coco_annotations(images_info_file,
 
   num_skipped = tfrecord_lib.write_tf_record_dataset(
       output_path, coco_annotations_iter, create_tf_example, num_shards,
-      multiple_processes=_NUM_PROCESSES.value)
+      multiple_processes=_NUM_PROCESSES.value, resume=resume)
 
   logging.info('Finished writing, skipped %d annotations.', num_skipped)
 
@@ -561,7 +568,8 @@ def main(_):
                                           FLAGS.panoptic_masks_dir,
                                           FLAGS.panoptic_annotations_file,
                                           FLAGS.include_panoptic_masks,
-                                          FLAGS.include_masks)
+                                          FLAGS.include_masks,
+                                          _RESUME.value)
 
 
 if __name__ == '__main__':
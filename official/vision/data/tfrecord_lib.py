@@ -17,6 +17,7 @@
 import hashlib
 import io
 import itertools
+import os
 
 from absl import logging
 import numpy as np
@@ -26,9 +27,6 @@ import tensorflow as tf, tf_keras
 import multiprocessing as mp
 
 
-LOG_EVERY = 100
-
-
 def convert_to_feature(value, value_type=None):
   """Converts the given python object to a tf.train.Feature.
 
@@ -115,11 +113,77 @@ def encode_mask_as_png(mask):
   return output_io.getvalue()
 
 
+# The annotations and processing function of the current conversion. They are
+# set once per worker process instead of being sent along with every shard.
+_shard_worker_state = {}
+
+
+def _init_shard_worker(annotations, process_func, unpack_arguments):
+  _shard_worker_state['annotations'] = annotations
+  _shard_worker_state['process_func'] = process_func
+  _shard_worker_state['unpack_arguments'] = unpack_arguments
+
+
+def _write_shard(output_path, shard_index, num_shards, resume):
+  """Processes the annotations of one shard and writes them to its file.
+
+  The shard is first written to a hidden temporary file which is only renamed
+  to the shard's path once it is complete, so an existing shard file is always
+  complete.
+
+  Args:
+    output_path: The prefix path of the TF record files.
+    shard_index: int, the index of the shard to write.
+    num_shards: int, the number of shards of the dataset.
+    resume: Whether to skip the shard if its file already exists.
+
+  Returns:
+    A tuple of the shard index, the number of written examples and the number
+    of skipped annotations, or None for the last two if the shard was skipped.
+  """
+  shard_path = output_path + '-%05d-of-%05d.tfrecord' % (shard_index,
+                                                         num_shards)
+  if resume and tf.io.gfile.exists(shard_path):
+    return shard_index, None, None
+
+  annotations = _shard_worker_state['annotations']
+  process_func = _shard_worker_state['process_func']
+  if _shard_worker_state['unpack_arguments']:
+    tf_example_iterator = itertools.starmap(
+        process_func, annotations[shard_index::num_shards])
+  else:
+    tf_example_iterator = map(process_func,
+                              annotations[shard_index::num_shards])
+
+  temp_path = os.path.join(
+      os.path.dirname(shard_path),
+      '.%s.incomplete' % os.path.basename(shard_path))
+  num_examples = 0
+  num_annotations_skipped = 0
+  with tf.io.TFRecordWriter(temp_path) as writer:
+    for tf_example, num_skipped in tf_example_iterator:
+      writer.write(tf_example.SerializeToString())
+      num_examples += 1
+      num_annotations_skipped += num_skipped
+  tf.io.gfile.rename(temp_path, shard_path, overwrite=True)
+  return shard_index, num_examples, num_annotations_skipped
+
+
+def _write_shard_in_worker(args):
+  return _write_shard(*args)
+
+
 def write_tf_record_dataset(output_path, annotation_iterator,
                             process_func, num_shards,
-                            multiple_processes=None, unpack_arguments=True):
+                            multiple_processes=None, unpack_arguments=True,
+                            resume=False):
   """Iterates over annotations, processes them and writes into TFRecords.
 
+  The i-th annotation is written to shard `i % num_shards`. Every shard is
+  processed and written by a single process which reads its annotations from
+  the index shared by all processes, so the processed examples never have to be
+  sent back to the main process.
+
   Args:
     output_path: The prefix path to create TF record files.
     annotation_iterator: An iterator of tuples containing details about the
@@ -136,46 +200,42 @@ def write_tf_record_dataset(output_path, annotation_iterator,
     unpack_arguments:
       Whether to unpack the tuples from annotation_iterator as individual
         arguments to the process func or to pass the returned value as it is.
+    resume: Whether to keep the shards written by a previous, interrupted
+      call with the same arguments instead of writing them again.
 
   Returns:
-    num_skipped: The total number of skipped annotations.
+    num_skipped: The total number of skipped annotations of the shards written
+      by this call.
   """
-
-  writers = [
-      tf.io.TFRecordWriter(
-          output_path + '-%05d-of-%05d.tfrecord' % (i, num_shards))
-      for i in range(num_shards)
-  ]
-
-  total_num_annotations_skipped = 0
+  annotations = list(annotation_iterator)
+  shard_args = [(output_path, shard_index, num_shards, resume)
+                for shard_index in range(num_shards)]
 
   if multiple_processes is None or multiple_processes > 0:
     pool = mp.Pool(
-        processes=multiple_processes)
-    if unpack_arguments:
-      tf_example_iterator = pool.starmap(process_func, annotation_iterator)
-    else:
-      tf_example_iterator = pool.imap(process_func, annotation_iterator)
+        processes=multiple_processes, initializer=_init_shard_worker,
+        initargs=(annotations, process_func, unpack_arguments))
+    shard_iterator = pool.imap_unordered(_write_shard_in_worker, shard_args)
   else:
-    if unpack_arguments:
-      tf_example_iterator = itertools.starmap(process_func, annotation_iterator)
-    else:
-      tf_example_iterator = map(process_func, annotation_iterator)
-
-  for idx, (tf_example, num_annotations_skipped) in enumerate(
-      tf_example_iterator):
-    if idx % LOG_EVERY == 0:
-      logging.info('On image %d', idx)
+    _init_shard_worker(annotations, process_func, unpack_arguments)
+    shard_iterator = map(_write_shard_in_worker, shard_args)
 
+  total_num_annotations_skipped = 0
+  for num_finished, (shard_index, num_examples,
+                     num_annotations_skipped) in enumerate(shard_iterator, 1):
+    if num_examples is None:
+      logging.info('Shard %d already exists, skipping it (%d/%d).',
+                   shard_index, num_finished, num_shards)
+      continue
+    logging.info('Wrote %d examples to shard %d (%d/%d).', num_examples,
+                 shard_index, num_finished, num_shards)
     total_num_annotations_skipped += num_annotations_skipped
-    writers[idx % num_shards].write(tf_example.SerializeToString())
 
   if multiple_processes is None or multiple_processes > 0:
     pool.close()
     pool.join()
-
-  for writer in writers:
-    writer.close()
+  else:
+    _shard_worker_state.clear()
 
   logging.info('Finished writing, skipped %d annotations.',
                total_num_annotations_skipped)
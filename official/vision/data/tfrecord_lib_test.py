@@ -45,7 +45,7 @@ class TfrecordLibTest(parameterized.TestCase):
   def test_write_tf_record_dataset(self):
     data = [(tfrecord_lib.convert_to_feature(i),) for i in range(17)]
 
-    path = os.path.join(FLAGS.test_tmpdir, 'train')
+    path = os.path.join(self.create_tempdir().full_path, 'train')
 
     tfrecord_lib.write_tf_record_dataset(
         path, data, process_sample, 3, multiple_processes=0)
@@ -59,6 +59,44 @@ class TfrecordLibTest(parameterized.TestCase):
     read_values = set(d['x'] for d in dataset.as_numpy_iterator())
     self.assertSetEqual(read_values, set(range(17)))
 
+  def test_write_tf_record_dataset_multiple_processes(self):
+    data = [(tfrecord_lib.convert_to_feature(i),) for i in range(17)]
+
+    temp_dir = self.create_tempdir().full_path
+    path = os.path.join(temp_dir, 'train_parallel')
+
+    tfrecord_lib.write_tf_record_dataset(
+        path, data, process_sample, 3, multiple_processes=2)
+
+    for shard in range(3):
+      dataset = tf.data.TFRecordDataset(
+          path + '-%05d-of-00003.tfrecord' % shard).map(parse_function)
+      # Every shard holds the samples with its index modulo the shard count.
+      self.assertEqual([d['x'] for d in dataset.as_numpy_iterator()],
+                       list(range(shard, 17, 3)))
+    # No temporary files are left behind.
+    self.assertLen(tf.io.gfile.listdir(temp_dir), 3)
+
+  def test_write_tf_record_dataset_resume(self):
+    data = [(tfrecord_lib.convert_to_feature(i),) for i in range(6)]
+    path = os.path.join(self.create_tempdir().full_path, 'train_resume')
+    tfrecord_lib.write_tf_record_dataset(
+        path, data, process_sample, 2, multiple_processes=0)
+    # Pretends that the conversion was interrupted before the second shard.
+    tf.io.gfile.remove(path + '-00001-of-00002.tfrecord')
+    with tf.io.TFRecordWriter(path + '-00000-of-00002.tfrecord') as writer:
+      writer.write(b'stale')
+
+    tfrecord_lib.write_tf_record_dataset(
+        path, data, process_sample, 2, multiple_processes=0, resume=True)
+
+    self.assertEqual(
+        list(tf.data.TFRecordDataset(
+            path + '-00000-of-00002.tfrecord').as_numpy_iterator()), [b'stale'])
+    dataset = tf.data.TFRecordDataset(
+        path + '-00001-of-00002.tfrecord').map(parse_function)
+    self.assertEqual([d['x'] for d in dataset.as_numpy_iterator()], [1, 3, 5])
+
   def test_convert_to_feature_float(self):
 
     proto = tfrecord_lib.convert_to_feature(0.0)
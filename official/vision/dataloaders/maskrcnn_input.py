@@ -52,6 +52,7 @@ class Parser(parser.Parser):
                include_mask=False,
                outer_boxes_scale=1.0,
                mask_crop_size=112,
+               mask_dtype='float32',
                dtype='float32'):
     """Initializes parameters for parsing annotations in the dataset.
 
@@ -92,6 +93,10 @@ class Parser(parser.Parser):
       outer_boxes_scale: a float to scale up the bounding boxes to generate
         more inclusive masks. The scale is expected to be >=1.0.
       mask_crop_size: the size which ground-truth mask is cropped to.
+      mask_dtype: `str`, data type of the cropped training masks. One of
+        {`float32`, `uint8`}. `uint8` masks are quantized to [0, 255] which
+        cuts the bytes moved by the input pipeline by 4x; they are dequantized
+        by `spatial_transform_ops.crop_mask_in_target_box` on device.
       dtype: `str`, data type. One of {`bfloat16`, `float32`, `float16`}.
     """
 
@@ -142,6 +147,9 @@ class Parser(parser.Parser):
     self._include_mask = include_mask
     self._outer_boxes_scale = outer_boxes_scale
     self._mask_crop_size = mask_crop_size
+    if mask_dtype not in ('float32', 'uint8'):
+      raise ValueError('Unsupported mask_dtype: {}'.format(mask_dtype))
+    self._mask_dtype = mask_dtype
 
     # Image output dtype.
     self._dtype = dtype
@@ -307,6 +315,10 @@ class Parser(parser.Parser):
           outer_boxes, self._max_num_instances, -1)
       masks = preprocess_ops.clip_or_pad_to_fixed_size(
           masks, self._max_num_instances, -1)
+      if self._mask_dtype == 'uint8':
+        # Padded masks are -1 and are clipped to 0; they are never sampled.
+        masks = tf.cast(
+            tf.clip_by_value(tf.round(masks * 255.0), 0.0, 255.0), tf.uint8)
       labels.update({
           'gt_outer_boxes': outer_boxes,
           'gt_masks': masks,
@@ -47,12 +47,18 @@ def process_image(image: tf.Tensor,
                   random_rotation: bool = False,
                   augmenter: Optional[augment.ImageAugment] = None,
                   seed: Optional[int] = None,
-                  input_image_format: Optional[str] = 'jpeg') -> tf.Tensor:
+                  input_image_format: Optional[str] = 'jpeg',
+                  decode_parallel_iterations: Optional[int] = None
+                  ) -> tf.Tensor:
   """Processes a serialized image tensor.
 
+  Frame indices are sampled first and only the selected frames are decoded, each
+  distinct frame once.
+
   Args:
     image: Input Tensor of shape [time-steps] and type tf.string of serialized
-      frames.
+      frames, or an already decoded Tensor of shape
+      [time-steps, height, width, channels].
     is_training: Whether or not in training mode. If True, random sample, crop
       and left right flip is used.
     num_frames: Number of frames per sub clip.
@@ -83,6 +89,8 @@ def process_image(image: tf.Tensor,
     seed: A deterministic seed to use when sampling.
     input_image_format: The format of input image which could be jpeg, png or
       none for unknown or mixed datasets.
+    decode_parallel_iterations: The number of frames decoded in parallel. If
+      None, the `tf.map_fn` default is used.
 
   Returns:
     Processed frames. Tensor of shape
@@ -106,7 +114,9 @@ def process_image(image: tf.Tensor,
     crop_size = (crop_size, crop_size)
   crop_height, crop_width = crop_size
 
-  # Temporal sampler.
+  # Temporal sampler. Samples frame indices so that only the selected frames
+  # need to be decoded.
+  frame_indices = tf.range(tf.shape(image)[0])
   if is_training:
     if random_stride_range > 0:
       # Uniformly sample different frame-rates
@@ -117,19 +127,23 @@ def process_image(image: tf.Tensor,
           dtype=tf.int32)
 
     # Sample random clip.
-    image = preprocess_ops_3d.sample_sequence(image, num_frames, True, stride,
-                                              seed)
+    frame_indices = preprocess_ops_3d.sample_sequence(
+        frame_indices, num_frames, True, stride, seed)
   elif num_test_clips > 1:
     # Sample linspace clips.
-    image = preprocess_ops_3d.sample_linspace_sequence(image, num_test_clips,
-                                                       num_frames, stride)
+    frame_indices = preprocess_ops_3d.sample_linspace_sequence(
+        frame_indices, num_test_clips, num_frames, stride)
   else:
     # Sample middle clip.
-    image = preprocess_ops_3d.sample_sequence(image, num_frames, False, stride)
+    frame_indices = preprocess_ops_3d.sample_sequence(
+        frame_indices, num_frames, False, stride)
 
   # Decode JPEG string to tf.uint8.
   if image.dtype == tf.string:
-    image = preprocess_ops_3d.decode_image(image, num_channels)
+    image = preprocess_ops_3d.decode_sampled_frames(
+        image, frame_indices, num_channels, decode_parallel_iterations)
+  else:
+    image = tf.gather(image, frame_indices)
 
   if is_training:
     # Standard image data augmentation: random resized crop and random flip.
@@ -308,6 +322,7 @@ class Parser(parser.Parser):
     self._max_area_ratio = input_params.aug_max_area_ratio
     self._input_image_format = input_params.input_image_format
     self._random_rotation = input_params.aug_random_rotation
+    self._decode_parallel_iterations = input_params.decode_parallel_iterations
     if self._output_audio:
       self._audio_feature = input_params.audio_feature
       self._audio_shape = input_params.audio_feature_shape
@@ -362,7 +377,8 @@ class Parser(parser.Parser):
         random_rotation=self._random_rotation,
         augmenter=self._augmenter,
         zero_centering_image=self._zero_centering_image,
-        input_image_format=self._input_image_format)
+        input_image_format=self._input_image_format,
+        decode_parallel_iterations=self._decode_parallel_iterations)
     image = tf.cast(image, dtype=self._dtype)
 
     features = {'image': image}
@@ -398,7 +414,8 @@ class Parser(parser.Parser):
         num_channels=self._num_channels,
         num_crops=self._num_crops,
         zero_centering_image=self._zero_centering_image,
-        input_image_format=self._input_image_format)
+        input_image_format=self._input_image_format,
+        decode_parallel_iterations=self._decode_parallel_iterations)
     image = tf.cast(image, dtype=self._dtype)
     features = {'image': image}
 
@@ -416,6 +433,28 @@ class Parser(parser.Parser):
 
     return features, label
 
+  def decode_frames(
+      self, decoded_tensors: Dict[str, tf.Tensor]) -> Dict[str, tf.Tensor]:
+    """Decodes all frames and downscales them to `min_image_size`.
+
+    The output is deterministic and can be cached, after which `parse_fn` only
+    does the temporal sampling, cropping and augmentation.
+
+    Args:
+      decoded_tensors: a dict of Tensors produced by the decoder.
+
+    Returns:
+      A copy of `decoded_tensors` whose image is a uint8 Tensor of shape
+      [time-steps, height, width, channels].
+    """
+    decoded_tensors = dict(decoded_tensors)
+    image = preprocess_ops_3d.decode_image(
+        decoded_tensors[self._image_key], self._num_channels,
+        self._decode_parallel_iterations)
+    image = preprocess_ops_3d.resize_smallest(image, self._min_resize)
+    decoded_tensors[self._image_key] = image
+    return decoded_tensors
+
 
 class PostBatchProcessor(object):
   """Processes a video and label dataset which is batched."""
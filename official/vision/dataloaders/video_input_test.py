@@ -213,6 +213,45 @@ class VideoAndLabelParserTest(tf.test.TestCase):
     self.assertAllEqual(label.shape, (1,))
     self.assertDTypeEqual(label, tf.float32)
 
+  def test_video_input_from_decoded_frames(self):
+    params = exp_cfg.kinetics600(is_training=True)
+    params.feature_shape = (2, 128, 128, 3)
+    params.min_image_size = 160
+    params.decode_parallel_iterations = 2
+
+    decoder = video_input.Decoder()
+    parser = video_input.Parser(params)
+
+    seq_example, _ = fake_seq_example()
+
+    input_tensor = tf.constant(seq_example.SerializeToString())
+    decoded_tensors = parser.decode_frames(decoder.decode(input_tensor))
+    frames = decoded_tensors[video_input.IMAGE_KEY]
+    self.assertAllEqual(frames.shape, (2, 160, 194, 3))
+    self.assertDTypeEqual(frames, tf.uint8)
+
+    image_features, label = parser.parse_fn(params.is_training)(
+        decoded_tensors)
+
+    self.assertAllEqual(image_features['image'].shape, (2, 128, 128, 3))
+    self.assertAllEqual(label.shape, (600,))
+
+  def test_video_input_multiple_test_clips(self):
+    params = exp_cfg.kinetics600(is_training=False)
+    params.feature_shape = (2, 224, 224, 3)
+    params.min_image_size = 224
+    params.num_test_clips = 3
+
+    decoder = video_input.Decoder()
+    parser = video_input.Parser(params).parse_fn(params.is_training)
+
+    seq_example, _ = fake_seq_example()
+
+    input_tensor = tf.constant(seq_example.SerializeToString())
+    image_features, _ = parser(decoder.decode(input_tensor))
+
+    self.assertAllEqual(image_features['image'].shape, (6, 224, 224, 3))
+
 
 if __name__ == '__main__':
   tf.test.main()
@@ -58,9 +58,11 @@ class COCOEvaluator(object):
     as the ground-truths and runs COCO evaluation.
 
     Args:
-      annotation_file: a JSON file that stores annotations of the eval dataset.
-        If `annotation_file` is None, ground-truth annotations will be loaded
-        from the dataloader.
+      annotation_file: a JSON file that stores annotations of the eval dataset,
+        or a ground-truth index directory written by
+        `coco_utils.write_groundtruth_index`, which is loaded lazily. If
+        `annotation_file` is None, ground-truth annotations will be loaded from
+        the dataloader.
       include_mask: a boolean to indicate whether or not to include the mask
         eval.
       include_keypoint: a boolean to indicate whether or not to include the
@@ -78,7 +80,11 @@ class COCOEvaluator(object):
     Raises:
       ValueError: if max_num_eval_detections is not an integer.
     """
-    if annotation_file:
+    if annotation_file and coco_utils.is_groundtruth_index(annotation_file):
+      self._coco_gt = coco_utils.COCOWrapper(
+          eval_type=('mask' if include_mask else 'box'),
+          groundtruth_index=annotation_file)
+    elif annotation_file:
       if annotation_file.startswith('gs://'):
         _, local_val_json = tempfile.mkstemp(suffix='.json')
         tf.io.gfile.remove(local_val_json)
@@ -141,6 +147,43 @@ class COCOEvaluator(object):
     if not self._annotation_file:
       self._groundtruths = {}
 
+  def get_state(self):
+    """Returns the aggregated predictions and ground-truths.
+
+    The state holds references to the lists that `update_state` appends to,
+    so it is cheap to get after every update.
+    """
+    state = {'predictions': self._predictions}
+    if not self._annotation_file:
+      state['groundtruths'] = self._groundtruths
+    return state
+
+  def set_state(self, state):
+    """Replaces the aggregated results with a state from `get_state`."""
+    self._predictions = state['predictions']
+    if not self._annotation_file:
+      self._groundtruths = state['groundtruths']
+
+  @staticmethod
+  def merge_states(state, other_state):
+    """Concatenates the results of two states from `get_state`.
+
+    Args:
+      state: A state returned by `get_state`, e.g. of one eval shard.
+      other_state: A state returned by `get_state` of another eval shard.
+
+    Returns:
+      A state holding the predictions and ground-truths of both states.
+    """
+    merged = {}
+    for name, results in state.items():
+      other_results = other_state[name]
+      merged[name] = {
+          key: results.get(key, []) + other_results.get(key, [])
+          for key in {**results, **other_results}
+      }
+    return merged
+
   def result(self):
     """Evaluates detection results, and reset_states."""
     metric_dict = self.evaluate()
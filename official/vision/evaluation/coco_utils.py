@@ -16,6 +16,7 @@
 
 import copy
 import json
+import os
 
 # Import libraries
 
@@ -33,6 +34,228 @@ from official.vision.ops import box_ops
 from official.vision.ops import mask_ops
 
 
+# File names of the columns of a ground-truth index written by
+# `write_groundtruth_index`.
+_GROUNDTRUTH_INDEX_ARRAYS = (
+    'image_ids', 'heights', 'widths', 'annotation_offsets', 'annotation_ids',
+    'annotation_order', 'category_ids', 'boxes', 'areas', 'is_crowds',
+    'rle_offsets', 'rle_counts')
+_GROUNDTRUTH_INDEX_CATEGORIES = 'categories.json'
+
+
+def _encode_segmentation(segmentation, height, width):
+  """Returns the compressed RLE counts of a COCO segmentation as bytes."""
+  if isinstance(segmentation, list):
+    # Polygons.
+    rle = mask_api.merge(mask_api.frPyObjects(segmentation, height, width))
+  elif isinstance(segmentation['counts'], list):
+    # Uncompressed RLE.
+    rle = mask_api.frPyObjects(segmentation, height, width)
+  else:
+    rle = segmentation
+  return six.ensure_binary(rle['counts'])
+
+
+def write_groundtruth_index(gt_dataset, index_dir):
+  """Writes a COCO ground-truth dataset as a columnar ground-truth index.
+
+  The index is a directory of `.npy` arrays: per-image ids and sizes with
+  offsets into the annotation columns (ids, classes, boxes, areas and crowd
+  flags), which are sorted by image, and the compressed RLE segmentations
+  packed into a single byte array with per-annotation offsets. It is loaded
+  lazily by `COCOGroundtruthIndex` and can be memory-mapped and shared by
+  several evaluation processes.
+
+  Args:
+    gt_dataset: the ground-truth dataset in COCO format, with integer image ids.
+      Polygon and uncompressed RLE segmentations are converted to compressed
+      RLE; other annotation fields, e.g. keypoints, are not stored.
+    index_dir: the directory to write the index to.
+
+  Raises:
+    ValueError: if an image id or annotation id is not an integer.
+  """
+  images = sorted(gt_dataset['images'], key=lambda image: image['id'])
+  image_ids = np.array([image['id'] for image in images])
+  if image_ids.size and not np.issubdtype(image_ids.dtype, np.integer):
+    raise ValueError('The ground-truth index requires integer image ids.')
+  image_ids = image_ids.astype(np.int64)
+  image_sizes = {image['id']: (image['height'], image['width'])
+                 for image in images}
+
+  annotations = sorted(
+      gt_dataset['annotations'], key=lambda ann: ann['image_id'])
+  annotation_image_ids = np.array(
+      [ann['image_id'] for ann in annotations], dtype=np.int64)
+  annotation_offsets = np.searchsorted(
+      annotation_image_ids, image_ids, side='left')
+  annotation_offsets = np.append(annotation_offsets, len(annotations))
+
+  rle_counts = []
+  rle_offsets = [0]
+  for ann in annotations:
+    if 'segmentation' in ann:
+      height, width = image_sizes[ann['image_id']]
+      rle_counts.append(
+          _encode_segmentation(ann['segmentation'], height, width))
+    else:
+      rle_counts.append(b'')
+    rle_offsets.append(rle_offsets[-1] + len(rle_counts[-1]))
+
+  annotation_ids = np.array([ann['id'] for ann in annotations])
+  if annotation_ids.size and not np.issubdtype(
+      annotation_ids.dtype, np.integer):
+    raise ValueError('The ground-truth index requires integer annotation ids.')
+  arrays = {
+      'image_ids': image_ids,
+      'heights': np.array([image['height'] for image in images], np.int32),
+      'widths': np.array([image['width'] for image in images], np.int32),
+      'annotation_offsets': annotation_offsets.astype(np.int64),
+      'annotation_ids': annotation_ids.astype(np.int64),
+      'annotation_order': np.argsort(annotation_ids, kind='stable').astype(
+          np.int64),
+      'category_ids': np.array(
+          [ann['category_id'] for ann in annotations], np.int64),
+      'boxes': np.array(
+          [ann['bbox'] for ann in annotations], np.float64).reshape([-1, 4]),
+      'areas': np.array([ann['area'] for ann in annotations], np.float64),
+      'is_crowds': np.array(
+          [ann.get('iscrowd', 0) for ann in annotations], np.uint8),
+      'rle_offsets': np.array(rle_offsets, np.int64),
+      'rle_counts': np.frombuffer(b''.join(rle_counts), np.uint8),
+  }
+
+  tf.io.gfile.makedirs(index_dir)
+  for name in _GROUNDTRUTH_INDEX_ARRAYS:
+    with tf.io.gfile.GFile(os.path.join(index_dir, name + '.npy'), 'wb') as f:
+      np.save(f, arrays[name])
+  with tf.io.gfile.GFile(
+      os.path.join(index_dir, _GROUNDTRUTH_INDEX_CATEGORIES), 'w') as f:
+    f.write(json.dumps(gt_dataset['categories']))
+
+
+def is_groundtruth_index(path):
+  """Returns whether `path` is a ground-truth index directory."""
+  return tf.io.gfile.exists(
+      os.path.join(path, _GROUNDTRUTH_INDEX_CATEGORIES))
+
+
+class COCOGroundtruthIndex:
+  """Lazily loaded ground-truth index written by `write_groundtruth_index`.
+
+  Local indices are memory-mapped, so only the pages of the annotations that
+  are accessed are read, and they are shared through the page cache across
+  evaluation processes on the same host.
+  """
+
+  def __init__(self, index_dir):
+    self._index_dir = index_dir
+    self._arrays = {}
+    with tf.io.gfile.GFile(
+        os.path.join(index_dir, _GROUNDTRUTH_INDEX_CATEGORIES)) as f:
+      self.categories = json.loads(f.read())
+
+  def _array(self, name):
+    """Returns the array `name`, loading it on first access."""
+    if name not in self._arrays:
+      path = os.path.join(self._index_dir, name + '.npy')
+      if os.path.exists(path):
+        self._arrays[name] = np.load(path, mmap_mode='r')
+      else:
+        with tf.io.gfile.GFile(path, 'rb') as f:
+          self._arrays[name] = np.load(f)
+    return self._arrays[name]
+
+  @property
+  def image_ids(self):
+    return self._array('image_ids')
+
+  def images(self):
+    """Returns the images as a list of COCO image dictionaries."""
+    return [{'id': int(i), 'height': int(h), 'width': int(w)}
+            for i, h, w in zip(self.image_ids, self._array('heights'),
+                               self._array('widths'))]
+
+  def image_positions(self, image_ids):
+    """Returns the positions of the `image_ids` that are in the index."""
+    image_ids = np.asarray(image_ids, np.int64)
+    if not len(self.image_ids):
+      return np.zeros([0], np.int64)
+    positions = np.searchsorted(self.image_ids, image_ids)
+    positions = np.minimum(positions, len(self.image_ids) - 1)
+    return positions[self.image_ids[positions] == image_ids]
+
+  def annotation_positions(self,
+                           image_ids=None,
+                           category_ids=None,
+                           area_range=None,
+                           iscrowd=None):
+    """Returns the positions of the annotations matching all given filters."""
+    offsets = self._array('annotation_offsets')
+    if image_ids is None:
+      positions = np.arange(offsets[-1])
+    else:
+      image_positions = self.image_positions(image_ids)
+      positions = [np.arange(offsets[i], offsets[i + 1])
+                   for i in image_positions]
+      positions = np.concatenate(positions) if positions else np.zeros(
+          [0], np.int64)
+    if category_ids is not None:
+      positions = positions[
+          np.isin(self._array('category_ids')[positions], category_ids)]
+    if area_range is not None:
+      areas = self._array('areas')[positions]
+      positions = positions[(areas > area_range[0]) & (areas < area_range[1])]
+    if iscrowd is not None:
+      positions = positions[self._array('is_crowds')[positions] == iscrowd]
+    return positions
+
+  def annotation_ids(self, positions):
+    return self._array('annotation_ids')[positions]
+
+  def annotation_image_ids(self, positions):
+    offsets = self._array('annotation_offsets')
+    return self.image_ids[
+        np.searchsorted(offsets, positions, side='right') - 1]
+
+  def positions_of_annotation_ids(self, annotation_ids):
+    """Returns the positions of the given annotation ids."""
+    ids = self._array('annotation_ids')
+    order = self._array('annotation_order')
+    annotation_ids = np.asarray(annotation_ids, np.int64)
+    if not len(ids):
+      if annotation_ids.size:
+        raise KeyError('Unknown annotation ids.')
+      return np.zeros(annotation_ids.shape, np.int64)
+    sorted_positions = np.searchsorted(ids[order], annotation_ids)
+    positions = order[np.minimum(sorted_positions, len(ids) - 1)]
+    if np.any(ids[positions] != annotation_ids):
+      raise KeyError('Unknown annotation ids.')
+    return positions
+
+  def annotation(self, position):
+    """Materializes the annotation at `position` as a COCO dictionary."""
+    offsets = self._array('annotation_offsets')
+    image_position = np.searchsorted(offsets, position, side='right') - 1
+    ann = {
+        'id': int(self._array('annotation_ids')[position]),
+        'image_id': int(self.image_ids[image_position]),
+        'category_id': int(self._array('category_ids')[position]),
+        'bbox': [float(x) for x in self._array('boxes')[position]],
+        'area': float(self._array('areas')[position]),
+        'iscrowd': int(self._array('is_crowds')[position]),
+    }
+    rle_offsets = self._array('rle_offsets')
+    start, end = rle_offsets[position], rle_offsets[position + 1]
+    if end > start:
+      ann['segmentation'] = {
+          'size': [int(self._array('heights')[image_position]),
+                   int(self._array('widths')[image_position])],
+          'counts': self._array('rle_counts')[start:end].tobytes(),
+      }
+    return ann
+
+
 class COCOWrapper(coco.COCO):
   """COCO wrapper class.
 
@@ -43,9 +266,16 @@ class COCOWrapper(coco.COCO):
        dictionary.
     3. Support loading the prediction results using the external annotation
        dictionary.
+    4. Support lazily loading the ground-truth from a ground-truth index
+       written by `write_groundtruth_index`, materializing annotations only
+       when they are queried.
   """
 
-  def __init__(self, eval_type='box', annotation_file=None, gt_dataset=None):
+  def __init__(self,
+               eval_type='box',
+               annotation_file=None,
+               gt_dataset=None,
+               groundtruth_index=None):
     """Instantiates a COCO-style API object.
 
     Args:
@@ -53,20 +283,74 @@ class COCOWrapper(coco.COCO):
       annotation_file: a JSON file that stores annotations of the eval dataset.
         This is required if `gt_dataset` is not provided.
       gt_dataset: the ground-truth eval datatset in COCO API format.
+      groundtruth_index: a ground-truth index directory written by
+        `write_groundtruth_index`.
     """
-    if ((annotation_file and gt_dataset) or
-        ((not annotation_file) and (not gt_dataset))):
-      raise ValueError('One and only one of `annotation_file` and `gt_dataset` '
-                       'needs to be specified.')
+    sources = [annotation_file, gt_dataset, groundtruth_index]
+    if sum(1 for source in sources if source) != 1:
+      raise ValueError('One and only one of `annotation_file`, `gt_dataset` '
+                       'and `groundtruth_index` needs to be specified.')
 
     if eval_type not in ['box', 'mask']:
       raise ValueError('The `eval_type` can only be either `box` or `mask`.')
 
+    self._groundtruth_index = None
     coco.COCO.__init__(self, annotation_file=annotation_file)
     self._eval_type = eval_type
     if gt_dataset:
       self.dataset = gt_dataset
       self.createIndex()
+    if groundtruth_index:
+      self._groundtruth_index = COCOGroundtruthIndex(groundtruth_index)
+      self.dataset = {
+          'images': self._groundtruth_index.images(),
+          'categories': self._groundtruth_index.categories,
+      }
+      self.createIndex()
+
+  def createIndex(self):
+    if self._groundtruth_index is None:
+      super().createIndex()
+      return
+    # Only images and categories are indexed; annotations stay in the
+    # ground-truth index until they are queried.
+    self.imgs = {image['id']: image for image in self.dataset['images']}
+    self.cats = {cat['id']: cat for cat in self.dataset['categories']}
+
+  def getAnnIds(self, imgIds=None, catIds=None, areaRng=None, iscrowd=None):
+    if self._groundtruth_index is None:
+      return super().getAnnIds(
+          imgIds=_default_to_list(imgIds), catIds=_default_to_list(catIds),
+          areaRng=_default_to_list(areaRng), iscrowd=iscrowd)
+    positions = self._groundtruth_index.annotation_positions(
+        image_ids=_as_list_or_none(imgIds),
+        category_ids=_as_list_or_none(catIds),
+        area_range=_as_list_or_none(areaRng),
+        iscrowd=iscrowd)
+    return self._groundtruth_index.annotation_ids(positions).tolist()
+
+  def getImgIds(self, imgIds=None, catIds=None):
+    if self._groundtruth_index is None:
+      return super().getImgIds(
+          imgIds=_default_to_list(imgIds), catIds=_default_to_list(catIds))
+    image_ids = _as_list_or_none(imgIds)
+    if image_ids is None:
+      image_ids = list(self.imgs.keys())
+    image_ids = set(image_ids)
+    # Same as pycocotools, keeps the images that contain every category.
+    for category_id in _as_list_or_none(catIds) or []:
+      positions = self._groundtruth_index.annotation_positions(
+          category_ids=[category_id])
+      image_ids &= set(
+          self._groundtruth_index.annotation_image_ids(positions).tolist())
+    return list(image_ids)
+
+  def loadAnns(self, ids=None):
+    if self._groundtruth_index is None:
+      return super().loadAnns(ids=_default_to_list(ids))
+    positions = self._groundtruth_index.positions_of_annotation_ids(
+        _as_list_or_none(ids) or [])
+    return [self._groundtruth_index.annotation(p) for p in positions]
 
   def loadRes(self, predictions):
     """Loads result file and return a result api object.
@@ -105,6 +389,20 @@ class COCOWrapper(coco.COCO):
     return res
 
 
+def _default_to_list(ids):
+  """Returns `ids`, or the pycocotools default `[]` if it is None."""
+  return [] if ids is None else ids
+
+
+def _as_list_or_none(ids):
+  """Returns `ids` as a list, or None if no ids are given."""
+  if ids is None:
+    return None
+  if isinstance(ids, (list, tuple, np.ndarray)):
+    return list(ids) if len(ids) else None
+  return [ids]
+
+
 def convert_predictions_to_coco_annotations(predictions):
   """Converts a batch of predictions to annotations in COCO format.
 
@@ -405,16 +703,27 @@ def scan_and_generator_annotation_file(file_pattern: str,
                                        num_samples: int,
                                        include_mask: bool,
                                        annotation_file: str,
-                                       regenerate_source_id: bool = False):
+                                       regenerate_source_id: bool = False,
+                                       as_groundtruth_index: bool = False):
   """Scans and generate the COCO-style annotation JSON file given a dataset."""
   groundtruth_generator = COCOGroundtruthGenerator(
       file_pattern, file_type, num_samples, include_mask, regenerate_source_id)
-  generate_annotation_file(groundtruth_generator, annotation_file)
+  generate_annotation_file(groundtruth_generator, annotation_file,
+                           as_groundtruth_index)
 
 
 def generate_annotation_file(groundtruth_generator,
-                             annotation_file):
-  """Generates COCO-style annotation JSON file given a ground-truth generator."""
+                             annotation_file,
+                             as_groundtruth_index=False):
+  """Generates COCO-style annotation JSON file given a ground-truth generator.
+
+  Args:
+    groundtruth_generator: a `COCOGroundtruthGenerator`.
+    annotation_file: the JSON file, or the ground-truth index directory if
+      `as_groundtruth_index` is True, to write.
+    as_groundtruth_index: whether to write a ground-truth index that can be
+      loaded lazily by `COCOWrapper` instead of a JSON file.
+  """
   groundtruths = {}
   logging.info('Loading groundtruth annotations from dataset to memory...')
   for i, groundtruth in enumerate(groundtruth_generator()):
@@ -428,6 +737,12 @@ def generate_annotation_file(groundtruth_generator,
         groundtruths[k].append(v)
   gt_dataset = convert_groundtruths_to_coco_dataset(groundtruths)
 
+  if as_groundtruth_index:
+    logging.info('Saving groundtruth annotations to the index directory...')
+    write_groundtruth_index(gt_dataset, annotation_file)
+    logging.info('Done saving the groundtruth index...')
+    return
+
   logging.info('Saving groundtruth annotations to the JSON file...')
   with tf.io.gfile.GFile(annotation_file, 'w') as f:
     f.write(json.dumps(gt_dataset))
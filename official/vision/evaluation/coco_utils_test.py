@@ -14,6 +14,7 @@
 
 """Tests for coco_utils."""
 
+import copy
 import os
 
 import numpy as np
@@ -49,6 +50,83 @@ class CocoUtilsTest(tf.test.TestCase):
         msg='Annotation file {annotation_file} does not exist.',
     )
 
+  def test_scan_and_generator_groundtruth_index(self):
+    num_samples = 4
+    example = tfexample_utils.create_detection_test_example(
+        image_height=64, image_width=64, image_channel=3, num_instances=3
+    )
+    data_file = os.path.join(self.create_tempdir(), 'test.tfrecord')
+    tfexample_utils.dump_to_tfrecord(
+        record_file=data_file, tf_examples=[example] * num_samples
+    )
+    index_dir = os.path.join(self.create_tempdir(), 'groundtruth_index')
+
+    coco_utils.scan_and_generator_annotation_file(
+        file_pattern=data_file,
+        file_type='tfrecord',
+        num_samples=num_samples,
+        include_mask=True,
+        annotation_file=index_dir,
+        as_groundtruth_index=True,
+    )
+
+    self.assertTrue(coco_utils.is_groundtruth_index(index_dir))
+    coco_gt = coco_utils.COCOWrapper(
+        eval_type='mask', groundtruth_index=index_dir)
+    annotations = coco_gt.loadAnns(coco_gt.getAnnIds())
+    self.assertLen(annotations, 3 * num_samples)
+    self.assertIn('segmentation', annotations[0])
+
+  def test_groundtruth_index_matches_gt_dataset(self):
+    gt_dataset = {
+        'images': [
+            {'id': 3, 'height': 40, 'width': 50},
+            {'id': 1, 'height': 30, 'width': 30},
+            {'id': 2, 'height': 20, 'width': 20},
+        ],
+        'categories': [{'id': 1}, {'id': 2}],
+        'annotations': [
+            {'id': 7, 'image_id': 3, 'category_id': 2, 'iscrowd': 0,
+             'bbox': [10., 5., 20., 10.], 'area': 200.,
+             'segmentation': [[10., 5., 30., 5., 30., 15., 10., 15.]]},
+            {'id': 2, 'image_id': 1, 'category_id': 1, 'iscrowd': 0,
+             'bbox': [0., 0., 10., 10.], 'area': 100.,
+             'segmentation': [[0., 0., 10., 0., 10., 10., 0., 10.]]},
+            {'id': 5, 'image_id': 3, 'category_id': 1, 'iscrowd': 1,
+             'bbox': [0., 0., 4., 4.], 'area': 16.,
+             'segmentation': {'size': [40, 50], 'counts': [0, 4, 36, 4, 1956]}},
+        ],
+    }
+    index_dir = os.path.join(self.create_tempdir(), 'groundtruth_index')
+    coco_utils.write_groundtruth_index(gt_dataset, index_dir)
+
+    expected = coco_utils.COCOWrapper(
+        eval_type='mask', gt_dataset=copy.deepcopy(gt_dataset))
+    coco_gt = coco_utils.COCOWrapper(
+        eval_type='mask', groundtruth_index=index_dir)
+
+    self.assertCountEqual(coco_gt.getImgIds(), expected.getImgIds())
+    self.assertCountEqual(coco_gt.getImgIds(catIds=[2]), [3])
+    self.assertCountEqual(coco_gt.getImgIds(catIds=[1, 2]), [3])
+    self.assertCountEqual(coco_gt.getCatIds(), expected.getCatIds())
+    for kwargs in [{}, {'imgIds': [3]}, {'imgIds': 2}, {'catIds': [1]},
+                   {'areaRng': [50, 500]}, {'iscrowd': 0}]:
+      self.assertCountEqual(
+          coco_gt.getAnnIds(**kwargs), expected.getAnnIds(**kwargs))
+
+    annotations = coco_gt.loadAnns([7, 5])
+    self.assertEqual([ann['id'] for ann in annotations], [7, 5])
+    self.assertEqual(annotations[0]['image_id'], 3)
+    self.assertEqual(annotations[0]['bbox'], [10., 5., 20., 10.])
+    self.assertEqual(annotations[1]['iscrowd'], 1)
+    for ann in annotations:
+      self.assertAllEqual(
+          coco_gt.annToMask(ann),
+          expected.annToMask(expected.loadAnns(ann['id'])[0]))
+    for unknown_ids in ([6], [1], [8], [2, 100]):
+      with self.assertRaises(KeyError):
+        coco_gt.loadAnns(unknown_ids)
+
   def test_convert_keypoint_predictions_to_coco_annotations(self):
     batch_size = 1
     max_num_detections = 3
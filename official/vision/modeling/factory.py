@@ -205,7 +205,8 @@ def build_maskrcnn(input_specs: tf_keras.layers.InputSpec,
       nms_version=generator_config.nms_version,
       use_cpu_nms=generator_config.use_cpu_nms,
       soft_nms_sigma=generator_config.soft_nms_sigma,
-      use_sigmoid_probability=generator_config.use_sigmoid_probability)
+      use_sigmoid_probability=generator_config.use_sigmoid_probability,
+      nms_backend=generator_config.nms_backend)
 
   if model_config.include_mask:
     mask_head = instance_heads.MaskHead(
@@ -350,6 +351,7 @@ def build_retinanet(
       return_decoded=generator_config.return_decoded,
       use_class_agnostic_nms=generator_config.use_class_agnostic_nms,
       box_coder_weights=generator_config.box_coder_weights,
+      nms_backend=generator_config.nms_backend,
   )
 
   num_scales = None
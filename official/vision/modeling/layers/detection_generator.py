@@ -748,6 +748,59 @@ def _generate_detections_batched(
   return nmsed_boxes, nmsed_scores, nmsed_classes, valid_detections
 
 
+def _generate_detections_auto(
+    boxes: tf.Tensor,
+    scores: tf.Tensor,
+    pre_nms_top_k: int,
+    pre_nms_score_threshold: float,
+    nms_iou_threshold: float,
+    max_num_detections: int,
+    nms_backend: Optional[str] = None,
+    use_cpu_nms: bool = False,
+):
+  """Generates detections with the backend chosen for the running device.
+
+  Args:
+    boxes: A `tf.Tensor` with shape `[batch_size, N, num_classes, 4]` or
+      `[batch_size, N, 1, 4]`, which box predictions on all feature levels. The
+      N is the number of total anchors on all levels.
+    scores: A `tf.Tensor` with shape `[batch_size, N, num_classes]`, which
+      stacks class probability on all feature levels.
+    pre_nms_top_k: An `int` number of top candidate detections before NMS.
+    pre_nms_score_threshold: A `float` representing the threshold for deciding
+      when to remove boxes based on score.
+    nms_iou_threshold: A `float` representing the threshold for deciding whether
+      boxes overlap too much with respect to IOU.
+    max_num_detections: A `scalar` representing maximum number of boxes retained
+      over all classes.
+    nms_backend: One of `nms.NMS_BACKENDS`. If None, it is selected by device.
+    use_cpu_nms: A `bool` of whether NMS is forced to run on CPU, which is
+      taken into account when selecting the backend.
+
+  Returns:
+    nms_boxes: A `float` tf.Tensor of shape [batch_size, max_num_detections, 4]
+      representing top detected boxes in [y1, x1, y2, x2].
+    nms_scores: A `float` tf.Tensor of shape [batch_size, max_num_detections]
+      representing sorted confidence scores for detected boxes.
+    nms_classes: An `int` tf.Tensor of shape [batch_size, max_num_detections]
+      representing classes for detected boxes.
+    valid_detections: An `int` tf.Tensor of shape [batch_size] only the top
+      `valid_detections` boxes are valid detections.
+  """
+  if nms_backend is None:
+    nms_backend = nms.select_nms_backend('CPU' if use_cpu_nms else None)
+  with tf.name_scope('generate_detections'):
+    return nms.batched_non_max_suppression(
+        boxes,
+        scores,
+        max_num_detections=max_num_detections,
+        nms_iou_threshold=nms_iou_threshold,
+        pre_nms_score_threshold=pre_nms_score_threshold,
+        pre_nms_top_k=pre_nms_top_k,
+        backend=nms_backend,
+    )
+
+
 def _generate_detections_tflite_implements_signature(
     config: Dict[str, Any]
 ) -> str:
@@ -928,6 +981,7 @@ class DetectionGenerator(tf_keras.layers.Layer):
       use_cpu_nms: bool = False,
       soft_nms_sigma: Optional[float] = None,
       use_sigmoid_probability: bool = False,
+      nms_backend: Optional[str] = None,
       **kwargs,
   ):
     """Initializes a detection generator.
@@ -943,12 +997,15 @@ class DetectionGenerator(tf_keras.layers.Layer):
       nms_iou_threshold: A `float` in [0, 1], the NMS IoU threshold.
       max_num_detections: An `int` of the final number of total detections to
         generate.
-      nms_version: A string of `batched`, `v1` or `v2` specifies NMS version.
+      nms_version: A string of `batched`, `v1`, `v2` or `auto` specifies NMS
+        version.
       use_cpu_nms: A `bool` of whether or not enforce NMS to run on CPU.
       soft_nms_sigma: A `float` representing the sigma parameter for Soft NMS.
         When soft_nms_sigma=0.0, we fall back to standard NMS.
       use_sigmoid_probability: A `bool`, if true, use sigmoid to get
         probability, otherwise use softmax.
+      nms_backend: For `auto` NMS, one of `tiled`, `offset` or
+        `class_agnostic`. When None, the backend is selected by device.
       **kwargs: Additional keyword arguments passed to Layer.
     """
     self._config_dict = {
@@ -962,6 +1019,9 @@ class DetectionGenerator(tf_keras.layers.Layer):
         'soft_nms_sigma': soft_nms_sigma,
         'use_sigmoid_probability': use_sigmoid_probability,
     }
+    # Don't store if were not defined
+    if nms_backend is not None:
+      self._config_dict['nms_backend'] = nms_backend
     super(DetectionGenerator, self).__init__(**kwargs)
 
   def __call__(
@@ -1100,6 +1160,21 @@ class DetectionGenerator(tf_keras.layers.Layer):
                 max_num_detections=self._config_dict['max_num_detections'],
             )
         )
+      elif self._config_dict['nms_version'] == 'auto':
+        (nmsed_boxes, nmsed_scores, nmsed_classes, valid_detections) = (
+            _generate_detections_auto(
+                decoded_boxes,
+                box_scores,
+                pre_nms_top_k=self._config_dict['pre_nms_top_k'],
+                pre_nms_score_threshold=self._config_dict[
+                    'pre_nms_score_threshold'
+                ],
+                nms_iou_threshold=self._config_dict['nms_iou_threshold'],
+                max_num_detections=self._config_dict['max_num_detections'],
+                nms_backend=self._config_dict.get('nms_backend'),
+                use_cpu_nms=self._config_dict['use_cpu_nms'],
+            )
+        )
       else:
         raise ValueError(
             'NMS version {} not supported.'.format(
@@ -1145,6 +1220,7 @@ class MultilevelDetectionGenerator(tf_keras.layers.Layer):
       return_decoded: Optional[bool] = None,
       use_class_agnostic_nms: Optional[bool] = None,
       box_coder_weights: Optional[List[float]] = None,
+      nms_backend: Optional[str] = None,
       **kwargs,
   ):
     """Initializes a multi-level detection generator.
@@ -1160,7 +1236,8 @@ class MultilevelDetectionGenerator(tf_keras.layers.Layer):
       nms_iou_threshold: A `float` in [0, 1], the NMS IoU threshold.
       max_num_detections: An `int` of the final number of total detections to
         generate.
-      nms_version: A string of `batched`, `v1` or `v2` specifies NMS version
+      nms_version: A string of `batched`, `v1`, `v2`, `v3`, `tflite` or `auto`
+        specifies NMS version
       use_cpu_nms: A `bool` of whether or not enforce NMS to run on CPU.
       soft_nms_sigma: A `float` representing the sigma parameter for Soft NMS.
         When soft_nms_sigma=0.0, we fall back to standard NMS.
@@ -1183,18 +1260,21 @@ class MultilevelDetectionGenerator(tf_keras.layers.Layer):
         h, and w when encoding box coordinates. If set to None, does not perform
         scaling. For Faster RCNN, the open-source implementation recommends
         using [10.0, 10.0, 5.0, 5.0].
+      nms_backend: For `auto` NMS, one of `tiled`, `offset` or
+        `class_agnostic`. When None, the backend is selected by device, or set
+        to `class_agnostic` if `use_class_agnostic_nms` is True.
       **kwargs: Additional keyword arguments passed to Layer.
 
     Raises:
       ValueError: If `use_class_agnostic_nms` is required by `nms_version` is
-      not specified as `v2`.
+      not specified as `v2` or `auto`.
     """
-    if use_class_agnostic_nms and nms_version != 'v2':
+    if use_class_agnostic_nms and nms_version not in ('v2', 'auto'):
       raise ValueError(
           'If not using TFLite custom NMS, `use_class_agnostic_nms` can only be'
-          ' enabled for NMS v2 for now, but NMS {} is used! If you are using'
-          ' TFLite NMS, please configure TFLite custom NMS for class-agnostic'
-          ' NMS.'.format(nms_version)
+          ' enabled for NMS v2 or auto for now, but NMS {} is used! If you are'
+          ' using TFLite NMS, please configure TFLite custom NMS for'
+          ' class-agnostic NMS.'.format(nms_version)
       )
     self._config_dict = {
         'apply_nms': apply_nms,
@@ -1216,6 +1296,8 @@ class MultilevelDetectionGenerator(tf_keras.layers.Layer):
       )
     if nms_v3_refinements is not None:
       self._config_dict['nms_v3_refinements'] = nms_v3_refinements
+    if nms_backend is not None:
+      self._config_dict['nms_backend'] = nms_backend
 
     if tflite_post_processing_config is not None:
       self._config_dict.update(
@@ -1582,6 +1664,26 @@ class MultilevelDetectionGenerator(tf_keras.layers.Layer):
         )
         # Set `nmsed_attributes` to None for v3.
         nmsed_attributes = {}
+      elif self._config_dict['nms_version'] == 'auto':
+        nms_backend = self._config_dict.get('nms_backend')
+        if nms_backend is None and self._config_dict['use_class_agnostic_nms']:
+          nms_backend = 'class_agnostic'
+        (nmsed_boxes, nmsed_scores, nmsed_classes, valid_detections) = (
+            _generate_detections_auto(
+                boxes,
+                scores,
+                pre_nms_top_k=self._config_dict['pre_nms_top_k'],
+                pre_nms_score_threshold=self._config_dict[
+                    'pre_nms_score_threshold'
+                ],
+                nms_iou_threshold=self._config_dict['nms_iou_threshold'],
+                max_num_detections=self._config_dict['max_num_detections'],
+                nms_backend=nms_backend,
+                use_cpu_nms=self._config_dict['use_cpu_nms'],
+            )
+        )
+        # Set `nmsed_attributes` to None for auto.
+        nmsed_attributes = {}
       else:
         raise ValueError(
             'NMS version {} not supported.'.format(
@@ -47,7 +47,7 @@ class DetectionGeneratorTest(
     parameterized.TestCase, tf.test.TestCase):
 
   @parameterized.product(
-      nms_version=['batched', 'v1', 'v2'],
+      nms_version=['batched', 'v1', 'v2', 'auto'],
       use_cpu_nms=[True, False],
       soft_nms_sigma=[None, 0.1],
       use_sigmoid_probability=[True, False])
@@ -134,6 +134,9 @@ class MultilevelDetectionGeneratorTest(
       ('v2', False, True, None, None, None),
       ('v2', False, False, None, None, None),
       ('v2', False, False, None, None, True),
+      ('auto', False, True, None, None, None),
+      ('auto', False, False, None, None, None),
+      ('auto', False, False, None, None, True),
       ('v1', True, True, 0.0, None, None),
       ('v1', True, False, 0.1, None, None),
       ('v1', True, False, None, None, None),
@@ -14,6 +14,8 @@
 
 """Tensorflow implementation of non max suppression."""
 
+from typing import Optional, Tuple
+
 # Import libraries
 import tensorflow as tf, tf_keras
 
@@ -22,6 +24,13 @@ from official.vision.ops import box_ops
 
 NMS_TILE_SIZE = 512
 
+# Backends supported by `batched_non_max_suppression`.
+#   `tiled`: class-batched tiled while-loop NMS, compiles on TPU.
+#   `offset`: single native NMS per image over class-offset boxes.
+#   `class_agnostic`: top-k pre-filter on the best class per box followed by a
+#     single native NMS per image.
+NMS_BACKENDS = ('tiled', 'offset', 'class_agnostic')
+
 
 def _self_suppression(iou, _, iou_sum):
   batch_size = tf.shape(iou)[0]
@@ -201,3 +210,283 @@ def sorted_non_max_suppression_padded(scores,
       tf.reshape(tf.range(max_output_size), [1, -1]) < tf.reshape(
           output_size, [-1, 1]), scores.dtype)
   return scores, boxes
+
+
+def select_nms_backend(device_type: Optional[str] = None) -> str:
+  """Selects the `batched_non_max_suppression` backend for a device type.
+
+  Args:
+    device_type: An optional device type string such as `TPU`, `GPU` or `CPU`.
+      If None, `TPU` is assumed when a logical TPU device is visible, otherwise
+      `CPU`.
+
+  Returns:
+    `tiled` for TPU, whose compiler cannot lower the native NMS kernels, and
+    `offset` for every other device.
+  """
+  if device_type is None:
+    device_type = 'TPU' if tf.config.list_logical_devices('TPU') else 'CPU'
+  if device_type.upper() == 'TPU':
+    return 'tiled'
+  return 'offset'
+
+
+def _native_non_max_suppression_padded(
+    boxes: tf.Tensor,
+    scores: tf.Tensor,
+    max_output_size: int,
+    iou_threshold: float,
+    score_threshold: float,
+) -> Tuple[tf.Tensor, tf.Tensor]:
+  """Runs the native NMS kernel on every image of a batch.
+
+  Args:
+    boxes: A `tf.Tensor` of shape [batch_size, K, 4].
+    scores: A `tf.Tensor` of shape [batch_size, K].
+    max_output_size: An `int` of the maximum number of selected boxes.
+    iou_threshold: A `float` of the IoU threshold.
+    score_threshold: A `float`. Boxes scoring below it are never selected.
+
+  Returns:
+    indices: An `int32` tf.Tensor of shape [batch_size, max_output_size] of
+      selected indices into K, padded with 0.
+    valid_detections: An `int32` tf.Tensor of shape [batch_size].
+  """
+
+  def _single_image_nms(args):
+    image_boxes, image_scores = args
+    selected_indices, valid_outputs = tf.raw_ops.NonMaxSuppressionV4(
+        boxes=image_boxes,
+        scores=image_scores,
+        max_output_size=max_output_size,
+        iou_threshold=iou_threshold,
+        score_threshold=score_threshold,
+        pad_to_max_output_size=True,
+    )
+    return selected_indices, valid_outputs
+
+  return tf.map_fn(
+      _single_image_nms,
+      elems=(boxes, scores),
+      fn_output_signature=(
+          tf.TensorSpec([max_output_size], tf.int32),
+          tf.TensorSpec([], tf.int32),
+      ),
+  )
+
+
+def _batched_nms_tiled(
+    boxes: tf.Tensor,
+    scores: tf.Tensor,
+    max_num_detections: int,
+    nms_iou_threshold: float,
+    pre_nms_score_threshold: float,
+    pre_nms_top_k: int,
+) -> Tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]:
+  """Class-aware NMS folding classes into the batch of the tiled NMS."""
+  batch_size, num_anchors, num_classes_for_box, _ = boxes.get_shape().as_list()
+  if batch_size is None:
+    batch_size = tf.shape(boxes)[0]
+  num_classes = scores.get_shape().as_list()[-1]
+  k = min(num_anchors, pre_nms_top_k)
+
+  # [batch_size, num_classes, k]
+  scores, indices = tf.nn.top_k(
+      tf.transpose(scores, [0, 2, 1]), k=k, sorted=True
+  )
+  # [batch_size, num_classes, num_anchors, 4]
+  boxes = tf.transpose(boxes, [0, 2, 1, 3])
+  if num_classes_for_box == 1:
+    boxes = tf.gather(boxes[:, 0], indices, axis=1, batch_dims=1)
+  else:
+    boxes = tf.gather(boxes, indices, axis=2, batch_dims=2)
+
+  boxes, scores = box_ops.filter_boxes_by_scores(
+      boxes, scores, min_score_threshold=pre_nms_score_threshold
+  )
+  # One tiled NMS call for all classes of all images.
+  nmsed_scores, nmsed_boxes = sorted_non_max_suppression_padded(
+      tf.reshape(tf.cast(scores, tf.float32), [-1, k]),
+      tf.reshape(tf.cast(boxes, tf.float32), [-1, k, 4]),
+      max_num_detections,
+      iou_threshold=nms_iou_threshold,
+  )
+  nmsed_scores = tf.reshape(
+      nmsed_scores, [batch_size, num_classes * max_num_detections]
+  )
+  nmsed_boxes = tf.reshape(
+      nmsed_boxes, [batch_size, num_classes * max_num_detections, 4]
+  )
+  nmsed_classes = tf.tile(
+      tf.repeat(tf.range(num_classes), max_num_detections)[tf.newaxis],
+      [batch_size, 1],
+  )
+
+  nmsed_scores, indices = tf.nn.top_k(
+      nmsed_scores, k=max_num_detections, sorted=True
+  )
+  nmsed_boxes = tf.gather(nmsed_boxes, indices, batch_dims=1)
+  nmsed_classes = tf.gather(nmsed_classes, indices, batch_dims=1)
+  valid_detections = tf.reduce_sum(
+      tf.cast(tf.greater(nmsed_scores, 0.0), tf.int32), axis=1
+  )
+  return nmsed_boxes, nmsed_scores, nmsed_classes, valid_detections
+
+
+def _batched_nms_native(
+    boxes: tf.Tensor,
+    scores: tf.Tensor,
+    max_num_detections: int,
+    nms_iou_threshold: float,
+    pre_nms_score_threshold: float,
+    pre_nms_top_k: int,
+    class_agnostic: bool,
+) -> Tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]:
+  """Runs one native NMS per image for all classes at once."""
+  _, num_anchors, num_classes_for_box, _ = boxes.get_shape().as_list()
+  num_classes = scores.get_shape().as_list()[-1]
+
+  if class_agnostic:
+    # Keeps only the best class of every box.
+    candidate_scores, candidate_classes = tf.nn.top_k(scores, k=1)
+    candidate_scores = candidate_scores[..., 0]
+    candidate_classes = candidate_classes[..., 0]
+    if num_classes_for_box > 1:
+      candidate_boxes = tf.gather(
+          boxes, candidate_classes, axis=2, batch_dims=2
+      )
+    else:
+      candidate_boxes = boxes[:, :, 0]
+    k = min(num_anchors, pre_nms_top_k)
+    candidate_scores, indices = tf.nn.top_k(candidate_scores, k=k, sorted=True)
+    candidate_classes = tf.gather(candidate_classes, indices, batch_dims=1)
+    candidate_boxes = tf.gather(candidate_boxes, indices, batch_dims=1)
+  else:
+    # Every (box, class) pair is a candidate.
+    k = min(num_anchors * num_classes, pre_nms_top_k)
+    candidate_scores, indices = tf.nn.top_k(
+        tf.reshape(scores, [-1, num_anchors * num_classes]), k=k, sorted=True
+    )
+    anchor_indices = indices // num_classes
+    candidate_classes = indices % num_classes
+    if num_classes_for_box > 1:
+      candidate_boxes = tf.gather(
+          tf.reshape(boxes, [-1, num_anchors * num_classes, 4]),
+          indices,
+          batch_dims=1,
+      )
+    else:
+      candidate_boxes = tf.gather(boxes[:, :, 0], anchor_indices, batch_dims=1)
+
+  candidate_boxes = tf.cast(candidate_boxes, tf.float32)
+  candidate_scores = tf.cast(candidate_scores, tf.float32)
+  if class_agnostic:
+    nms_boxes = candidate_boxes
+  else:
+    # Shifts boxes of different classes apart so that they never overlap and a
+    # single NMS is equivalent to a per-class NMS.
+    offset = tf.reduce_max(
+        tf.abs(candidate_boxes), axis=[1, 2], keepdims=True
+    ) + 1.0
+    nms_boxes = candidate_boxes + offset * tf.cast(
+        candidate_classes[..., tf.newaxis], tf.float32
+    )
+
+  nmsed_indices, valid_detections = _native_non_max_suppression_padded(
+      nms_boxes,
+      candidate_scores,
+      max_num_detections,
+      nms_iou_threshold,
+      pre_nms_score_threshold,
+  )
+  nmsed_boxes = tf.gather(candidate_boxes, nmsed_indices, batch_dims=1)
+  nmsed_scores = tf.gather(candidate_scores, nmsed_indices, batch_dims=1)
+  nmsed_classes = tf.gather(candidate_classes, nmsed_indices, batch_dims=1)
+
+  # Sets the padded boxes, scores, and classes to 0.
+  padding_mask = tf.reshape(tf.range(max_num_detections), [1, -1]) < tf.reshape(
+      valid_detections, [-1, 1]
+  )
+  nmsed_boxes *= tf.cast(padding_mask[..., tf.newaxis], nmsed_boxes.dtype)
+  nmsed_scores *= tf.cast(padding_mask, nmsed_scores.dtype)
+  nmsed_classes *= tf.cast(padding_mask, nmsed_classes.dtype)
+  return nmsed_boxes, nmsed_scores, nmsed_classes, valid_detections
+
+
+def batched_non_max_suppression(
+    boxes: tf.Tensor,
+    scores: tf.Tensor,
+    max_num_detections: int = 100,
+    nms_iou_threshold: float = 0.5,
+    pre_nms_score_threshold: float = 0.05,
+    pre_nms_top_k: int = 5000,
+    backend: Optional[str] = None,
+) -> Tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]:
+  """Applies multi-class NMS to a batch of detections with a chosen backend.
+
+  All backends share the same inputs and outputs so they can be swapped at
+  export time:
+    * `tiled` runs `sorted_non_max_suppression_padded` once over all classes of
+      all images. It is the only backend that compiles on TPU.
+    * `offset` flattens (box, class) pairs, keeps the `pre_nms_top_k` best and
+      shifts each class into its own coordinate range, so a single native NMS
+      per image replaces the per-class loop. It is the fastest on CPU and GPU.
+    * `class_agnostic` keeps the best class of each box, pre-filters the
+      `pre_nms_top_k` best boxes and suppresses across classes.
+
+  Args:
+    boxes: A `tf.Tensor` with shape `[batch_size, N, num_classes, 4]` or
+      `[batch_size, N, 1, 4]` of box predictions.
+    scores: A `tf.Tensor` with shape `[batch_size, N, num_classes]` of class
+      probabilities.
+    max_num_detections: An `int` of the number of boxes retained over all
+      classes.
+    nms_iou_threshold: A `float` representing the threshold for deciding whether
+      boxes overlap too much with respect to IOU.
+    pre_nms_score_threshold: A `float` representing the threshold for deciding
+      when to remove boxes based on score.
+    pre_nms_top_k: An `int` of the number of top candidates kept before NMS.
+      It applies per class for `tiled` and over all (box, class) pairs for
+      `offset`.
+    backend: One of `NMS_BACKENDS`, or None to use `select_nms_backend()`.
+
+  Returns:
+    nms_boxes: A `float` tf.Tensor of shape [batch_size, max_num_detections, 4]
+      representing top detected boxes in [y1, x1, y2, x2].
+    nms_scores: A `float` tf.Tensor of shape [batch_size, max_num_detections]
+      representing sorted confidence scores for detected boxes.
+    nms_classes: An `int` tf.Tensor of shape [batch_size, max_num_detections]
+      representing classes for detected boxes.
+    valid_detections: An `int` tf.Tensor of shape [batch_size] only the top
+      `valid_detections` boxes are valid detections.
+
+  Raises:
+    ValueError: If `backend` is not supported.
+  """
+  if backend is None:
+    backend = select_nms_backend()
+  with tf.name_scope('batched_non_max_suppression'):
+    if backend == 'tiled':
+      return _batched_nms_tiled(
+          boxes,
+          scores,
+          max_num_detections=max_num_detections,
+          nms_iou_threshold=nms_iou_threshold,
+          pre_nms_score_threshold=pre_nms_score_threshold,
+          pre_nms_top_k=pre_nms_top_k,
+      )
+    if backend in ('offset', 'class_agnostic'):
+      return _batched_nms_native(
+          boxes,
+          scores,
+          max_num_detections=max_num_detections,
+          nms_iou_threshold=nms_iou_threshold,
+          pre_nms_score_threshold=pre_nms_score_threshold,
+          pre_nms_top_k=pre_nms_top_k,
+          class_agnostic=backend == 'class_agnostic',
+      )
+  raise ValueError(
+      'NMS backend {} not supported. Must be one of {}.'.format(
+          backend, NMS_BACKENDS
+      )
+  )
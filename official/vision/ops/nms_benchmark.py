@@ -0,0 +1,83 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmarks the NMS backends of `nms.batched_non_max_suppression`.
+
+Example usage:
+python3 -m official.vision.ops.nms_benchmark \
+  --batch_size=8 --num_anchors=49104 --num_classes=90
+"""
+
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import numpy as np
+import tensorflow as tf, tf_keras
+
+from official.vision.ops import nms
+
+_BATCH_SIZE = flags.DEFINE_integer('batch_size', 8, 'Batch size.')
+_NUM_ANCHORS = flags.DEFINE_integer(
+    'num_anchors', 49104, 'Number of anchors per image.')
+_NUM_CLASSES = flags.DEFINE_integer('num_classes', 90, 'Number of classes.')
+_PRE_NMS_TOP_K = flags.DEFINE_integer(
+    'pre_nms_top_k', 5000, 'Number of candidates kept before NMS.')
+_MAX_NUM_DETECTIONS = flags.DEFINE_integer(
+    'max_num_detections', 100, 'Number of detections kept after NMS.')
+_BACKENDS = flags.DEFINE_list(
+    'backends', list(nms.NMS_BACKENDS), 'NMS backends to benchmark.')
+_NUM_ITERS = flags.DEFINE_integer('num_iters', 20, 'Number of timed runs.')
+_DEVICE = flags.DEFINE_string('device', 'cpu:0', 'Device to run NMS on.')
+
+
+def benchmark_backend(backend: str, boxes: tf.Tensor, scores: tf.Tensor,
+                      num_iters: int) -> float:
+  """Returns the mean latency of one NMS call in milliseconds."""
+
+  @tf.function
+  def run_nms(boxes, scores):
+    return nms.batched_non_max_suppression(
+        boxes,
+        scores,
+        max_num_detections=_MAX_NUM_DETECTIONS.value,
+        pre_nms_top_k=_PRE_NMS_TOP_K.value,
+        backend=backend)
+
+  # Traces and warms up.
+  tf.nest.map_structure(lambda t: t.numpy(), run_nms(boxes, scores))
+  start = time.perf_counter()
+  for _ in range(num_iters):
+    tf.nest.map_structure(lambda t: t.numpy(), run_nms(boxes, scores))
+  return (time.perf_counter() - start) / num_iters * 1000
+
+
+def main(_):
+  rng = np.random.RandomState(0)
+  shape = (_BATCH_SIZE.value, _NUM_ANCHORS.value, 1)
+  yx = rng.uniform(0, 1024, size=shape + (2,))
+  hw = rng.uniform(8, 256, size=shape + (2,))
+  with tf.device(_DEVICE.value):
+    boxes = tf.constant(np.concatenate([yx, yx + hw], axis=-1), tf.float32)
+    scores = tf.constant(
+        rng.beta(0.5, 8, size=shape[:2] + (_NUM_CLASSES.value,)), tf.float32)
+    for backend in _BACKENDS.value:
+      latency = benchmark_backend(backend, boxes, scores, _NUM_ITERS.value)
+      logging.info('backend=%s device=%s batch_size=%d: %.2f ms/batch',
+                   backend, _DEVICE.value, _BATCH_SIZE.value, latency)
+
+
+if __name__ == '__main__':
+  app.run(main)
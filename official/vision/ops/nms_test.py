@@ -0,0 +1,117 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for nms.py."""
+
+from absl.testing import parameterized
+import numpy as np
+import tensorflow as tf, tf_keras
+
+from official.vision.ops import nms
+
+
+def _random_detections(batch_size, num_boxes, num_classes, num_box_classes):
+  rng = np.random.RandomState(0)
+  centers = rng.uniform(0, 100, size=(batch_size, num_boxes, 1, 2))
+  sizes = rng.uniform(5, 30, size=(batch_size, num_boxes, num_box_classes, 2))
+  boxes = np.concatenate([centers - sizes / 2, centers + sizes / 2], axis=-1)
+  scores = rng.uniform(0, 1, size=(batch_size, num_boxes, num_classes))
+  return (tf.constant(boxes, dtype=tf.float32),
+          tf.constant(scores, dtype=tf.float32))
+
+
+class BatchedNonMaxSuppressionTest(parameterized.TestCase, tf.test.TestCase):
+
+  @parameterized.parameters(('TPU', 'tiled'), ('tpu', 'tiled'),
+                            ('GPU', 'offset'), ('CPU', 'offset'))
+  def test_select_nms_backend(self, device_type, expected_backend):
+    self.assertEqual(nms.select_nms_backend(device_type), expected_backend)
+
+  @parameterized.product(
+      backend=nms.NMS_BACKENDS, num_box_classes=[1, 3], batch_size=[1, 2])
+  def test_output_shapes(self, backend, num_box_classes, batch_size):
+    boxes, scores = _random_detections(
+        batch_size, num_boxes=50, num_classes=3,
+        num_box_classes=num_box_classes)
+    nmsed_boxes, nmsed_scores, nmsed_classes, valid_detections = (
+        nms.batched_non_max_suppression(
+            boxes, scores, max_num_detections=10, backend=backend))
+    self.assertEqual(nmsed_boxes.shape, (batch_size, 10, 4))
+    self.assertEqual(nmsed_scores.shape, (batch_size, 10))
+    self.assertEqual(nmsed_classes.shape, (batch_size, 10))
+    self.assertEqual(valid_detections.shape, (batch_size,))
+    self.assertAllInRange(nmsed_classes, 0, 2)
+
+  @parameterized.parameters(1, 3)
+  def test_offset_matches_per_class_nms(self, num_box_classes):
+    boxes, scores = _random_detections(
+        2, num_boxes=64, num_classes=3, num_box_classes=num_box_classes)
+    max_num_detections = 20
+    nmsed_boxes, nmsed_scores, nmsed_classes, valid_detections = (
+        nms.batched_non_max_suppression(
+            boxes, scores, max_num_detections=max_num_detections,
+            nms_iou_threshold=0.5, pre_nms_score_threshold=0.3,
+            backend='offset'))
+    expected = tf.image.combined_non_max_suppression(
+        boxes, scores, max_output_size_per_class=max_num_detections,
+        max_total_size=max_num_detections, iou_threshold=0.5,
+        score_threshold=0.3, clip_boxes=False)
+
+    self.assertAllEqual(valid_detections, expected.valid_detections)
+    self.assertAllClose(nmsed_scores, expected.nmsed_scores)
+    self.assertAllClose(nmsed_boxes, expected.nmsed_boxes)
+    self.assertAllEqual(nmsed_classes,
+                        tf.cast(expected.nmsed_classes, tf.int32))
+
+  def test_tiled_matches_offset(self):
+    boxes, scores = _random_detections(
+        1, num_boxes=30, num_classes=2, num_box_classes=1)
+    results = {}
+    for backend in ('tiled', 'offset'):
+      results[backend] = nms.batched_non_max_suppression(
+          boxes, scores, max_num_detections=15, nms_iou_threshold=0.5,
+          pre_nms_score_threshold=0.2, backend=backend)
+    for tiled, offset in zip(results['tiled'], results['offset']):
+      self.assertAllClose(tiled, offset)
+
+  def test_class_agnostic_suppresses_across_classes(self):
+    boxes = tf.constant([[[[0., 0., 10., 10.]], [[0., 0., 10., 9.]],
+                          [[20., 20., 30., 30.]]]])
+    scores = tf.constant([[[0.9, 0.1], [0.1, 0.8], [0.7, 0.2]]])
+    nmsed_boxes, nmsed_scores, nmsed_classes, valid_detections = (
+        nms.batched_non_max_suppression(
+            boxes, scores, max_num_detections=4,
+            pre_nms_score_threshold=0.5, backend='class_agnostic'))
+    self.assertAllEqual(valid_detections, [2])
+    self.assertAllClose(nmsed_scores, [[0.9, 0.7, 0., 0.]])
+    self.assertAllEqual(nmsed_classes, [[0, 0, 0, 0]])
+    self.assertAllClose(nmsed_boxes[0, :2],
+                        [[0., 0., 10., 10.], [20., 20., 30., 30.]])
+
+    _, _, offset_classes, offset_valid_detections = (
+        nms.batched_non_max_suppression(
+            boxes, scores, max_num_detections=4,
+            pre_nms_score_threshold=0.5, backend='offset'))
+    self.assertAllEqual(offset_valid_detections, [3])
+    self.assertAllEqual(offset_classes, [[0, 1, 0, 0]])
+
+  def test_unsupported_backend(self):
+    boxes, scores = _random_detections(
+        1, num_boxes=8, num_classes=2, num_box_classes=1)
+    with self.assertRaisesRegex(ValueError, 'not supported'):
+      nms.batched_non_max_suppression(boxes, scores, backend='v9')
+
+
+if __name__ == '__main__':
+  tf.test.main()
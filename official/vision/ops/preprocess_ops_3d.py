@@ -178,7 +178,9 @@ def sample_segment_sequence(sequence: tf.Tensor,
   return tf.gather(sequence, indices)
 
 
-def decode_jpeg(image_string: tf.Tensor, channels: int = 0) -> tf.Tensor:
+def decode_jpeg(image_string: tf.Tensor,
+                channels: int = 0,
+                parallel_iterations: Optional[int] = None) -> tf.Tensor:
   """Decodes JPEG raw bytes string into a RGB uint8 Tensor.
 
   Args:
@@ -187,6 +189,8 @@ def decode_jpeg(image_string: tf.Tensor, channels: int = 0) -> tf.Tensor:
     channels: Number of channels of the JPEG image. Allowed values are 0, 1 and
       3. If 0, the number of channels will be calculated at runtime and no
       static shape is set.
+    parallel_iterations: The number of frames decoded in parallel. If None, the
+      `tf.map_fn` default is used.
 
   Returns:
     A Tensor of shape [T, H, W, C] of type uint8 with the decoded images.
@@ -195,10 +199,13 @@ def decode_jpeg(image_string: tf.Tensor, channels: int = 0) -> tf.Tensor:
       lambda x: tf.image.decode_jpeg(x, channels=channels),
       image_string,
       back_prop=False,
+      parallel_iterations=parallel_iterations,
       dtype=tf.uint8)
 
 
-def decode_image(image_string: tf.Tensor, channels: int = 0) -> tf.Tensor:
+def decode_image(image_string: tf.Tensor,
+                 channels: int = 0,
+                 parallel_iterations: Optional[int] = None) -> tf.Tensor:
   """Decodes PNG or JPEG raw bytes string into a RGB uint8 Tensor.
 
   Args:
@@ -207,6 +214,8 @@ def decode_image(image_string: tf.Tensor, channels: int = 0) -> tf.Tensor:
     channels: Number of channels of the PNG image. Allowed values are 0, 1 and
       3. If 0, the number of channels will be calculated at runtime and no
       static shape is set.
+    parallel_iterations: The number of frames decoded in parallel. If None, the
+      `tf.map_fn` default is used.
 
   Returns:
     A Tensor of shape [T, H, W, C] of type uint8 with the decoded images.
@@ -216,10 +225,40 @@ def decode_image(image_string: tf.Tensor, channels: int = 0) -> tf.Tensor:
           x, channels=channels, expand_animations=False),
       image_string,
       back_prop=False,
+      parallel_iterations=parallel_iterations,
       dtype=tf.uint8,
   )
 
 
+def decode_sampled_frames(image_string: tf.Tensor,
+                          indices: tf.Tensor,
+                          channels: int = 0,
+                          parallel_iterations: Optional[int] = None
+                          ) -> tf.Tensor:
+  """Decodes only the frames at `indices` of a sequence of encoded frames.
+
+  Each distinct frame is decoded once, even when `indices` selects it several
+  times, e.g. for overlapping test clips or short videos that are looped to
+  reach the requested number of frames.
+
+  Args:
+    image_string: A `tf.Tensor` of type strings with the raw PNG or JPEG bytes
+      where the first dimension is timesteps.
+    indices: A 1D int `tf.Tensor` with the frame indices to decode.
+    channels: Number of channels of the image. Allowed values are 0, 1 and 3.
+    parallel_iterations: The number of frames decoded in parallel. If None, the
+      `tf.map_fn` default is used.
+
+  Returns:
+    A Tensor of shape [len(indices), H, W, C] of type uint8 with the decoded
+    frames, in the order given by `indices`.
+  """
+  unique_indices, positions = tf.unique(indices)
+  frames = decode_image(
+      tf.gather(image_string, unique_indices), channels, parallel_iterations)
+  return tf.gather(frames, positions)
+
+
 def crop_image(
     frames: tf.Tensor,
     target_height: int,
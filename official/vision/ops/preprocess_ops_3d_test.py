@@ -122,6 +122,21 @@ class ParserUtilsTest(tf.test.TestCase):
     self.assertEqual(decoded_image.shape.as_list()[3], 3)
     self.assertAllEqual(decoded_image.shape, (2, 263, 320, 3))
 
+  def test_decode_sampled_frames(self):
+    raw_frames = []
+    for value in (0, 100, 200):
+      with io.BytesIO() as buffer:
+        Image.fromarray(np.full((8, 10, 3), value, np.uint8)).save(
+            buffer, format='PNG')
+        raw_frames.append(buffer.getvalue())
+
+    decoded_frames = preprocess_ops_3d.decode_sampled_frames(
+        tf.constant(raw_frames), tf.constant([2, 0, 2, 2]), 3,
+        parallel_iterations=4)
+
+    self.assertAllEqual(decoded_frames.shape, (4, 8, 10, 3))
+    self.assertAllEqual(decoded_frames[:, 0, 0, 0], [200, 0, 200, 200])
+
   def test_crop_image(self):
     cropped_image_1 = preprocess_ops_3d.crop_image(self._frames, 50, 70)
     cropped_image_2 = preprocess_ops_3d.crop_image(self._frames, 200, 200)
@@ -454,6 +454,8 @@ def crop_mask_in_target_box(masks: tf.Tensor,
 
   Args:
     masks: A tensor with a shape of [batch_size, num_masks, height, width].
+      uint8 masks are treated as quantized to [0, 255] and are mapped back to
+      [0, 1].
     boxes: a float tensor representing box cooridnates that tightly enclose
       masks with a shape of [batch_size, num_masks, 4] in un-normalized
       coordinates. A box is represented by [ymin, xmin, ymax, xmax].
@@ -473,6 +475,8 @@ def crop_mask_in_target_box(masks: tf.Tensor,
   with tf.name_scope('crop_mask_in_target_box'):
     # Cast to float32, as the y_transform and other transform variables may
     # overflow in float16
+    if masks.dtype == tf.uint8:
+      masks = tf.cast(masks, tf.float32) / 255.0
     masks = tf.cast(masks, tf.float32)
     boxes = tf.cast(boxes, tf.float32)
     target_boxes = tf.cast(target_boxes, tf.float32)
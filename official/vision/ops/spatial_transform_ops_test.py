@@ -0,0 +1,43 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for spatial_transform_ops.py."""
+
+import numpy as np
+import tensorflow as tf, tf_keras
+
+from official.vision.ops import spatial_transform_ops
+
+
+class CropMaskInTargetBoxTest(tf.test.TestCase):
+
+  def test_uint8_masks_are_dequantized(self):
+    rng = np.random.RandomState(0)
+    masks = rng.uniform(size=(2, 3, 16, 16)).astype(np.float32)
+    quantized_masks = np.round(masks * 255.0).astype(np.uint8)
+    boxes = tf.constant(rng.uniform(0, 20, size=(2, 3, 2)), tf.float32)
+    boxes = tf.concat([boxes, boxes + 30.], axis=-1)
+    target_boxes = boxes + tf.constant([2., -3., 1., 4.])
+
+    cropped_masks = spatial_transform_ops.crop_mask_in_target_box(
+        masks, boxes, target_boxes, output_size=7)
+    cropped_quantized_masks = spatial_transform_ops.crop_mask_in_target_box(
+        quantized_masks, boxes, target_boxes, output_size=7)
+
+    self.assertDTypeEqual(cropped_quantized_masks, np.float32)
+    self.assertAllClose(cropped_quantized_masks, cropped_masks, atol=1. / 255)
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -0,0 +1,362 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Multi-scale and flip test-time augmentation (TTA) ops for detection.
+
+All views of a batch are stacked view-major into a single batch of the model
+input size, so one forward pass serves every view. Detections of all views are
+mapped back to the original image frame and merged on device.
+"""
+
+from typing import Any, Callable, List, Mapping, Optional, Sequence, Tuple
+
+# Import libraries
+import tensorflow as tf, tf_keras
+
+from official.vision.ops import box_ops
+
+MERGE_METHODS = ('nms', 'wbf')
+
+
+def _view_specs(scales: Sequence[float],
+                horizontal_flip: bool) -> List[Tuple[float, bool]]:
+  """Returns the (scale, flipped) pair of every view in view-major order."""
+  views = []
+  for scale in scales:
+    views.append((scale, False))
+    if horizontal_flip:
+      views.append((scale, True))
+  return views
+
+
+def _flip_widths(image_shape: tf.Tensor) -> tf.Tensor:
+  """Returns the integer widths that flipped views are mirrored within."""
+  return tf.round(image_shape[:, 1])
+
+
+def build_views(
+    images: tf.Tensor,
+    image_shape: tf.Tensor,
+    scales: Sequence[float],
+    horizontal_flip: bool,
+) -> Tuple[tf.Tensor, tf.Tensor]:
+  """Builds the augmented views of a batch of padded images.
+
+  Every view keeps the padded input size: images scaled down are zero padded at
+  the bottom and right, images scaled up are cropped there. Flipped views are
+  mirrored within the valid image region so that the padding stays at the
+  bottom and right.
+
+  Args:
+    images: A `tf.Tensor` of shape [batch_size, height, width, channels] with
+      static height and width.
+    image_shape: A `tf.Tensor` of shape [batch_size, 2] of the valid image size
+      inside the padded images.
+    scales: A sequence of resize factors, one per view.
+    horizontal_flip: Whether every scale is also added horizontally flipped.
+
+  Returns:
+    view_images: A `tf.Tensor` of shape
+      [num_views * batch_size, height, width, channels].
+    view_image_shape: A `tf.Tensor` of shape [num_views * batch_size, 2].
+
+  Raises:
+    ValueError: If the spatial size of `images` is not static.
+  """
+  _, height, width, _ = images.get_shape().as_list()
+  if height is None or width is None:
+    raise ValueError('Test-time augmentation requires a static image size, '
+                     'got {}.'.format(images.get_shape()))
+  padded_size = tf.constant([height, width], dtype=image_shape.dtype)
+
+  view_images = []
+  view_image_shape = []
+  for scale, flipped in _view_specs(scales, horizontal_flip):
+    if scale == 1.0:
+      scaled_images = images
+    else:
+      scaled_images = tf.image.resize(
+          images, [int(round(height * scale)), int(round(width * scale))])
+      scaled_images = tf.image.pad_to_bounding_box(
+          scaled_images[:, :height, :width, :], 0, 0, height, width)
+      scaled_images = tf.cast(scaled_images, images.dtype)
+    scaled_shape = tf.minimum(image_shape * scale, padded_size)
+    if flipped:
+      scaled_images = tf.reverse_sequence(
+          scaled_images,
+          tf.cast(_flip_widths(scaled_shape), tf.int32),
+          seq_axis=2,
+          batch_axis=0)
+    view_images.append(scaled_images)
+    view_image_shape.append(scaled_shape)
+  return tf.concat(view_images, axis=0), tf.concat(view_image_shape, axis=0)
+
+
+def restore_boxes(
+    boxes: tf.Tensor,
+    view_image_shape: tf.Tensor,
+    image_shape: tf.Tensor,
+    scales: Sequence[float],
+    horizontal_flip: bool,
+) -> tf.Tensor:
+  """Maps boxes detected on the views back to the original image frame.
+
+  Args:
+    boxes: A `tf.Tensor` of shape [num_views * batch_size, K, 4] of boxes in
+      [y1, x1, y2, x2] detected on the output of `build_views`.
+    view_image_shape: The `view_image_shape` returned by `build_views`.
+    image_shape: A `tf.Tensor` of shape [batch_size, 2] of the original valid
+      image size.
+    scales: The `scales` passed to `build_views`.
+    horizontal_flip: The `horizontal_flip` passed to `build_views`.
+
+  Returns:
+    A `tf.Tensor` of the same shape as `boxes` in the original image frame.
+  """
+  views = _view_specs(scales, horizontal_flip)
+  restored_boxes = []
+  for (scale, flipped), view_boxes, scaled_shape in zip(
+      views,
+      tf.split(boxes, len(views), axis=0),
+      tf.split(view_image_shape, len(views), axis=0)):
+    if flipped:
+      flip_widths = tf.cast(_flip_widths(scaled_shape), view_boxes.dtype)
+      flip_widths = flip_widths[:, tf.newaxis]
+      ymin, xmin, ymax, xmax = tf.unstack(view_boxes, axis=-1)
+      view_boxes = tf.stack(
+          [ymin, flip_widths - xmax, ymax, flip_widths - xmin], axis=-1)
+    view_boxes /= scale
+    restored_boxes.append(
+        box_ops.clip_boxes(view_boxes, image_shape[:, tf.newaxis, :]))
+  return tf.concat(restored_boxes, axis=0)
+
+
+def restore_masks(
+    masks: tf.Tensor, scales: Sequence[float], horizontal_flip: bool
+) -> tf.Tensor:
+  """Un-flips box-relative instance masks detected on flipped views.
+
+  Args:
+    masks: A `tf.Tensor` of shape [num_views * batch_size, K, height, width] of
+      masks relative to their boxes.
+    scales: The `scales` passed to `build_views`.
+    horizontal_flip: The `horizontal_flip` passed to `build_views`.
+
+  Returns:
+    A `tf.Tensor` of the same shape as `masks`.
+  """
+  if not horizontal_flip:
+    return masks
+  views = _view_specs(scales, horizontal_flip)
+  return tf.concat([
+      tf.reverse(view_masks, axis=[-1]) if flipped else view_masks
+      for (_, flipped), view_masks in zip(
+          views, tf.split(masks, len(views), axis=0))
+  ], axis=0)
+
+
+def _views_to_candidates(tensor: tf.Tensor, num_views: int) -> tf.Tensor:
+  """Reshapes view-major [V * B, K, ...] tensors to [B, V * K, ...]."""
+  rank = tensor.get_shape().rank
+  shape = tf.shape(tensor)
+  tensor = tf.reshape(
+      tensor, tf.concat([[num_views, shape[0] // num_views], shape[1:]], 0))
+  tensor = tf.transpose(tensor, [1, 0] + list(range(2, rank + 1)))
+  return tf.reshape(
+      tensor, tf.concat([[shape[0] // num_views, -1], shape[2:]], 0))
+
+
+def merge_detections(
+    detections: Mapping[str, tf.Tensor],
+    num_views: int,
+    merge_method: str = 'wbf',
+    iou_threshold: float = 0.55,
+    max_num_detections: int = 100,
+) -> Mapping[str, tf.Tensor]:
+  """Merges the detections of all views of every image.
+
+  Detections of the same class are first suppressed with NMS over all views.
+  With `wbf`, every kept box is then replaced by the score-weighted average of
+  all same-class candidates overlapping it by at least `iou_threshold`, and its
+  score by the average candidate score discounted by the fraction of views that
+  contributed (weighted box fusion, https://arxiv.org/abs/1910.13302).
+
+  Args:
+    detections: A dict with `detection_boxes` [N, K, 4], `detection_scores`
+      [N, K], `detection_classes` [N, K] and `num_detections` [N], where N is
+      `num_views * batch_size` in view-major order and boxes are in the
+      original image frame. Optional `detection_outer_boxes` [N, K, 4] and
+      `detection_masks` [N, K, height, width] are carried along with the box
+      that is kept for every merged detection.
+    num_views: An `int` of the number of views.
+    merge_method: One of `MERGE_METHODS`.
+    iou_threshold: A `float` of the IoU above which same-class detections are
+      merged.
+    max_num_detections: An `int` of the number of merged detections per image.
+
+  Returns:
+    A dict with the same keys as `detections` whose tensors have a leading
+    dimension of batch_size and `max_num_detections` detections per image.
+
+  Raises:
+    ValueError: If `merge_method` is not supported.
+  """
+  if merge_method not in MERGE_METHODS:
+    raise ValueError('Merge method {} not supported. Must be one of {}.'.format(
+        merge_method, MERGE_METHODS))
+
+  with tf.name_scope('merge_detections'):
+    num_candidates_per_view = tf.shape(detections['detection_scores'])[1]
+    valid = tf.range(num_candidates_per_view)[tf.newaxis, :] < tf.cast(
+        detections['num_detections'][:, tf.newaxis], tf.int32)
+    valid = _views_to_candidates(valid, num_views)
+    boxes = _views_to_candidates(
+        tf.cast(detections['detection_boxes'], tf.float32), num_views)
+    scores = _views_to_candidates(
+        tf.cast(detections['detection_scores'], tf.float32), num_views)
+    scores = tf.where(valid, scores, -tf.ones_like(scores))
+    classes = _views_to_candidates(detections['detection_classes'], num_views)
+    carried = {
+        key: _views_to_candidates(detections[key], num_views)
+        for key in ('detection_outer_boxes', 'detection_masks')
+        if key in detections
+    }
+
+    # Shifts boxes of different classes apart so that one NMS is class-aware.
+    offset = tf.reduce_max(tf.abs(boxes), axis=[1, 2], keepdims=True) + 1.0
+    class_offsets = offset * tf.cast(classes, tf.float32)[..., tf.newaxis]
+    selected_indices, num_merged = tf.image.non_max_suppression_padded(
+        boxes + class_offsets,
+        scores,
+        max_num_detections,
+        iou_threshold=iou_threshold,
+        score_threshold=0.0,
+        pad_to_max_output_size=True)
+    selected_indices = tf.reshape(selected_indices, [-1, max_num_detections])
+    padding_mask = tf.range(max_num_detections)[tf.newaxis, :] < (
+        num_merged[:, tf.newaxis])
+
+    merged_boxes = tf.gather(boxes, selected_indices, batch_dims=1)
+    merged_scores = tf.gather(scores, selected_indices, batch_dims=1)
+    merged_classes = tf.gather(classes, selected_indices, batch_dims=1)
+
+    if merge_method == 'wbf':
+      iou = box_ops.bbox_overlap(merged_boxes, boxes)
+      members = tf.logical_and(
+          iou >= iou_threshold,
+          tf.equal(merged_classes[:, :, tf.newaxis], classes[:, tf.newaxis, :]))
+      members = tf.cast(
+          tf.logical_and(members, valid[:, tf.newaxis, :]), tf.float32)
+      weights = members * tf.nn.relu(scores)[:, tf.newaxis, :]
+      total_weights = tf.reduce_sum(weights, axis=-1)
+      num_members = tf.reduce_sum(members, axis=-1)
+      merged_boxes = tf.einsum('bmn,bnc->bmc', weights, boxes) / tf.maximum(
+          total_weights, 1e-8)[..., tf.newaxis]
+      merged_scores = (
+          total_weights / tf.maximum(num_members, 1.0) *
+          tf.minimum(num_members, float(num_views)) / float(num_views))
+      merged_scores *= tf.cast(padding_mask, merged_scores.dtype)
+      # Fused scores can change the ranking.
+      merged_scores, order = tf.nn.top_k(merged_scores, k=max_num_detections)
+      merged_boxes = tf.gather(merged_boxes, order, batch_dims=1)
+      merged_classes = tf.gather(merged_classes, order, batch_dims=1)
+      selected_indices = tf.gather(selected_indices, order, batch_dims=1)
+
+    merged = {
+        'detection_boxes': merged_boxes * tf.cast(
+            padding_mask[..., tf.newaxis], merged_boxes.dtype),
+        'detection_scores': merged_scores * tf.cast(
+            padding_mask, merged_scores.dtype),
+        'detection_classes': merged_classes * tf.cast(
+            padding_mask, merged_classes.dtype),
+        'num_detections': tf.cast(
+            num_merged, detections['num_detections'].dtype),
+    }
+    for key, value in carried.items():
+      merged[key] = tf.gather(value, selected_indices, batch_dims=1)
+    merged['detection_boxes'] = tf.cast(
+        merged['detection_boxes'], detections['detection_boxes'].dtype)
+    merged['detection_scores'] = tf.cast(
+        merged['detection_scores'], detections['detection_scores'].dtype)
+    return merged
+
+
+def detect_with_test_time_augmentation(
+    detect_fn: Callable[[tf.Tensor, tf.Tensor, Optional[Mapping[str, tf.Tensor]]],
+                        Mapping[str, Any]],
+    images: tf.Tensor,
+    image_shape: tf.Tensor,
+    anchor_boxes: Optional[Mapping[str, tf.Tensor]],
+    scales: Sequence[float],
+    horizontal_flip: bool,
+    merge_method: str = 'wbf',
+    merge_iou_threshold: float = 0.55,
+    max_num_detections: int = 100,
+) -> Tuple[Mapping[str, tf.Tensor], Mapping[str, Any]]:
+  """Runs a detector on all views in one batch and merges the detections.
+
+  Args:
+    detect_fn: A callable taking `images`, `image_shape` and `anchor_boxes` and
+      returning the model outputs with NMSed detections.
+    images: A `tf.Tensor` of shape [batch_size, height, width, channels].
+    image_shape: A `tf.Tensor` of shape [batch_size, 2] of the valid image size.
+    anchor_boxes: An optional dict of per-level anchor tensors with a leading
+      batch dimension. Anchors depend on the padded size only, so they are
+      shared by all views.
+    scales: A sequence of resize factors, one per view.
+    horizontal_flip: Whether every scale is also run horizontally flipped.
+    merge_method: One of `MERGE_METHODS`.
+    merge_iou_threshold: A `float` of the IoU above which same-class detections
+      are merged.
+    max_num_detections: An `int` of the number of merged detections per image.
+
+  Returns:
+    detections: The merged detections, see `merge_detections`.
+    outputs: The model outputs of the first view, i.e. `scales[0]` unflipped,
+      e.g. to compute evaluation losses.
+  """
+  num_views = len(_view_specs(scales, horizontal_flip))
+  batch_size = tf.shape(images)[0]
+  view_images, view_image_shape = build_views(
+      images, image_shape, scales, horizontal_flip)
+  if anchor_boxes is not None:
+    anchor_boxes = tf.nest.map_structure(
+        lambda x: tf.concat([x] * num_views, axis=0), anchor_boxes)
+  outputs = detect_fn(view_images, view_image_shape, anchor_boxes)
+
+  view_detections = {
+      'detection_boxes': restore_boxes(
+          outputs['detection_boxes'], view_image_shape, image_shape, scales,
+          horizontal_flip),
+      'detection_scores': outputs['detection_scores'],
+      'detection_classes': outputs['detection_classes'],
+      'num_detections': outputs['num_detections'],
+  }
+  if 'detection_outer_boxes' in outputs:
+    view_detections['detection_outer_boxes'] = restore_boxes(
+        outputs['detection_outer_boxes'], view_image_shape, image_shape,
+        scales, horizontal_flip)
+  if 'detection_masks' in outputs:
+    view_detections['detection_masks'] = restore_masks(
+        outputs['detection_masks'], scales, horizontal_flip)
+  detections = merge_detections(
+      view_detections,
+      num_views=num_views,
+      merge_method=merge_method,
+      iou_threshold=merge_iou_threshold,
+      max_num_detections=max_num_detections)
+
+  first_view_outputs = tf.nest.map_structure(
+      lambda x: x if x is None else x[:batch_size], outputs)
+  return detections, first_view_outputs
@@ -0,0 +1,164 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for tta_ops.py."""
+
+from absl.testing import parameterized
+import numpy as np
+import tensorflow as tf, tf_keras
+
+from official.vision.ops import tta_ops
+
+
+class TestTimeAugmentationTest(parameterized.TestCase, tf.test.TestCase):
+
+  def test_build_views(self):
+    images = tf.reshape(tf.range(2 * 4 * 6, dtype=tf.float32), [2, 4, 6, 1])
+    image_shape = tf.constant([[4., 6.], [4., 3.]])
+    view_images, view_image_shape = tta_ops.build_views(
+        images, image_shape, scales=[1.0, 0.5], horizontal_flip=True)
+
+    self.assertEqual(view_images.shape, (8, 4, 6, 1))
+    self.assertAllClose(
+        view_image_shape,
+        [[4., 6.], [4., 3.], [4., 6.], [4., 3.],
+         [2., 3.], [2., 1.5], [2., 3.], [2., 1.5]])
+    self.assertAllClose(view_images[:2], images)
+    # Flipped views are mirrored within the valid width.
+    self.assertAllClose(view_images[2], images[0, :, ::-1])
+    self.assertAllClose(view_images[3, :, :3], images[1, :, 2::-1])
+    self.assertAllClose(view_images[3, :, 3:], images[1, :, 3:])
+    # Downscaled views are padded at the bottom and right.
+    self.assertAllClose(view_images[4:, 2:], tf.zeros([4, 2, 6, 1]))
+    self.assertAllClose(view_images[4:, :, 3:], tf.zeros([4, 4, 3, 1]))
+
+  def test_build_views_requires_static_size(self):
+
+    @tf.function(input_signature=[tf.TensorSpec([1, None, None, 3])])
+    def build(images):
+      return tta_ops.build_views(
+          images, tf.constant([[4., 4.]]), [1.0], horizontal_flip=False)
+
+    with self.assertRaisesRegex(ValueError, 'static image size'):
+      build.get_concrete_function()
+
+  @parameterized.parameters(([1.0], True), ([1.0, 0.5, 1.5], True),
+                            ([0.8, 1.2], False))
+  def test_restore_boxes_inverts_views(self, scales, horizontal_flip):
+    image_shape = tf.constant([[64., 96.], [80., 50.]])
+    boxes = tf.constant([[[10., 20., 30., 40.]], [[5., 1., 60., 49.]]])
+    images = tf.zeros([2, 100, 100, 3])
+    _, view_image_shape = tta_ops.build_views(
+        images, image_shape, scales, horizontal_flip)
+
+    # Maps the boxes onto every view the same way the images are.
+    view_boxes = []
+    for scale in scales:
+      flips = [False, True] if horizontal_flip else [False]
+      for flipped in flips:
+        scaled = boxes * scale
+        if flipped:
+          widths = tf.round(
+              tf.minimum(image_shape[:, 1] * scale, 100.))[:, None]
+          ymin, xmin, ymax, xmax = tf.unstack(scaled, axis=-1)
+          scaled = tf.stack([ymin, widths - xmax, ymax, widths - xmin], -1)
+        view_boxes.append(scaled)
+    restored = tta_ops.restore_boxes(
+        tf.concat(view_boxes, 0), view_image_shape, image_shape, scales,
+        horizontal_flip)
+
+    num_views = len(scales) * (2 if horizontal_flip else 1)
+    self.assertAllClose(restored, tf.concat([boxes] * num_views, 0), atol=1e-4)
+
+  def test_restore_masks(self):
+    masks = tf.reshape(tf.range(2 * 1 * 2 * 3, dtype=tf.float32), [2, 1, 2, 3])
+    restored = tta_ops.restore_masks(masks, [1.0], horizontal_flip=True)
+    self.assertAllClose(restored[0], masks[0])
+    self.assertAllClose(restored[1], masks[1, :, :, ::-1])
+
+  @parameterized.parameters('nms', 'wbf')
+  def test_merge_detections(self, merge_method):
+    # Two views of a batch of one image, view-major.
+    detections = {
+        'detection_boxes': tf.constant([
+            [[0., 0., 10., 10.], [20., 20., 30., 30.], [0., 0., 0., 0.]],
+            [[0., 0., 10., 12.], [0., 0., 10., 10.], [50., 50., 60., 60.]],
+        ]),
+        'detection_scores': tf.constant([[0.9, 0.6, 0.0], [0.7, 0.8, 0.5]]),
+        'detection_classes': tf.constant([[1, 1, 0], [1, 2, 3]]),
+        'num_detections': tf.constant([2, 3]),
+        'detection_masks': tf.reshape(tf.range(6, dtype=tf.float32),
+                                      [2, 3, 1, 1]),
+    }
+    merged = tta_ops.merge_detections(
+        detections, num_views=2, merge_method=merge_method, iou_threshold=0.5,
+        max_num_detections=5)
+
+    self.assertAllEqual(merged['num_detections'], [4])
+    self.assertAllEqual(merged['detection_masks'].shape, [1, 5, 1, 1])
+    if merge_method == 'nms':
+      self.assertAllClose(merged['detection_scores'],
+                          [[0.9, 0.8, 0.6, 0.5, 0.]])
+      self.assertAllEqual(merged['detection_classes'], [[1, 2, 1, 3, 0]])
+      self.assertAllClose(merged['detection_boxes'][0, 0], [0., 0., 10., 10.])
+      self.assertAllClose(merged['detection_masks'][0, :4, 0, 0],
+                          [0., 4., 1., 5.])
+    else:
+      # The two overlapping class 1 boxes are fused; all others are single
+      # view detections whose scores are halved.
+      self.assertAllClose(merged['detection_scores'],
+                          [[0.8, 0.4, 0.3, 0.25, 0.]])
+      self.assertAllEqual(merged['detection_classes'], [[1, 2, 1, 3, 0]])
+      self.assertAllClose(merged['detection_boxes'][0, 0],
+                          [0., 0., 10., 10. + 2. * 0.7 / 1.6])
+      self.assertAllClose(merged['detection_masks'][0, :4, 0, 0],
+                          [0., 4., 1., 5.])
+
+  def test_detect_with_test_time_augmentation(self):
+    images = tf.zeros([2, 32, 32, 3])
+    image_shape = tf.constant([[32., 32.], [32., 20.]])
+    anchor_boxes = {'3': tf.zeros([2, 4, 4, 36])}
+
+    def detect_fn(view_images, view_image_shape, view_anchor_boxes):
+      self.assertEqual(view_images.shape[0], 4)
+      self.assertEqual(view_anchor_boxes['3'].shape[0], 4)
+      # Returns a full-image box per view.
+      height, width = tf.unstack(view_image_shape, axis=-1)
+      boxes = tf.stack([tf.zeros_like(height), tf.zeros_like(width), height,
+                        width], axis=-1)[:, None, :]
+      return {
+          'detection_boxes': boxes,
+          'detection_scores': tf.fill([4, 1], 0.5),
+          'detection_classes': tf.ones([4, 1], tf.int32),
+          'num_detections': tf.ones([4], tf.int32),
+          'cls_outputs': {'3': tf.reshape(tf.range(4.), [4, 1])},
+      }
+
+    detections, outputs = tta_ops.detect_with_test_time_augmentation(
+        detect_fn, images, image_shape, anchor_boxes, scales=[1.0, 0.5],
+        horizontal_flip=False, max_num_detections=3)
+
+    self.assertAllEqual(detections['num_detections'], [1, 1])
+    self.assertAllClose(detections['detection_boxes'][:, 0],
+                        [[0., 0., 32., 32.], [0., 0., 32., 20.]])
+    self.assertAllClose(detections['detection_scores'][:, 0], [0.5, 0.5])
+    self.assertAllClose(outputs['cls_outputs']['3'], [[0.], [1.]])
+
+  def test_unsupported_merge_method(self):
+    with self.assertRaisesRegex(ValueError, 'not supported'):
+      tta_ops.merge_detections({}, num_views=1, merge_method='mean')
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -15,7 +15,7 @@
 """Detection input and model functions for serving/inference."""
 
 import math
-from typing import Mapping, Tuple
+from typing import Dict, Mapping, Optional, Text, Tuple
 
 from absl import logging
 import tensorflow as tf, tf_keras
@@ -24,7 +24,9 @@ from official.vision import configs
 from official.vision.modeling import factory
 from official.vision.ops import anchor
 from official.vision.ops import box_ops
+from official.vision.ops import nms
 from official.vision.ops import preprocess_ops
+from official.vision.ops import tta_ops
 from official.vision.serving import export_base
 
 
@@ -41,8 +43,9 @@ class DetectionModule(export_base.ExportModule):
       return self._input_image_size
 
   def _build_model(self):
-    nms_versions_supporting_dynamic_batch_size = {'batched', 'v2', 'v3'}
-    nms_version = self.params.task.model.detection_generator.nms_version
+    nms_versions_supporting_dynamic_batch_size = {'batched', 'v2', 'v3', 'auto'}
+    generator_config = self.params.task.model.detection_generator
+    nms_version = generator_config.nms_version
     if (
         self._batch_size is None
         and nms_version not in nms_versions_supporting_dynamic_batch_size
@@ -52,7 +55,19 @@ class DetectionModule(export_base.ExportModule):
           'does not support with dynamic batch size.',
           nms_version,
       )
-      self.params.task.model.detection_generator.nms_version = 'batched'
+      generator_config.nms_version = 'batched'
+
+    if nms_version == 'auto' and generator_config.nms_backend is None:
+      # Pins the backend at export time so the SavedModel does not depend on
+      # the devices visible when it is loaded.
+      if getattr(generator_config, 'use_class_agnostic_nms', False):
+        nms_backend = 'class_agnostic'
+      else:
+        nms_backend = nms.select_nms_backend(
+            'CPU' if generator_config.use_cpu_nms else None
+        )
+      logging.info('Exporting with NMS backend `%s`.', nms_backend)
+      generator_config.nms_backend = nms_backend
 
     input_specs = tf_keras.layers.InputSpec(
         shape=[self._batch_size, *self._padded_size, 3]
@@ -191,15 +206,37 @@ class DetectionModule(export_base.ExportModule):
 
       return images, anchor_boxes, image_info
 
-  def serve(self, images: tf.Tensor):
+  def serve(
+      self,
+      images: tf.Tensor,
+      test_time_augmentation: Optional[bool] = None,
+  ):
     """Casts image to float and runs inference.
 
     Args:
       images: uint8 Tensor of shape [batch_size, None, None, 3]
+      test_time_augmentation: Whether to run the test-time augmentation
+        configured in `task.test_time_augmentation`. If None, it is run when
+        `task.test_time_augmentation.enabled` is set.
 
     Returns:
       Tensor holding detection output logits.
+
+    Raises:
+      ValueError: If test-time augmentation is requested for `tflite` inputs or
+        without NMS.
     """
+    tta_config = self.params.task.test_time_augmentation
+    if test_time_augmentation is None:
+      test_time_augmentation = tta_config.enabled
+    if test_time_augmentation and (
+        self._input_type == 'tflite'
+        or not self.params.task.model.detection_generator.apply_nms
+    ):
+      raise ValueError(
+          'Test-time augmentation requires NMS and is not supported for '
+          '`tflite` inputs.'
+      )
 
     # Skip image preprocessing when input_type is tflite so it is compatible
     # with TFLite quantization.
@@ -237,7 +274,33 @@ class DetectionModule(export_base.ExportModule):
       model_call_kwargs['output_intermediate_features'] = (
           self.params.task.export_config.output_intermediate_features
       )
-    detections = self.model.call(**model_call_kwargs)
+    if test_time_augmentation:
+
+      def detect_fn(view_images, view_image_shape, view_anchor_boxes):
+        return self.model.call(
+            **{
+                **model_call_kwargs,
+                'images': view_images,
+                'image_shape': view_image_shape,
+                'anchor_boxes': view_anchor_boxes,
+            }
+        )
+
+      detections, _ = tta_ops.detect_with_test_time_augmentation(
+          detect_fn,
+          images=images,
+          image_shape=input_image_shape,
+          anchor_boxes=anchor_boxes,
+          scales=tta_config.scales,
+          horizontal_flip=tta_config.horizontal_flip,
+          merge_method=tta_config.merge_method,
+          merge_iou_threshold=tta_config.merge_iou_threshold,
+          max_num_detections=(
+              self.params.task.model.detection_generator.max_num_detections
+          ),
+      )
+    else:
+      detections = self.model.call(**model_call_kwargs)
 
     if self.params.task.model.detection_generator.apply_nms:
       # For RetinaNet model, apply export_config.
@@ -301,3 +364,42 @@ class DetectionModule(export_base.ExportModule):
     if self.params.task.model.detection_generator.nms_version != 'tflite':
       final_outputs.update({'image_info': image_info})
     return final_outputs
+
+  @tf.function
+  def inference_from_image_tensors_with_tta(
+      self, inputs: tf.Tensor
+  ) -> Mapping[str, tf.Tensor]:
+    return self.serve(inputs, test_time_augmentation=True)
+
+  def get_inference_signatures(self, function_keys: Dict[Text, Text]):
+    """Gets defined function signatures.
+
+    In addition to the input types of the base module, `image_tensor_tta`
+    exports an `image_tensor` signature that always runs the test-time
+    augmentation configured in `task.test_time_augmentation`.
+
+    Args:
+      function_keys: A dictionary with keys as the function to create signature
+        for and values as the signature keys when returns.
+
+    Returns:
+      A dictionary with key as signature key and value as concrete functions
+        that can be used for tf.saved_model.save.
+    """
+    function_keys = dict(function_keys)
+    signatures = {}
+    if 'image_tensor_tta' in function_keys:
+      input_signature = tf.TensorSpec(
+          shape=[self._batch_size]
+          + [None] * len(self._input_image_size)
+          + [self._num_channels],
+          dtype=tf.uint8,
+          name=self._input_name,
+      )
+      signatures[function_keys.pop('image_tensor_tta')] = (
+          self.inference_from_image_tensors_with_tta.get_concrete_function(
+              input_signature
+          )
+      )
+    signatures.update(super().get_inference_signatures(function_keys))
+    return signatures
@@ -105,6 +105,8 @@ class DetectionExportTest(tf.test.TestCase, parameterized.TestCase):
       ('image_tensor', 'fasterrcnn_resnetfpn_coco', [384, 384], 1.1),
       ('tf_example', 'maskrcnn_resnetfpn_coco', [640, 640], 1.1),
       ('image_tensor', 'fasterrcnn_resnetfpn_coco', [384, 384], 1.1, 'v2'),
+      ('image_tensor', 'maskrcnn_resnetfpn_coco', [640, 640], 1.0, 'auto'),
+      ('image_tensor', 'retinanet_resnetfpn_coco', [640, 640], 1.0, 'auto'),
   )
   def test_export(
       self,
@@ -153,6 +155,71 @@ class DetectionExportTest(tf.test.TestCase, parameterized.TestCase):
     self.assertAllEqual(outputs['num_detections'].numpy(),
                         expected_outputs['num_detections'].numpy())
 
+  @parameterized.parameters(
+      ('retinanet_resnetfpn_coco', False, 'offset'),
+      ('retinanet_resnetfpn_coco', True, 'class_agnostic'),
+      ('maskrcnn_resnetfpn_coco', False, 'offset'),
+  )
+  def test_auto_nms_backend_pinned_at_export(
+      self, experiment_name, use_class_agnostic_nms, expected_backend
+  ):
+    params = exp_factory.get_exp_config(experiment_name)
+    params.task.model.backbone.resnet.model_id = 18
+    params.task.model.detection_generator.nms_version = 'auto'
+    if use_class_agnostic_nms:
+      params.task.model.detection_generator.use_class_agnostic_nms = True
+    module = detection.DetectionModule(
+        params, batch_size=None, input_image_size=[384, 384]
+    )
+    self.assertEqual(
+        module.params.task.model.detection_generator.nms_backend,
+        expected_backend,
+    )
+    self.assertEqual(
+        module.model.detection_generator.get_config()['nms_backend'],
+        expected_backend,
+    )
+
+  @parameterized.parameters(
+      ('retinanet_resnetfpn_coco', 'wbf'),
+      ('maskrcnn_resnetfpn_coco', 'nms'),
+  )
+  def test_export_with_test_time_augmentation(
+      self, experiment_name, merge_method
+  ):
+    tmp_dir = self.get_temp_dir()
+    module = self._get_detection_module(experiment_name, 'image_tensor')
+    tta_config = module.params.task.test_time_augmentation
+    tta_config.scales = [1.0, 0.5]
+    tta_config.merge_method = merge_method
+    signatures = module.get_inference_signatures({
+        'image_tensor': 'serving_default',
+        'image_tensor_tta': 'serving_tta',
+    })
+    tf.saved_model.save(module, tmp_dir, signatures=signatures)
+
+    imported = tf.saved_model.load(tmp_dir)
+    self.assertContainsSubset(
+        {'serving_default', 'serving_tta'}, imported.signatures.keys()
+    )
+    images = self._get_dummy_input(
+        'image_tensor', batch_size=1, image_size=[640, 640]
+    )
+    outputs = imported.signatures['serving_tta'](tf.constant(images))
+    expected_outputs = signatures['serving_tta'](tf.constant(images))
+    max_num_detections = (
+        module.params.task.model.detection_generator.max_num_detections
+    )
+    self.assertEqual(
+        outputs['detection_boxes'].shape, (1, max_num_detections, 4)
+    )
+    self.assertAllClose(
+        outputs['detection_scores'], expected_outputs['detection_scores']
+    )
+    self.assertAllEqual(
+        outputs['num_detections'], expected_outputs['num_detections']
+    )
+
   @parameterized.parameters(('retinanet_resnetfpn_coco',),
                             ('maskrcnn_spinenet_coco',))
   def test_build_model_pass_with_none_batch_size(self, experiment_type):
@@ -35,6 +35,7 @@ from official.vision.evaluation import coco_utils
 from official.vision.evaluation import instance_metrics as metrics_lib
 from official.vision.losses import maskrcnn_losses
 from official.vision.modeling import factory
+from official.vision.ops import tta_ops
 from official.vision.utils.object_detection import visualization_utils
 
 
@@ -171,6 +172,7 @@ class MaskRCNNTask(base_task.Task):
         include_mask=self.task_config.model.include_mask,
         outer_boxes_scale=self.task_config.model.outer_boxes_scale,
         mask_crop_size=params.parser.mask_crop_size,
+        mask_dtype=params.parser.mask_dtype,
         dtype=params.dtype,
     )
 
@@ -505,12 +507,34 @@ class MaskRCNNTask(base_task.Task):
       A dictionary of logs.
     """
     images, labels = inputs
-    outputs = model(
-        images,
-        anchor_boxes=labels['anchor_boxes'],
-        image_shape=labels['image_info'][:, 1, :],
-        training=False,
-    )
+    tta_config = self.task_config.test_time_augmentation
+    if tta_config.enabled:
+      detections, outputs = tta_ops.detect_with_test_time_augmentation(
+          lambda images, image_shape, anchor_boxes: model(  # pylint: disable=g-long-lambda
+              images,
+              anchor_boxes=anchor_boxes,
+              image_shape=image_shape,
+              training=False,
+          ),
+          images=images,
+          image_shape=labels['image_info'][:, 1, :],
+          anchor_boxes=labels['anchor_boxes'],
+          scales=tta_config.scales,
+          horizontal_flip=tta_config.horizontal_flip,
+          merge_method=tta_config.merge_method,
+          merge_iou_threshold=tta_config.merge_iou_threshold,
+          max_num_detections=(
+              self.task_config.model.detection_generator.max_num_detections
+          ),
+      )
+      outputs.update(detections)
+    else:
+      outputs = model(
+          images,
+          anchor_boxes=labels['anchor_boxes'],
+          image_shape=labels['image_info'][:, 1, :],
+          training=False,
+      )
 
     logs = {self.loss: 0}
     self._update_metrics(labels, outputs, logs)
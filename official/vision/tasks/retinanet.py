@@ -32,6 +32,7 @@ from official.vision.evaluation import coco_evaluator
 from official.vision.losses import focal_loss
 from official.vision.losses import loss_utils
 from official.vision.modeling import factory
+from official.vision.ops import tta_ops
 from official.vision.utils.object_detection import visualization_utils
 
 
@@ -377,9 +378,28 @@ class RetinaNetTask(base_task.Task):
     """
     features, labels = inputs
 
-    outputs = model(features, anchor_boxes=labels['anchor_boxes'],
-                    image_shape=labels['image_info'][:, 1, :],
-                    training=False)
+    tta_config = self.task_config.test_time_augmentation
+    if tta_config.enabled:
+      detections, outputs = tta_ops.detect_with_test_time_augmentation(
+          lambda images, image_shape, anchor_boxes: model(  # pylint: disable=g-long-lambda
+              images,
+              anchor_boxes=anchor_boxes,
+              image_shape=image_shape,
+              training=False),
+          images=features,
+          image_shape=labels['image_info'][:, 1, :],
+          anchor_boxes=labels['anchor_boxes'],
+          scales=tta_config.scales,
+          horizontal_flip=tta_config.horizontal_flip,
+          merge_method=tta_config.merge_method,
+          merge_iou_threshold=tta_config.merge_iou_threshold,
+          max_num_detections=(
+              self.task_config.model.detection_generator.max_num_detections))
+      outputs.update(detections)
+    else:
+      outputs = model(features, anchor_boxes=labels['anchor_boxes'],
+                      image_shape=labels['image_info'][:, 1, :],
+                      training=False)
     loss, cls_loss, box_loss, model_loss = self.build_losses(
         outputs=outputs, labels=labels, aux_losses=model.losses
     )
@@ -430,34 +450,55 @@ class RetinaNetTask(base_task.Task):
     return logs
 
   def aggregate_logs(self, state=None, step_outputs=None):
-    if self._task_config.use_coco_metrics:
-      if state is None:
+    if state is None:
+      if self._task_config.use_coco_metrics:
         self.coco_metric.reset_states()
+      if self._task_config.use_wod_metrics:
+        self.wod_metric.reset_states()
+    if not isinstance(state, dict):
+      state = {}
+
+    if self._task_config.use_coco_metrics:
       self.coco_metric.update_state(step_outputs[self.coco_metric.name][0],
                                     step_outputs[self.coco_metric.name][1])
+      # Keeps the aggregated detections in the state, so that the states of
+      # sharded evals can be merged.
+      state[self.coco_metric.name] = self.coco_metric.get_state()
     if self._task_config.use_wod_metrics:
-      if state is None:
-        self.wod_metric.reset_states()
       self.wod_metric.update_state(step_outputs[self.wod_metric.name][0],
                                    step_outputs[self.wod_metric.name][1])
 
     if 'visualization' in step_outputs:
       # Update detection state for writing summary if there are artifacts for
       # visualization.
-      if state is None:
-        state = {}
       state.update(visualization_utils.update_detection_state(step_outputs))
 
-    if state is None:
-      # Create an arbitrary state to indicate it's not the first step in the
-      # following calls to this function.
-      state = True
+    # Return an arbitrary state for an empty one to indicate it's not the first
+    # step in the following calls to this function.
+    return state or True
 
-    return state
+  def merge_aggregated_logs(self, state, other_state):
+    if not isinstance(other_state, dict):
+      return state
+    if not isinstance(state, dict):
+      return other_state
+    if self._task_config.use_wod_metrics:
+      logging.warning('The Waymo open dataset metrics of sharded evals are not '
+                      'merged, and only cover the eval shard of the chief.')
+    # The visualization is of the first state.
+    merged = dict(state)
+    if self._task_config.use_coco_metrics:
+      name = self.coco_metric.name
+      merged[name] = coco_evaluator.COCOEvaluator.merge_states(
+          state[name], other_state[name])
+    return merged
 
   def reduce_aggregated_logs(self, aggregated_logs, global_step=None):
     logs = {}
     if self._task_config.use_coco_metrics:
+      if (isinstance(aggregated_logs, dict) and
+          self.coco_metric.name in aggregated_logs):
+        self.coco_metric.set_state(aggregated_logs[self.coco_metric.name])
       logs.update(self.coco_metric.result())
     if self._task_config.use_wod_metrics:
       logs.update(self.wod_metric.result())
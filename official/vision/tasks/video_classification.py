@@ -145,11 +145,28 @@ class VideoClassificationTask(base_task.Task):
         return features, labels
       postprocess_fn = mixup_and_cutmix
 
+    parser_fn = parser.parse_fn(params.is_training)
+    transform_and_batch_fn = None
+    if params.cache and params.cache_decoded_frames:
+      # Caches the decoded frames and samples clips from them after the cache.
+      clip_parser_fn = parser_fn
+      parser_fn = parser.decode_frames
+
+      def transform_and_batch_fn(dataset, input_context):
+        dataset = dataset.map(
+            clip_parser_fn, num_parallel_calls=tf.data.experimental.AUTOTUNE)
+        per_replica_batch_size = input_context.get_per_replica_batch_size(
+            params.global_batch_size
+        ) if input_context else params.global_batch_size
+        return dataset.batch(
+            per_replica_batch_size, drop_remainder=params.drop_remainder)
+
     reader = input_reader_factory.input_reader_generator(
         params,
         dataset_fn=self._get_dataset_fn(params),
         decoder_fn=self._get_decoder_fn(params),
-        parser_fn=parser.parse_fn(params.is_training),
+        parser_fn=parser_fn,
+        transform_and_batch_fn=transform_and_batch_fn,
         postprocess_fn=postprocess_fn)
 
     dataset = reader.read(input_context=input_context)
@@ -22,11 +22,13 @@ import tensorflow as tf, tf_keras
 
 from official.common import distribute_utils
 from official.common import flags as tfm_flags
+# pylint: disable=unused-import
+from official.common import lazy_registry_imports
+# pylint: enable=unused-import
 from official.core import task_factory
 from official.core import train_lib
 from official.core import train_utils
 from official.modeling import performance
-from official.vision import registry_imports  # pylint: disable=unused-import
 from official.vision.utils import summary_manager
 
 
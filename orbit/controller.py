@@ -105,6 +105,7 @@ class Controller:
       steps_per_loop: Optional[Union[int, Callable[[int], int]]] = None,
       checkpoint_manager: Optional[tf.train.CheckpointManager] = None,
       enable_async_checkpointing: bool = False,
+      checkpoint_manifest: Optional[utils.CheckpointManifest] = None,
       # Summary related
       summary_interval: Optional[int] = None,
       summary_dir: Optional[str] = None,
@@ -152,6 +153,11 @@ class Controller:
         automatically save to or restore from checkpoints.
       enable_async_checkpointing: Optional bool indicating whether to enable
         async checkpoint saving.
+      checkpoint_manifest: An optional `orbit.utils.CheckpointManifest` in the
+        directory of `checkpoint_manager`. If provided, every saved checkpoint
+        is recorded in the manifest once it is complete, and
+        `evaluate_continuously` waits for checkpoints recorded in the manifest
+        instead of polling the directory.
       summary_interval: Step interval for training summaries. Note that this
         argument only applies to `tf.summary` calls inside the `trainer.train`
         function. Summaries written by the `Controller` (specifically
@@ -216,6 +222,9 @@ class Controller:
     self.global_step = global_step
     self.checkpoint_manager = checkpoint_manager
     self._enable_async_checkpoint_saving = enable_async_checkpointing
+    self.checkpoint_manifest = checkpoint_manifest
+    # Async checkpoints that are not recorded in the manifest yet.
+    self._unrecorded_checkpoints = []
     self._checkpoint_options = tf.train.CheckpointOptions(
         enable_async=enable_async_checkpointing
     )
@@ -430,10 +439,15 @@ class Controller:
 
     output = None
     assert isinstance(self.checkpoint_manager, tf.train.CheckpointManager)
-    for checkpoint_path in tf.train.checkpoints_iterator(
-        self.checkpoint_manager.directory,
-        timeout=timeout,
-        timeout_fn=timeout_fn):
+    if self.checkpoint_manifest is not None:
+      checkpoints_iterator = self.checkpoint_manifest.checkpoints_iterator(
+          timeout=timeout, timeout_fn=timeout_fn)
+    else:
+      checkpoints_iterator = tf.train.checkpoints_iterator(
+          self.checkpoint_manager.directory,
+          timeout=timeout,
+          timeout_fn=timeout_fn)
+    for checkpoint_path in checkpoints_iterator:
       self.restore_checkpoint(checkpoint_path)
       output = self.evaluate(steps)
     return output
@@ -563,9 +577,22 @@ class Controller:
           options=self._checkpoint_options)
       if ckpt_path is not None:
         _log(f"saved checkpoint to {ckpt_path}.")
+        self._record_checkpoint(ckpt_path)
         return True
     return False
 
+  def _record_checkpoint(self, checkpoint_path: str):
+    """Records a saved checkpoint in the manifest once it is complete."""
+    if self.checkpoint_manifest is None:
+      return
+    if self._enable_async_checkpoint_saving:
+      # An async save only returns after the previous async save is complete.
+      for unrecorded_checkpoint in self._unrecorded_checkpoints:
+        self.checkpoint_manifest.append(unrecorded_checkpoint)
+      self._unrecorded_checkpoints = [checkpoint_path]
+    else:
+      self.checkpoint_manifest.append(checkpoint_path)
+
   def _require(self, attribute, for_method):
     """Utility method to raise an error if the given `attribute` is not set."""
     if getattr(self, attribute, None) is None:
@@ -579,6 +606,10 @@ class Controller:
     if self.checkpoint_manager:
       logging.info("Sync on async checkpoint saving.")
       self.checkpoint_manager.sync()
+      if self.checkpoint_manifest is not None:
+        for unrecorded_checkpoint in self._unrecorded_checkpoints:
+          self.checkpoint_manifest.append(unrecorded_checkpoint)
+      self._unrecorded_checkpoints = []
 
 
 class StepTimer:
@@ -515,6 +515,49 @@ class ControllerTest(tf.test.TestCase, parameterized.TestCase):
         timeout=1, timeout_fn=timeout_fn, steps=2)
     self.assertNotEmpty(tf.io.gfile.glob(done_file))
 
+  @parameterized.named_parameters(
+      ("_sync_checkpoint_saving", False),
+      ("_async_checkpoint_saving", True)
+  )
+  def test_checkpoint_manifest(self, enable_async_checkpoint_saving):
+    test_runner = TestRunner()
+
+    checkpoint = tf.train.Checkpoint(
+        model=test_runner.model, optimizer=test_runner.optimizer)
+    checkpoint_manager = tf.train.CheckpointManager(
+        checkpoint,
+        self.model_dir,
+        max_to_keep=None,
+        step_counter=test_runner.global_step,
+        checkpoint_interval=4)
+    test_controller = controller.Controller(
+        trainer=test_runner,
+        global_step=test_runner.global_step,
+        steps_per_loop=2,
+        checkpoint_manager=checkpoint_manager,
+        enable_async_checkpointing=enable_async_checkpoint_saving,
+        checkpoint_manifest=orbit.utils.CheckpointManifest(self.model_dir))
+    test_controller.train(steps=10)
+
+    # All checkpoints are recorded once they are complete.
+    manifest = orbit.utils.CheckpointManifest(self.model_dir)
+    self.assertEqual(manifest.read_new_checkpoints(),
+                     checkpoint_manager.checkpoints)
+
+    evaluated_steps = []
+    record_step = lambda _: evaluated_steps.append(  # pylint: disable=g-long-lambda
+        test_runner.global_step.numpy())
+    test_controller = controller.Controller(
+        evaluator=test_runner,
+        global_step=test_runner.global_step,
+        checkpoint_manager=checkpoint_manager,
+        eval_actions=[record_step],
+        checkpoint_manifest=orbit.utils.CheckpointManifest(self.model_dir))
+    test_controller.evaluate_continuously(steps=2, timeout=1)
+    # Only the latest checkpoint is evaluated, as with
+    # `tf.train.checkpoints_iterator`.
+    self.assertEqual(evaluated_steps, [10])
+
   def test_no_eval_steps(self):
     test_runner = TestRunner()
 
@@ -14,6 +14,8 @@
 
 """Defines exported symbols for the `orbit.utils` package."""
 
+from orbit.utils.checkpoint_manifest import CheckpointManifest
+
 from orbit.utils.common import create_global_step
 from orbit.utils.common import get_value
 from orbit.utils.common import make_distributed_dataset
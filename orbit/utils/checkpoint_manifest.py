@@ -0,0 +1,225 @@
+# Copyright 2024 The Orbit Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Provides an append-only manifest of completed checkpoints.
+
+Watching a directory for new checkpoints with `tf.train.checkpoints_iterator`
+re-reads the directory state every second, which puts metadata load on shared
+file systems when many evaluators watch the same directory. Instead, the
+trainer can append every completed checkpoint to a `CheckpointManifest`, and
+watchers only read the bytes appended since their last read. On local Linux
+file systems the watchers are woken up by inotify as soon as the manifest
+changes, and otherwise they fall back to checking the manifest size.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import time
+from typing import Callable, Iterator, List, Optional
+
+from absl import logging
+import tensorflow as tf, tf_keras
+
+MANIFEST_FILENAME = "checkpoint_manifest"
+
+# From <sys/inotify.h>.
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+
+
+class _InotifyWatcher:
+  """Waits for changes to the files of a local directory with inotify."""
+
+  def __init__(self, directory: str):
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+    if self._fd < 0:
+      raise OSError(ctypes.get_errno(), "inotify_init1 failed.")
+    watch = libc.inotify_add_watch(
+        self._fd, os.fsencode(directory),
+        _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE)
+    if watch < 0:
+      errno = ctypes.get_errno()
+      os.close(self._fd)
+      raise OSError(errno, f"inotify_add_watch failed for {directory}.")
+
+  def wait(self, timeout: float):
+    """Waits until a file in the directory changes or `timeout` seconds pass."""
+    readable, _, _ = select.select([self._fd], [], [], timeout)
+    if readable:
+      try:
+        while os.read(self._fd, 4096):
+          pass
+      except BlockingIOError:
+        pass
+
+  def close(self):
+    os.close(self._fd)
+
+
+def _create_watcher(directory: str) -> Optional[_InotifyWatcher]:
+  """Returns an inotify watcher for local directories, if supported."""
+  if "://" in directory or not hasattr(select, "select"):
+    return None
+  try:
+    return _InotifyWatcher(directory)
+  except (OSError, AttributeError, TypeError) as e:
+    logging.info("Watching %s without inotify: %s", directory, e)
+    return None
+
+
+class CheckpointManifest:
+  """An append-only manifest of the completed checkpoints of a directory.
+
+  Every line of the manifest holds the basename of a completed checkpoint.
+  Since lines are only ever appended, watchers remember how many bytes they
+  have read and only read new complete lines.
+
+  The file system of `directory` must support appending to files.
+  """
+
+  def __init__(self,
+               directory: str,
+               filename: str = MANIFEST_FILENAME,
+               poll_interval_secs: float = 1.0):
+    """Initializes the `CheckpointManifest` instance.
+
+    Args:
+      directory: The directory of the checkpoints and the manifest.
+      filename: The filename of the manifest.
+      poll_interval_secs: The maximum number of seconds between checks of the
+        manifest while waiting for new checkpoints. Local watchers are woken up
+        earlier by inotify. Note that inotify does not see writes of other
+        hosts on network file systems.
+    """
+    self._directory = directory
+    self._path = os.path.join(directory, filename)
+    self._poll_interval_secs = poll_interval_secs
+    self._offset = 0
+
+  @property
+  def path(self) -> str:
+    """The path of the manifest."""
+    return self._path
+
+  def append(self, checkpoint_path: str):
+    """Records that the checkpoint at `checkpoint_path` is complete."""
+    tf.io.gfile.makedirs(self._directory)
+    with tf.io.gfile.GFile(self._path, "a") as f:
+      f.write(os.path.basename(checkpoint_path) + "\n")
+
+  def read_new_checkpoints(self) -> List[str]:
+    """Returns the checkpoints recorded since the last call, oldest first."""
+    try:
+      size = tf.io.gfile.stat(self._path).length
+    except tf.errors.NotFoundError:
+      return []
+    if size <= self._offset:
+      return []
+    with tf.io.gfile.GFile(self._path, "rb") as f:
+      f.seek(self._offset)
+      data = f.read(size - self._offset)
+    # A partially written last line is read again with the next call.
+    data = data[:data.rfind(b"\n") + 1]
+    self._offset += len(data)
+    return [
+        os.path.join(self._directory, name)
+        for name in data.decode("utf-8").splitlines()
+        if name
+    ]
+
+  def wait_for_new_checkpoints(
+      self, timeout: Optional[float] = None) -> Optional[List[str]]:
+    """Waits until new checkpoints are recorded in the manifest.
+
+    Args:
+      timeout: The maximum number of seconds to wait. If left as `None`, then
+        the process will wait indefinitely.
+
+    Returns:
+      The new checkpoint paths, oldest first, or `None` if the timeout was
+      reached.
+    """
+    logging.info("Waiting for new checkpoints in %s", self._path)
+    stop_time = time.time() + timeout if timeout is not None else None
+    watcher = _create_watcher(self._directory)
+    try:
+      while True:
+        checkpoints = self.read_new_checkpoints()
+        if checkpoints:
+          return checkpoints
+        wait_secs = self._poll_interval_secs
+        if stop_time is not None:
+          wait_secs = min(wait_secs, stop_time - time.time())
+          if wait_secs <= 0:
+            return None
+        if watcher is not None:
+          watcher.wait(wait_secs)
+        else:
+          time.sleep(wait_secs)
+    finally:
+      if watcher is not None:
+        watcher.close()
+
+  def checkpoints_iterator(
+      self,
+      min_interval_secs: float = 0,
+      timeout: Optional[float] = None,
+      timeout_fn: Optional[Callable[[], bool]] = None,
+      latest_only: bool = True) -> Iterator[str]:
+    """Continuously yields new checkpoint paths as they are recorded.
+
+    This behaves like `tf.train.checkpoints_iterator`, and starts with the
+    checkpoints that are already recorded in the manifest.
+
+    Args:
+      min_interval_secs: The minimum number of seconds between yielding
+        checkpoints.
+      timeout: The maximum number of seconds to wait between checkpoints. If
+        left as `None`, then the process will wait indefinitely.
+      timeout_fn: Optional function to call after a timeout. If the function
+        returns True, then it means that no new checkpoints will be generated
+        and the iterator will exit. The function is called with no arguments.
+      latest_only: Whether to only yield the latest of the checkpoints recorded
+        since the last one was yielded, like `tf.train.checkpoints_iterator`,
+        instead of all of them.
+
+    Yields:
+      String paths to the checkpoints as they are recorded.
+    """
+    pending = []
+    while True:
+      if not pending:
+        pending = self.wait_for_new_checkpoints(timeout=timeout)
+        if pending is None:
+          pending = []
+          if not timeout_fn:
+            logging.info("Timed-out waiting for a checkpoint.")
+            return
+          if timeout_fn():
+            return
+          continue
+        if latest_only:
+          pending = pending[-1:]
+      start = time.time()
+      yield pending.pop(0)
+      time_to_next_eval = start + min_interval_secs - time.time()
+      if time_to_next_eval > 0:
+        time.sleep(time_to_next_eval)
@@ -0,0 +1,95 @@
+# Copyright 2024 The Orbit Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for orbit.utils.checkpoint_manifest."""
+
+import os
+import threading
+import time
+
+from orbit.utils import checkpoint_manifest
+
+import tensorflow as tf, tf_keras
+
+
+class CheckpointManifestTest(tf.test.TestCase):
+
+  def test_reads_only_new_complete_lines(self):
+    directory = self.get_temp_dir()
+    writer = checkpoint_manifest.CheckpointManifest(directory)
+    reader = checkpoint_manifest.CheckpointManifest(directory)
+    self.assertEqual(reader.read_new_checkpoints(), [])
+
+    writer.append(os.path.join(directory, "ckpt-1"))
+    writer.append(os.path.join(directory, "ckpt-2"))
+    self.assertEqual(reader.read_new_checkpoints(),
+                     [os.path.join(directory, "ckpt-1"),
+                      os.path.join(directory, "ckpt-2")])
+    self.assertEqual(reader.read_new_checkpoints(), [])
+
+    # A partially written line is only read once it is complete.
+    with tf.io.gfile.GFile(writer.path, "a") as f:
+      f.write("ckpt-")
+    self.assertEqual(reader.read_new_checkpoints(), [])
+    with tf.io.gfile.GFile(writer.path, "a") as f:
+      f.write("3\n")
+    self.assertEqual(reader.read_new_checkpoints(),
+                     [os.path.join(directory, "ckpt-3")])
+
+  def test_wait_returns_none_after_timeout(self):
+    manifest = checkpoint_manifest.CheckpointManifest(
+        self.get_temp_dir(), poll_interval_secs=0.1)
+    start = time.time()
+    self.assertIsNone(manifest.wait_for_new_checkpoints(timeout=0.5))
+    self.assertGreaterEqual(time.time() - start, 0.5)
+
+  def test_wait_is_woken_up_by_append(self):
+    directory = self.get_temp_dir()
+    writer = checkpoint_manifest.CheckpointManifest(directory)
+    reader = checkpoint_manifest.CheckpointManifest(
+        directory, poll_interval_secs=0.2)
+    thread = threading.Timer(
+        0.5, writer.append, args=(os.path.join(directory, "ckpt-1"),))
+    thread.start()
+    checkpoints = reader.wait_for_new_checkpoints(timeout=10)
+    thread.join()
+    self.assertEqual(checkpoints, [os.path.join(directory, "ckpt-1")])
+
+  def test_checkpoints_iterator(self):
+    directory = self.get_temp_dir()
+    manifest = checkpoint_manifest.CheckpointManifest(directory)
+    for i in range(3):
+      manifest.append(os.path.join(directory, f"ckpt-{i}"))
+
+    latest = checkpoint_manifest.CheckpointManifest(directory)
+    self.assertEqual(
+        list(latest.checkpoints_iterator(timeout=0.1)),
+        [os.path.join(directory, "ckpt-2")])
+
+    timeout_fn_calls = []
+
+    def timeout_fn():
+      timeout_fn_calls.append(True)
+      return len(timeout_fn_calls) > 1
+
+    every = checkpoint_manifest.CheckpointManifest(directory)
+    self.assertEqual(
+        list(every.checkpoints_iterator(
+            timeout=0.1, timeout_fn=timeout_fn, latest_only=False)),
+        [os.path.join(directory, f"ckpt-{i}") for i in range(3)])
+    self.assertLen(timeout_fn_calls, 2)
+
+
+if __name__ == "__main__":
+  tf.test.main()
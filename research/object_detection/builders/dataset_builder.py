@@ -247,8 +247,19 @@ def build(input_reader_config, batch_size=None, transform_input_data_fn=None,
       dataset = dataset.shard(input_reader_config.sample_1_of_n_examples, 0)
     # TODO(rathodv): make batch size a required argument once the old binaries
     # are deleted.
-    dataset = dataset_map_fn(dataset, decoder.decode, batch_size,
-                             input_reader_config)
+    if (input_reader_config.parse_batch_size > 0 and
+        hasattr(decoder, 'parse_batch')):
+      # Parses the examples in batches and decodes the parsed features of
+      # each example separately.
+      dataset = dataset.batch(input_reader_config.parse_batch_size)
+      dataset = dataset_map_fn(dataset, decoder.parse_batch, batch_size,
+                               input_reader_config)
+      dataset = dataset.unbatch()
+      dataset = dataset_map_fn(dataset, decoder.decode_parsed, batch_size,
+                               input_reader_config)
+    else:
+      dataset = dataset_map_fn(dataset, decoder.decode, batch_size,
+                               input_reader_config)
     if reduce_to_frame_fn:
       dataset = reduce_to_frame_fn(dataset, dataset_map_fn, batch_size,
                                    input_reader_config)
@@ -322,6 +322,37 @@ class DatasetBuilderTest(test_case.TestCase):
     self.assertAllEqual([[[0.0, 0.0, 1.0, 1.0]], [[0.0, 0.0, 1.0, 1.0]]],
                         output_dict[fields.InputDataFields.groundtruth_boxes])
 
+  def test_build_tf_record_input_reader_with_parse_batch_size(self):
+    tf_record_path = self.create_tf_record(num_examples_per_shard=3)
+
+    input_reader_text_proto = """
+      shuffle: false
+      num_readers: 1
+      parse_batch_size: 2
+      decode_fields: 'groundtruth_area'
+      tf_record_input_reader {{
+        input_path: '{0}'
+      }}
+    """.format(tf_record_path)
+    input_reader_proto = input_reader_pb2.InputReader()
+    text_format.Merge(input_reader_text_proto, input_reader_proto)
+
+    def graph_fn():
+      return get_iterator_next_for_testing(
+          dataset_builder.build(input_reader_proto, batch_size=3),
+          self.is_tf2())
+
+    output_dict = self.execute(graph_fn, [])
+
+    self.assertAllEqual([b'0', b'1', b'2'],
+                        output_dict[fields.InputDataFields.source_id])
+    self.assertAllEqual([3, 4, 5, 3],
+                        output_dict[fields.InputDataFields.image].shape)
+    self.assertAllEqual([[2], [2], [2]],
+                        output_dict[fields.InputDataFields.groundtruth_classes])
+    self.assertIn(fields.InputDataFields.groundtruth_area, output_dict)
+    self.assertNotIn(fields.InputDataFields.groundtruth_difficult, output_dict)
+
   def test_build_tf_record_input_reader_with_batch_size_two_and_masks(self):
     tf_record_path = self.create_tf_record()
 
@@ -61,7 +61,8 @@ def build(input_reader_config):
           load_dense_pose=input_reader_config.load_dense_pose,
           load_track_id=input_reader_config.load_track_id,
           load_keypoint_depth_features=input_reader_config
-          .load_keypoint_depth_features)
+          .load_keypoint_depth_features,
+          decode_fields=list(input_reader_config.decode_fields) or None)
       return decoder
     elif input_type == input_reader_pb2.InputType.Value('TF_SEQUENCE_EXAMPLE'):
       decoder = tf_sequence_example_decoder.TfSequenceExampleDecoder(
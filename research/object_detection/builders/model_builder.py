@@ -19,6 +19,7 @@ import functools
 import sys
 
 from absl import logging
+import tensorflow.compat.v1 as tf
 
 from object_detection.builders import anchor_generator_builder
 from object_detection.builders import box_coder_builder
@@ -457,7 +458,10 @@ def _build_ssd_model(ssd_config, is_training, add_summaries):
       region_similarity_calculator,
       matcher,
       box_coder,
-      negative_class_weight=negative_class_weight)
+      negative_class_weight=negative_class_weight,
+      matching_dtype=(tf.bfloat16 if ssd_config.use_bfloat16_matching
+                      else tf.float32),
+      use_padded_batch=ssd_config.use_padded_batch_target_assignment)
 
   ssd_meta_arch_fn = ssd_meta_arch.SSDMetaArch
   kwargs = {}
@@ -631,10 +635,14 @@ def _build_faster_rcnn_model(frcnn_config, is_training, add_summaries):
   first_stage_anchor_generator = anchor_generator_builder.build(
       frcnn_config.first_stage_anchor_generator)
 
+  matching_dtype = (tf.bfloat16 if frcnn_config.use_bfloat16_matching
+                    else tf.float32)
   first_stage_target_assigner = target_assigner.create_target_assigner(
       'FasterRCNN',
       'proposal',
-      use_matmul_gather=frcnn_config.use_matmul_gather_in_matcher)
+      use_matmul_gather=frcnn_config.use_matmul_gather_in_matcher,
+      matching_dtype=matching_dtype,
+      use_padded_batch=frcnn_config.use_padded_batch_target_assignment)
   first_stage_atrous_rate = frcnn_config.first_stage_atrous_rate
   if is_keras:
     first_stage_box_predictor_arg_scope_fn = (
@@ -681,7 +689,8 @@ def _build_faster_rcnn_model(frcnn_config, is_training, add_summaries):
   second_stage_target_assigner = target_assigner.create_target_assigner(
       'FasterRCNN',
       'detection',
-      use_matmul_gather=frcnn_config.use_matmul_gather_in_matcher)
+      use_matmul_gather=frcnn_config.use_matmul_gather_in_matcher,
+      matching_dtype=matching_dtype)
   if is_keras:
     second_stage_box_predictor = box_predictor_builder.build_keras(
         hyperparams_builder.KerasLayerHyperparams,
@@ -939,7 +948,9 @@ def keypoint_proto_to_params(kp_config, keypoint_map_dict):
       std_dev_multiplier=kp_config.std_dev_multiplier,
       rescoring_threshold=kp_config.rescoring_threshold,
       gaussian_denom_ratio=kp_config.gaussian_denom_ratio,
-      argmax_postprocessing=kp_config.argmax_postprocessing)
+      argmax_postprocessing=kp_config.argmax_postprocessing,
+      num_nearby_candidates=kp_config.num_nearby_candidates or None,
+      instance_chunk_size=kp_config.instance_chunk_size or None)
 
 
 def object_detection_proto_to_params(od_config):
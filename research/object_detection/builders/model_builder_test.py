@@ -17,6 +17,7 @@
 from absl.testing import parameterized
 
 from google.protobuf import text_format
+import tensorflow.compat.v1 as tf
 from object_detection.builders import model_builder
 from object_detection.meta_architectures import faster_rcnn_meta_arch
 from object_detection.meta_architectures import rfcn_meta_arch
@@ -220,6 +221,28 @@ class ModelBuilderTest(test_case.TestCase, parameterized.TestCase):
     self.assertEqual(model._feature_extractor._fpn_min_level, 3)
     self.assertEqual(model._feature_extractor._fpn_max_level, 7)
 
+  def test_create_ssd_model_with_padded_batch_target_assignment(self):
+    model_proto = self.create_default_ssd_model_proto()
+    model = model_builder.build(model_proto, is_training=True)
+    self.assertFalse(model._target_assigner.use_padded_batch)
+    model_proto.ssd.use_padded_batch_target_assignment = True
+    model_proto.ssd.use_bfloat16_matching = True
+    model = model_builder.build(model_proto, is_training=True)
+    self.assertTrue(model._target_assigner.use_padded_batch)
+    self.assertEqual(model._target_assigner._matching_dtype, tf.bfloat16)
+
+  def test_create_faster_rcnn_model_with_padded_batch_target_assignment(self):
+    model_proto = self.create_default_faster_rcnn_model_proto()
+    model_proto.faster_rcnn.use_padded_batch_target_assignment = True
+    model_proto.faster_rcnn.use_bfloat16_matching = True
+    model = model_builder.build(model_proto, is_training=True)
+    self.assertTrue(model._proposal_target_assigner.use_padded_batch)
+    self.assertFalse(model._detector_target_assigner.use_padded_batch)
+    self.assertEqual(model._proposal_target_assigner._matching_dtype,
+                     tf.bfloat16)
+    self.assertEqual(model._detector_target_assigner._matching_dtype,
+                     tf.bfloat16)
+
 
   @parameterized.named_parameters(
       {
@@ -1278,36 +1278,389 @@ def random_distort_color(image, color_ordering=0, preprocess_vars_cache=None):
     ValueError: if color_ordering is not in {0, 1}.
   """
   with tf.name_scope('RandomDistortColor', values=[image]):
+    brightness = (random_adjust_brightness, {'max_delta': 32. / 255.})
+    contrast = (random_adjust_contrast, {'min_delta': 0.5, 'max_delta': 1.5})
+    saturation = (random_adjust_saturation,
+                  {'min_delta': 0.5, 'max_delta': 1.5})
+    hue = (random_adjust_hue, {'max_delta': 0.2})
     if color_ordering == 0:
-      image = random_adjust_brightness(
-          image, max_delta=32. / 255.,
-          preprocess_vars_cache=preprocess_vars_cache)
-      image = random_adjust_saturation(
-          image, min_delta=0.5, max_delta=1.5,
-          preprocess_vars_cache=preprocess_vars_cache)
-      image = random_adjust_hue(
-          image, max_delta=0.2,
-          preprocess_vars_cache=preprocess_vars_cache)
-      image = random_adjust_contrast(
-          image, min_delta=0.5, max_delta=1.5,
-          preprocess_vars_cache=preprocess_vars_cache)
-
+      adjustments = [brightness, saturation, hue, contrast]
     elif color_ordering == 1:
-      image = random_adjust_brightness(
-          image, max_delta=32. / 255.,
-          preprocess_vars_cache=preprocess_vars_cache)
-      image = random_adjust_contrast(
-          image, min_delta=0.5, max_delta=1.5,
-          preprocess_vars_cache=preprocess_vars_cache)
-      image = random_adjust_saturation(
-          image, min_delta=0.5, max_delta=1.5,
-          preprocess_vars_cache=preprocess_vars_cache)
-      image = random_adjust_hue(
-          image, max_delta=0.2,
-          preprocess_vars_cache=preprocess_vars_cache)
+      adjustments = [brightness, contrast, saturation, hue]
     else:
       raise ValueError('color_ordering must be in {0, 1}')
-    return image
+    return fused_color_adjustments(
+        image, adjustments, preprocess_vars_cache=preprocess_vars_cache)
+
+
+# Color adjustments that can be applied by `fused_color_adjustments`, mapped to
+# (cache key, function returning the range of the random factor from the
+# arguments, adjustment of [0, 1] images, whether the result must be clipped).
+_FUSABLE_COLOR_ADJUSTMENTS = {
+    random_adjust_brightness: (
+        preprocessor_cache.PreprocessorCache.ADJUST_BRIGHTNESS,
+        lambda args: (-args['max_delta'], args['max_delta']),
+        tf.image.adjust_brightness, True),
+    random_adjust_contrast: (
+        preprocessor_cache.PreprocessorCache.ADJUST_CONTRAST,
+        lambda args: (args['min_delta'], args['max_delta']),
+        tf.image.adjust_contrast, True),
+    random_adjust_hue: (
+        preprocessor_cache.PreprocessorCache.ADJUST_HUE,
+        lambda args: (-args['max_delta'], args['max_delta']),
+        tf.image.adjust_hue, False),
+    random_adjust_saturation: (
+        preprocessor_cache.PreprocessorCache.ADJUST_SATURATION,
+        lambda args: (args['min_delta'], args['max_delta']),
+        tf.image.adjust_saturation, False),
+}
+
+
+def fused_color_adjustments(image, adjustments, preprocess_vars_cache=None):
+  """Applies a sequence of random color adjustments in a single pass.
+
+  This is equivalent to applying the `random_adjust_brightness`,
+  `random_adjust_contrast`, `random_adjust_hue` and `random_adjust_saturation`
+  steps one after another, with the same random factors and cache entries.
+  However, the RGB channels are sliced and rescaled to [0, 1] only once, and
+  only the brightness and contrast adjustments, which can leave the valid range,
+  are followed by clipping.
+
+  Args:
+    image: rank 3 float32 tensor contains 1 image -> [height, width, channels]
+           with pixel values varying between [0, 255].
+    adjustments: a list of (function, kwargs) tuples of the color adjustments
+                 to apply, in order.
+    preprocess_vars_cache: PreprocessorCache object that records previously
+                           performed augmentations. Updated in-place. If this
+                           function is called multiple times with the same
+                           non-null cache, it will perform deterministically.
+
+  Returns:
+    image: image which is the same shape as input image.
+
+  Raises:
+    ValueError: if one of the adjustments can not be fused.
+  """
+  with tf.name_scope('FusedColorAdjustments', values=[image]):
+    steps = []
+    for func, params in adjustments:
+      if func not in _FUSABLE_COLOR_ADJUSTMENTS:
+        raise ValueError('The function %s can not be fused' % func.__name__)
+      cache_key, get_range, adjust_fn, needs_clipping = (
+          _FUSABLE_COLOR_ADJUSTMENTS[func])
+      params = {key: value for key, value in params.items()
+                if key != 'preprocess_vars_cache'}
+      arguments = inspect.signature(func).bind(image, **params)
+      arguments.apply_defaults()
+      minval, maxval = get_range(arguments.arguments)
+      generator_func = functools.partial(
+          tf.random_uniform, [], minval, maxval,
+          seed=arguments.arguments['seed'])
+      factor = _get_or_create_preprocess_rand_vars(
+          generator_func, cache_key, preprocess_vars_cache)
+      steps.append((adjust_fn, factor, needs_clipping))
+
+    def _adjust_colors(image):
+      image = image / 255
+      for adjust_fn, factor, needs_clipping in steps:
+        image = adjust_fn(image, factor)
+        if needs_clipping:
+          image = tf.clip_by_value(image, clip_value_min=0.0,
+                                   clip_value_max=1.0)
+      return image * 255
+
+    return _augment_only_rgb_channels(image, _adjust_colors)
+
+
+# Flips and rotations that can be applied by `fused_dihedral_transforms`,
+# mapped to the cache key of their random decision.
+_FUSABLE_DIHEDRAL_TRANSFORMS = {
+    random_horizontal_flip: preprocessor_cache.PreprocessorCache.HORIZONTAL_FLIP,
+    random_vertical_flip: preprocessor_cache.PreprocessorCache.VERTICAL_FLIP,
+    random_rotation90: preprocessor_cache.PreprocessorCache.ROTATION90,
+}
+
+
+def _transpose_and_reverse(tensor, transpose, reverse_y, reverse_x, y_axis):
+  """Optionally swaps the y and x axes of a tensor, and then reverses them.
+
+  Args:
+    tensor: a tensor whose y and x axes are `y_axis` and `y_axis + 1`.
+    transpose: a bool scalar tensor, whether to swap the y and x axes.
+    reverse_y: a bool scalar tensor, whether to reverse the y axis afterwards.
+    reverse_x: a bool scalar tensor, whether to reverse the x axis afterwards.
+    y_axis: the index of the y axis.
+
+  Returns:
+    the transformed tensor.
+  """
+  x_axis = y_axis + 1
+  perm = list(range(tensor.get_shape().ndims))
+  perm[y_axis], perm[x_axis] = x_axis, y_axis
+  tensor = tf.cond(transpose, lambda: tf.transpose(tensor, perm),
+                   lambda: tensor)
+  reverse_index = (2 * tf.cast(reverse_y, tf.int32) +
+                   tf.cast(reverse_x, tf.int32))
+  return tf.switch_case(reverse_index, [
+      lambda: tensor,
+      lambda: tf.reverse(tensor, [x_axis]),
+      lambda: tf.reverse(tensor, [y_axis]),
+      lambda: tf.reverse(tensor, [y_axis, x_axis]),
+  ])
+
+
+def fused_dihedral_transforms(image,
+                              boxes=None,
+                              masks=None,
+                              keypoints=None,
+                              keypoint_visibilities=None,
+                              densepose_part_ids=None,
+                              densepose_surface_coords=None,
+                              keypoint_depths=None,
+                              keypoint_depth_weights=None,
+                              transforms=None,
+                              preprocess_vars_cache=None):
+  """Applies a sequence of random flips and 90 degree rotations at once.
+
+  This is equivalent to applying the `random_horizontal_flip`,
+  `random_vertical_flip` and `random_rotation90` steps one after another, with
+  the same random decisions and cache entries. However, since any sequence of
+  flips and 90 degree rotations is one of the eight symmetries of a square, the
+  image and masks are transformed only once, by an optional transpose followed
+  by a reversal of some of their axes. The boxes and keypoints, which are small,
+  are transformed step by step.
+
+  Args:
+    image: rank 3 float32 tensor with shape [height, width, channels].
+    boxes: (optional) rank 2 float32 tensor with shape [N, 4]
+           containing the bounding boxes.
+           Boxes are in normalized form meaning their coordinates vary
+           between [0, 1].
+           Each row is in the form of [ymin, xmin, ymax, xmax].
+    masks: (optional) rank 3 float32 tensor with shape
+           [num_instances, height, width] containing instance masks. The masks
+           are of the same height, width as the input `image`.
+    keypoints: (optional) rank 3 float32 tensor with shape
+               [num_instances, num_keypoints, 2]. The keypoints are in y-x
+               normalized coordinates.
+    keypoint_visibilities: (optional) rank 2 bool tensor with shape
+                           [num_instances, num_keypoints]. Only changed by
+                           horizontal flips.
+    densepose_part_ids: (optional) rank 2 int32 tensor with shape
+                        [num_instances, num_points]. Only changed by horizontal
+                        flips.
+    densepose_surface_coords: (optional) rank 3 float32 tensor with shape
+                              [num_instances, num_points, 4]. Only changed by
+                              horizontal flips.
+    keypoint_depths: (optional) rank 2 float32 tensor with shape [num_instances,
+                     num_keypoints]. Only changed by horizontal flips.
+    keypoint_depth_weights: (optional) rank 2 float32 tensor with shape
+                            [num_instances, num_keypoints]. Only changed by
+                            horizontal flips.
+    transforms: a list of (function, kwargs) tuples of the flips and rotations
+                to apply, in order.
+    preprocess_vars_cache: PreprocessorCache object that records previously
+                           performed augmentations. Updated in-place. If this
+                           function is called multiple times with the same
+                           non-null cache, it will perform deterministically.
+
+  Returns:
+    image: the transformed image, followed by the transformed boxes, masks,
+    keypoints, keypoint_visibilities, densepose_part_ids,
+    densepose_surface_coords, keypoint_depths and keypoint_depth_weights that
+    are not None.
+
+  Raises:
+    ValueError: if one of the transforms can not be fused, or if keypoints are
+                provided but the keypoint flip permutation of a flip is not.
+    ValueError: if either densepose_part_ids or densepose_surface_coords is
+                not None, but both are not None.
+  """
+  if ((densepose_part_ids is not None and densepose_surface_coords is None) or
+      (densepose_part_ids is None and densepose_surface_coords is not None)):
+    raise ValueError(
+        'Must provide both `densepose_part_ids` and `densepose_surface_coords`')
+
+  with tf.name_scope('FusedDihedralTransforms', values=[image, boxes]):
+    # The image and masks are transformed by swapping their y and x axes if
+    # `transpose`, and then reversing the axes selected by `reverse_y` and
+    # `reverse_x`.
+    transpose = tf.constant(False)
+    reverse_y = tf.constant(False)
+    reverse_x = tf.constant(False)
+    for func, params in transforms:
+      if func not in _FUSABLE_DIHEDRAL_TRANSFORMS:
+        raise ValueError('The function %s can not be fused' % func.__name__)
+      params = {key: value for key, value in params.items()
+                if key != 'preprocess_vars_cache'}
+      arguments = inspect.signature(func).bind(image, **params)
+      arguments.apply_defaults()
+      arguments = arguments.arguments
+      generator_func = functools.partial(
+          tf.random_uniform, [], seed=arguments['seed'])
+      do_transform = _get_or_create_preprocess_rand_vars(
+          generator_func, _FUSABLE_DIHEDRAL_TRANSFORMS[func],
+          preprocess_vars_cache)
+      do_transform = tf.less(do_transform, arguments['probability'])
+
+      # pylint: disable=cell-var-from-loop
+      if func is random_rotation90:
+        # A counter-clockwise rotation swaps the axes, and then reverses the
+        # new y axis.
+        transpose, reverse_y, reverse_x = (
+            tf.logical_xor(transpose, do_transform),
+            tf.where(do_transform, tf.logical_not(reverse_x), reverse_y),
+            tf.where(do_transform, reverse_y, reverse_x))
+        if boxes is not None:
+          boxes = tf.cond(do_transform, lambda: _rot90_boxes(boxes),
+                          lambda: boxes)
+        if keypoints is not None:
+          permutation = arguments['keypoint_rot_permutation']
+          keypoints = tf.cond(
+              do_transform,
+              lambda: keypoint_ops.rot90(keypoints, permutation),
+              lambda: keypoints)
+        continue
+
+      permutation = arguments['keypoint_flip_permutation']
+      if keypoints is not None and permutation is None:
+        raise ValueError('keypoints are provided but keypoints_flip_permutation'
+                         ' is not provided')
+      if func is random_vertical_flip:
+        reverse_y = tf.logical_xor(reverse_y, do_transform)
+        if boxes is not None:
+          boxes = tf.cond(do_transform, lambda: _flip_boxes_up_down(boxes),
+                          lambda: boxes)
+        if keypoints is not None:
+          keypoints = tf.cond(
+              do_transform,
+              lambda: keypoint_ops.flip_vertical(keypoints, 0.5, permutation),
+              lambda: keypoints)
+        continue
+
+      reverse_x = tf.logical_xor(reverse_x, do_transform)
+      if boxes is not None:
+        boxes = tf.cond(do_transform, lambda: _flip_boxes_left_right(boxes),
+                        lambda: boxes)
+      if keypoints is not None:
+        keypoints = tf.cond(
+            do_transform,
+            lambda: keypoint_ops.flip_horizontal(keypoints, 0.5, permutation),
+            lambda: keypoints)
+      if keypoint_visibilities is not None and permutation is not None:
+        keypoint_visibilities = tf.cond(
+            do_transform,
+            lambda: tf.gather(keypoint_visibilities, permutation, axis=1),
+            lambda: keypoint_visibilities)
+      if densepose_part_ids is not None:
+        densepose_part_ids, densepose_surface_coords = tf.cond(
+            do_transform,
+            functools.partial(densepose_ops.flip_horizontal,
+                              densepose_part_ids, densepose_surface_coords),
+            lambda: (densepose_part_ids, densepose_surface_coords))
+      if keypoint_depths is not None and permutation is not None:
+        keypoint_depths = tf.cond(
+            do_transform,
+            lambda: tf.gather(keypoint_depths, permutation, axis=1),
+            lambda: keypoint_depths)
+        keypoint_depth_weights = tf.cond(
+            do_transform,
+            lambda: tf.gather(keypoint_depth_weights, permutation, axis=1),
+            lambda: keypoint_depth_weights)
+      # pylint: enable=cell-var-from-loop
+
+    image = _transpose_and_reverse(image, transpose, reverse_y, reverse_x,
+                                   y_axis=0)
+    if masks is not None:
+      masks = _transpose_and_reverse(masks, transpose, reverse_y, reverse_x,
+                                     y_axis=1)
+    return tuple(
+        tensor for tensor in (image, boxes, masks, keypoints,
+                              keypoint_visibilities, densepose_part_ids,
+                              densepose_surface_coords, keypoint_depths,
+                              keypoint_depth_weights)
+        if tensor is not None)
+
+
+def _fuse_runs(preprocess_options, fusable_funcs, fused_func, runs_key):
+  """Replaces runs of consecutive `fusable_funcs` by a `fused_func` step.
+
+  Args:
+    preprocess_options: a list of (function, kwargs) tuples as passed to
+                        `preprocess`.
+    fusable_funcs: the functions that can be fused.
+    fused_func: the function which applies a run of fused steps, which it takes
+                as a list of (function, kwargs) tuples in its `runs_key`
+                argument.
+    runs_key: the name of the argument of `fused_func` that takes the run.
+
+  Returns:
+    a list of (function, kwargs) tuples in which every run of two or more
+    consecutive `fusable_funcs` steps is replaced by a single `fused_func`
+    step.
+  """
+  fused_options = []
+  for func, params in preprocess_options:
+    if func in fusable_funcs:
+      if fused_options and fused_options[-1][0] is fused_func:
+        fused_options[-1][1][runs_key].append((func, params))
+      else:
+        fused_options.append((fused_func, {runs_key: [(func, params)]}))
+    else:
+      fused_options.append((func, params))
+  # A single step does not benefit from fusion.
+  return [params[runs_key][0]
+          if func is fused_func and len(params[runs_key]) == 1 else
+          (func, params)
+          for func, params in fused_options]
+
+
+def fuse_color_adjustments(preprocess_options):
+  """Replaces consecutive color adjustments by `fused_color_adjustments`.
+
+  Args:
+    preprocess_options: a list of (function, kwargs) tuples as passed to
+                        `preprocess`.
+
+  Returns:
+    a list of (function, kwargs) tuples in which every run of two or more
+    consecutive color adjustments is replaced by a single
+    `fused_color_adjustments` step. The random decisions are unchanged.
+  """
+  return _fuse_runs(preprocess_options, _FUSABLE_COLOR_ADJUSTMENTS,
+                    fused_color_adjustments, 'adjustments')
+
+
+def fuse_dihedral_transforms(preprocess_options):
+  """Replaces consecutive flips and rotations by `fused_dihedral_transforms`.
+
+  Args:
+    preprocess_options: a list of (function, kwargs) tuples as passed to
+                        `preprocess`.
+
+  Returns:
+    a list of (function, kwargs) tuples in which every run of two or more
+    consecutive `random_horizontal_flip`, `random_vertical_flip` and
+    `random_rotation90` steps is replaced by a single
+    `fused_dihedral_transforms` step. The random decisions are unchanged.
+  """
+  return _fuse_runs(preprocess_options, _FUSABLE_DIHEDRAL_TRANSFORMS,
+                    fused_dihedral_transforms, 'transforms')
+
+
+def fuse_augmentations(preprocess_options):
+  """Fuses the color adjustments and the flips and rotations of the options.
+
+  Args:
+    preprocess_options: a list of (function, kwargs) tuples as passed to
+                        `preprocess`.
+
+  Returns:
+    a list of (function, kwargs) tuples with the fused steps of
+    `fuse_color_adjustments` and `fuse_dihedral_transforms`.
+  """
+  return fuse_dihedral_transforms(fuse_color_adjustments(preprocess_options))
 
 
 def random_jitter_boxes(boxes, ratio=0.05, jitter_mode='default', seed=None):
@@ -4526,6 +4879,18 @@ def get_default_func_arg_map(include_label_weights=True,
       random_adjust_hue: (fields.InputDataFields.image,),
       random_adjust_saturation: (fields.InputDataFields.image,),
       random_distort_color: (fields.InputDataFields.image,),
+      fused_color_adjustments: (fields.InputDataFields.image,),
+      fused_dihedral_transforms: (
+          fields.InputDataFields.image,
+          fields.InputDataFields.groundtruth_boxes,
+          groundtruth_instance_masks,
+          groundtruth_keypoints,
+          groundtruth_keypoint_visibilities,
+          groundtruth_dp_part_ids,
+          groundtruth_dp_surface_coords,
+          groundtruth_keypoint_depths,
+          groundtruth_keypoint_depth_weights,
+      ),
       random_jitter_boxes: (fields.InputDataFields.groundtruth_boxes,),
       random_crop_image:
           (fields.InputDataFields.image,
@@ -19,6 +19,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import itertools
 import unittest
 from absl.testing import parameterized
 import numpy as np
@@ -1263,6 +1264,120 @@ class PreprocessorTest(test_case.TestCase, parameterized.TestCase):
                                 test_masks=False,
                                 test_keypoints=False)
 
+  def testFuseColorAdjustments(self):
+    preprocess_options = [
+        (preprocessor.random_adjust_brightness, {}),
+        (preprocessor.random_adjust_contrast, {}),
+        (preprocessor.random_horizontal_flip, {}),
+        (preprocessor.random_adjust_hue, {}),
+        (preprocessor.random_adjust_saturation, {'max_delta': 1.1}),
+        (preprocessor.random_adjust_hue, {}),
+        (preprocessor.random_vertical_flip, {}),
+        (preprocessor.random_adjust_saturation, {}),
+    ]
+    fused_options = preprocessor.fuse_color_adjustments(preprocess_options)
+    self.assertEqual([func for func, _ in fused_options], [
+        preprocessor.fused_color_adjustments,
+        preprocessor.random_horizontal_flip,
+        preprocessor.fused_color_adjustments,
+        preprocessor.random_vertical_flip,
+        preprocessor.random_adjust_saturation,
+    ])
+    self.assertEqual(fused_options[2][1]['adjustments'],
+                     preprocess_options[3:6])
+
+  def testFusedColorAdjustmentsMatchUnfused(self):
+    preprocess_options = [
+        (preprocessor.random_adjust_brightness, {'max_delta': 0.5}),
+        (preprocessor.random_adjust_contrast, {}),
+        (preprocessor.random_adjust_hue, {'max_delta': 0.5}),
+        (preprocessor.random_adjust_saturation, {}),
+        (preprocessor.random_distort_color, {'color_ordering': 1}),
+    ]
+
+    def graph_fn():
+      cache = preprocessor_cache.PreprocessorCache()
+      images = self.createTestImages()
+      outputs = []
+      for options in (
+          preprocess_options,
+          preprocessor.fuse_color_adjustments(preprocess_options)):
+        tensor_dict = preprocessor.preprocess(
+            {fields.InputDataFields.image: images}, options,
+            preprocess_vars_cache=cache)
+        outputs.append(tensor_dict[fields.InputDataFields.image])
+      return outputs
+
+    unfused_images, fused_images = self.execute_cpu(graph_fn, [])
+    self.assertAllClose(unfused_images, fused_images, atol=1e-3)
+
+  def testFuseDihedralTransforms(self):
+    preprocess_options = [
+        (preprocessor.random_horizontal_flip, {}),
+        (preprocessor.random_rotation90, {}),
+        (preprocessor.random_adjust_hue, {}),
+        (preprocessor.random_vertical_flip, {}),
+        (preprocessor.random_adjust_brightness, {}),
+        (preprocessor.random_adjust_contrast, {}),
+        (preprocessor.random_rotation90, {}),
+        (preprocessor.random_horizontal_flip, {'probability': 0.3}),
+        (preprocessor.random_vertical_flip, {}),
+    ]
+    fused_options = preprocessor.fuse_augmentations(preprocess_options)
+    self.assertEqual([func for func, _ in fused_options], [
+        preprocessor.fused_dihedral_transforms,
+        preprocessor.random_adjust_hue,
+        preprocessor.random_vertical_flip,
+        preprocessor.fused_color_adjustments,
+        preprocessor.fused_dihedral_transforms,
+    ])
+    self.assertEqual(fused_options[0][1]['transforms'], preprocess_options[:2])
+    self.assertEqual(fused_options[4][1]['transforms'], preprocess_options[6:])
+
+  def testFusedDihedralTransformsMatchUnfused(self):
+    transforms = [
+        (preprocessor.random_horizontal_flip,
+         {'keypoint_flip_permutation': self.createKeypointFlipPermutation()}),
+        (preprocessor.random_rotation90,
+         {'keypoint_rot_permutation': self.createKeypointRotPermutation()}),
+        (preprocessor.random_vertical_flip,
+         {'keypoint_flip_permutation': self.createKeypointFlipPermutation()}),
+        (preprocessor.random_rotation90, {}),
+    ]
+    func_arg_map = preprocessor.get_default_func_arg_map(
+        include_instance_masks=True, include_keypoints=True,
+        include_keypoint_visibilities=True)
+
+    # Every combination of the transforms is applied, with a non-square image.
+    for performed in itertools.product([False, True], repeat=len(transforms)):
+      preprocess_options = [
+          (func, dict(params, probability=float(do_transform)))
+          for (func, params), do_transform in zip(transforms, performed)]
+
+      def graph_fn():
+        keypoints, keypoint_visibilities = self.createTestKeypoints()
+        tensors = {
+            fields.InputDataFields.image: tf.random.uniform([1, 4, 6, 3]),
+            fields.InputDataFields.groundtruth_boxes: self.createTestBoxes(),
+            fields.InputDataFields.groundtruth_instance_masks:
+                tf.random.uniform([2, 4, 6]),
+            fields.InputDataFields.groundtruth_keypoints: keypoints,
+            fields.InputDataFields.groundtruth_keypoint_visibilities:
+                keypoint_visibilities,
+        }
+        outputs = []
+        for options in (
+            preprocess_options,
+            preprocessor.fuse_dihedral_transforms(preprocess_options)):
+          tensor_dict = preprocessor.preprocess(
+              dict(tensors), options, func_arg_map=func_arg_map)
+          outputs.append([tensor_dict[key] for key in sorted(tensors)])
+        return outputs
+
+      unfused_tensors, fused_tensors = self.execute_cpu(graph_fn, [])
+      for unfused, fused in zip(unfused_tensors, fused_tensors):
+        self.assertAllClose(unfused, fused)
+
   def testRandomJitterBoxes(self):
 
     def graph_fn():
@@ -42,6 +42,7 @@ import tensorflow.compat.v2 as tf2
 
 from object_detection.box_coders import faster_rcnn_box_coder
 from object_detection.box_coders import mean_stddev_box_coder
+from object_detection.box_coders import square_box_coder
 from object_detection.core import box_coder
 from object_detection.core import box_list
 from object_detection.core import box_list_ops
@@ -63,6 +64,12 @@ ResizeMethod = tf2.image.ResizeMethod
 
 _DEFAULT_KEYPOINT_OFFSET_STD_DEV = 1.0
 
+# Box coders that encode every box independently of the other boxes and only
+# use the box corners, which allows encoding a flattened batch of boxes.
+_ELEMENTWISE_BOX_CODERS = (faster_rcnn_box_coder.FasterRcnnBoxCoder,
+                           mean_stddev_box_coder.MeanStddevBoxCoder,
+                           square_box_coder.SquareBoxCoder)
+
 
 class TargetAssigner(object):
   """Target assigner to compute classification and regression targets."""
@@ -71,7 +78,9 @@ class TargetAssigner(object):
                similarity_calc,
                matcher,
                box_coder_instance,
-               negative_class_weight=1.0):
+               negative_class_weight=1.0,
+               matching_dtype=tf.float32,
+               use_padded_batch=False):
     """Construct Object Detection Target Assigner.
 
     Args:
@@ -82,10 +91,21 @@ class TargetAssigner(object):
         matching groundtruth boxes with respect to anchors.
       negative_class_weight: classification weight to be associated to negative
         anchors (default: 1.0). The weight must be in [0., 1.].
+      matching_dtype: the dtype of the similarity matrix used for matching
+        (default: tf.float32). Using tf.bfloat16 halves the memory of the
+        [num_gt_boxes, num_anchors] matrices but is approximate: anchors whose
+        similarity is close to a matching threshold, or close to the similarity
+        with another groundtruth box, may be assigned differently.
+      use_padded_batch: whether `batch_assign` assigns the targets of a batch
+        sharing the same anchors at once with `batch_assign_padded` instead of
+        image by image (default: False). This is usually faster on
+        accelerators and with XLA, but can be slower in graph mode on CPU as
+        the [batch_size, num_gt_boxes, num_anchors] intermediates are larger.
 
     Raises:
       ValueError: if similarity_calc is not a RegionSimilarityCalculator or
-        if matcher is not a Matcher or if box_coder is not a BoxCoder
+        if matcher is not a Matcher or if box_coder is not a BoxCoder or if
+        use_padded_batch is True but `supports_padded_batch` is False.
     """
     if not isinstance(similarity_calc, sim_calc.RegionSimilarityCalculator):
       raise ValueError('similarity_calc must be a RegionSimilarityCalculator')
@@ -97,11 +117,28 @@ class TargetAssigner(object):
     self._matcher = matcher
     self._box_coder = box_coder_instance
     self._negative_class_weight = negative_class_weight
+    self._matching_dtype = matching_dtype
+    if use_padded_batch and not self.supports_padded_batch:
+      raise ValueError('use_padded_batch requires IouSimilarity, ArgMaxMatcher '
+                       'and a box coder encoding boxes independently.')
+    self._use_padded_batch = use_padded_batch
 
   @property
   def box_coder(self):
     return self._box_coder
 
+  @property
+  def use_padded_batch(self):
+    """Whether `batch_assign` uses `batch_assign_padded` when possible."""
+    return self._use_padded_batch
+
+  @property
+  def supports_padded_batch(self):
+    """Whether `batch_assign_padded` can be used with this target assigner."""
+    return (isinstance(self._similarity_calc, sim_calc.IouSimilarity) and
+            isinstance(self._matcher, argmax_matcher.ArgMaxMatcher) and
+            isinstance(self._box_coder, _ELEMENTWISE_BOX_CODERS))
+
   # TODO(rathodv): move labels, scores, and weights to groundtruth_boxes fields.
   def assign(self,
              anchors,
@@ -197,6 +234,8 @@ class TargetAssigner(object):
         [unmatched_shape_assert, labels_and_box_shapes_assert]):
       match_quality_matrix = self._similarity_calc.compare(groundtruth_boxes,
                                                            anchors)
+      match_quality_matrix = tf.cast(match_quality_matrix,
+                                     self._matching_dtype)
       match = self._matcher.match(match_quality_matrix,
                                   valid_rows=tf.greater(groundtruth_weights, 0))
       reg_targets = self._create_regression_targets(anchors,
@@ -229,6 +268,165 @@ class TargetAssigner(object):
     return (cls_targets, cls_weights, reg_targets, reg_weights,
             match.match_results)
 
+  def batch_assign_padded(self,
+                          anchors,
+                          groundtruth_boxes,
+                          num_groundtruth_boxes,
+                          groundtruth_labels,
+                          unmatched_class_label=None,
+                          groundtruth_weights=None):
+    """Assigns targets to a batch of images sharing the same anchors.
+
+    Computes the same targets as calling `assign` on every image, but matches
+    all images at once against groundtruth padded to a common number of boxes.
+    The anchor corners and areas are only computed once for the whole batch.
+
+    This is only supported if `supports_padded_batch` is True, i.e. for
+    IouSimilarity, ArgMaxMatcher and box coders that encode boxes independently
+    of each other.
+
+    Args:
+      anchors: a BoxList representing N anchors shared by all images.
+      groundtruth_boxes: a float32 tensor of shape [batch_size, M, 4] with the
+        groundtruth boxes of each image, padded after the first
+        num_groundtruth_boxes[i] boxes.
+      num_groundtruth_boxes: an int32 tensor of shape [batch_size] with the
+        number of valid groundtruth boxes of each image.
+      groundtruth_labels: a tensor of shape [batch_size, M, d_1, ... d_k] with
+        the labels of the groundtruth boxes.
+      unmatched_class_label: a float32 tensor with shape [d_1, d_2, ..., d_k]
+        which is consistent with the classification target for each anchor. If
+        set to None, unmatched_cls_target is set to be [0] for each anchor.
+      groundtruth_weights: a float tensor of shape [batch_size, M] with the
+        weights of the groundtruth boxes. The weights of the padded boxes must
+        be zero. If None, the weights of valid boxes are set to 1.
+
+    Returns:
+      cls_targets: a float32 tensor with shape
+        [batch_size, num_anchors, d_1, d_2 ... d_k].
+      cls_weights: a float32 tensor with shape
+        [batch_size, num_anchors, d_1, d_2 ... d_k].
+      reg_targets: a float32 tensor with shape
+        [batch_size, num_anchors, box_code_dimension].
+      reg_weights: a float32 tensor with shape [batch_size, num_anchors].
+      match: an int32 tensor of shape [batch_size, num_anchors], see `assign`.
+
+    Raises:
+      ValueError: if the target assigner does not support padded batches or if
+        anchors is not a BoxList.
+    """
+    if not self.supports_padded_batch:
+      raise ValueError('batch_assign_padded requires IouSimilarity, '
+                       'ArgMaxMatcher and an elementwise box coder.')
+    if not isinstance(anchors, box_list.BoxList):
+      raise ValueError('anchors must be an BoxList')
+
+    if unmatched_class_label is None:
+      unmatched_class_label = tf.constant([0], tf.float32)
+
+    with tf.name_scope('BatchAssignPadded'):
+      boxes_shape = shape_utils.combined_static_and_dynamic_shape(
+          groundtruth_boxes)
+      batch_size, max_num_boxes = boxes_shape[0], boxes_shape[1]
+      valid_boxes = tf.sequence_mask(num_groundtruth_boxes, max_num_boxes)
+      if groundtruth_weights is None:
+        groundtruth_weights = tf.cast(valid_boxes, tf.float32)
+
+      match_results = self._batch_match(anchors, groundtruth_boxes,
+                                        tf.greater(groundtruth_weights, 0))
+      # Images without groundtruth boxes have only unmatched anchors.
+      match_results = tf2.where(
+          tf.greater(num_groundtruth_boxes, 0)[:, tf.newaxis], match_results,
+          -1)
+      # Gathering from [ignored_value, unmatched_value, groundtruth...] with
+      # match + 2 resolves the three match cases at once.
+      gather_indices = match_results + 2
+      use_matmul_gather = self._matcher._use_matmul_gather  # pylint: disable=protected-access
+
+      def gather(groundtruth, unmatched_value, ignored_value):
+        unmatched_value = tf.cast(unmatched_value, groundtruth.dtype)
+        ignored_value = tf.cast(ignored_value, groundtruth.dtype)
+        defaults = tf.stack([
+            tf.broadcast_to(ignored_value, tf.shape(groundtruth)[2:]),
+            tf.broadcast_to(unmatched_value, tf.shape(groundtruth)[2:])])
+        params = tf.concat(
+            [tf.tile(defaults[tf.newaxis],
+                     tf.concat([[batch_size], tf.ones_like(
+                         tf.shape(defaults))], axis=0)), groundtruth],
+            axis=1)
+        if use_matmul_gather:
+          params_shape = shape_utils.combined_static_and_dynamic_shape(params)
+          gathered = tf.matmul(
+              tf.one_hot(gather_indices, params_shape[1], dtype=params.dtype),
+              tf.reshape(params, [batch_size, params_shape[1], -1]))
+          return tf.reshape(gathered, tf.concat(
+              [tf.shape(gather_indices), tf.shape(params)[2:]], axis=0))
+        return tf.gather(params, gather_indices, batch_dims=1)
+
+      matched_anchors_mask = tf.greater_equal(match_results, 0)
+      matched_gt_boxes = gather(groundtruth_boxes, tf.zeros(4), tf.zeros(4))
+      num_anchors = shape_utils.combined_static_and_dynamic_shape(
+          anchors.get())[0]
+      matched_reg_targets = self._box_coder.encode(
+          box_list.BoxList(tf.reshape(matched_gt_boxes, [-1, 4])),
+          box_list.BoxList(tf.tile(anchors.get(), [batch_size, 1])))
+      matched_reg_targets = tf.reshape(
+          matched_reg_targets,
+          [batch_size, num_anchors, self._box_coder.code_size])
+      reg_targets = tf.where(
+          tf.tile(matched_anchors_mask[:, :, tf.newaxis],
+                  [1, 1, self._box_coder.code_size]),
+          matched_reg_targets,
+          tf.zeros_like(matched_reg_targets))
+
+      cls_targets = gather(groundtruth_labels, unmatched_class_label,
+                           unmatched_class_label)
+      reg_weights = gather(groundtruth_weights, 0., 0.)
+      cls_weights = gather(groundtruth_weights, self._negative_class_weight, 0.)
+      # convert cls_weights from per-anchor to per-class.
+      for _ in range(len(cls_targets.get_shape()[2:])):
+        cls_weights = tf.expand_dims(cls_weights, -1)
+      cls_weights = tf.tile(cls_weights, tf.concat(
+          [[1, 1], tf.shape(cls_targets)[2:]], axis=0))
+
+    return (cls_targets, cls_weights, reg_targets, reg_weights, match_results)
+
+  def _batch_match(self, anchors, groundtruth_boxes, valid_rows):
+    """Matches anchors to a batch of padded groundtruth boxes.
+
+    Args:
+      anchors: a BoxList representing N anchors.
+      groundtruth_boxes: a float32 tensor of shape [batch_size, M, 4].
+      valid_rows: a boolean tensor of shape [batch_size, M].
+
+    Returns:
+      an int32 tensor of shape [batch_size, N] with the match results.
+    """
+    # The pairwise IOU is computed as in box_list_ops.iou so that the matches
+    # are identical to the ones of `assign`. The groundtruth boxes of all
+    # images are flattened, which keeps every broadcast two dimensional.
+    groundtruth_shape = shape_utils.combined_static_and_dynamic_shape(
+        groundtruth_boxes)
+    y_min1, x_min1, y_max1, x_max1 = tf.split(
+        tf.cast(tf.reshape(groundtruth_boxes, [-1, 4]), self._matching_dtype),
+        4, axis=1)
+    y_min2, x_min2, y_max2, x_max2 = tf.split(
+        tf.cast(tf.transpose(anchors.get()), self._matching_dtype), 4, axis=0)
+    zero = tf.constant(0, self._matching_dtype)
+    intersect_heights = tf.maximum(
+        zero, tf.minimum(y_max1, y_max2) - tf.maximum(y_min1, y_min2))
+    intersect_widths = tf.maximum(
+        zero, tf.minimum(x_max1, x_max2) - tf.maximum(x_min1, x_min2))
+    intersections = intersect_heights * intersect_widths
+    groundtruth_areas = (y_max1 - y_min1) * (x_max1 - x_min1)
+    anchor_areas = (y_max2 - y_min2) * (x_max2 - x_min2)
+    unions = groundtruth_areas + anchor_areas - intersections
+    similarity = tf.where(
+        tf.equal(intersections, zero), tf.zeros_like(intersections),
+        tf.truediv(intersections, unions))
+    similarity = tf.reshape(similarity, groundtruth_shape[:2] + [-1])
+    return self._matcher.batch_match(similarity, valid_rows)
+
   def _reset_target_shape(self, target, num_anchors):
     """Sets the static shape of the target.
 
@@ -384,7 +582,8 @@ class TargetAssigner(object):
 # TODO(rathodv): This method pulls in all the implementation dependencies into
 # core. Therefore its best to have this factory method outside of core.
 def create_target_assigner(reference, stage=None,
-                           negative_class_weight=1.0, use_matmul_gather=False):
+                           negative_class_weight=1.0, use_matmul_gather=False,
+                           matching_dtype=tf.float32, use_padded_batch=False):
   """Factory function for creating standard target assigners.
 
   Args:
@@ -394,6 +593,10 @@ def create_target_assigner(reference, stage=None,
       anchors (default: 1.0)
     use_matmul_gather: whether to use matrix multiplication based gather which
       are better suited for TPUs.
+    matching_dtype: the dtype of the similarity matrix used for matching
+      (default: tf.float32).
+    use_padded_batch: whether `batch_assign` assigns the targets of a batch at
+      once over padded groundtruth (default: False).
 
   Returns:
     TargetAssigner: desired target assigner.
@@ -439,7 +642,9 @@ def create_target_assigner(reference, stage=None,
     raise ValueError('No valid combination of reference and stage.')
 
   return TargetAssigner(similarity_calc, matcher, box_coder_instance,
-                        negative_class_weight=negative_class_weight)
+                        negative_class_weight=negative_class_weight,
+                        matching_dtype=matching_dtype,
+                        use_padded_batch=use_padded_batch)
 
 
 def batch_assign(target_assigner,
@@ -490,6 +695,15 @@ def batch_assign(target_assigner,
         and batch_size == len(anchors_batch) unless anchors_batch is a single
         BoxList.
   """
+  if (isinstance(anchors_batch, box_list.BoxList) and
+      target_assigner.use_padded_batch and
+      len(gt_box_batch) == len(gt_class_targets_batch) and
+      not any(gt_boxes.has_field(fields.BoxListFields.keypoints)
+              for gt_boxes in gt_box_batch)):
+    # All images share the anchors, so they can be matched at once.
+    return _batch_assign_padded(target_assigner, anchors_batch, gt_box_batch,
+                                gt_class_targets_batch, unmatched_class_label,
+                                gt_weights_batch)
   if not isinstance(anchors_batch, list):
     anchors_batch = len(gt_box_batch) * [anchors_batch]
   if not all(
@@ -527,6 +741,40 @@ def batch_assign(target_assigner,
           batch_reg_weights, batch_match)
 
 
+def _batch_assign_padded(target_assigner, anchors, gt_box_batch,
+                         gt_class_targets_batch, unmatched_class_label,
+                         gt_weights_batch):
+  """Pads the groundtruth of all images and calls `batch_assign_padded`."""
+  num_gt_boxes_list = [gt_boxes.num_boxes() for gt_boxes in gt_box_batch]
+  # One extra padded box keeps the padded groundtruth non-empty.
+  max_num_gt_boxes = tf.reduce_max(tf.stack(num_gt_boxes_list)) + 1
+
+  def pad(tensor, num_boxes):
+    rank = len(tensor.get_shape())
+    return tf.pad(tensor, [[0, max_num_gt_boxes - num_boxes]] +
+                  [[0, 0]] * (rank - 1))
+
+  if gt_weights_batch is None:
+    gt_weights_batch = [None] * len(gt_box_batch)
+  padded_boxes = []
+  padded_labels = []
+  padded_weights = []
+  for gt_boxes, gt_class_targets, gt_weights, num_boxes in zip(
+      gt_box_batch, gt_class_targets_batch, gt_weights_batch,
+      num_gt_boxes_list):
+    if gt_class_targets is None:
+      gt_class_targets = tf.ones([num_boxes, 1])
+    if gt_weights is None:
+      gt_weights = tf.ones([num_boxes], dtype=tf.float32)
+    padded_boxes.append(pad(gt_boxes.get(), num_boxes))
+    padded_labels.append(pad(gt_class_targets, num_boxes))
+    padded_weights.append(pad(gt_weights, num_boxes))
+  return target_assigner.batch_assign_padded(
+      anchors, tf.stack(padded_boxes), tf.stack(num_gt_boxes_list),
+      tf.stack(padded_labels), unmatched_class_label,
+      tf.stack(padded_weights))
+
+
 # Assign an alias to avoid large refactor of existing users.
 batch_assign_targets = batch_assign
 
@@ -18,6 +18,7 @@ from absl.testing import parameterized
 import numpy as np
 import tensorflow.compat.v1 as tf
 
+from object_detection.box_coders import faster_rcnn_box_coder
 from object_detection.box_coders import keypoint_box_coder
 from object_detection.box_coders import mean_stddev_box_coder
 from object_detection.core import box_list
@@ -821,6 +822,138 @@ class BatchTargetAssignerTest(test_case.TestCase):
     self.assertAllClose(reg_weights_out, exp_reg_weights)
 
 
+class BatchAssignPaddedTest(test_case.TestCase, parameterized.TestCase):
+
+  def _get_inputs(self):
+    rng = np.random.RandomState(0)
+    corners = rng.uniform(0, 0.8, [200, 2])
+    anchors = np.concatenate(
+        [corners, corners + rng.uniform(0.05, 0.2, [200, 2])], axis=1)
+    groundtruth = []
+    for num_boxes in (3, 0, 6):
+      corners = rng.uniform(0, 0.7, [num_boxes, 2])
+      boxes = np.concatenate(
+          [corners, corners + rng.uniform(0.05, 0.3, [num_boxes, 2])], axis=1)
+      # Duplicate boxes make the argmax over groundtruth boxes ambiguous.
+      if num_boxes > 3:
+        boxes[3] = boxes[1]
+      # Makes sure that some anchors are matched without forced matches.
+      if num_boxes:
+        boxes[-1] = anchors[num_boxes]
+      labels = np.eye(4)[rng.randint(1, 4, num_boxes)]
+      weights = np.ones(num_boxes)
+      weights[::4] = 0.
+      groundtruth.append((boxes, labels, weights))
+    return anchors.astype(np.float32), [
+        [array.astype(np.float32) for array in arrays]
+        for arrays in groundtruth]
+
+  @parameterized.parameters(
+      {'force_match_for_each_row': True,
+       'negatives_lower_than_unmatched': True},
+      {'force_match_for_each_row': False,
+       'negatives_lower_than_unmatched': False},
+      {'force_match_for_each_row': True,
+       'negatives_lower_than_unmatched': True,
+       'matched_threshold': None},
+      {'force_match_for_each_row': True,
+       'negatives_lower_than_unmatched': False,
+       'use_matmul_gather': True},
+  )
+  def test_matches_per_image_assignment(self, force_match_for_each_row,
+                                        negatives_lower_than_unmatched,
+                                        matched_threshold=0.5,
+                                        use_matmul_gather=False):
+    anchors, groundtruth = self._get_inputs()
+
+    def graph_fn(anchors, boxes1, labels1, weights1, boxes2, labels2,
+                 weights2, boxes3, labels3, weights3):
+      matcher = argmax_matcher.ArgMaxMatcher(
+          matched_threshold=matched_threshold,
+          unmatched_threshold=None if matched_threshold is None else 0.3,
+          negatives_lower_than_unmatched=negatives_lower_than_unmatched,
+          force_match_for_each_row=force_match_for_each_row,
+          use_matmul_gather=use_matmul_gather)
+      target_assigner = targetassigner.TargetAssigner(
+          region_similarity_calculator.IouSimilarity(), matcher,
+          faster_rcnn_box_coder.FasterRcnnBoxCoder(), negative_class_weight=0.5,
+          use_padded_batch=True)
+      anchors = box_list.BoxList(anchors)
+      gt_box_batch = [box_list.BoxList(boxes)
+                      for boxes in (boxes1, boxes2, boxes3)]
+      unmatched_class_label = tf.constant([1, 0, 0, 0], tf.float32)
+      batched = targetassigner.batch_assign(
+          target_assigner, anchors, gt_box_batch, [labels1, labels2, labels3],
+          unmatched_class_label, [weights1, weights2, weights3])
+      per_image = [
+          target_assigner.assign(anchors, gt_boxes, labels,
+                                 unmatched_class_label, weights)
+          for gt_boxes, labels, weights in zip(
+              gt_box_batch, (labels1, labels2, labels3),
+              (weights1, weights2, weights3))]
+      return list(batched) + [tf.stack(targets) for targets in zip(*per_image)]
+
+    outputs = self.execute(
+        graph_fn, [anchors] + [array for arrays in groundtruth
+                               for array in arrays])
+    batched, per_image = outputs[:5], outputs[5:]
+    self.assertAllEqual(batched[4], per_image[4])
+    self.assertAllGreater(np.sum(batched[4] >= 0), 0)
+    for batched_targets, per_image_targets in zip(batched[:4], per_image[:4]):
+      self.assertAllClose(batched_targets, per_image_targets)
+
+  def test_bfloat16_matching(self):
+    anchors, groundtruth = self._get_inputs()
+    boxes, labels, weights = groundtruth[2]
+
+    def graph_fn(anchors, boxes, labels, weights):
+      matcher = argmax_matcher.ArgMaxMatcher(matched_threshold=0.5,
+                                             unmatched_threshold=0.3)
+      target_assigner = targetassigner.TargetAssigner(
+          region_similarity_calculator.IouSimilarity(), matcher,
+          faster_rcnn_box_coder.FasterRcnnBoxCoder(),
+          matching_dtype=tf.bfloat16)
+      num_boxes = tf.shape(boxes)[:1]
+      return target_assigner.batch_assign_padded(
+          box_list.BoxList(anchors), boxes[tf.newaxis], num_boxes,
+          labels[tf.newaxis], tf.constant([1, 0, 0, 0], tf.float32),
+          weights[tf.newaxis])
+
+    (cls_targets, cls_weights, reg_targets, reg_weights,
+     match) = self.execute(graph_fn, [anchors, boxes, labels, weights])
+    self.assertEqual(cls_targets.dtype, np.float32)
+    self.assertAllEqual(cls_targets.shape, [1, 200, 4])
+    self.assertAllEqual(cls_weights.shape, [1, 200, 4])
+    self.assertAllEqual(reg_targets.shape, [1, 200, 4])
+    self.assertAllEqual(reg_weights, (match >= 0).astype(np.float32))
+
+  def test_raises_error_on_unsupported_similarity(self):
+    target_assigner = targetassigner.TargetAssigner(
+        region_similarity_calculator.NegSqDistSimilarity(),
+        argmax_matcher.ArgMaxMatcher(matched_threshold=0.5),
+        mean_stddev_box_coder.MeanStddevBoxCoder())
+    self.assertFalse(target_assigner.supports_padded_batch)
+    with self.assertRaises(ValueError):
+      target_assigner.batch_assign_padded(
+          box_list.BoxList(tf.zeros([2, 4])), tf.zeros([1, 1, 4]),
+          tf.ones([1], tf.int32), tf.ones([1, 1, 1]))
+    with self.assertRaises(ValueError):
+      targetassigner.TargetAssigner(
+          region_similarity_calculator.NegSqDistSimilarity(),
+          argmax_matcher.ArgMaxMatcher(matched_threshold=0.5),
+          mean_stddev_box_coder.MeanStddevBoxCoder(), use_padded_batch=True)
+
+  def test_padded_batch_is_opt_in(self):
+    self.assertFalse(
+        targetassigner.create_target_assigner(
+            'FasterRCNN', 'proposal').use_padded_batch)
+    target_assigner = targetassigner.create_target_assigner(
+        'FasterRCNN', 'proposal', matching_dtype=tf.bfloat16,
+        use_padded_batch=True)
+    self.assertTrue(target_assigner.use_padded_batch)
+    self.assertEqual(target_assigner._matching_dtype, tf.bfloat16)
+
+
 class BatchGetTargetsTest(test_case.TestCase):
 
   def test_scalar_targets(self):
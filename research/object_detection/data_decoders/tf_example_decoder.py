@@ -24,7 +24,6 @@ from __future__ import print_function
 import enum
 import functools
 import numpy as np
-from six.moves import zip
 import tensorflow.compat.v1 as tf
 from tf_slim import tfexample_decoder as slim_example_decoder
 from object_detection.core import data_decoder
@@ -46,6 +45,29 @@ _LABEL_OFFSET = 1
 # The field name of hosting keypoint text feature. Only used within this file
 # to help forming the keypoint related features.
 _KEYPOINT_TEXT_FIELD = 'image/object/keypoint/text'
+# Fields that are always decoded but are only needed by some models or
+# evaluators. They can be skipped with the `decode_fields` option.
+_PRUNABLE_FIELDS = frozenset([
+    fields.InputDataFields.key,
+    fields.InputDataFields.filename,
+    fields.InputDataFields.groundtruth_image_confidences,
+    fields.InputDataFields.groundtruth_verified_neg_classes,
+    fields.InputDataFields.groundtruth_not_exhaustive_classes,
+    fields.InputDataFields.groundtruth_area,
+    fields.InputDataFields.groundtruth_difficult,
+    fields.InputDataFields.groundtruth_group_of,
+    fields.InputDataFields.groundtruth_image_classes,
+])
+
+
+def _reset_sparse_shape(sparse_tensor):
+  """Returns `sparse_tensor` with the smallest dense shape of its indices."""
+  indices = tf.concat(
+      [sparse_tensor.indices + 1,
+       tf.zeros([1, tf.shape(sparse_tensor.indices)[1]], dtype=tf.int64)],
+      axis=0)
+  return tf.SparseTensor(sparse_tensor.indices, sparse_tensor.values,
+                         tf.reduce_max(indices, axis=0))
 
 
 class Visibility(enum.Enum):
@@ -145,7 +167,8 @@ class TfExampleDecoder(data_decoder.DataDecoder):
                load_dense_pose=False,
                load_track_id=False,
                load_keypoint_depth_features=False,
-               use_keypoint_label_map=False):
+               use_keypoint_label_map=False,
+               decode_fields=None):
     """Constructor sets keys_to_features and items_to_handlers.
 
     Args:
@@ -188,6 +211,11 @@ class TfExampleDecoder(data_decoder.DataDecoder):
         in the tf.Example feature. This is useful when training with multiple
         datasets while each of them contains different subset of keypoint
         annotations.
+      decode_fields: An optional list of `fields.InputDataFields` names. If
+        provided, the optional fields that are otherwise always decoded (the
+        key, filename, area, difficult, group_of and image-level labels) are
+        only parsed and decoded if they are listed. All other fields are
+        controlled by the options above.
 
     Raises:
       ValueError: If `instance_mask_type` option is not one of
@@ -488,6 +516,37 @@ class TfExampleDecoder(data_decoder.DataDecoder):
         raise ValueError('In order to expand labels, the label_map_proto_file '
                          'has to be provided.')
 
+    if decode_fields is not None:
+      decode_fields = set(decode_fields)
+      if expand_hierarchy_labels:
+        decode_fields.update([
+            fields.InputDataFields.groundtruth_image_classes,
+            fields.InputDataFields.groundtruth_image_confidences])
+      for item in _PRUNABLE_FIELDS - decode_fields:
+        del self.items_to_handlers[item]
+      used_keys = set()
+      for handler in self.items_to_handlers.values():
+        used_keys.update(handler.keys)
+      self.keys_to_features = {
+          key: feature for key, feature in self.keys_to_features.items()
+          if key in used_keys}
+
+  def parse_batch(self, tf_example_string_tensors):
+    """Parses a batch of serialized tensorflow examples.
+
+    Parsing many examples with one op is considerably cheaper than parsing them
+    one at a time. The parsed features of a single example, e.g. after
+    `tf.data.Dataset.unbatch`, can then be decoded with `decode_parsed`.
+
+    Args:
+      tf_example_string_tensors: a 1-D string tensor holding serialized
+        tensorflow example protos.
+
+    Returns:
+      A dictionary from feature keys to batched (sparse) tensors.
+    """
+    return tf.io.parse_example(tf_example_string_tensors, self.keys_to_features)
+
   def decode(self, tf_example_string_tensor):
     """Decodes serialized tensorflow example and returns a tensor dictionary.
 
@@ -550,11 +609,33 @@ class TfExampleDecoder(data_decoder.DataDecoder):
         the length of each feature in context_features
     """
     serialized_example = tf.reshape(tf_example_string_tensor, shape=[])
-    decoder = slim_example_decoder.TFExampleDecoder(self.keys_to_features,
-                                                    self.items_to_handlers)
-    keys = decoder.list_items()
-    tensors = decoder.decode(serialized_example, items=keys)
-    tensor_dict = dict(zip(keys, tensors))
+    return self.decode_parsed(
+        tf.io.parse_single_example(serialized_example, self.keys_to_features))
+
+  def decode_parsed(self, parsed_example):
+    """Decodes the parsed features of a single tensorflow example.
+
+    Args:
+      parsed_example: a dictionary from feature keys to the (sparse) tensors of
+        a single example, as returned by `tf.io.parse_single_example` or by
+        unbatching the output of `parse_batch`.
+
+    Returns:
+      A dictionary of tensors, see `decode`.
+    """
+    parsed_example = dict(parsed_example)
+    for key, feature in self.keys_to_features.items():
+      if isinstance(feature, tf.FixedLenFeature):
+        parsed_example[key] = tf.reshape(parsed_example[key], feature.shape)
+      elif isinstance(parsed_example[key], tf.SparseTensor):
+        # After unbatching the output of `parse_batch`, the sparse features of
+        # every example keep the dense shape of the longest example of the
+        # batch, which would pad the densified features.
+        parsed_example[key] = _reset_sparse_shape(parsed_example[key])
+    tensor_dict = {}
+    for item, handler in self.items_to_handlers.items():
+      tensor_dict[item] = handler.tensors_to_item(
+          {key: parsed_example[key] for key in handler.keys})
     is_crowd = fields.InputDataFields.groundtruth_is_crowd
     tensor_dict[is_crowd] = tf.cast(tensor_dict[is_crowd], dtype=tf.bool)
     tensor_dict[fields.InputDataFields.image].set_shape([None, None, 3])
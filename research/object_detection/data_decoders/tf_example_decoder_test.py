@@ -275,6 +275,159 @@ class TfExampleDecoderTest(test_case.TestCase):
     self.assertAllEqual(expected_boxes,
                         tensor_dict[fields.InputDataFields.groundtruth_boxes])
 
+  def testDecodeFieldsPrunesOptionalFields(self):
+    image_tensor = np.random.randint(256, size=(4, 5, 3)).astype(np.uint8)
+    encoded_jpeg, _ = self._create_encoded_and_decoded_data(
+        image_tensor, 'jpeg')
+    example_decoder = tf_example_decoder.TfExampleDecoder(
+        decode_fields=[fields.InputDataFields.groundtruth_area])
+    self.assertNotIn('image/object/difficult',
+                     example_decoder.keys_to_features)
+    self.assertNotIn('image/filename', example_decoder.keys_to_features)
+
+    def graph_fn():
+      example = tf.train.Example(
+          features=tf.train.Features(
+              feature={
+                  'image/encoded':
+                      dataset_util.bytes_feature(encoded_jpeg),
+                  'image/format':
+                      dataset_util.bytes_feature(six.b('jpeg')),
+                  'image/object/bbox/ymin':
+                      dataset_util.float_list_feature([0.0]),
+                  'image/object/bbox/xmin':
+                      dataset_util.float_list_feature([1.0]),
+                  'image/object/bbox/ymax':
+                      dataset_util.float_list_feature([2.0]),
+                  'image/object/bbox/xmax':
+                      dataset_util.float_list_feature([3.0]),
+                  'image/object/area':
+                      dataset_util.float_list_feature([4.0]),
+                  'image/object/difficult':
+                      dataset_util.int64_list_feature([1]),
+              })).SerializeToString()
+      return example_decoder.decode(tf.convert_to_tensor(example))
+
+    tensor_dict = self.execute_cpu(graph_fn, [])
+    self.assertAllEqual([4.0],
+                        tensor_dict[fields.InputDataFields.groundtruth_area])
+    self.assertAllEqual([[0.0, 1.0, 2.0, 3.0]],
+                        tensor_dict[fields.InputDataFields.groundtruth_boxes])
+    self.assertNotIn(fields.InputDataFields.groundtruth_difficult, tensor_dict)
+    self.assertNotIn(fields.InputDataFields.filename, tensor_dict)
+
+  def testParseBatchAndDecodeParsed(self):
+    image_tensor = np.random.randint(256, size=(4, 5, 3)).astype(np.uint8)
+    encoded_jpeg, decoded_jpeg = self._create_encoded_and_decoded_data(
+        image_tensor, 'jpeg')
+
+    def create_example(source_id, ymins):
+      return tf.train.Example(
+          features=tf.train.Features(
+              feature={
+                  'image/encoded':
+                      dataset_util.bytes_feature(encoded_jpeg),
+                  'image/format':
+                      dataset_util.bytes_feature(six.b('jpeg')),
+                  'image/source_id':
+                      dataset_util.bytes_feature(six.b(source_id)),
+                  'image/object/bbox/ymin':
+                      dataset_util.float_list_feature(ymins),
+                  'image/object/bbox/xmin':
+                      dataset_util.float_list_feature([1.0] * len(ymins)),
+                  'image/object/bbox/ymax':
+                      dataset_util.float_list_feature([2.0] * len(ymins)),
+                  'image/object/bbox/xmax':
+                      dataset_util.float_list_feature([3.0] * len(ymins)),
+                  'image/object/class/label':
+                      dataset_util.int64_list_feature([5] * len(ymins)),
+              })).SerializeToString()
+
+    examples = [create_example('image_0', [0.0, 0.5]),
+                create_example('image_1', [0.1, 0.2])]
+
+    def graph_fn():
+      example_decoder = tf_example_decoder.TfExampleDecoder()
+      dataset = tf.data.Dataset.from_tensor_slices(examples).batch(2)
+      dataset = dataset.map(example_decoder.parse_batch).unbatch()
+      dataset = dataset.map(example_decoder.decode_parsed).batch(2)
+      return tf.data.experimental.get_single_element(dataset)
+
+    tensor_dict = self.execute_cpu(graph_fn, [])
+    self.assertAllEqual([six.b('image_0'), six.b('image_1')],
+                        tensor_dict[fields.InputDataFields.source_id])
+    self.assertAllEqual([decoded_jpeg] * 2,
+                        tensor_dict[fields.InputDataFields.image])
+    self.assertAllClose(
+        [[[0.0, 1.0, 2.0, 3.0], [0.5, 1.0, 2.0, 3.0]],
+         [[0.1, 1.0, 2.0, 3.0], [0.2, 1.0, 2.0, 3.0]]],
+        tensor_dict[fields.InputDataFields.groundtruth_boxes])
+    self.assertAllEqual([[5, 5], [5, 5]],
+                        tensor_dict[fields.InputDataFields.groundtruth_classes])
+
+  def testParseBatchAndDecodeParsedWithDifferentNumBoxes(self):
+    image_tensor = np.random.randint(256, size=(4, 5, 3)).astype(np.uint8)
+    encoded_jpeg, _ = self._create_encoded_and_decoded_data(
+        image_tensor, 'jpeg')
+
+    def create_example(ymins, labels):
+      return tf.train.Example(
+          features=tf.train.Features(
+              feature={
+                  'image/encoded':
+                      dataset_util.bytes_feature(encoded_jpeg),
+                  'image/format':
+                      dataset_util.bytes_feature(six.b('jpeg')),
+                  'image/object/bbox/ymin':
+                      dataset_util.float_list_feature(ymins),
+                  'image/object/bbox/xmin':
+                      dataset_util.float_list_feature([1.0] * len(ymins)),
+                  'image/object/bbox/ymax':
+                      dataset_util.float_list_feature([2.0] * len(ymins)),
+                  'image/object/bbox/xmax':
+                      dataset_util.float_list_feature([3.0] * len(ymins)),
+                  'image/object/class/label':
+                      dataset_util.int64_list_feature(labels),
+                  'image/object/area':
+                      dataset_util.float_list_feature([4.0] * len(ymins)),
+                  'image/object/is_crowd':
+                      dataset_util.int64_list_feature([0] * len(ymins)),
+              })).SerializeToString()
+
+    examples = [create_example([0.0], [3]),
+                create_example([0.1, 0.2, 0.3], [1, 2, 4])]
+
+    def graph_fn():
+      example_decoder = tf_example_decoder.TfExampleDecoder()
+      dataset = tf.data.Dataset.from_tensor_slices(examples).batch(2)
+      dataset = dataset.map(example_decoder.parse_batch).unbatch()
+      dataset = dataset.map(example_decoder.decode_parsed)
+      outputs = []
+      for tensor_dict in (
+          tf.data.experimental.get_single_element(dataset.take(1)),
+          tf.data.experimental.get_single_element(dataset.skip(1))):
+        outputs.extend([
+            tensor_dict[fields.InputDataFields.groundtruth_boxes],
+            tensor_dict[fields.InputDataFields.groundtruth_classes],
+            tensor_dict[fields.InputDataFields.groundtruth_area],
+            tensor_dict[fields.InputDataFields.groundtruth_is_crowd],
+            tensor_dict[fields.InputDataFields.groundtruth_weights]
+        ])
+      return outputs
+
+    (boxes_0, classes_0, area_0, is_crowd_0, weights_0, boxes_1, classes_1,
+     area_1, is_crowd_1, weights_1) = self.execute_cpu(graph_fn, [])
+    self.assertAllClose([[0.0, 1.0, 2.0, 3.0]], boxes_0)
+    self.assertAllEqual([3], classes_0)
+    self.assertAllClose([4.0], area_0)
+    self.assertAllEqual([False], is_crowd_0)
+    self.assertAllClose([1.0], weights_0)
+    self.assertEqual((3, 4), boxes_1.shape)
+    self.assertAllEqual([1, 2, 4], classes_1)
+    self.assertAllClose([4.0] * 3, area_1)
+    self.assertAllEqual([False] * 3, is_crowd_1)
+    self.assertAllClose([1.0] * 3, weights_1)
+
   def testDecodeKeypointDepth(self):
     image_tensor = np.random.randint(256, size=(4, 5, 3)).astype(np.uint8)
     encoded_jpeg, _ = self._create_encoded_and_decoded_data(
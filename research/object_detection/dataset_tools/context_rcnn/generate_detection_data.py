@@ -46,8 +46,10 @@ from __future__ import division
 from __future__ import print_function
 
 import argparse
+import collections
 import os
 import threading
+import time
 import tensorflow as tf
 
 try:
@@ -56,6 +58,36 @@ except ModuleNotFoundError:
   pass
 
 
+def _image_size(example):
+  """Returns the (height, width) of the encoded image of a tf.Example."""
+  encoded_image = example.features.feature['image/encoded'].bytes_list.value[0]
+  if tf.io.is_jpeg(encoded_image):
+    # Only parses the header.
+    return tuple(tf.io.extract_jpeg_shape(encoded_image)[:2].numpy().tolist())
+  image = tf.io.decode_image(encoded_image, expand_animations=False)
+  return tuple(image.shape[:2].as_list())
+
+
+def group_by_image_size(examples):
+  """Returns the indices of the tf.Examples grouped by image size.
+
+  The exported models decode and resize the images of a batch with `tf.map_fn`,
+  which requires every image of the batch to have the same shape after
+  preprocessing. With resizers that keep the aspect ratio, this only holds for
+  images of the same size, so a batch is run as one call per image size.
+
+  Args:
+    examples: A list of tf.train.Example protos.
+
+  Returns:
+    A list of lists of indices into `examples`, in order of first occurrence.
+  """
+  groups = collections.OrderedDict()
+  for i, example in enumerate(examples):
+    groups.setdefault(_image_size(example), []).append(i)
+  return list(groups.values())
+
+
 class GenerateDetectionDataFn(beam.DoFn):
   """Generates detection data for camera trap images.
 
@@ -77,6 +109,12 @@ class GenerateDetectionDataFn(beam.DoFn):
     self._session = None
     self._num_examples_processed = beam.metrics.Metrics.counter(
         'detection_data_generation', 'num_tf_examples_processed')
+    self._num_inference_batches = beam.metrics.Metrics.counter(
+        'detection_data_generation', 'num_inference_batches')
+    self._inference_batch_size = beam.metrics.Metrics.distribution(
+        'detection_data_generation', 'inference_batch_size')
+    self._inference_batch_latency_ms = beam.metrics.Metrics.distribution(
+        'detection_data_generation', 'inference_batch_latency_ms')
 
   def setup(self):
     self._load_inference_model()
@@ -88,22 +126,61 @@ class GenerateDetectionDataFn(beam.DoFn):
     with self.session_lock:
       self._detect_fn = tf.saved_model.load(self._model_dir)
 
-  def process(self, tfrecord_entry):
-    return self._run_inference_and_generate_detections(tfrecord_entry)
-
-  def _run_inference_and_generate_detections(self, tfrecord_entry):
-    input_example = tf.train.Example.FromString(tfrecord_entry)
-    if input_example.features.feature[
-        'image/object/bbox/ymin'].float_list.value:
-      # There are already ground truth boxes for this image, just keep them.
-      return [input_example]
+  def process(self, tfrecord_entries):
+    """Runs inference on a serialized tf.Example or a batch of them.
 
-    detections = self._detect_fn.signatures['serving_default'](
-        (tf.expand_dims(tf.convert_to_tensor(tfrecord_entry), 0)))
-    detection_boxes = detections['detection_boxes']
-    num_detections = detections['num_detections']
-    detection_scores = detections['detection_scores']
+    Args:
+      tfrecord_entries: A serialized tf.Example, or a list of them as produced
+        by `beam.BatchElements`. The images of the same size are run through
+        the model as one batch.
 
+    Returns:
+      A list of output tf.Examples.
+    """
+    if not isinstance(tfrecord_entries, list):
+      tfrecord_entries = [tfrecord_entries]
+    return self._run_inference_and_generate_detections(tfrecord_entries)
+
+  def _run_inference_and_generate_detections(self, tfrecord_entries):
+    input_examples = [tf.train.Example.FromString(tfrecord_entry)
+                      for tfrecord_entry in tfrecord_entries]
+    # Images that already have ground truth boxes are kept as they are.
+    inference_indices = [
+        i for i, input_example in enumerate(input_examples)
+        if not input_example.features.feature[
+            'image/object/bbox/ymin'].float_list.value]
+    detections = {}
+    for group in group_by_image_size(
+        [input_examples[i] for i in inference_indices]):
+      batch_indices = [inference_indices[j] for j in group]
+      start_time = time.time()
+      batch_detections = self._detect_fn.signatures['serving_default'](
+          tf.convert_to_tensor([tfrecord_entries[i] for i in batch_indices]))
+      batch_detections = {
+          key: batch_detections[key].numpy() for key in
+          ('detection_boxes', 'num_detections', 'detection_scores')}
+      self._num_inference_batches.inc(1)
+      self._inference_batch_size.update(len(batch_indices))
+      self._inference_batch_latency_ms.update(
+          int((time.time() - start_time) * 1000))
+      for j, i in enumerate(batch_indices):
+        detections[i] = {key: value[j:j + 1]
+                         for key, value in batch_detections.items()}
+
+    outputs = []
+    for i, input_example in enumerate(input_examples):
+      if i not in detections:
+        outputs.append(input_example)
+        continue
+      outputs.extend(self._generate_detections(
+          input_example,
+          detections[i]['detection_boxes'],
+          detections[i]['num_detections'],
+          detections[i]['detection_scores']))
+    return outputs
+
+  def _generate_detections(self, input_example, detection_boxes,
+                           num_detections, detection_scores):
     example = tf.train.Example()
 
     num_detections = int(num_detections[0])
@@ -182,7 +259,7 @@ class GenerateDetectionDataFn(beam.DoFn):
 
 
 def construct_pipeline(pipeline, input_tfrecord, output_tfrecord, model_dir,
-                       confidence_threshold, num_shards):
+                       confidence_threshold, num_shards, batch_size=1):
   """Returns a Beam pipeline to run object detection inference.
 
   Args:
@@ -193,11 +270,14 @@ def construct_pipeline(pipeline, input_tfrecord, output_tfrecord, model_dir,
     model_dir: Path to `saved_model` to use for inference.
     confidence_threshold: Threshold to use when keeping detection results.
     num_shards: The number of output shards.
+    batch_size: The maximum number of examples per inference batch.
   """
   input_collection = (
       pipeline | 'ReadInputTFRecord' >> beam.io.tfrecordio.ReadFromTFRecord(
           input_tfrecord,
-          coder=beam.coders.BytesCoder()))
+          coder=beam.coders.BytesCoder())
+      | 'BatchElements' >> beam.BatchElements(
+          min_batch_size=1, max_batch_size=batch_size))
   output_collection = input_collection | 'RunInference' >> beam.ParDo(
       GenerateDetectionDataFn(model_dir, confidence_threshold))
   output_collection = output_collection | 'Reshuffle' >> beam.Reshuffle()
@@ -243,6 +323,12 @@ def parse_args(argv):
       dest='num_shards',
       default=0,
       help='Number of output shards.')
+  parser.add_argument(
+      '--batch_size',
+      dest='batch_size',
+      default=16,
+      type=int,
+      help='Maximum number of examples per inference batch.')
   beam_args, pipeline_args = parser.parse_known_args(argv)
   return beam_args, pipeline_args
 
@@ -274,7 +360,8 @@ def main(argv=None, save_main_session=True):
       args.detection_output_tfrecord,
       args.detection_model_dir,
       args.confidence_threshold,
-      args.num_shards)
+      args.num_shards,
+      args.batch_size)
 
   p.run()
 
@@ -143,10 +143,47 @@ class GenerateDetectionDataTest(tf.test.TestCase):
       saved_model_path = os.path.join(output_directory, 'saved_model')
     return saved_model_path
 
-  def _create_tf_example(self):
+  def _export_batched_saved_model(self):
+    """Exports a model whose outputs follow the batch size of its input.
+
+    Like the exported detection models, the model decodes the images with
+    `tf.map_fn`, which fails on a batch of images of different sizes.
+    """
+
+    class BatchedFakeModel(tf.Module):
+
+      @tf.function(input_signature=[
+          tf.TensorSpec([None], tf.string, name='input_tensor')])
+      def __call__(self, input_tensor):
+
+        def decode(serialized_example):
+          features = tf.io.parse_single_example(
+              serialized_example,
+              {'image/encoded': tf.io.FixedLenFeature([], tf.string)})
+          return tf.io.decode_jpeg(features['image/encoded'], channels=3)
+
+        images = tf.map_fn(
+            decode, input_tensor,
+            fn_output_signature=tf.TensorSpec([None, None, 3], tf.uint8))
+        batch_size = tf.shape(images)[0]
+        return {
+            'detection_boxes': tf.tile(
+                [[[0.0, 0.1, 0.5, 0.6], [0.5, 0.5, 0.8, 0.8]]],
+                [batch_size, 1, 1]),
+            'detection_scores': tf.tile([[0.95, 0.6]], [batch_size, 1]),
+            'num_detections': tf.fill([batch_size], 2.0),
+        }
+
+    fake_model = BatchedFakeModel()
+    saved_model_path = tempfile.mkdtemp(dir=self.get_temp_dir())
+    tf.saved_model.save(fake_model, saved_model_path,
+                        signatures=fake_model.__call__)
+    return saved_model_path
+
+  def _create_tf_example(self, image_width=6):
     with self.test_session():
       encoded_image = tf.io.encode_jpeg(
-          tf.constant(np.ones((4, 6, 3)).astype(np.uint8))).numpy()
+          tf.constant(np.ones((4, image_width, 3)).astype(np.uint8))).numpy()
 
     def BytesFeature(value):
       return tf.train.Feature(bytes_list=tf.train.BytesList(value=[value]))
@@ -158,7 +195,7 @@ class GenerateDetectionDataTest(tf.test.TestCase):
         'image/encoded': BytesFeature(encoded_image),
         'image/source_id': BytesFeature(b'image_id'),
         'image/height': Int64Feature(4),
-        'image/width': Int64Feature(6),
+        'image/width': Int64Feature(image_width),
         'image/object/class/label': Int64Feature(5),
         'image/object/class/text': BytesFeature(b'hyena'),
         'image/class/label': Int64Feature(5),
@@ -231,6 +268,44 @@ class GenerateDetectionDataTest(tf.test.TestCase):
 
     self.assert_expected_example(output_example)
 
+  def test_generate_detection_data_fn_batched(self):
+    inference_fn = generate_detection_data.GenerateDetectionDataFn(
+        self._export_batched_saved_model(), confidence_threshold=0.8)
+    inference_fn.setup()
+    labeled_example = tf.train.Example.FromString(self._create_tf_example())
+    labeled_example.features.feature[
+        'image/object/bbox/ymin'].float_list.value.append(0.2)
+
+    output = inference_fn.process([
+        self._create_tf_example(),
+        labeled_example.SerializeToString(),
+        self._create_tf_example()])
+
+    self.assertLen(output, 3)
+    self.assert_expected_example(output[0])
+    # Examples with ground truth boxes are passed through.
+    self.assertEqual(output[1], labeled_example)
+    self.assert_expected_example(output[2])
+
+  def test_generate_detection_data_fn_batched_mixed_image_sizes(self):
+    inference_fn = generate_detection_data.GenerateDetectionDataFn(
+        self._export_batched_saved_model(), confidence_threshold=0.8)
+    inference_fn.setup()
+
+    output = inference_fn.process([
+        self._create_tf_example(),
+        self._create_tf_example(image_width=8),
+        self._create_tf_example()])
+
+    self.assertLen(output, 3)
+    self.assert_expected_example(output[0])
+    self.assertAllClose(
+        output[1].features.feature['image/object/bbox/xmax'].float_list.value,
+        [0.6])
+    self.assertAllEqual(
+        output[1].features.feature['image/width'].int64_list.value, [8])
+    self.assert_expected_example(output[2])
+
   def test_beam_pipeline(self):
     with InMemoryTFRecord([self._create_tf_example()]) as input_tfrecord:
       temp_dir = tempfile.mkdtemp(dir=os.environ.get('TEST_TMPDIR'))
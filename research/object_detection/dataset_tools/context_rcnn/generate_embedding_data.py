@@ -52,6 +52,7 @@ import argparse
 import datetime
 import os
 import threading
+import time
 
 import numpy as np
 import six
@@ -62,6 +63,8 @@ try:
 except ModuleNotFoundError:
   pass
 
+from object_detection.dataset_tools.context_rcnn import generate_detection_data  # pylint:disable=g-import-not-at-top
+
 
 def add_keys(serialized_example):
   key = hash(serialized_example)
@@ -155,6 +158,12 @@ class GenerateEmbeddingDataFn(beam.DoFn):
     self._session = None
     self._num_examples_processed = beam.metrics.Metrics.counter(
         'embedding_data_generation', 'num_tf_examples_processed')
+    self._num_inference_batches = beam.metrics.Metrics.counter(
+        'embedding_data_generation', 'num_inference_batches')
+    self._inference_batch_size = beam.metrics.Metrics.distribution(
+        'embedding_data_generation', 'inference_batch_size')
+    self._inference_batch_latency_ms = beam.metrics.Metrics.distribution(
+        'embedding_data_generation', 'inference_batch_latency_ms')
     self._top_k_embedding_count = top_k_embedding_count
     self._bottom_k_embedding_count = bottom_k_embedding_count
     self._embedding_type = embedding_type
@@ -169,12 +178,59 @@ class GenerateEmbeddingDataFn(beam.DoFn):
     with self.session_lock:
       self._detect_fn = tf.saved_model.load(self._model_dir)
 
-  def process(self, tfexample_key_value):
-    return self._run_inference_and_generate_embedding(tfexample_key_value)
+  def process(self, tfexample_key_values):
+    """Runs inference on a keyed serialized tf.Example or a batch of them.
+
+    Args:
+      tfexample_key_values: A (key, serialized tf.Example) tuple, or a list of
+        them as produced by `beam.BatchElements`. The images of the same size
+        are run through the model as one batch.
+
+    Returns:
+      A list of (key, output tf.Example) tuples.
+    """
+    if not isinstance(tfexample_key_values, list):
+      tfexample_key_values = [tfexample_key_values]
+    return self._run_inference_and_generate_embedding(tfexample_key_values)
 
-  def _run_inference_and_generate_embedding(self, tfexample_key_value):
-    key, tfexample = tfexample_key_value
-    input_example = tf.train.Example.FromString(tfexample)
+  def _run_inference_and_generate_embedding(self, tfexample_key_values):
+    if self._embedding_type == 'final_box_features':
+      features_key = 'detection_features'
+    elif self._embedding_type == 'rpn_box_features':
+      features_key = 'cropped_rpn_box_features'
+    else:
+      raise ValueError('embedding type not supported')
+
+    input_examples = [tf.train.Example.FromString(tfexample)
+                      for _, tfexample in tfexample_key_values]
+    outputs = [None] * len(tfexample_key_values)
+    for batch_indices in generate_detection_data.group_by_image_size(
+        input_examples):
+      start_time = time.time()
+      detections = self._detect_fn.signatures['serving_default'](
+          tf.convert_to_tensor(
+              [tfexample_key_values[i][1] for i in batch_indices]))
+      detections = {
+          key: detections[key].numpy() for key in
+          (features_key, 'detection_boxes', 'num_detections',
+           'detection_scores')}
+      self._num_inference_batches.inc(1)
+      self._inference_batch_size.update(len(batch_indices))
+      self._inference_batch_latency_ms.update(
+          int((time.time() - start_time) * 1000))
+
+      for j, i in enumerate(batch_indices):
+        example = self._generate_embedding(
+            input_examples[i],
+            detections[features_key][j:j + 1],
+            detections['detection_boxes'][j:j + 1],
+            detections['num_detections'][j:j + 1],
+            detections['detection_scores'][j:j + 1])
+        outputs[i] = (tfexample_key_values[i][0], example)
+    return outputs
+
+  def _generate_embedding(self, input_example, detection_features,
+                          detection_boxes, num_detections, detection_scores):
     example = tf.train.Example()
     example.CopyFrom(input_example)
 
@@ -188,24 +244,10 @@ class GenerateEmbeddingDataFn(beam.DoFn):
     except Exception:  # pylint: disable=broad-except
       temporal_embedding = None
 
-    detections = self._detect_fn.signatures['serving_default'](
-        (tf.expand_dims(tf.convert_to_tensor(tfexample), 0)))
-    if self._embedding_type == 'final_box_features':
-      detection_features = detections['detection_features']
-    elif self._embedding_type == 'rpn_box_features':
-      detection_features = detections['cropped_rpn_box_features']
-    else:
-      raise ValueError('embedding type not supported')
-    detection_boxes = detections['detection_boxes']
-    num_detections = detections['num_detections']
-    detection_scores = detections['detection_scores']
-
-    num_detections = int(num_detections)
+    num_detections = int(num_detections[0])
     embed_all = []
     score_all = []
 
-    detection_features = np.asarray(detection_features)
-
     embedding_count = 0
     for index in range(min(num_detections, self._top_k_embedding_count)):
       bb_embedding, score = get_bb_embedding(
@@ -247,12 +289,12 @@ class GenerateEmbeddingDataFn(beam.DoFn):
         embedding_count)
 
     self._num_examples_processed.inc(1)
-    return [(key, example)]
+    return example
 
 
 def construct_pipeline(pipeline, input_tfrecord, output_tfrecord, model_dir,
                        top_k_embedding_count, bottom_k_embedding_count,
-                       num_shards, embedding_type):
+                       num_shards, embedding_type, batch_size=1):
   """Returns a beam pipeline to run object detection inference.
 
   Args:
@@ -265,11 +307,14 @@ def construct_pipeline(pipeline, input_tfrecord, output_tfrecord, model_dir,
     bottom_k_embedding_count: The number of low-confidence embeddings to store.
     num_shards: The number of output shards.
     embedding_type: Which features to embed.
+    batch_size: The maximum number of examples per inference batch.
   """
   input_collection = (
       pipeline | 'ReadInputTFRecord' >> beam.io.tfrecordio.ReadFromTFRecord(
           input_tfrecord, coder=beam.coders.BytesCoder())
-      | 'AddKeys' >> beam.Map(add_keys))
+      | 'AddKeys' >> beam.Map(add_keys)
+      | 'BatchElements' >> beam.BatchElements(
+          min_batch_size=1, max_batch_size=batch_size))
   output_collection = input_collection | 'ExtractEmbedding' >> beam.ParDo(
       GenerateEmbeddingDataFn(model_dir, top_k_embedding_count,
                               bottom_k_embedding_count, embedding_type))
@@ -329,6 +374,12 @@ def parse_args(argv):
       default='final_box_features',
       help='What features to embed, supports `final_box_features`, '
       '`rpn_box_features`.')
+  parser.add_argument(
+      '--batch_size',
+      dest='batch_size',
+      default=16,
+      type=int,
+      help='Maximum number of examples per inference batch.')
   beam_args, pipeline_args = parser.parse_known_args(argv)
   return beam_args, pipeline_args
 
@@ -361,7 +412,8 @@ def main(argv=None, save_main_session=True):
       args.top_k_embedding_count,
       args.bottom_k_embedding_count,
       args.num_shards,
-      args.embedding_type)
+      args.embedding_type,
+      args.batch_size)
 
   p.run()
 
@@ -149,9 +149,47 @@ class GenerateEmbeddingData(tf.test.TestCase):
       saved_model_path = os.path.join(output_directory, 'saved_model')
     return saved_model_path
 
-  def _create_tf_example(self):
+  def _export_batched_saved_model(self):
+    """Exports a model whose outputs follow the batch size of its input.
+
+    Like the exported detection models, the model decodes the images with
+    `tf.map_fn`, which fails on a batch of images of different sizes.
+    """
+
+    class BatchedFakeModel(tf.Module):
+
+      @tf.function(input_signature=[
+          tf.TensorSpec([None], tf.string, name='input_tensor')])
+      def __call__(self, input_tensor):
+
+        def decode(serialized_example):
+          features = tf.io.parse_single_example(
+              serialized_example,
+              {'image/encoded': tf.io.FixedLenFeature([], tf.string)})
+          return tf.io.decode_jpeg(features['image/encoded'], channels=3)
+
+        images = tf.map_fn(
+            decode, input_tensor,
+            fn_output_signature=tf.TensorSpec([None, None, 3], tf.uint8))
+        batch_size = tf.shape(images)[0]
+        return {
+            'detection_boxes': tf.tile(
+                [[[0.0, 0.1, 0.5, 0.6], [0.5, 0.5, 0.8, 0.8]]],
+                [batch_size, 1, 1]),
+            'detection_scores': tf.tile([[0.95, 0.6]], [batch_size, 1]),
+            'num_detections': tf.fill([batch_size], 2.0),
+            'detection_features': tf.ones([batch_size, 2, 10, 10, 100]),
+        }
+
+    fake_model = BatchedFakeModel()
+    saved_model_path = tempfile.mkdtemp(dir=self.get_temp_dir())
+    tf.saved_model.save(fake_model, saved_model_path,
+                        signatures=fake_model.__call__)
+    return saved_model_path
+
+  def _create_tf_example(self, image_width=4):
     encoded_image = tf.io.encode_jpeg(
-        tf.constant(np.ones((4, 4, 3)).astype(np.uint8))).numpy()
+        tf.constant(np.ones((4, image_width, 3)).astype(np.uint8))).numpy()
 
     def BytesFeature(value):
       return tf.train.Feature(bytes_list=tf.train.BytesList(value=[value]))
@@ -298,6 +336,31 @@ class GenerateEmbeddingData(tf.test.TestCase):
     output_example = output[0][1]
     self.assert_expected_example(output_example, botk=True)
 
+  def test_generate_embedding_data_fn_batched(self):
+    inference_fn = generate_embedding_data.GenerateEmbeddingDataFn(
+        self._export_batched_saved_model(), top_k_embedding_count=1,
+        bottom_k_embedding_count=0)
+    inference_fn.setup()
+    output = inference_fn.process(
+        [('key_0', self._create_tf_example()),
+         ('key_1', self._create_tf_example())])
+    self.assertEqual([key for key, _ in output], ['key_0', 'key_1'])
+    for _, output_example in output:
+      self.assert_expected_example(output_example)
+
+  def test_generate_embedding_data_fn_batched_mixed_image_sizes(self):
+    inference_fn = generate_embedding_data.GenerateEmbeddingDataFn(
+        self._export_batched_saved_model(), top_k_embedding_count=1,
+        bottom_k_embedding_count=0)
+    inference_fn.setup()
+    output = inference_fn.process(
+        [('key_0', self._create_tf_example()),
+         ('key_1', self._create_tf_example(image_width=8)),
+         ('key_2', self._create_tf_example())])
+    self.assertEqual([key for key, _ in output], ['key_0', 'key_1', 'key_2'])
+    for _, output_example in output:
+      self.assert_expected_example(output_example)
+
   def test_beam_pipeline(self):
     with InMemoryTFRecord([self._create_tf_example()]) as input_tfrecord:
       temp_dir = tempfile.mkdtemp(dir=os.environ.get('TEST_TMPDIR'))
@@ -327,5 +390,26 @@ class GenerateEmbeddingData(tf.test.TestCase):
           actual_output[0]))
 
 
+  def test_beam_pipeline_batched(self):
+    with InMemoryTFRecord([self._create_tf_example()] * 3) as input_tfrecord:
+      temp_dir = tempfile.mkdtemp(dir=os.environ.get('TEST_TMPDIR'))
+      output_tfrecord = os.path.join(temp_dir, 'output_tfrecord')
+      pipeline_options = beam.options.pipeline_options.PipelineOptions(
+          runner='DirectRunner')
+      p = beam.Pipeline(options=pipeline_options)
+      generate_embedding_data.construct_pipeline(
+          p, input_tfrecord, output_tfrecord,
+          self._export_batched_saved_model(), top_k_embedding_count=1,
+          bottom_k_embedding_count=0, num_shards=1,
+          embedding_type='final_box_features', batch_size=2)
+      p.run()
+      filenames = tf.io.gfile.glob(output_tfrecord + '-?????-of-?????')
+      actual_output = list(tf.data.TFRecordDataset(
+          tf.convert_to_tensor(filenames)).as_numpy_iterator())
+      self.assertLen(actual_output, 3)
+      for record in actual_output:
+        self.assert_expected_example(tf.train.Example.FromString(record))
+
+
 if __name__ == '__main__':
   tf.test.main()
@@ -33,12 +33,13 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import functools
 import hashlib
 import io
 import json
 import logging
+import multiprocessing
 import os
-import contextlib2
 import numpy as np
 import PIL.Image
 
@@ -78,6 +79,12 @@ tf.flags.DEFINE_boolean('remove_non_person_annotations', False, 'Whether to '
                         'remove all annotations for non-person objects.')
 tf.flags.DEFINE_boolean('remove_non_person_images', False, 'Whether to '
                         'remove all examples that do not contain a person.')
+tf.flags.DEFINE_integer('num_workers', 0, 'Number of processes converting '
+                        'images in parallel; each process writes whole output '
+                        'shards. If 0, uses one process per CPU core.')
+tf.flags.DEFINE_boolean('resume', False, 'Whether to keep the output shards '
+                        'written by a previous, interrupted run with the same '
+                        'flags instead of converting them again.')
 
 FLAGS = flags.FLAGS
 
@@ -359,13 +366,50 @@ def create_tf_example(image,
           num_keypoint_annotation_skipped, num_densepose_annotation_skipped)
 
 
+def _create_tf_example_from_image_input(image_input, image_dir,
+                                        category_index, include_masks,
+                                        remove_non_person_annotations,
+                                        remove_non_person_images):
+  """Converts an image and its annotations with `create_tf_example`.
+
+  Args:
+    image_input: a tuple of the image dict, the list of its annotations and
+      the dicts of its keypoint and DensePose annotations (or None).
+    image_dir: directory containing the image files.
+    category_index: a dict containing COCO category information keyed by the
+      'id' field of each category.
+    include_masks: Whether to include instance segmentations masks.
+    remove_non_person_annotations: Whether to remove any annotations that are
+      not the "person" class.
+    remove_non_person_images: Whether to remove any images that do not contain
+      at least one "person" annotation.
+
+  Returns:
+    tf_example: The converted tf.Example, or None if the image was removed.
+    num_skipped: A tuple of the number of skipped annotations, keypoint
+      annotations and DensePose annotations.
+  """
+  (image, annotations_list, keypoint_annotations_dict,
+   densepose_annotations_dict) = image_input
+  (_, tf_example, num_annotations_skipped, num_keypoint_annotations_skipped,
+   num_densepose_annotations_skipped) = create_tf_example(
+       image, annotations_list, image_dir, category_index, include_masks,
+       keypoint_annotations_dict, densepose_annotations_dict,
+       remove_non_person_annotations, remove_non_person_images)
+  return tf_example, (num_annotations_skipped,
+                      num_keypoint_annotations_skipped,
+                      num_densepose_annotations_skipped)
+
+
 def _create_tf_record_from_coco_annotations(annotations_file, image_dir,
                                             output_path, include_masks,
                                             num_shards,
                                             keypoint_annotations_file='',
                                             densepose_annotations_file='',
                                             remove_non_person_annotations=False,
-                                            remove_non_person_images=False):
+                                            remove_non_person_images=False,
+                                            num_workers=1,
+                                            resume=False):
   """Loads COCO annotation json files and converts to tf.Record format.
 
   Args:
@@ -384,11 +428,12 @@ def _create_tf_record_from_coco_annotations(annotations_file, image_dir,
       not the "person" class.
     remove_non_person_images: Whether to remove any images that do not contain
       at least one "person" annotation.
+    num_workers: number of processes converting the images in parallel. Each
+      process converts and writes whole output shards.
+    resume: Whether to keep the output shards that were completely written by a
+      previous, interrupted call instead of converting them again.
   """
-  with contextlib2.ExitStack() as tf_record_close_stack, \
-      tf.gfile.GFile(annotations_file, 'r') as fid:
-    output_tfrecords = tf_record_creation_util.open_sharded_output_tfrecords(
-        tf_record_close_stack, output_path, num_shards)
+  with tf.gfile.GFile(annotations_file, 'r') as fid:
     groundtruth_data = json.load(fid)
     images = groundtruth_data['images']
     category_index = label_map_util.create_category_index(
@@ -433,43 +478,40 @@ def _create_tf_record_from_coco_annotations(annotations_file, image_dir,
             densepose_annotations_index[image_id] = {}
           densepose_annotations_index[image_id][annotation['id']] = annotation
 
-    total_num_annotations_skipped = 0
-    total_num_keypoint_annotations_skipped = 0
-    total_num_densepose_annotations_skipped = 0
-    for idx, image in enumerate(images):
-      if idx % 100 == 0:
-        logging.info('On image %d of %d', idx, len(images))
-      annotations_list = annotations_index[image['id']]
-      keypoint_annotations_dict = None
-      if keypoint_annotations_file:
-        keypoint_annotations_dict = {}
-        if image['id'] in keypoint_annotations_index:
-          keypoint_annotations_dict = keypoint_annotations_index[image['id']]
-      densepose_annotations_dict = None
-      if densepose_annotations_file:
-        densepose_annotations_dict = {}
-        if image['id'] in densepose_annotations_index:
-          densepose_annotations_dict = densepose_annotations_index[image['id']]
-      (_, tf_example, num_annotations_skipped, num_keypoint_annotations_skipped,
-       num_densepose_annotations_skipped) = create_tf_example(
-           image, annotations_list, image_dir, category_index, include_masks,
-           keypoint_annotations_dict, densepose_annotations_dict,
-           remove_non_person_annotations, remove_non_person_images)
-      total_num_annotations_skipped += num_annotations_skipped
-      total_num_keypoint_annotations_skipped += num_keypoint_annotations_skipped
-      total_num_densepose_annotations_skipped += (
-          num_densepose_annotations_skipped)
-      shard_idx = idx % num_shards
-      if tf_example:
-        output_tfrecords[shard_idx].write(tf_example.SerializeToString())
-    logging.info('Finished writing, skipped %d annotations.',
-                 total_num_annotations_skipped)
+  image_inputs = []
+  for image in images:
+    keypoint_annotations_dict = None
     if keypoint_annotations_file:
-      logging.info('Finished writing, skipped %d keypoint annotations.',
-                   total_num_keypoint_annotations_skipped)
+      keypoint_annotations_dict = keypoint_annotations_index.get(
+          image['id'], {})
+    densepose_annotations_dict = None
     if densepose_annotations_file:
-      logging.info('Finished writing, skipped %d DensePose annotations.',
-                   total_num_densepose_annotations_skipped)
+      densepose_annotations_dict = densepose_annotations_index.get(
+          image['id'], {})
+    image_inputs.append((image, annotations_index[image['id']],
+                         keypoint_annotations_dict, densepose_annotations_dict))
+  process_fn = functools.partial(
+      _create_tf_example_from_image_input,
+      image_dir=image_dir,
+      category_index=category_index,
+      include_masks=include_masks,
+      remove_non_person_annotations=remove_non_person_annotations,
+      remove_non_person_images=remove_non_person_images)
+  logging.info('Converting %d images to %d shards with %d workers.',
+               len(images), num_shards, num_workers)
+  (total_num_annotations_skipped, total_num_keypoint_annotations_skipped,
+   total_num_densepose_annotations_skipped) = (
+       tf_record_creation_util.write_sharded_output_tfrecords(
+           output_path, num_shards, image_inputs, process_fn,
+           num_workers=num_workers, resume=resume) or (0, 0, 0))
+  logging.info('Finished writing, skipped %d annotations.',
+               total_num_annotations_skipped)
+  if keypoint_annotations_file:
+    logging.info('Finished writing, skipped %d keypoint annotations.',
+                 total_num_keypoint_annotations_skipped)
+  if densepose_annotations_file:
+    logging.info('Finished writing, skipped %d DensePose annotations.',
+                 total_num_densepose_annotations_skipped)
 
 
 def main(_):
@@ -485,6 +527,7 @@ def main(_):
   train_output_path = os.path.join(FLAGS.output_dir, 'coco_train.record')
   val_output_path = os.path.join(FLAGS.output_dir, 'coco_val.record')
   testdev_output_path = os.path.join(FLAGS.output_dir, 'coco_testdev.record')
+  num_workers = FLAGS.num_workers or multiprocessing.cpu_count()
 
   _create_tf_record_from_coco_annotations(
       FLAGS.train_annotations_file,
@@ -495,7 +538,9 @@ def main(_):
       keypoint_annotations_file=FLAGS.train_keypoint_annotations_file,
       densepose_annotations_file=FLAGS.train_densepose_annotations_file,
       remove_non_person_annotations=FLAGS.remove_non_person_annotations,
-      remove_non_person_images=FLAGS.remove_non_person_images)
+      remove_non_person_images=FLAGS.remove_non_person_images,
+      num_workers=num_workers,
+      resume=FLAGS.resume)
   _create_tf_record_from_coco_annotations(
       FLAGS.val_annotations_file,
       FLAGS.val_image_dir,
@@ -505,13 +550,17 @@ def main(_):
       keypoint_annotations_file=FLAGS.val_keypoint_annotations_file,
       densepose_annotations_file=FLAGS.val_densepose_annotations_file,
       remove_non_person_annotations=FLAGS.remove_non_person_annotations,
-      remove_non_person_images=FLAGS.remove_non_person_images)
+      remove_non_person_images=FLAGS.remove_non_person_images,
+      num_workers=num_workers,
+      resume=FLAGS.resume)
   _create_tf_record_from_coco_annotations(
       FLAGS.testdev_annotations_file,
       FLAGS.test_image_dir,
       testdev_output_path,
       FLAGS.include_masks,
-      num_shards=50)
+      num_shards=50,
+      num_workers=num_workers,
+      resume=FLAGS.resume)
 
 
 if __name__ == '__main__':
@@ -492,6 +492,19 @@ class CreateCocoTFRecordTest(tf.test.TestCase):
     self.assertTrue(os.path.exists(output_path + '-00000-of-00002'))
     self.assertTrue(os.path.exists(output_path + '-00001-of-00002'))
 
+    parallel_output_path = os.path.join(tmp_dir, 'parallel_out.record')
+    create_coco_tf_record._create_tf_record_from_coco_annotations(
+        annotation_file,
+        tmp_dir,
+        parallel_output_path,
+        False,
+        2,
+        num_workers=2)
+    for shard in ('-00000-of-00002', '-00001-of-00002'):
+      self.assertEqual(
+          list(tf.python_io.tf_record_iterator(output_path + shard)),
+          list(tf.python_io.tf_record_iterator(parallel_output_path + shard)))
+
 
 if __name__ == '__main__':
   tf.test.main()
@@ -18,9 +18,16 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import multiprocessing
+import os
+
 from six.moves import range
 import tensorflow.compat.v1 as tf
 
+# The inputs and processing function of the current conversion. They are set
+# once per worker process instead of being sent along with every shard.
+_shard_worker_state = {}
+
 
 def open_sharded_output_tfrecords(exit_stack, base_path, num_shards):
   """Opens all TFRecord shards for writing and adds them to an exit stack.
@@ -45,3 +52,110 @@ def open_sharded_output_tfrecords(exit_stack, base_path, num_shards):
   ]
 
   return tfrecords
+
+
+def _init_shard_worker(inputs, process_fn):
+  _shard_worker_state['inputs'] = inputs
+  _shard_worker_state['process_fn'] = process_fn
+
+
+def _add_counts(total_counts, counts):
+  """Adds `counts` element-wise to `total_counts`, which may be empty."""
+  if not total_counts:
+    return list(counts)
+  if not counts:
+    return total_counts
+  return [total + count for total, count in zip(total_counts, counts)]
+
+
+def _write_shard(base_path, shard_idx, num_shards, resume):
+  """Converts the inputs of one shard and writes them to the shard's file.
+
+  The shard is first written to a hidden temporary file which is renamed to the
+  shard's path once complete, so that an existing shard is always complete.
+
+  Args:
+    base_path: The base path for all shards.
+    shard_idx: The index of the shard to write.
+    num_shards: The number of shards.
+    resume: Whether to skip the shard if its file already exists.
+
+  Returns:
+    The index of the shard and a list with the sum of the counts returned by
+    `process_fn`, or None if the shard was skipped.
+  """
+  shard_path = '{}-{:05d}-of-{:05d}'.format(base_path, shard_idx, num_shards)
+  if resume and tf.gfile.Exists(shard_path):
+    return shard_idx, None
+  process_fn = _shard_worker_state['process_fn']
+  temp_path = os.path.join(os.path.dirname(shard_path),
+                           '.{}.incomplete'.format(os.path.basename(shard_path)))
+  total_counts = []
+  with tf.python_io.TFRecordWriter(temp_path) as writer:
+    for shard_input in _shard_worker_state['inputs'][shard_idx::num_shards]:
+      tf_example, counts = process_fn(shard_input)
+      if tf_example:
+        writer.write(tf_example.SerializeToString())
+      total_counts = _add_counts(total_counts, counts)
+  tf.gfile.Rename(temp_path, shard_path, overwrite=True)
+  return shard_idx, total_counts
+
+
+def _write_shard_in_worker(args):
+  return _write_shard(*args)
+
+
+def write_sharded_output_tfrecords(base_path, num_shards, inputs, process_fn,
+                                   num_workers=1, resume=False):
+  """Converts inputs to TF examples and writes them to TFRecord shards.
+
+  Input k is written to shard k % num_shards. Each shard is converted and
+  written by a single worker process which reads its inputs from the list
+  shared by all workers, so that the TF examples are never sent between
+  processes.
+
+  Args:
+    base_path: The base path for all shards.
+    num_shards: The number of shards.
+    inputs: A list of inputs to convert, e.g. one per image.
+    process_fn: A picklable function which takes an input and returns a tuple
+      of a tf.train.Example, or None if the input should be skipped, and a
+      tuple of integer counts, e.g. of skipped annotations.
+    num_workers: The number of worker processes. If 1, all shards are written
+      by the calling process.
+    resume: Whether to keep the shards written by a previous, interrupted call
+      with the same arguments instead of writing them again.
+
+  Returns:
+    A list with the sum of the counts returned by `process_fn` for the shards
+    written by this call. Empty if no shards were written.
+  """
+  shard_args = [(base_path, shard_idx, num_shards, resume)
+                for shard_idx in range(num_shards)]
+  if num_workers > 1:
+    pool = multiprocessing.Pool(
+        processes=num_workers, initializer=_init_shard_worker,
+        initargs=(inputs, process_fn))
+    shard_results = pool.imap_unordered(_write_shard_in_worker, shard_args)
+  else:
+    _init_shard_worker(inputs, process_fn)
+    shard_results = map(_write_shard_in_worker, shard_args)
+
+  total_counts = []
+  for num_finished, (shard_idx, counts) in enumerate(shard_results, 1):
+    if counts is None:
+      tf.logging.info('Shard %d already exists, skipping it (%d of %d).',
+                      shard_idx, num_finished, num_shards)
+      continue
+    tf.logging.info('Finished shard %d (%d of %d).', shard_idx, num_finished,
+                    num_shards)
+    # Shards without inputs, e.g. if there are more shards than inputs, return
+    # no counts.
+    total_counts = _add_counts(total_counts, counts)
+
+  if num_workers > 1:
+    pool.close()
+    pool.join()
+  else:
+    _shard_worker_state.clear()
+  return total_counts
@@ -27,6 +27,23 @@ import tensorflow.compat.v1 as tf
 from object_detection.dataset_tools import tf_record_creation_util
 
 
+def _process_input(value):
+  if value % 5 == 4:
+    return None, (1,)
+  return six.ensure_binary('test_{}'.format(value)), (0,)
+
+
+class _FakeExample(bytes):
+
+  def SerializeToString(self):
+    return bytes(self)
+
+
+def _process_input_to_example(value):
+  serialized, counts = _process_input(value)
+  return serialized and _FakeExample(serialized), counts
+
+
 class OpenOutputTfrecordsTests(tf.test.TestCase):
 
   def test_sharded_tfrecord_writes(self):
@@ -44,5 +61,58 @@ class OpenOutputTfrecordsTests(tf.test.TestCase):
       self.assertAllEqual(records, ['test_{}'.format(idx).encode('utf-8')])
 
 
+
+class WriteShardedOutputTfrecordsTests(tf.test.TestCase):
+
+  def _read_shards(self, base_path, num_shards):
+    return [
+        list(tf.python_io.tf_record_iterator(
+            '{}-{:05d}-of-{:05d}'.format(base_path, idx, num_shards)))
+        for idx in range(num_shards)]
+
+  def test_sharded_tfrecord_writes(self):
+    temp_dir = self.create_tempdir().full_path
+    base_path = os.path.join(temp_dir, 'test.tfrec')
+    for num_workers in (1, 2):
+      counts = tf_record_creation_util.write_sharded_output_tfrecords(
+          base_path, 3, list(range(10)), _process_input_to_example,
+          num_workers=num_workers)
+      self.assertEqual(counts, [2])
+      self.assertAllEqual(
+          self._read_shards(base_path, 3),
+          [[b'test_0', b'test_3', b'test_6'], [b'test_1', b'test_7'],
+           [b'test_2', b'test_5', b'test_8']])
+    # No temporary files are left behind.
+    self.assertLen(tf.gfile.ListDirectory(temp_dir), 3)
+
+  def test_more_shards_than_inputs(self):
+    base_path = os.path.join(self.create_tempdir().full_path, 'test.tfrec')
+    for num_workers in (1, 2):
+      counts = tf_record_creation_util.write_sharded_output_tfrecords(
+          base_path, 8, list(range(5)), _process_input_to_example,
+          num_workers=num_workers)
+      # The empty shards do not reset the counts of the other shards.
+      self.assertEqual(counts, [1])
+      self.assertAllEqual(
+          self._read_shards(base_path, 8),
+          [[b'test_0'], [b'test_1'], [b'test_2'], [b'test_3'], [], [], [],
+           []])
+
+  def test_resume(self):
+    base_path = os.path.join(self.create_tempdir().full_path, 'test.tfrec')
+    tf_record_creation_util.write_sharded_output_tfrecords(
+        base_path, 2, list(range(4)), _process_input_to_example)
+    tf.gfile.Remove('{}-00001-of-00002'.format(base_path))
+    with tf.python_io.TFRecordWriter(
+        '{}-00000-of-00002'.format(base_path)) as writer:
+      writer.write(b'stale')
+
+    counts = tf_record_creation_util.write_sharded_output_tfrecords(
+        base_path, 2, list(range(4)), _process_input_to_example, resume=True)
+
+    self.assertEqual(counts, [0])
+    self.assertAllEqual(self._read_shards(base_path, 2),
+                        [[b'stale'], [b'test_1', b'test_3']])
+
 if __name__ == '__main__':
   tf.test.main()
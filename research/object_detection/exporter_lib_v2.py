@@ -149,7 +149,10 @@ class DetectionFromImageModule(DetectionInferenceModule):
     """
     if zipped_side_inputs is None:
       zipped_side_inputs = []
-    sig = [tf.TensorSpec(shape=[1, None, None, 3],
+    # Side inputs are defined for a single image, so the batch size is only
+    # left dynamic without them.
+    batch_size = 1 if use_side_inputs else None
+    sig = [tf.TensorSpec(shape=[batch_size, None, None, 3],
                          dtype=tf.uint8,
                          name='input_tensor')]
     if use_side_inputs:
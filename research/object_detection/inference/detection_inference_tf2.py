@@ -0,0 +1,375 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Batched TF2 offline detection inference on TFRecords of TFExamples.
+
+Unlike the TF1 `detection_inference` utilities, which decode and run one image
+at a time, the input examples are decoded in parallel with tf.data and grouped
+into real batches for a SavedModel exported by `exporter_lib_v2`. Each shard of
+the input is processed in chunks whose outputs are written atomically, so that
+an interrupted run resumes from the last completed chunk.
+"""
+import json
+import time
+
+from absl import logging
+import tensorflow.compat.v2 as tf
+
+from object_detection.core import standard_fields
+
+INPUT_TYPES = ('image_tensor', 'encoded_image_string_tensor', 'tf_example')
+
+
+def _decode_example(serialized_example):
+  """Returns the serialized example with its decoded image and image shape."""
+  features = tf.io.parse_single_example(
+      serialized_example,
+      features={
+          standard_fields.TfExampleFields.image_encoded:
+              tf.io.FixedLenFeature([], tf.string),
+      })
+  image = tf.image.decode_image(
+      features[standard_fields.TfExampleFields.image_encoded],
+      channels=3,
+      expand_animations=False)
+  image.set_shape([None, None, 3])
+  return {
+      'serialized_example': serialized_example,
+      'model_input': image,
+      'image_shape': tf.shape(image)[:2],
+  }
+
+
+def _encoded_image_input(serialized_example):
+  """Returns the serialized example with the encoded image it contains."""
+  features = tf.io.parse_single_example(
+      serialized_example,
+      features={
+          standard_fields.TfExampleFields.image_encoded:
+              tf.io.FixedLenFeature([], tf.string),
+      })
+  return {
+      'serialized_example': serialized_example,
+      'model_input': features[standard_fields.TfExampleFields.image_encoded],
+  }
+
+
+def read_records(input_tfrecord_paths,
+                 num_shards=1,
+                 shard_index=0,
+                 start_index=0):
+  """Returns the serialized records of one shard of the input TFRecords.
+
+  If there are at least as many input files as shards, the shards are made of
+  whole files, so that each shard only reads its own files. Otherwise every
+  shard reads all the files and keeps every `num_shards`-th record.
+
+  Args:
+    input_tfrecord_paths: List of paths to the input TFRecords.
+    num_shards: The number of shards the input records are split into.
+    shard_index: The index of the shard to read.
+    start_index: The number of records of the shard to skip, e.g. to resume.
+
+  Returns:
+    A tf.data.Dataset of serialized records in a deterministic order.
+  """
+  input_tfrecord_paths = list(input_tfrecord_paths)
+  if len(input_tfrecord_paths) >= num_shards:
+    dataset = tf.data.TFRecordDataset(
+        input_tfrecord_paths[shard_index::num_shards],
+        num_parallel_reads=tf.data.AUTOTUNE)
+  else:
+    dataset = tf.data.TFRecordDataset(
+        input_tfrecord_paths, num_parallel_reads=tf.data.AUTOTUNE)
+    dataset = dataset.shard(num_shards, shard_index)
+  if start_index:
+    dataset = dataset.skip(start_index)
+  return dataset
+
+
+def batch_records(records,
+                  batch_size,
+                  input_type='image_tensor',
+                  bucket_boundaries=(320, 640, 1024)):
+  """Decodes and batches serialized records for the model.
+
+  For `image_tensor` models, images are decoded in parallel and bucketed by
+  their longest side, so that each batch is zero-padded to the largest image in
+  it rather than to the largest image of the dataset. For the other input types
+  decoding happens inside the model and the batches are not padded.
+
+  Args:
+    records: A tf.data.Dataset of serialized TFExamples.
+    batch_size: The number of images per batch.
+    input_type: The input type of the exported SavedModel, one of
+      `INPUT_TYPES`.
+    bucket_boundaries: Increasing longest-side boundaries of the size buckets
+      for `image_tensor` inputs.
+
+  Returns:
+    A tf.data.Dataset of batched dictionaries with the `serialized_example`s and
+    the `model_input`s, which are the padded uint8 images for `image_tensor`,
+    the encoded images for `encoded_image_string_tensor` and the serialized
+    examples for `tf_example` inputs. Padded batches also have the
+    [batch, 2] true height and width of each image as `image_shape`.
+
+  Raises:
+    ValueError: if `input_type` is not supported.
+  """
+  if input_type not in INPUT_TYPES:
+    raise ValueError('Unsupported input_type: {}. Supported values are: '
+                     '{}'.format(input_type, INPUT_TYPES))
+  if input_type == 'image_tensor':
+    dataset = records.map(
+        _decode_example, num_parallel_calls=tf.data.AUTOTUNE)
+    dataset = dataset.bucket_by_sequence_length(
+        element_length_func=lambda x: tf.reduce_max(x['image_shape']),
+        bucket_boundaries=list(bucket_boundaries),
+        bucket_batch_sizes=[batch_size] * (len(bucket_boundaries) + 1))
+  elif input_type == 'encoded_image_string_tensor':
+    dataset = records.map(
+        _encoded_image_input, num_parallel_calls=tf.data.AUTOTUNE)
+    dataset = dataset.batch(batch_size)
+  else:
+    dataset = records.map(
+        lambda x: {'serialized_example': x, 'model_input': x})
+    dataset = dataset.batch(batch_size)
+  return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def build_dataset(input_tfrecord_paths,
+                  batch_size,
+                  input_type='image_tensor',
+                  bucket_boundaries=(320, 640, 1024),
+                  num_shards=1,
+                  shard_index=0,
+                  start_index=0,
+                  num_examples=None):
+  """Builds the batched input for one shard of the input TFRecords.
+
+  See `read_records` for the sharding and `batch_records` for the batches.
+
+  Args:
+    input_tfrecord_paths: List of paths to the input TFRecords.
+    batch_size: The number of images per batch.
+    input_type: The input type of the exported SavedModel, one of
+      `INPUT_TYPES`.
+    bucket_boundaries: Increasing longest-side boundaries of the size buckets
+      for `image_tensor` inputs.
+    num_shards: The number of shards the input records are split into.
+    shard_index: The index of the shard to read.
+    start_index: The number of records of the shard to skip.
+    num_examples: The number of records of the shard to read after
+      `start_index`. If None, reads all remaining records.
+
+  Returns:
+    A tf.data.Dataset of batched dictionaries, see `batch_records`.
+
+  Raises:
+    ValueError: if `input_type` is not supported.
+  """
+  records = read_records(input_tfrecord_paths, num_shards, shard_index,
+                         start_index)
+  if num_examples is not None:
+    records = records.take(num_examples)
+  return batch_records(records, batch_size, input_type, bucket_boundaries)
+
+
+def rescale_padded_boxes(boxes, padded_shape, image_shapes):
+  """Maps normalized boxes of padded images to the unpadded images.
+
+  Args:
+    boxes: A [batch, num_detections, 4] float tensor of [ymin, xmin, ymax, xmax]
+      boxes normalized to the padded images.
+    padded_shape: A [2] tensor with the padded height and width.
+    image_shapes: A [batch, 2] tensor with the true height and width of each
+      image.
+
+  Returns:
+    The boxes normalized to the true image sizes and clipped to [0, 1].
+  """
+  scale = (tf.cast(padded_shape, tf.float32)[tf.newaxis, :] /
+           tf.cast(image_shapes, tf.float32))
+  scale = tf.tile(scale, [1, 2])[:, tf.newaxis, :]
+  return tf.clip_by_value(boxes * scale, 0.0, 1.0)
+
+
+def infer_detections(detect_fn, model_inputs, image_shapes=None):
+  """Runs the detection SavedModel signature on a batch.
+
+  Args:
+    detect_fn: The `serving_default` signature of an exported detection model.
+    model_inputs: A batch of model inputs as produced by `build_dataset`.
+    image_shapes: The true image shapes of padded `image_tensor` inputs, or None
+      if the inputs are not padded.
+
+  Returns:
+    A dictionary of numpy arrays with the `detection_boxes`,
+    `detection_scores`, `detection_classes` and `num_detections` of the batch.
+  """
+  detections = detect_fn(input_tensor=model_inputs)
+  boxes = detections['detection_boxes']
+  if image_shapes is not None:
+    boxes = rescale_padded_boxes(
+        boxes, tf.shape(model_inputs)[1:3], image_shapes)
+  return {
+      'detection_boxes': boxes.numpy(),
+      'detection_scores': detections['detection_scores'].numpy(),
+      'detection_classes': detections['detection_classes'].numpy(),
+      'num_detections': detections['num_detections'].numpy(),
+  }
+
+
+def add_detections_to_example(serialized_example, detected_boxes,
+                              detected_scores, detected_classes,
+                              discard_image_pixels):
+  """Adds the detections of one image to its de-serialized TF example.
+
+  Args:
+    serialized_example: The serialized input TF example.
+    detected_boxes: A [num_detections, 4] numpy array of normalized boxes.
+    detected_scores: A [num_detections] numpy array of scores.
+    detected_classes: A [num_detections] numpy array of class labels.
+    discard_image_pixels: If true, discards the image from the result.
+
+  Returns:
+    The de-serialized TF example augmented with the inferred detections.
+  """
+  tf_example = tf.train.Example()
+  tf_example.ParseFromString(serialized_example)
+  detected_boxes = detected_boxes.T
+  feature = tf_example.features.feature
+  feature[standard_fields.TfExampleFields.
+          detection_score].float_list.value[:] = detected_scores
+  feature[standard_fields.TfExampleFields.
+          detection_bbox_ymin].float_list.value[:] = detected_boxes[0]
+  feature[standard_fields.TfExampleFields.
+          detection_bbox_xmin].float_list.value[:] = detected_boxes[1]
+  feature[standard_fields.TfExampleFields.
+          detection_bbox_ymax].float_list.value[:] = detected_boxes[2]
+  feature[standard_fields.TfExampleFields.
+          detection_bbox_xmax].float_list.value[:] = detected_boxes[3]
+  feature[standard_fields.TfExampleFields.
+          detection_class_label].int64_list.value[:] = (
+              detected_classes.astype('int64'))
+
+  if discard_image_pixels:
+    del feature[standard_fields.TfExampleFields.image_encoded]
+
+  return tf_example
+
+
+def _shard_name(output_tfrecord_path, shard_index, num_shards):
+  return '{}-{:05d}-of-{:05d}'.format(
+      output_tfrecord_path, shard_index, num_shards)
+
+
+def _read_progress(progress_path):
+  if not tf.io.gfile.exists(progress_path):
+    return {'completed_chunks': 0, 'num_images': 0}
+  with tf.io.gfile.GFile(progress_path) as f:
+    return json.loads(f.read())
+
+
+def _write_progress(progress_path, progress):
+  with tf.io.gfile.GFile(progress_path + '.tmp', 'w') as f:
+    f.write(json.dumps(progress))
+  tf.io.gfile.rename(progress_path + '.tmp', progress_path, overwrite=True)
+
+
+def run_shard(detect_fn,
+              input_tfrecord_paths,
+              output_tfrecord_path,
+              batch_size,
+              input_type='image_tensor',
+              bucket_boundaries=(320, 640, 1024),
+              num_shards=1,
+              shard_index=0,
+              examples_per_chunk=10000,
+              discard_image_pixels=False):
+  """Runs inference on one shard of the input and writes its detections.
+
+  The shard is processed in chunks of `examples_per_chunk` records. Each chunk
+  is written to its own TFRecord file
+  `<output_tfrecord_path>-<shard>-of-<num_shards>.chunk-<chunk>`, which is
+  renamed into place once it is complete, and the number of completed chunks
+  is recorded in a `.progress` JSON file next to it. Rerunning the shard
+  resumes after the last completed chunk. The shard is read in a single pass,
+  and the records of the current and the next chunk are held in memory.
+
+  Args:
+    detect_fn: The `serving_default` signature of an exported detection model.
+    input_tfrecord_paths: List of paths to the input TFRecords.
+    output_tfrecord_path: The prefix of the output TFRecords.
+    batch_size: The number of images per inference batch.
+    input_type: The input type of the exported SavedModel, one of
+      `INPUT_TYPES`.
+    bucket_boundaries: Increasing longest-side boundaries of the size buckets
+      for `image_tensor` inputs.
+    num_shards: The number of shards the input records are split into.
+    shard_index: The index of the shard to process.
+    examples_per_chunk: The number of input records per output chunk.
+    discard_image_pixels: If true, discards the images from the output.
+
+  Returns:
+    The number of images processed by this call.
+  """
+  shard_name = _shard_name(output_tfrecord_path, shard_index, num_shards)
+  progress_path = shard_name + '.progress'
+  progress = _read_progress(progress_path)
+  if progress.get('done'):
+    logging.info('Shard %s is already complete.', shard_name)
+    return 0
+
+  # The shard is read once. Each chunk of records is decoded and batched
+  # separately, so that a chunk is complete once its records are processed.
+  chunks = read_records(
+      input_tfrecord_paths, num_shards, shard_index,
+      start_index=progress['completed_chunks'] * examples_per_chunk).batch(
+          examples_per_chunk).prefetch(1)
+  num_images = 0
+  start_time = time.time()
+  for records in chunks:
+    chunk = progress['completed_chunks']
+    dataset = batch_records(
+        tf.data.Dataset.from_tensor_slices(records), batch_size, input_type,
+        bucket_boundaries)
+    chunk_path = '{}.chunk-{:05d}'.format(shard_name, chunk)
+    with tf.io.TFRecordWriter(chunk_path + '.tmp') as writer:
+      for batch in dataset:
+        detections = infer_detections(
+            detect_fn, batch['model_input'], batch.get('image_shape'))
+        serialized_examples = batch['serialized_example'].numpy()
+        for i, serialized_example in enumerate(serialized_examples):
+          num_detections = int(detections['num_detections'][i])
+          tf_example = add_detections_to_example(
+              serialized_example,
+              detections['detection_boxes'][i, :num_detections],
+              detections['detection_scores'][i, :num_detections],
+              detections['detection_classes'][i, :num_detections],
+              discard_image_pixels)
+          writer.write(tf_example.SerializeToString())
+    tf.io.gfile.rename(chunk_path + '.tmp', chunk_path, overwrite=True)
+
+    num_images += len(records)
+    progress['completed_chunks'] = chunk + 1
+    progress['num_images'] += len(records)
+    _write_progress(progress_path, progress)
+    logging.info('Shard %s: %d images, %.2f images/sec.', shard_name,
+                 progress['num_images'],
+                 num_images / max(time.time() - start_time, 1e-6))
+
+  progress['done'] = True
+  _write_progress(progress_path, progress)
+  return num_images
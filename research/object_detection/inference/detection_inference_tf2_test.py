@@ -0,0 +1,183 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for detection_inference_tf2.py."""
+import os
+import unittest
+
+import numpy as np
+from PIL import Image
+import six
+import tensorflow.compat.v2 as tf
+
+from object_detection.core import standard_fields
+from object_detection.inference import detection_inference_tf2
+from object_detection.utils import dataset_util
+from object_detection.utils import tf_version
+
+
+def _create_tfrecord(path, image_sizes):
+  with tf.io.TFRecordWriter(path) as writer:
+    for i, (height, width) in enumerate(image_sizes):
+      pil_image = Image.fromarray(
+          np.full((height, width, 3), 100, dtype=np.uint8), 'RGB')
+      image_output_stream = six.BytesIO()
+      pil_image.save(image_output_stream, format='png')
+      feature_map = {
+          'test_field': dataset_util.int64_feature(i),
+          standard_fields.TfExampleFields.image_encoded:
+              dataset_util.bytes_feature(image_output_stream.getvalue()),
+      }
+      tf_example = tf.train.Example(
+          features=tf.train.Features(feature=feature_map))
+      writer.write(tf_example.SerializeToString())
+
+
+class _MockImageModel(tf.Module):
+  """Detects the non-zero area of each padded image as one box."""
+
+  def __init__(self):
+    super().__init__()
+    self.batch_sizes = []
+
+  @tf.function(input_signature=[
+      tf.TensorSpec([None, None, None, 3], tf.uint8, name='input_tensor')])
+  def __call__(self, input_tensor):
+    shape = tf.cast(tf.shape(input_tensor), tf.float32)
+    valid = tf.reduce_max(tf.cast(input_tensor, tf.float32), axis=-1) > 0
+    height = tf.reduce_sum(tf.cast(tf.reduce_any(valid, axis=2), tf.float32),
+                           axis=1)
+    width = tf.reduce_sum(tf.cast(tf.reduce_any(valid, axis=1), tf.float32),
+                          axis=1)
+    zeros = tf.zeros_like(height)
+    boxes = tf.stack([zeros, zeros, height / shape[1], width / shape[2]],
+                     axis=-1)[:, tf.newaxis, :]
+    batch_size = tf.shape(input_tensor)[0]
+    return {
+        'detection_boxes': boxes,
+        'detection_scores': tf.fill([batch_size, 1], 0.5),
+        'detection_classes': tf.fill([batch_size, 1], 3.0),
+        'num_detections': tf.fill([batch_size], 1.0),
+    }
+
+
+@unittest.skipIf(tf_version.is_tf1(), 'Skipping TF2.X only test.')
+class DetectionInferenceTF2Test(tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self._input_path = os.path.join(self.get_temp_dir(), 'input.tfrecord')
+    self._image_sizes = [(4, 6), (20, 10), (5, 5), (24, 30), (3, 2)]
+    _create_tfrecord(self._input_path, self._image_sizes)
+
+  def test_build_dataset_buckets_by_image_size(self):
+    dataset = detection_inference_tf2.build_dataset(
+        [self._input_path], batch_size=2, bucket_boundaries=[8])
+    batches = list(dataset)
+
+    self.assertEqual(sum(len(b['serialized_example']) for b in batches), 5)
+    for batch in batches:
+      max_sizes = tf.reduce_max(batch['image_shape'], axis=1)
+      # Small and large images are never batched together.
+      self.assertEqual(len(set((max_sizes < 8).numpy().tolist())), 1)
+      self.assertAllEqual(tf.shape(batch['model_input'])[1:3],
+                          tf.reduce_max(batch['image_shape'], axis=0))
+
+  def test_build_dataset_shards(self):
+    dataset = detection_inference_tf2.build_dataset(
+        [self._input_path], batch_size=8, input_type='tf_example',
+        num_shards=2, shard_index=1)
+    batches = list(dataset)
+    self.assertLen(batches, 1)
+    self.assertLen(batches[0]['model_input'], 2)
+    self.assertNotIn('image_shape', batches[0])
+
+  def test_read_records_shards_by_file(self):
+    second_input_path = os.path.join(self.get_temp_dir(), 'input2.tfrecord')
+    _create_tfrecord(second_input_path, [(2, 2)] * 3)
+    input_paths = [self._input_path, second_input_path]
+
+    records = detection_inference_tf2.read_records(
+        input_paths, num_shards=2, shard_index=1)
+    self.assertAllEqual(
+        list(records), list(tf.data.TFRecordDataset(second_input_path)))
+    # With more shards than files, the records of all files are sharded.
+    records = detection_inference_tf2.read_records(
+        input_paths, num_shards=4, shard_index=0, start_index=1)
+    self.assertLen(list(records), 1)
+
+  def test_run_shard_and_resume(self):
+    output_path = os.path.join(self.get_temp_dir(), 'output.tfrecord')
+    model = _MockImageModel()
+
+    num_images = detection_inference_tf2.run_shard(
+        model.__call__, [self._input_path], output_path, batch_size=2,
+        bucket_boundaries=[8], examples_per_chunk=2, discard_image_pixels=True)
+    self.assertEqual(num_images, 5)
+    # A completed shard is not processed again.
+    self.assertEqual(
+        detection_inference_tf2.run_shard(
+            model.__call__, [self._input_path], output_path, batch_size=2,
+            examples_per_chunk=2), 0)
+
+    output_files = sorted(tf.io.gfile.glob(output_path + '-00000-of-00001.*'))
+    self.assertEqual(
+        [os.path.basename(f).split('.')[-1] for f in output_files],
+        ['chunk-00000', 'chunk-00001', 'chunk-00002', 'progress'])
+    test_fields = []
+    for serialized_example in tf.data.TFRecordDataset(output_files[:-1]):
+      tf_example = tf.train.Example.FromString(serialized_example.numpy())
+      feature = tf_example.features.feature
+      test_fields.append(feature['test_field'].int64_list.value[0])
+      self.assertNotIn(standard_fields.TfExampleFields.image_encoded, feature)
+      # The boxes are relative to the unpadded images.
+      for key in (standard_fields.TfExampleFields.detection_bbox_ymax,
+                  standard_fields.TfExampleFields.detection_bbox_xmax):
+        self.assertAllClose(feature[key].float_list.value, [1.0])
+      self.assertAllClose(
+          feature[standard_fields.TfExampleFields.detection_score]
+          .float_list.value, [0.5])
+      self.assertEqual(
+          feature[standard_fields.TfExampleFields.detection_class_label]
+          .int64_list.value, [3])
+    self.assertCountEqual(test_fields, range(5))
+
+  def test_run_shard_resumes_after_completed_chunks(self):
+    output_path = os.path.join(self.get_temp_dir(), 'resumed.tfrecord')
+    shard_name = output_path + '-00000-of-00001'
+    with tf.io.gfile.GFile(shard_name + '.progress', 'w') as f:
+      f.write('{"completed_chunks": 1, "num_images": 2}')
+
+    num_images = detection_inference_tf2.run_shard(
+        _MockImageModel().__call__, [self._input_path], output_path,
+        batch_size=2, examples_per_chunk=2)
+
+    self.assertEqual(num_images, 3)
+    output_files = sorted(tf.io.gfile.glob(shard_name + '.chunk-*'))
+    self.assertEqual([os.path.basename(f).split('.')[-1] for f in output_files],
+                     ['chunk-00001', 'chunk-00002'])
+    test_fields = [
+        tf.train.Example.FromString(serialized_example.numpy()).features
+        .feature['test_field'].int64_list.value[0]
+        for serialized_example in tf.data.TFRecordDataset(output_files)]
+    self.assertCountEqual(test_fields, [2, 3, 4])
+
+  def test_unsupported_input_type(self):
+    with self.assertRaisesRegex(ValueError, 'Unsupported input_type'):
+      detection_inference_tf2.build_dataset(
+          [self._input_path], batch_size=2, input_type='float_image_tensor')
+
+
+if __name__ == '__main__':
+  tf.test.main()
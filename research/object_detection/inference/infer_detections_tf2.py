@@ -0,0 +1,137 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Infers detections on TFRecords of TFExamples given a TF2 SavedModel.
+
+Example usage:
+  python object_detection/inference/infer_detections_tf2.py \
+    --input_tfrecord_paths=/path/to/input/tfrecord1,/path/to/input/tfrecord2 \
+    --output_tfrecord_path=/path/to/output/detections.tfrecord \
+    --saved_model_dir=/path/to/exported_model/saved_model \
+    --batch_size=16 --num_workers=8
+
+The SavedModel is expected to be exported by `exporter_main_v2.py`, with the
+input type given by --input_type. Each TFExample from the input is augmented
+with the detections and copied to the output, which is written as one set of
+`<output_tfrecord_path>-<shard>-of-<num_shards>.chunk-<chunk>` files per shard.
+The input is split into `num_hosts * num_workers` shards and each worker
+process runs one shard; e.g. on a CPU-only host use one worker per core.
+Rerunning the same command resumes every shard after its last completed chunk.
+"""
+import multiprocessing
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import tensorflow.compat.v2 as tf
+
+from object_detection.inference import detection_inference_tf2
+
+flags.DEFINE_string('input_tfrecord_paths', None,
+                    'A comma separated list of paths to input TFRecords.')
+flags.DEFINE_string('output_tfrecord_path', None,
+                    'Path prefix of the output TFRecords.')
+flags.DEFINE_string('saved_model_dir', None,
+                    'Path to the exported detection SavedModel.')
+flags.DEFINE_enum('input_type', 'image_tensor',
+                  list(detection_inference_tf2.INPUT_TYPES),
+                  'Input type of the exported SavedModel.')
+flags.DEFINE_integer('batch_size', 16, 'Number of images per batch.')
+flags.DEFINE_list('bucket_boundaries', ['320', '640', '1024'],
+                  'Longest-side boundaries of the image size buckets used to '
+                  'limit padding of `image_tensor` batches.')
+flags.DEFINE_integer('num_workers', 1,
+                     'Number of inference processes on this host.')
+flags.DEFINE_integer('threads_per_worker', 0,
+                     'Number of intra-op threads per worker. 0 lets '
+                     'TensorFlow decide.')
+flags.DEFINE_integer('num_hosts', 1, 'Number of hosts running inference.')
+flags.DEFINE_integer('host_index', 0, 'Index of this host.')
+flags.DEFINE_integer('examples_per_chunk', 10000,
+                     'Number of examples per resumable output chunk. The '
+                     'examples of two chunks are held in memory per worker.')
+flags.DEFINE_boolean('discard_image_pixels', False,
+                     'Discards the images in the output TFExamples. This'
+                     ' significantly reduces the output size and is useful'
+                     ' if the subsequent tools don\'t need access to the'
+                     ' images (e.g. when computing evaluation measures).')
+
+FLAGS = flags.FLAGS
+
+
+def _run_worker(shard_index, num_shards, params):
+  """Loads the SavedModel and runs inference on one shard."""
+  if params['threads_per_worker']:
+    tf.config.threading.set_intra_op_parallelism_threads(
+        params['threads_per_worker'])
+    tf.config.threading.set_inter_op_parallelism_threads(
+        params['threads_per_worker'])
+  detect_fn = tf.saved_model.load(
+      params['saved_model_dir']).signatures['serving_default']
+  return detection_inference_tf2.run_shard(
+      detect_fn,
+      params['input_tfrecord_paths'],
+      params['output_tfrecord_path'],
+      params['batch_size'],
+      input_type=params['input_type'],
+      bucket_boundaries=params['bucket_boundaries'],
+      num_shards=num_shards,
+      shard_index=shard_index,
+      examples_per_chunk=params['examples_per_chunk'],
+      discard_image_pixels=params['discard_image_pixels'])
+
+
+def main(_):
+  logging.set_verbosity(logging.INFO)
+
+  required_flags = ['input_tfrecord_paths', 'output_tfrecord_path',
+                    'saved_model_dir']
+  for flag_name in required_flags:
+    if not getattr(FLAGS, flag_name):
+      raise ValueError('Flag --{} is required'.format(flag_name))
+
+  params = {
+      'input_tfrecord_paths': [
+          v for v in FLAGS.input_tfrecord_paths.split(',') if v],
+      'output_tfrecord_path': FLAGS.output_tfrecord_path,
+      'saved_model_dir': FLAGS.saved_model_dir,
+      'input_type': FLAGS.input_type,
+      'batch_size': FLAGS.batch_size,
+      'bucket_boundaries': [int(v) for v in FLAGS.bucket_boundaries],
+      'threads_per_worker': FLAGS.threads_per_worker,
+      'examples_per_chunk': FLAGS.examples_per_chunk,
+      'discard_image_pixels': FLAGS.discard_image_pixels,
+  }
+  num_shards = FLAGS.num_hosts * FLAGS.num_workers
+  shard_indices = [FLAGS.host_index * FLAGS.num_workers + i
+                   for i in range(FLAGS.num_workers)]
+  logging.info('Reading input from %d files, running shards %s of %d',
+               len(params['input_tfrecord_paths']), shard_indices, num_shards)
+
+  start_time = time.time()
+  if FLAGS.num_workers == 1:
+    num_images = _run_worker(shard_indices[0], num_shards, params)
+  else:
+    # TensorFlow is not fork-safe, so the workers are spawned.
+    with multiprocessing.get_context('spawn').Pool(FLAGS.num_workers) as pool:
+      num_images = sum(pool.starmap(
+          _run_worker,
+          [(shard_index, num_shards, params) for shard_index in shard_indices]))
+  logging.info('Finished processing %d images at %.2f images/sec.', num_images,
+               num_images / max(time.time() - start_time, 1e-6))
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -872,6 +872,9 @@ def train_input(train_config, train_input_config,
         preprocessor_builder.build(step)
         for step in train_config.data_augmentation_options
     ]
+    if train_config.fuse_data_augmentation_options:
+      data_augmentation_options = preprocessor.fuse_augmentations(
+          data_augmentation_options)
     data_augmentation_fn = functools.partial(
         augment_input_data,
         data_augmentation_options=data_augmentation_options)
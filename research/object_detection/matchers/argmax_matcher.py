@@ -136,52 +136,7 @@ class ArgMaxMatcher(matcher.Matcher):
       Returns:
         matches:  int32 tensor indicating the row each column matches to.
       """
-      # Matches for each column
-      matches = tf.argmax(similarity_matrix, 0, output_type=tf.int32)
-
-      # Deal with matched and unmatched threshold
-      if self._matched_threshold is not None:
-        # Get logical indices of ignored and unmatched columns as tf.int64
-        matched_vals = tf.reduce_max(similarity_matrix, 0)
-        below_unmatched_threshold = tf.greater(self._unmatched_threshold,
-                                               matched_vals)
-        between_thresholds = tf.logical_and(
-            tf.greater_equal(matched_vals, self._unmatched_threshold),
-            tf.greater(self._matched_threshold, matched_vals))
-
-        if self._negatives_lower_than_unmatched:
-          matches = self._set_values_using_indicator(matches,
-                                                     below_unmatched_threshold,
-                                                     -1)
-          matches = self._set_values_using_indicator(matches,
-                                                     between_thresholds,
-                                                     -2)
-        else:
-          matches = self._set_values_using_indicator(matches,
-                                                     below_unmatched_threshold,
-                                                     -2)
-          matches = self._set_values_using_indicator(matches,
-                                                     between_thresholds,
-                                                     -1)
-
-      if self._force_match_for_each_row:
-        similarity_matrix_shape = shape_utils.combined_static_and_dynamic_shape(
-            similarity_matrix)
-        force_match_column_ids = tf.argmax(similarity_matrix, 1,
-                                           output_type=tf.int32)
-        force_match_column_indicators = (
-            tf.one_hot(
-                force_match_column_ids, depth=similarity_matrix_shape[1]) *
-            tf.cast(tf.expand_dims(valid_rows, axis=-1), dtype=tf.float32))
-        force_match_row_ids = tf.argmax(force_match_column_indicators, 0,
-                                        output_type=tf.int32)
-        force_match_column_mask = tf.cast(
-            tf.reduce_max(force_match_column_indicators, 0), tf.bool)
-        final_matches = tf.where(force_match_column_mask,
-                                 force_match_row_ids, matches)
-        return final_matches
-      else:
-        return matches
+      return self._match_rows(similarity_matrix, valid_rows)
 
     if similarity_matrix.shape.is_fully_defined():
       if shape_utils.get_dim_as_int(similarity_matrix.shape[0]) == 0:
@@ -193,6 +148,84 @@ class ArgMaxMatcher(matcher.Matcher):
           tf.greater(tf.shape(similarity_matrix)[0], 0),
           _match_when_rows_are_non_empty, _match_when_rows_are_empty)
 
+  def batch_match(self, similarity_matrices, valid_rows):
+    """Matches the columns of a batch of similarity matrices to their rows.
+
+    Equivalent to calling `match` on every similarity matrix separately, as
+    long as every matrix has at least one row. The rows of a batch of
+    differently sized matrices can be padded as long as the padded rows are
+    invalid and never have a larger similarity than the real rows.
+
+    Args:
+      similarity_matrices: float tensor of shape [batch_size, N, M].
+      valid_rows: a boolean tensor of shape [batch_size, N] indicating valid
+        rows.
+
+    Returns:
+      matches: an int32 tensor of shape [batch_size, M] with the match results
+        of every matrix, see `Match.match_results`.
+    """
+    with tf.name_scope('BatchMatch'):
+      return self._match_rows(similarity_matrices, valid_rows)
+
+  def _match_rows(self, similarity_matrix, valid_rows):
+    """Matches columns to rows of similarity matrices with at least one row.
+
+    Args:
+      similarity_matrix: tensor of shape [..., N, M].
+      valid_rows: a boolean tensor of shape [..., N] indicating valid rows.
+
+    Returns:
+      matches: int32 tensor of shape [..., M] indicating the row each column
+        matches to.
+    """
+    # Matches for each column
+    matches = tf.argmax(similarity_matrix, -2, output_type=tf.int32)
+
+    # Deal with matched and unmatched threshold
+    if self._matched_threshold is not None:
+      # Get logical indices of ignored and unmatched columns as tf.int64
+      matched_vals = tf.cast(tf.reduce_max(similarity_matrix, -2), tf.float32)
+      below_unmatched_threshold = tf.greater(self._unmatched_threshold,
+                                             matched_vals)
+      between_thresholds = tf.logical_and(
+          tf.greater_equal(matched_vals, self._unmatched_threshold),
+          tf.greater(self._matched_threshold, matched_vals))
+
+      if self._negatives_lower_than_unmatched:
+        matches = self._set_values_using_indicator(matches,
+                                                   below_unmatched_threshold,
+                                                   -1)
+        matches = self._set_values_using_indicator(matches,
+                                                   between_thresholds,
+                                                   -2)
+      else:
+        matches = self._set_values_using_indicator(matches,
+                                                   below_unmatched_threshold,
+                                                   -2)
+        matches = self._set_values_using_indicator(matches,
+                                                   between_thresholds,
+                                                   -1)
+
+    if self._force_match_for_each_row:
+      similarity_matrix_shape = shape_utils.combined_static_and_dynamic_shape(
+          similarity_matrix)
+      force_match_column_ids = tf.argmax(similarity_matrix, -1,
+                                         output_type=tf.int32)
+      force_match_column_indicators = (
+          tf.one_hot(
+              force_match_column_ids, depth=similarity_matrix_shape[-1]) *
+          tf.cast(tf.expand_dims(valid_rows, axis=-1), dtype=tf.float32))
+      force_match_row_ids = tf.argmax(force_match_column_indicators, -2,
+                                      output_type=tf.int32)
+      force_match_column_mask = tf.cast(
+          tf.reduce_max(force_match_column_indicators, -2), tf.bool)
+      final_matches = tf.where(force_match_column_mask,
+                               force_match_row_ids, matches)
+      return final_matches
+    else:
+      return matches
+
   def _set_values_using_indicator(self, x, indicator, val):
     """Set the indicated fields of x to val.
 
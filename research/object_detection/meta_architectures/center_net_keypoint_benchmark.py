@@ -0,0 +1,129 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Benchmarks CenterNet keypoint refinement for crowded images.
+
+Compares the latency and memory of `center_net_meta_arch.refine_keypoints`
+when matching all instances at once and when matching them in chunks,
+optionally ranking only the nearby candidates.
+
+Example usage:
+python object_detection/meta_architectures/center_net_keypoint_benchmark.py \
+  --num_instances=100 --num_keypoints=17 --instance_chunk_sizes=0,16,32
+"""
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+from object_detection.meta_architectures import center_net_meta_arch as cnma
+
+_BATCH_SIZE = flags.DEFINE_integer('batch_size', 1, 'Batch size.')
+_NUM_INSTANCES = flags.DEFINE_integer(
+    'num_instances', 100, 'Number of instances per image.')
+_NUM_KEYPOINTS = flags.DEFINE_integer(
+    'num_keypoints', 17, 'Number of keypoints per instance.')
+_MAX_CANDIDATES = flags.DEFINE_integer(
+    'max_candidates', 100, 'Number of candidates per keypoint type.')
+_CANDIDATE_RANKING_MODE = flags.DEFINE_string(
+    'candidate_ranking_mode', 'min_distance', 'Candidate ranking mode.')
+_INSTANCE_CHUNK_SIZES = flags.DEFINE_list(
+    'instance_chunk_sizes', ['0', '16', '32'],
+    'Instance chunk sizes to benchmark; 0 matches all instances at once.')
+_NUM_NEARBY_CANDIDATES = flags.DEFINE_integer(
+    'num_nearby_candidates', 0,
+    'If positive, only this many nearby candidates are ranked.')
+_NUM_ITERS = flags.DEFINE_integer('num_iters', 20, 'Number of timed runs.')
+_DEVICE = flags.DEFINE_string('device', 'cpu:0', 'Device to benchmark on.')
+
+
+def _peak_memory_mb(device):
+  """Returns the peak memory of `device` in MB, or None if not tracked."""
+  try:
+    return tf.config.experimental.get_memory_info(device)['peak'] / 2**20
+  except ValueError:
+    return None
+
+
+def benchmark(inputs, instance_chunk_size, num_nearby_candidates, num_iters):
+  """Returns the mean latency in ms and the peak memory in MB (or None)."""
+
+  @tf.function
+  def run_refinement(regressed_keypoints, keypoint_candidates, keypoint_scores,
+                     num_keypoint_candidates, bboxes):
+    return cnma.refine_keypoints(
+        regressed_keypoints,
+        keypoint_candidates,
+        keypoint_scores,
+        num_keypoint_candidates,
+        bboxes=bboxes,
+        candidate_ranking_mode=_CANDIDATE_RANKING_MODE.value,
+        keypoint_std_dev=[1.0] * _NUM_KEYPOINTS.value,
+        num_nearby_candidates=num_nearby_candidates,
+        instance_chunk_size=instance_chunk_size)[:2]
+
+  # Traces and warms up.
+  tf.nest.map_structure(lambda t: t.numpy(), run_refinement(*inputs))
+  try:
+    tf.config.experimental.reset_memory_stats(_DEVICE.value)
+  except ValueError:
+    pass
+  start = time.perf_counter()
+  for _ in range(num_iters):
+    tf.nest.map_structure(lambda t: t.numpy(), run_refinement(*inputs))
+  latency = (time.perf_counter() - start) / num_iters * 1000
+  return latency, _peak_memory_mb(_DEVICE.value)
+
+
+def main(_):
+  rng = np.random.RandomState(0)
+  batch_size = _BATCH_SIZE.value
+  num_instances = _NUM_INSTANCES.value
+  num_keypoints = _NUM_KEYPOINTS.value
+  max_candidates = _MAX_CANDIDATES.value
+  box_mins = rng.uniform(0, 100, [batch_size, num_instances, 2])
+  box_sizes = rng.uniform(10, 50, [batch_size, num_instances, 2])
+  with tf.device(_DEVICE.value):
+    inputs = (
+        tf.constant(rng.uniform(
+            0, 128, [batch_size, num_instances, num_keypoints, 2]), tf.float32),
+        tf.constant(rng.uniform(
+            0, 128, [batch_size, max_candidates, num_keypoints, 2]),
+                    tf.float32),
+        tf.constant(rng.uniform(
+            0, 1, [batch_size, max_candidates, num_keypoints]), tf.float32),
+        tf.fill([batch_size, num_keypoints], max_candidates),
+        tf.constant(np.concatenate([box_mins, box_mins + box_sizes], axis=-1),
+                    tf.float32),
+    )
+    num_nearby_candidates = _NUM_NEARBY_CANDIDATES.value or None
+    for chunk_size in [int(v) for v in _INSTANCE_CHUNK_SIZES.value]:
+      latency, peak_memory = benchmark(
+          inputs, chunk_size or None, num_nearby_candidates, _NUM_ITERS.value)
+      # The largest intermediate is the tiled pairwise difference tensor.
+      distance_mb = (batch_size * min(chunk_size or num_instances,
+                                      num_instances) *
+                     max_candidates * num_keypoints * 2 * 4 / 2**20)
+      logging.info(
+          'instance_chunk_size=%d num_nearby_candidates=%s: %.2f ms/batch, '
+          'pairwise distance tensors %.2f MB, device peak memory %s MB',
+          chunk_size, num_nearby_candidates, latency, distance_mb,
+          'n/a' if peak_memory is None else '%.2f' % peak_memory)
+
+
+if __name__ == '__main__':
+  app.run(main)
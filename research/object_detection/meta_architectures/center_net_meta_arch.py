@@ -1150,7 +1150,9 @@ def sdr_scaled_ranking_score(
   Args:
     keypoint_scores: A float tensor of shape
       [batch_size, max_candidates, num_keypoints] indicating the scores for
-      keypoint candidates.
+      keypoint candidates, or of shape
+      [batch_size, num_instances, max_candidates, num_keypoints] if the
+      candidates differ per instance.
     distances: A float tensor of shape
       [batch_size, num_instances, max_candidates, num_keypoints] indicating the
       distances between the keypoint candidates and the joint regression
@@ -1173,8 +1175,10 @@ def sdr_scaled_ranking_score(
   offsets = tf.math.maximum(
       ymax - ymin, xmax - xmin) * score_distance_multiplier
 
+  if len(keypoint_scores.shape) == 3:
+    keypoint_scores = keypoint_scores[:, tf.newaxis, :, :]
   # Shape: [batch_size, num_instances, max_candidates, num_keypoints]
-  ranking_scores = keypoint_scores[:, tf.newaxis, :, :] / (
+  ranking_scores = keypoint_scores / (
       distances + offsets[:, :, tf.newaxis, tf.newaxis])
   return ranking_scores
 
@@ -1198,7 +1202,9 @@ def gaussian_weighted_score(
   Args:
     keypoint_scores: A float tensor of shape
       [batch_size, max_candidates, num_keypoints] indicating the scores for
-      keypoint candidates.
+      keypoint candidates, or of shape
+      [batch_size, num_instances, max_candidates, num_keypoints] if the
+      candidates differ per instance.
     distances: A float tensor of shape
       [batch_size, num_instances, max_candidates, num_keypoints] indicating the
       distances between the keypoint candidates and the joint regression
@@ -1233,7 +1239,9 @@ def gaussian_weighted_score(
       sigma[:, :, tf.newaxis, :], multiples=[1, 1, max_candidates, 1])
 
   gaussian_map = tf.exp((-1 * distances * distances) / (2 * sigma * sigma))
-  return keypoint_scores[:, tf.newaxis, :, :] * gaussian_map
+  if len(keypoint_scores.shape) == 3:
+    keypoint_scores = keypoint_scores[:, tf.newaxis, :, :]
+  return keypoint_scores * gaussian_map
 
 
 def refine_keypoints(regressed_keypoints,
@@ -1249,7 +1257,9 @@ def refine_keypoints(regressed_keypoints,
                      keypoint_depth_candidates=None,
                      keypoint_score_threshold=0.1,
                      score_distance_multiplier=0.1,
-                     keypoint_std_dev=None):
+                     keypoint_std_dev=None,
+                     num_nearby_candidates=None,
+                     instance_chunk_size=None):
   """Refines regressed keypoints by snapping to the nearest candidate keypoints.
 
   The initial regressed keypoints represent a full set of keypoints regressed
@@ -1323,6 +1333,15 @@ def refine_keypoints(regressed_keypoints,
       flexibility of using different sizes of Gaussian kernel for each keypoint
       class. Only applicable when the candidate_ranking_mode equals to
       'gaussian_weighted'.
+    num_nearby_candidates: (optional) int, if set, only this many candidates
+      closest to each regressed keypoint are ranked, which reduces the size of
+      the ranking tensors. The result is unchanged for the 'min_distance'
+      ranking mode; other modes ignore candidates that are further away.
+    instance_chunk_size: (optional) int, if set, the candidates are selected
+      for at most this many instances at a time, bounding the size of the
+      intermediate [batch_size, instance_chunk_size, max_candidates,
+      num_keypoints] distance tensors for crowded images. The result is
+      unchanged.
 
   Returns:
     A tuple with:
@@ -1350,73 +1369,24 @@ def refine_keypoints(regressed_keypoints,
                                  [1, max_candidates, 1])
   invalid_candidates = range_tiled >= num_candidates_tiled
 
-  # Pairwise squared distances between regressed keypoints and candidate
-  # keypoints (for a single keypoint type).
-  # Shape [batch_size, num_instances, 1, num_keypoints, 2].
-  regressed_keypoint_expanded = tf.expand_dims(regressed_keypoints,
-                                               axis=2)
-  # Shape [batch_size, 1, max_candidates, num_keypoints, 2].
-  keypoint_candidates_expanded = tf.expand_dims(
-      keypoint_candidates, axis=1)
-  # Use explicit tensor shape broadcasting (since the tensor dimensions are
-  # expanded to 5D) to make it tf.lite compatible.
-  regressed_keypoint_expanded = tf.tile(
-      regressed_keypoint_expanded, multiples=[1, 1, max_candidates, 1, 1])
-  keypoint_candidates_expanded = tf.tile(
-      keypoint_candidates_expanded, multiples=[1, num_instances, 1, 1, 1])
-  # Replace tf.math.squared_difference by "-" operator and tf.multiply ops since
-  # tf.lite convert doesn't support squared_difference with undetermined
-  # dimension.
-  diff = regressed_keypoint_expanded - keypoint_candidates_expanded
-  sqrd_distances = tf.math.reduce_sum(tf.multiply(diff, diff), axis=-1)
-  distances = tf.math.sqrt(sqrd_distances)
-
-  # Replace the invalid candidated with large constant (10^5) to make sure the
-  # following reduce_min/argmin behaves properly.
-  max_dist = 1e5
-  distances = tf.where(
-      tf.tile(
-          tf.expand_dims(invalid_candidates, axis=1),
-          multiples=[1, num_instances, 1, 1]),
-      tf.ones_like(distances) * max_dist,
-      distances
-  )
+  def select_candidates(regressed_keypoints, bboxes):
+    return _select_keypoint_candidates(
+        regressed_keypoints, keypoint_candidates, keypoint_scores,
+        invalid_candidates, bboxes, candidate_ranking_mode,
+        score_distance_offset, score_distance_multiplier, keypoint_std_dev,
+        num_nearby_candidates)
 
-  # Determine the candidates that have the minimum distance to the regressed
-  # keypoints. Shape [batch_size, num_instances, num_keypoints].
-  min_distances = tf.math.reduce_min(distances, axis=2)
-  if candidate_ranking_mode == 'min_distance':
-    nearby_candidate_inds = tf.math.argmin(distances, axis=2)
-  elif candidate_ranking_mode == 'score_distance_ratio':
-    # tiled_keypoint_scores:
-    # Shape [batch_size, num_instances, max_candidates, num_keypoints].
-    tiled_keypoint_scores = tf.tile(
-        tf.expand_dims(keypoint_scores, axis=1),
-        multiples=[1, num_instances, 1, 1],
-    )
-    ranking_scores = tiled_keypoint_scores / (distances + score_distance_offset)
-    nearby_candidate_inds = tf.math.argmax(
-        ranking_scores, axis=2, output_type=tf.int32
-    )
-  elif candidate_ranking_mode == 'score_scaled_distance_ratio':
-    ranking_scores = sdr_scaled_ranking_score(
-        keypoint_scores, distances, bboxes, score_distance_multiplier
-    )
-    nearby_candidate_inds = tf.math.argmax(
-        ranking_scores, axis=2, output_type=tf.int32
-    )
-  elif candidate_ranking_mode == 'gaussian_weighted':
-    ranking_scores = gaussian_weighted_score(
-        keypoint_scores, distances, keypoint_std_dev, bboxes
-    )
-    nearby_candidate_inds = tf.math.argmax(
-        ranking_scores, axis=2, output_type=tf.int32
-    )
-    weighted_scores = tf.math.reduce_max(ranking_scores, axis=2)
+  # Determine the candidates with the best ranking scores and their distances
+  # to the regressed keypoints.
+  # Shape [batch_size, num_instances, num_keypoints].
+  if (instance_chunk_size is None or
+      (isinstance(num_instances, int) and num_instances <= instance_chunk_size)):
+    (nearby_candidate_inds, min_distances,
+     max_ranking_scores) = select_candidates(regressed_keypoints, bboxes)
   else:
-    raise ValueError(
-        'Not recognized candidate_ranking_mode: %s' % candidate_ranking_mode
-    )
+    (nearby_candidate_inds, min_distances,
+     max_ranking_scores) = _map_over_instance_chunks(
+         select_candidates, regressed_keypoints, bboxes, instance_chunk_size)
 
   # Gather the coordinates and scores corresponding to the closest candidates.
   # Shape of tensors are [batch_size, num_instances, num_keypoints, 2] and
@@ -1430,7 +1400,7 @@ def refine_keypoints(regressed_keypoints,
   # If the ranking mode is 'gaussian_weighted', we use the ranking scores as the
   # final keypoint confidence since their values are in between [0, 1].
   if candidate_ranking_mode == 'gaussian_weighted':
-    nearby_candidate_scores = weighted_scores
+    nearby_candidate_scores = max_ranking_scores
 
   if bboxes is None:
     # Filter out the chosen candidate with score lower than unmatched
@@ -1493,6 +1463,186 @@ def refine_keypoints(regressed_keypoints,
   return refined_keypoints, refined_scores, refined_depths
 
 
+def _select_keypoint_candidates(regressed_keypoints,
+                                keypoint_candidates,
+                                keypoint_scores,
+                                invalid_candidates,
+                                bboxes,
+                                candidate_ranking_mode,
+                                score_distance_offset,
+                                score_distance_multiplier,
+                                keypoint_std_dev,
+                                num_nearby_candidates=None):
+  """Selects the best ranked candidate for each regressed keypoint.
+
+  See `refine_keypoints` for a description of the ranking modes.
+
+  Args:
+    regressed_keypoints: A float tensor of shape
+      [batch_size, num_instances, num_keypoints, 2] with the regressed
+      keypoints.
+    keypoint_candidates: A tensor of shape
+      [batch_size, max_candidates, num_keypoints, 2] with the candidates.
+    keypoint_scores: A float tensor of shape
+      [batch_size, max_candidates, num_keypoints] with the candidate scores.
+    invalid_candidates: A bool tensor of shape
+      [batch_size, max_candidates, num_keypoints] indicating padded candidates.
+    bboxes: A tensor of shape [batch_size, num_instances, 4] with the instance
+      boxes, or None.
+    candidate_ranking_mode: The candidate ranking mode.
+    score_distance_offset: The offset of the 'score_distance_ratio' mode.
+    score_distance_multiplier: The multiplier of the
+      'score_scaled_distance_ratio' mode.
+    keypoint_std_dev: The standard deviations of the 'gaussian_weighted' mode.
+    num_nearby_candidates: (optional) int, the number of closest candidates to
+      rank for each regressed keypoint. All candidates are ranked if None.
+
+  Returns:
+    A tuple with
+    candidate_inds: An int32 tensor of shape
+      [batch_size, num_instances, num_keypoints] with the indices of the
+      selected candidates.
+    min_distances: A float tensor of shape
+      [batch_size, num_instances, num_keypoints] with the distances to the
+      closest candidates.
+    max_ranking_scores: A float tensor of shape
+      [batch_size, num_instances, num_keypoints] with the ranking scores of
+      the selected candidates.
+
+  Raises:
+    ValueError: if candidate_ranking_mode is not recognized.
+  """
+  _, num_instances, _, _ = (
+      shape_utils.combined_static_and_dynamic_shape(regressed_keypoints))
+  max_candidates = keypoint_candidates.shape[1]
+
+  # Pairwise squared distances between regressed keypoints and candidate
+  # keypoints (for a single keypoint type).
+  # Shape [batch_size, num_instances, 1, num_keypoints, 2].
+  regressed_keypoint_expanded = tf.expand_dims(regressed_keypoints,
+                                               axis=2)
+  # Shape [batch_size, 1, max_candidates, num_keypoints, 2].
+  keypoint_candidates_expanded = tf.expand_dims(
+      keypoint_candidates, axis=1)
+  # Use explicit tensor shape broadcasting (since the tensor dimensions are
+  # expanded to 5D) to make it tf.lite compatible.
+  regressed_keypoint_expanded = tf.tile(
+      regressed_keypoint_expanded, multiples=[1, 1, max_candidates, 1, 1])
+  keypoint_candidates_expanded = tf.tile(
+      keypoint_candidates_expanded, multiples=[1, num_instances, 1, 1, 1])
+  # Replace tf.math.squared_difference by "-" operator and tf.multiply ops since
+  # tf.lite convert doesn't support squared_difference with undetermined
+  # dimension.
+  diff = regressed_keypoint_expanded - keypoint_candidates_expanded
+  sqrd_distances = tf.math.reduce_sum(tf.multiply(diff, diff), axis=-1)
+  distances = tf.math.sqrt(sqrd_distances)
+
+  # Replace the invalid candidated with large constant (10^5) to make sure the
+  # following reduce_min/argmin behaves properly.
+  max_dist = 1e5
+  distances = tf.where(
+      tf.tile(
+          tf.expand_dims(invalid_candidates, axis=1),
+          multiples=[1, num_instances, 1, 1]),
+      tf.ones_like(distances) * max_dist,
+      distances
+  )
+  min_distances = tf.math.reduce_min(distances, axis=2)
+
+  # Shape [batch_size, 1, max_candidates, num_keypoints], or
+  # [batch_size, num_instances, num_nearby_candidates, num_keypoints] when only
+  # the nearby candidates are ranked.
+  candidate_scores = keypoint_scores[:, tf.newaxis, :, :]
+  nearby_inds = None
+  if num_nearby_candidates is not None:
+    # Shape [batch_size, num_instances, num_keypoints, num_nearby_candidates].
+    neg_distances, nearby_inds = tf.math.top_k(
+        -tf.transpose(distances, [0, 1, 3, 2]),
+        k=min(num_nearby_candidates, max_candidates))
+    distances = -tf.transpose(neg_distances, [0, 1, 3, 2])
+    # Shape [batch_size, num_keypoints, num_instances, num_nearby_candidates].
+    candidate_scores = tf.gather(
+        tf.transpose(keypoint_scores, [0, 2, 1]),
+        tf.transpose(nearby_inds, [0, 2, 1, 3]), batch_dims=2)
+    candidate_scores = tf.transpose(candidate_scores, [0, 2, 3, 1])
+
+  # Shape [batch_size, num_instances, num_ranked_candidates, num_keypoints].
+  if candidate_ranking_mode == 'min_distance':
+    ranking_scores = -distances
+  elif candidate_ranking_mode == 'score_distance_ratio':
+    ranking_scores = candidate_scores / (distances + score_distance_offset)
+  elif candidate_ranking_mode == 'score_scaled_distance_ratio':
+    ranking_scores = sdr_scaled_ranking_score(
+        candidate_scores, distances, bboxes, score_distance_multiplier)
+  elif candidate_ranking_mode == 'gaussian_weighted':
+    ranking_scores = gaussian_weighted_score(
+        candidate_scores, distances, keypoint_std_dev, bboxes)
+  else:
+    raise ValueError(
+        'Not recognized candidate_ranking_mode: %s' % candidate_ranking_mode
+    )
+  candidate_inds = tf.math.argmax(
+      ranking_scores, axis=2, output_type=tf.int32)
+  max_ranking_scores = tf.math.reduce_max(ranking_scores, axis=2)
+  if nearby_inds is not None:
+    # Map the indices of the nearby candidates back to all candidates.
+    candidate_inds = tf.gather(
+        nearby_inds, candidate_inds[:, :, :, tf.newaxis], batch_dims=3)
+    candidate_inds = candidate_inds[:, :, :, 0]
+  return candidate_inds, min_distances, max_ranking_scores
+
+
+def _map_over_instance_chunks(fn, regressed_keypoints, bboxes, chunk_size):
+  """Applies `fn` to chunks of instances, one chunk at a time.
+
+  Args:
+    fn: A function taking regressed keypoints of shape
+      [batch_size, chunk_size, num_keypoints, 2] and boxes of shape
+      [batch_size, chunk_size, 4] (or None) and returning a tuple of int32,
+      float32 and float32 tensors of shape
+      [batch_size, chunk_size, num_keypoints].
+    regressed_keypoints: A float tensor of shape
+      [batch_size, num_instances, num_keypoints, 2].
+    bboxes: A float tensor of shape [batch_size, num_instances, 4], or None.
+    chunk_size: int, the maximum number of instances per chunk.
+
+  Returns:
+    The outputs of `fn` for all instances, each of shape
+    [batch_size, num_instances, num_keypoints].
+  """
+  batch_size, num_instances, num_keypoints, _ = (
+      shape_utils.combined_static_and_dynamic_shape(regressed_keypoints))
+  num_chunks = (num_instances + chunk_size - 1) // chunk_size
+  num_padded = num_chunks * chunk_size - num_instances
+
+  def to_chunks(tensor):
+    # Shape [num_chunks, batch_size, chunk_size, ...].
+    rank = len(tensor.shape)
+    tensor = tf.pad(tensor, [[0, 0], [0, num_padded]] + [[0, 0]] * (rank - 2))
+    tensor = tf.reshape(
+        tensor,
+        [batch_size, num_chunks, chunk_size] + tensor.shape.as_list()[2:])
+    return tf.transpose(tensor, [1, 0] + list(range(2, rank + 1)))
+
+  def from_chunks(tensor):
+    tensor = tf.transpose(tensor, [1, 0, 2, 3])
+    tensor = tf.reshape(tensor, [batch_size, -1, num_keypoints])
+    return tensor[:, :num_instances]
+
+  if bboxes is None:
+    chunk_fn = lambda keypoints: fn(keypoints, None)
+    elems = to_chunks(regressed_keypoints)
+  else:
+    chunk_fn = lambda elems: fn(*elems)
+    elems = (to_chunks(regressed_keypoints), to_chunks(bboxes))
+  # Chunks are processed sequentially so that only one set of intermediate
+  # tensors is alive at a time.
+  outputs = tf.map_fn(
+      chunk_fn, elems, fn_output_signature=(tf.int32, tf.float32, tf.float32),
+      parallel_iterations=1)
+  return tuple(from_chunks(output) for output in outputs)
+
+
 def _pad_to_full_keypoint_dim(keypoint_coords, keypoint_scores, keypoint_inds,
                               num_total_keypoints):
   """Scatter keypoint elements into tensors with full keypoints dimension.
@@ -2208,7 +2358,7 @@ class KeypointEstimationParams(
         'offset_head_kernel_sizes', 'regress_head_num_filters',
         'regress_head_kernel_sizes', 'score_distance_multiplier',
         'std_dev_multiplier', 'rescoring_threshold', 'gaussian_denom_ratio',
-        'argmax_postprocessing'
+        'argmax_postprocessing', 'num_nearby_candidates', 'instance_chunk_size'
     ])):
   """Namedtuple to host object detection related parameters.
 
@@ -2258,7 +2408,9 @@ class KeypointEstimationParams(
               std_dev_multiplier=1.0,
               rescoring_threshold=0.0,
               argmax_postprocessing=False,
-              gaussian_denom_ratio=0.1):
+              gaussian_denom_ratio=0.1,
+              num_nearby_candidates=None,
+              instance_chunk_size=None):
     """Constructor with default values for KeypointEstimationParams.
 
     Args:
@@ -2365,6 +2517,10 @@ class KeypointEstimationParams(
       gaussian_denom_ratio: The ratio used to multiply the image size to
         determine the denominator of the Gaussian formula. Only applicable when
         the candidate_ranking_mode is set to be 'gaussian_weighted_const'.
+      num_nearby_candidates: If set, only this many candidates closest to each
+        regressed keypoint are ranked during keypoint refinement.
+      instance_chunk_size: If set, keypoint refinement processes at most this
+        many instances at a time to bound its memory use.
 
     Returns:
       An initialized KeypointEstimationParams namedtuple.
@@ -2384,7 +2540,8 @@ class KeypointEstimationParams(
         offset_head_num_filters, offset_head_kernel_sizes,
         regress_head_num_filters, regress_head_kernel_sizes,
         score_distance_multiplier, std_dev_multiplier, rescoring_threshold,
-        argmax_postprocessing, gaussian_denom_ratio)
+        argmax_postprocessing, gaussian_denom_ratio, num_nearby_candidates,
+        instance_chunk_size)
 
 
 class ObjectCenterParams(
@@ -4770,7 +4927,9 @@ class CenterNetMetaArch(model.DetectionModel):
         keypoint_depth_candidates=keypoint_depth_candidates,
         keypoint_score_threshold=(kp_params.keypoint_candidate_score_threshold),
         score_distance_multiplier=kp_params.score_distance_multiplier,
-        keypoint_std_dev=kpts_std_dev_postprocess)
+        keypoint_std_dev=kpts_std_dev_postprocess,
+        num_nearby_candidates=kp_params.num_nearby_candidates,
+        instance_chunk_size=kp_params.instance_chunk_size)
 
     return refined_keypoints, refined_scores, refined_depths
 
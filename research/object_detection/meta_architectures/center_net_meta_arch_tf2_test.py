@@ -1507,6 +1507,61 @@ class CenterNetMetaArchHelpersTest(test_case.TestCase, parameterized.TestCase):
       np.testing.assert_allclose(expected_refined_keypoints, refined_keypoints)
       np.testing.assert_allclose(expected_refined_scores, refined_scores)
 
+  @parameterized.parameters(
+      {'candidate_ranking_mode': 'min_distance', 'num_nearby_candidates': 3},
+      {'candidate_ranking_mode': 'min_distance', 'num_nearby_candidates': None},
+      {'candidate_ranking_mode': 'score_distance_ratio',
+       'num_nearby_candidates': None},
+      {'candidate_ranking_mode': 'score_distance_ratio',
+       'num_nearby_candidates': 6},
+      {'candidate_ranking_mode': 'score_scaled_distance_ratio',
+       'num_nearby_candidates': None},
+      {'candidate_ranking_mode': 'gaussian_weighted',
+       'num_nearby_candidates': None},
+      {'candidate_ranking_mode': 'gaussian_weighted',
+       'num_nearby_candidates': 6},
+  )
+  def test_refine_keypoints_in_instance_chunks(self, candidate_ranking_mode,
+                                               num_nearby_candidates):
+    batch_size, num_instances, max_candidates, num_keypoints = 2, 7, 6, 3
+    rng = np.random.RandomState(0)
+    regressed_keypoints_np = rng.uniform(
+        0, 20, [batch_size, num_instances, num_keypoints, 2]).astype(np.float32)
+    keypoint_candidates_np = rng.uniform(
+        0, 20, [batch_size, max_candidates, num_keypoints, 2]).astype(
+            np.float32)
+    keypoint_scores_np = rng.uniform(
+        0, 1, [batch_size, max_candidates, num_keypoints]).astype(np.float32)
+    num_keypoint_candidates_np = np.array([[6, 4, 0], [5, 6, 2]], np.int32)
+    box_mins = rng.uniform(0, 10, [batch_size, num_instances, 2])
+    bboxes_np = np.concatenate(
+        [box_mins, box_mins + rng.uniform(2, 10, [batch_size, num_instances, 2])],
+        axis=-1).astype(np.float32)
+
+    def graph_fn(regressed_keypoints, keypoint_candidates, keypoint_scores,
+                 num_keypoint_candidates, bboxes):
+      outputs = []
+      for kwargs in ({}, {'num_nearby_candidates': num_nearby_candidates,
+                          'instance_chunk_size': 3}):
+        refined_keypoints, refined_scores, _ = cnma.refine_keypoints(
+            regressed_keypoints,
+            keypoint_candidates,
+            keypoint_scores,
+            num_keypoint_candidates,
+            bboxes=bboxes,
+            candidate_ranking_mode=candidate_ranking_mode,
+            keypoint_std_dev=[1.0, 0.5, 1.5],
+            **kwargs)
+        outputs.extend([refined_keypoints, refined_scores])
+      return outputs
+
+    (refined_keypoints, refined_scores, chunked_keypoints,
+     chunked_scores) = self.execute(graph_fn, [
+         regressed_keypoints_np, keypoint_candidates_np, keypoint_scores_np,
+         num_keypoint_candidates_np, bboxes_np])
+    self.assertAllClose(refined_keypoints, chunked_keypoints)
+    self.assertAllClose(refined_scores, chunked_scores)
+
   def test_sdr_scaled_ranking_score(self):
     keypoint_scores_np = np.array(
         [
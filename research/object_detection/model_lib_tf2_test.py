@@ -236,6 +236,40 @@ class CheckpointV2Test(tf.test.TestCase):
           unpad_groundtruth_tensors=True)
 
 
+class _RecordingEvaluator(object):
+  """Records the eval dicts it receives, failing on a given value."""
+
+  def __init__(self, fail_on=None):
+    self.eval_dicts = []
+    self._fail_on = fail_on
+
+  def add_eval_dict(self, eval_dict):
+    if eval_dict['value'] == self._fail_on:
+      raise ValueError('Failed on {}'.format(self._fail_on))
+    self.eval_dicts.append(eval_dict['value'])
+
+
+@unittest.skipIf(tf_version.is_tf1(), 'Skipping TF2.X only test.')
+class AsyncEvaluatorsTest(tf.test.TestCase):
+
+  def test_evaluators_receive_eval_dicts_in_order(self):
+    evaluators = [_RecordingEvaluator(), _RecordingEvaluator()]
+    async_evaluators = model_lib_v2._AsyncEvaluators(evaluators, queue_size=2)
+    for i in range(20):
+      async_evaluators.add_eval_dict({'value': i})
+    async_evaluators.join()
+    for evaluator in evaluators:
+      self.assertEqual(evaluator.eval_dicts, list(range(20)))
+
+  def test_evaluator_errors_are_raised(self):
+    async_evaluators = model_lib_v2._AsyncEvaluators(
+        [_RecordingEvaluator(fail_on=3)], queue_size=1)
+    with self.assertRaisesRegex(ValueError, 'Failed on 3'):
+      for i in range(10):
+        async_evaluators.add_eval_dict({'value': i})
+      async_evaluators.join()
+
+
 @unittest.skipIf(tf_version.is_tf1(), 'Skipping TF2.X only test.')
 class MetricsExportTest(tf.test.TestCase):
 
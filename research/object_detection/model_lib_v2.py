@@ -21,6 +21,8 @@ from __future__ import print_function
 import copy
 import os
 import pprint
+import queue
+import threading
 import time
 
 import numpy as np
@@ -830,6 +832,78 @@ def concat_replica_results(tensor_dict):
   return new_tensor_dict
 
 
+class _AsyncEvaluators(object):
+  """Feeds eval dicts to evaluators on background threads.
+
+  Every evaluator is driven by its own thread through a bounded queue, so the
+  host side metric accumulation overlaps with the forward passes of the next
+  batches. Each evaluator still sees the eval dicts one at a time and in the
+  order they were added, which keeps the final metrics unchanged.
+  """
+
+  def __init__(self, evaluators, queue_size):
+    """Constructor.
+
+    Args:
+      evaluators: A list of DetectionEvaluator objects.
+      queue_size: The maximum number of eval dicts pending per evaluator, after
+        which `add_eval_dict` blocks.
+    """
+    self._queues = []
+    self._threads = []
+    self._errors = []
+    for evaluator in evaluators:
+      eval_dict_queue = queue.Queue(maxsize=queue_size)
+      thread = threading.Thread(
+          target=self._run, args=(evaluator, eval_dict_queue), daemon=True)
+      thread.start()
+      self._queues.append(eval_dict_queue)
+      self._threads.append(thread)
+
+  def _run(self, evaluator, eval_dict_queue):
+    while True:
+      eval_dict = eval_dict_queue.get()
+      if eval_dict is None:
+        return
+      # After a failure the queue is only drained so producers never block.
+      if self._errors:
+        continue
+      try:
+        evaluator.add_eval_dict(eval_dict)
+      except Exception as exc:  # pylint:disable=broad-except
+        self._errors.append(exc)
+
+  def _raise_errors(self):
+    if self._errors:
+      raise self._errors[0]
+
+  def add_eval_dict(self, eval_dict):
+    """Queues an eval dict for all evaluators.
+
+    Args:
+      eval_dict: A dictionary that holds tensors for evaluating an object
+        detection model, as returned by `prepare_eval_dict`.
+
+    Raises:
+      Exception: The first error raised by an evaluator, if any.
+    """
+    self._raise_errors()
+    for eval_dict_queue in self._queues:
+      eval_dict_queue.put(eval_dict)
+
+  def join(self):
+    """Waits until all queued eval dicts have been added to the evaluators.
+
+    Raises:
+      Exception: The first error raised by an evaluator, if any.
+    """
+    for eval_dict_queue in self._queues:
+      eval_dict_queue.put(None)
+    for thread in self._threads:
+      thread.join()
+    self._raise_errors()
+
+
 def eager_eval_loop(
     detection_model,
     configs,
@@ -837,6 +911,7 @@ def eager_eval_loop(
     use_tpu=False,
     postprocess_on_cpu=False,
     global_step=None,
+    evaluator_queue_size=8,
     ):
   """Evaluate the model eagerly on the evaluation dataset.
 
@@ -855,6 +930,9 @@ def eager_eval_loop(
       the CPU when using a TPU to execute the model.
     global_step: A variable containing the training step this model was trained
       to. Used for logging purposes.
+    evaluator_queue_size: The number of batches that may be pending for each
+      evaluator while the next batches are evaluated. Evaluators are fed on
+      background threads if positive, and synchronously if 0.
 
   Returns:
     A dict of evaluation metrics representing the results of this evaluation.
@@ -891,6 +969,7 @@ def eager_eval_loop(
         evaluator_options)
 
   evaluators = None
+  async_evaluators = None
   loss_metrics = {}
 
   @tf.function
@@ -995,15 +1074,23 @@ def eager_eval_loop(
         evaluators = class_agnostic_evaluators
       else:
         evaluators = class_aware_evaluators
+      if evaluator_queue_size > 0:
+        async_evaluators = _AsyncEvaluators(evaluators, evaluator_queue_size)
 
-    for evaluator in evaluators:
-      evaluator.add_eval_dict(eval_dict)
+    if async_evaluators is not None:
+      async_evaluators.add_eval_dict(eval_dict)
+    else:
+      for evaluator in evaluators:
+        evaluator.add_eval_dict(eval_dict)
 
     for loss_key, loss_tensor in iter(losses_dict.items()):
       if loss_key not in loss_metrics:
         loss_metrics[loss_key] = []
       loss_metrics[loss_key].append(loss_tensor)
 
+  if async_evaluators is not None:
+    async_evaluators.join()
+
   eval_metrics = {}
 
   for evaluator in evaluators:
@@ -212,29 +212,133 @@ def non_max_suppression(boxlist,
     else:
       return boxlist
 
-  boxes = boxlist.get()
-  num_boxes = boxlist.num_boxes()
-  # is_index_valid is True only for all remaining valid boxes,
-  is_index_valid = np.full(num_boxes, 1, dtype=bool)
+  selected_indices = greedy_non_max_suppression(
+      boxlist.get(), iou_threshold, max_output_size)
+  return gather(boxlist, selected_indices)
+
+
+def greedy_non_max_suppression(data,
+                               iou_threshold,
+                               max_output_size,
+                               segment_ids=None,
+                               iou_fn=np_box_ops.iou,
+                               block_size=256):
+  """Greedily selects non-overlapping boxes from score-sorted segments.
+
+  The boxes are processed in blocks of `block_size`. The pairwise IOU between
+  the unsuppressed boxes of a block and all later boxes of the same segments is
+  computed with a single `iou_fn` call, so the greedy selection itself only
+  updates boolean masks.
+
+  Args:
+    data: a numpy array of shape [N, ...] holding the boxes (or masks) of all
+      segments, sorted by segment and by decreasing score within each segment.
+    iou_threshold: intersection over union threshold.
+    max_output_size: maximum number of retained boxes per segment.
+    segment_ids: an optional sorted integer numpy array of shape [N] with the
+      segment (e.g. image or class) of each box. Boxes of different segments
+      never suppress each other. Defaults to a single segment.
+    iou_fn: function computing the pairwise IOU between two arrays like
+      `data`.
+    block_size: number of boxes per IOU block.
+
+  Returns:
+    a sorted int64 numpy array with the indices of the selected boxes.
+  """
+  num_boxes = data.shape[0]
+  if segment_ids is None:
+    segment_ids = np.zeros(num_boxes, dtype=np.int64)
+  segment_starts = np.searchsorted(segment_ids, segment_ids, side='left')
+  segment_ends = np.searchsorted(segment_ids, segment_ids, side='right')
+  if iou_threshold == 1.0:
+    return np.flatnonzero(
+        np.arange(num_boxes) - segment_starts < max_output_size)
+
+  is_suppressed = np.zeros(num_boxes, dtype=bool)
+  # The number of selected boxes of each segment, indexed by segment start.
+  num_selected = np.zeros(num_boxes, dtype=np.int64)
   selected_indices = []
-  num_output = 0
-  for i in range(num_boxes):
-    if num_output < max_output_size:
-      if is_index_valid[i]:
-        num_output += 1
-        selected_indices.append(i)
-        is_index_valid[i] = False
-        valid_indices = np.where(is_index_valid)[0]
-        if valid_indices.size == 0:
-          break
-
-        intersect_over_union = np_box_ops.iou(
-            np.expand_dims(boxes[i, :], axis=0), boxes[valid_indices, :])
-        intersect_over_union = np.squeeze(intersect_over_union, axis=0)
-        is_index_valid[valid_indices] = np.logical_and(
-            is_index_valid[valid_indices],
-            intersect_over_union <= iou_threshold)
-  return gather(boxlist, np.array(selected_indices))
+  for block_start in range(0, num_boxes, block_size):
+    block_end = min(block_start + block_size, num_boxes)
+    candidates = block_start + np.flatnonzero(
+        ~is_suppressed[block_start:block_end] &
+        (num_selected[segment_starts[block_start:block_end]] < max_output_size))
+    if candidates.size == 0:
+      continue
+    window_end = segment_ends[block_end - 1]
+    # NaN IOUs (e.g. of empty boxes) suppress, as in the sequential version.
+    is_overlapping = ~(iou_fn(data[candidates], data[block_start:window_end])
+                       <= iou_threshold)
+    is_overlapping &= (segment_ids[candidates, np.newaxis] ==
+                       segment_ids[np.newaxis, block_start:window_end])
+    for row, index in enumerate(candidates):
+      segment_start = segment_starts[index]
+      if (is_suppressed[index] or
+          num_selected[segment_start] >= max_output_size):
+        continue
+      selected_indices.append(index)
+      num_selected[segment_start] += 1
+      is_suppressed[block_start:window_end] |= is_overlapping[row]
+  return np.array(selected_indices, dtype=np.int64)
+
+
+def batch_non_max_suppression(boxes,
+                              scores,
+                              row_splits,
+                              max_output_size=10000,
+                              iou_threshold=1.0,
+                              score_threshold=-10.0):
+  """Non maximum suppression of the boxes of many images in one call.
+
+  The boxes of all images are stored in flat arrays, and the boxes of image `i`
+  are `boxes[row_splits[i]:row_splits[i + 1]]`. The result is the same as
+  calling `non_max_suppression` on every image separately.
+
+  Args:
+    boxes: a numpy array of shape [N, 4] holding the boxes of all images.
+    scores: a numpy array of shape [N] holding the box scores.
+    row_splits: an integer numpy array of shape [num_images + 1] holding the
+      offsets of the boxes of each image.
+    max_output_size: maximum number of retained boxes per image.
+    iou_threshold: intersection over union threshold.
+    score_threshold: minimum score threshold. Boxes with scores less than or
+      equal to this value are removed.
+
+  Returns:
+    selected_indices: an int64 numpy array of shape [M] with the indices of the
+      retained boxes, grouped by image and sorted by decreasing score within
+      each image.
+    selected_row_splits: an int64 numpy array of shape [num_images + 1] with
+      the offsets of the retained boxes of each image in `selected_indices`.
+
+  Raises:
+    ValueError: if threshold is not in [0, 1]
+    ValueError: if max_output_size < 0
+    ValueError: if row_splits does not match the number of boxes
+  """
+  if iou_threshold < 0. or iou_threshold > 1.0:
+    raise ValueError('IOU threshold must be in [0, 1]')
+  if max_output_size < 0:
+    raise ValueError('max_output_size must be bigger than 0.')
+  row_splits = np.asarray(row_splits, dtype=np.int64)
+  if (row_splits.ndim != 1 or row_splits.size == 0 or row_splits[0] != 0 or
+      row_splits[-1] != boxes.shape[0] or np.any(np.diff(row_splits) < 0)):
+    raise ValueError('row_splits must be non-decreasing offsets from 0 to the '
+                     'number of boxes.')
+  scores = np.reshape(scores, [-1])
+  num_images = row_splits.size - 1
+  segment_ids = np.repeat(np.arange(num_images), np.diff(row_splits))
+
+  valid_indices = np.flatnonzero(scores > score_threshold)
+  order = valid_indices[np.lexsort(
+      (-scores[valid_indices], segment_ids[valid_indices]))]
+  selected_indices = order[greedy_non_max_suppression(
+      boxes[order], iou_threshold, max_output_size,
+      segment_ids=segment_ids[order])]
+  num_selected = np.bincount(segment_ids[selected_indices],
+                             minlength=num_images)
+  selected_row_splits = np.concatenate([[0], np.cumsum(num_selected)])
+  return selected_indices, selected_row_splits.astype(np.int64)
 
 
 def multi_class_non_max_suppression(boxlist, score_thresh, iou_thresh,
@@ -291,21 +395,22 @@ def multi_class_non_max_suppression(boxlist, score_thresh, iou_thresh,
   if num_boxes != num_scores:
     raise ValueError('Incorrect scores field length: actual vs expected.')
 
-  selected_boxes_list = []
-  for class_idx in range(num_classes):
-    boxlist_and_class_scores = np_box_list.BoxList(boxlist.get())
-    class_scores = np.reshape(scores[0:num_scores, class_idx], [-1])
-    boxlist_and_class_scores.add_field('scores', class_scores)
-    boxlist_filt = filter_scores_greater_than(boxlist_and_class_scores,
-                                              score_thresh)
-    nms_result = non_max_suppression(boxlist_filt,
-                                     max_output_size=max_output_size,
-                                     iou_threshold=iou_thresh,
-                                     score_threshold=score_thresh)
-    nms_result.add_field(
-        'classes', np.zeros_like(nms_result.get_field('scores')) + class_idx)
-    selected_boxes_list.append(nms_result)
-  selected_boxes = concatenate(selected_boxes_list)
+  # Every class is a segment of the tiled boxes, so all classes are suppressed
+  # in a single call.
+  selected_indices, _ = batch_non_max_suppression(
+      np.tile(boxlist.get(), [num_classes, 1]),
+      np.reshape(np.transpose(scores), [-1]),
+      np.arange(num_classes + 1) * num_boxes,
+      max_output_size=max_output_size,
+      iou_threshold=iou_thresh,
+      score_threshold=score_thresh)
+  box_indices = selected_indices % max(num_boxes, 1)
+  class_indices = selected_indices // max(num_boxes, 1)
+  selected_boxes = np_box_list.BoxList(boxlist.get()[box_indices])
+  selected_scores = scores[box_indices, class_indices]
+  selected_boxes.add_field('scores', selected_scores)
+  selected_boxes.add_field(
+      'classes', np.zeros_like(selected_scores) + class_indices)
   sorted_boxes = sort_by_field(selected_boxes, 'scores')
   return sorted_boxes
 
@@ -24,6 +24,7 @@ import tensorflow.compat.v1 as tf
 
 from object_detection.utils import np_box_list
 from object_detection.utils import np_box_list_ops
+from object_detection.utils import np_box_ops
 
 
 class AreaRelatedTest(tf.test.TestCase):
@@ -414,5 +415,70 @@ class NonMaximumSuppressionTest(tf.test.TestCase):
     self.assertAllClose(boxes, expected_boxes)
 
 
+
+def _sequential_nms(boxes, scores, max_output_size, iou_threshold):
+  """Reference greedy NMS returning indices sorted by decreasing score."""
+  order = np.argsort(-scores, kind='stable')
+  selected = []
+  for i in order:
+    if len(selected) == max_output_size:
+      break
+    if all(np_box_ops.iou(boxes[i:i + 1], boxes[j:j + 1])[0, 0] <= iou_threshold
+           for j in selected):
+      selected.append(i)
+  return np.array(selected, dtype=np.int64)
+
+
+class BatchNonMaximumSuppressionTest(tf.test.TestCase):
+
+  def setUp(self):
+    rng = np.random.RandomState(0)
+    self._num_boxes = [7, 0, 30, 1, 12]
+    num_boxes = sum(self._num_boxes)
+    mins = rng.uniform(0, 10, [num_boxes, 2])
+    self._boxes = np.concatenate(
+        [mins, mins + rng.uniform(1, 5, [num_boxes, 2])], axis=1)
+    self._scores = rng.uniform(0, 1, num_boxes)
+    self._row_splits = np.concatenate([[0], np.cumsum(self._num_boxes)])
+
+  def test_greedy_nms_does_not_depend_on_block_size(self):
+    order = np.argsort(-self._scores, kind='stable')
+    boxes = self._boxes[order]
+    expected = _sequential_nms(boxes, self._scores[order], 10, 0.3)
+    for block_size in [1, 4, 256]:
+      self.assertAllEqual(
+          np_box_list_ops.greedy_non_max_suppression(
+              boxes, 0.3, 10, block_size=block_size), np.sort(expected))
+
+  def test_batch_nms_matches_per_image_nms(self):
+    selected_indices, selected_row_splits = (
+        np_box_list_ops.batch_non_max_suppression(
+            self._boxes, self._scores, self._row_splits, max_output_size=5,
+            iou_threshold=0.3, score_threshold=0.1))
+
+    for i in range(len(self._num_boxes)):
+      start, end = self._row_splits[i], self._row_splits[i + 1]
+      scores = np.where(self._scores[start:end] > 0.1,
+                        self._scores[start:end], -np.inf)
+      expected = _sequential_nms(self._boxes[start:end], scores, 5, 0.3)
+      expected = expected[np.isfinite(scores[expected])] + start
+      self.assertAllEqual(
+          selected_indices[selected_row_splits[i]:selected_row_splits[i + 1]],
+          expected)
+
+  def test_batch_nms_disabled(self):
+    selected_indices, selected_row_splits = (
+        np_box_list_ops.batch_non_max_suppression(
+            self._boxes, self._scores, self._row_splits, max_output_size=3))
+    self.assertAllEqual(selected_row_splits, [0, 3, 3, 6, 7, 10])
+    self.assertAllEqual(selected_indices[:3],
+                        np.argsort(-self._scores[:7])[:3])
+
+  def test_batch_nms_with_invalid_row_splits(self):
+    with self.assertRaises(ValueError):
+      np_box_list_ops.batch_non_max_suppression(
+          self._boxes, self._scores, [0, 5], iou_threshold=0.5)
+
+
 if __name__ == '__main__':
   tf.test.main()
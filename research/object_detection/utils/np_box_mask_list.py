@@ -39,6 +39,8 @@ class BoxMaskList(np_box_list.BoxList):
       mask_data: a numpy array of shape [N, height, width] representing masks
         with values are in {0,1}. The masks correspond to the full
         image. The height and the width will be equal to image height and width.
+        Alternatively, a numpy object array of shape [N] holding the run-length
+        encodings of the masks (see `np_mask_ops.encode`).
 
     Raises:
       ValueError: if bbox data is not a numpy array
@@ -49,9 +51,9 @@ class BoxMaskList(np_box_list.BoxList):
     super(BoxMaskList, self).__init__(box_data)
     if not isinstance(mask_data, np.ndarray):
       raise ValueError('Mask data must be a numpy array.')
-    if len(mask_data.shape) != 3:
+    if len(mask_data.shape) != (1 if mask_data.dtype == object else 3):
       raise ValueError('Invalid dimensions for mask data.')
-    if mask_data.dtype != np.uint8:
+    if mask_data.dtype != np.uint8 and mask_data.dtype != object:
       raise ValueError('Invalid data type for mask data: uint8 is required.')
     if mask_data.shape[0] != box_data.shape[0]:
       raise ValueError('There should be the same number of boxes and masks.')
@@ -61,6 +63,7 @@ class BoxMaskList(np_box_list.BoxList):
     """Convenience function for accessing masks.
 
     Returns:
-      a numpy array of shape [N, height, width] representing masks
+      a numpy array of shape [N, height, width] representing masks, or of shape
+      [N] holding their run-length encodings.
     """
     return self.get_field('masks')
@@ -214,30 +214,10 @@ def non_max_suppression(box_mask_list,
     else:
       return box_mask_list
 
-  masks = box_mask_list.get_masks()
-  num_masks = box_mask_list.num_boxes()
-
-  # is_index_valid is True only for all remaining valid boxes,
-  is_index_valid = np.full(num_masks, 1, dtype=bool)
-  selected_indices = []
-  num_output = 0
-  for i in range(num_masks):
-    if num_output < max_output_size:
-      if is_index_valid[i]:
-        num_output += 1
-        selected_indices.append(i)
-        is_index_valid[i] = False
-        valid_indices = np.where(is_index_valid)[0]
-        if valid_indices.size == 0:
-          break
-
-        intersect_over_union = np_mask_ops.iou(
-            np.expand_dims(masks[i], axis=0), masks[valid_indices])
-        intersect_over_union = np.squeeze(intersect_over_union, axis=0)
-        is_index_valid[valid_indices] = np.logical_and(
-            is_index_valid[valid_indices],
-            intersect_over_union <= iou_threshold)
-  return gather(box_mask_list, np.array(selected_indices))
+  selected_indices = np_box_list_ops.greedy_non_max_suppression(
+      box_mask_list.get_masks(), iou_threshold, max_output_size,
+      iou_fn=np_mask_ops.iou)
+  return gather(box_mask_list, selected_indices)
 
 
 def multi_class_non_max_suppression(box_mask_list, score_thresh, iou_thresh,
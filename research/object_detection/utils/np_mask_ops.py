@@ -18,6 +18,10 @@
 Example mask operations that are supported:
   * Areas: compute mask areas
   * IOU: pairwise intersection-over-union scores
+
+Masks can also be given as 1-D object arrays of pycocotools run-length
+encodings (see `encode`), in which case the overlaps are computed on the
+encodings without decoding the masks.
 """
 
 from __future__ import absolute_import
@@ -25,16 +29,51 @@ from __future__ import division
 from __future__ import print_function
 
 import numpy as np
+from pycocotools import mask as coco_mask
 
 EPSILON = 1e-7
 
 
+def encode(masks):
+  """Run-length encodes masks.
+
+  Args:
+    masks: a numpy array with shape [N, height, width] holding N masks. Masks
+      values are of type np.uint8 and values are in {0,1}.
+
+  Returns:
+    a numpy object array with shape [N] holding the pycocotools run-length
+    encoding of each mask.
+
+  Raises:
+    ValueError: If masks.dtype is not np.uint8
+  """
+  if masks.dtype != np.uint8:
+    raise ValueError('Masks type should be np.uint8')
+  rles = np.empty(masks.shape[0], dtype=object)
+  if masks.shape[0]:
+    rles[:] = coco_mask.encode(np.asfortranarray(np.transpose(masks, [1, 2, 0])))
+  return rles
+
+
+def is_encoded(masks):
+  """Returns whether `masks` holds run-length encodings (see `encode`)."""
+  return masks.dtype == object
+
+
+def _check_masks(masks1, masks2):
+  for masks in (masks1, masks2):
+    if not is_encoded(masks) and masks.dtype != np.uint8:
+      raise ValueError('masks1 and masks2 should be of type np.uint8')
+
+
 def area(masks):
   """Computes area of masks.
 
   Args:
     masks: Numpy array with shape [N, height, width] holding N masks. Masks
-      values are of type np.uint8 and values are in {0,1}.
+      values are of type np.uint8 and values are in {0,1}. Alternatively, a
+      numpy object array with shape [N] holding run-length encodings.
 
   Returns:
     a numpy array with shape [N*1] representing mask areas.
@@ -42,11 +81,27 @@ def area(masks):
   Raises:
     ValueError: If masks.dtype is not np.uint8
   """
+  if is_encoded(masks):
+    if not masks.size:
+      return np.zeros([0], dtype=np.float32)
+    return coco_mask.area(list(masks)).astype(np.float32)
   if masks.dtype != np.uint8:
     raise ValueError('Masks type should be np.uint8')
   return np.sum(masks, axis=(1, 2), dtype=np.float32)
 
 
+def _encoded_intersection(rles1, rles2):
+  """Computes pairwise intersection areas between run-length encodings."""
+  if not rles1.size or not rles2.size:
+    return np.zeros([rles1.size, rles2.size], dtype=np.float32)
+  # With all `iscrowd` flags set, pycocotools divides the intersection by the
+  # area of the masks in the first argument.
+  intersection_over_area = np.asarray(
+      coco_mask.iou(list(rles1), list(rles2), [1] * rles2.size))
+  return np.round(intersection_over_area *
+                  np.expand_dims(area(rles1), axis=1)).astype(np.float32)
+
+
 def intersection(masks1, masks2):
   """Compute pairwise intersection areas between masks.
 
@@ -62,8 +117,11 @@ def intersection(masks1, masks2):
   Raises:
     ValueError: If masks1 and masks2 are not of type np.uint8.
   """
-  if masks1.dtype != np.uint8 or masks2.dtype != np.uint8:
-    raise ValueError('masks1 and masks2 should be of type np.uint8')
+  _check_masks(masks1, masks2)
+  if is_encoded(masks1) or is_encoded(masks2):
+    return _encoded_intersection(
+        masks1 if is_encoded(masks1) else encode(masks1),
+        masks2 if is_encoded(masks2) else encode(masks2))
   n = masks1.shape[0]
   m = masks2.shape[0]
   answer = np.zeros([n, m], dtype=np.float32)
@@ -88,8 +146,7 @@ def iou(masks1, masks2):
   Raises:
     ValueError: If masks1 and masks2 are not of type np.uint8.
   """
-  if masks1.dtype != np.uint8 or masks2.dtype != np.uint8:
-    raise ValueError('masks1 and masks2 should be of type np.uint8')
+  _check_masks(masks1, masks2)
   intersect = intersection(masks1, masks2)
   area1 = area(masks1)
   area2 = area(masks2)
@@ -117,8 +174,7 @@ def ioa(masks1, masks2):
   Raises:
     ValueError: If masks1 and masks2 are not of type np.uint8.
   """
-  if masks1.dtype != np.uint8 or masks2.dtype != np.uint8:
-    raise ValueError('masks1 and masks2 should be of type np.uint8')
+  _check_masks(masks1, masks2)
   intersect = intersection(masks1, masks2)
   areas = np.expand_dims(area(masks2), axis=0)
   return intersect / (areas + EPSILON)
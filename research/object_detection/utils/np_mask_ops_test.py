@@ -88,5 +88,23 @@ class MaskOpsTests(tf.test.TestCase):
     self.assertAllClose(ioa21, expected_ioa21)
 
 
+  def testEncodedArea(self):
+    areas = np_mask_ops.area(np_mask_ops.encode(self.masks1))
+    self.assertAllClose(np.array([8.0, 10.0], dtype=np.float32), areas)
+
+  def testEncodedOverlaps(self):
+    encoded_masks1 = np_mask_ops.encode(self.masks1)
+    encoded_masks2 = np_mask_ops.encode(self.masks2)
+    self.assertAllClose(
+        np_mask_ops.intersection(encoded_masks1, encoded_masks2),
+        np_mask_ops.intersection(self.masks1, self.masks2))
+    self.assertAllClose(np_mask_ops.iou(encoded_masks1, self.masks2),
+                        np_mask_ops.iou(self.masks1, self.masks2))
+    self.assertAllClose(np_mask_ops.ioa(self.masks1, encoded_masks2),
+                        np_mask_ops.ioa(self.masks1, self.masks2))
+    self.assertAllEqual(
+        np_mask_ops.iou(encoded_masks1, encoded_masks2[:0]).shape, [2, 0])
+
+
 if __name__ == '__main__':
   tf.test.main()
@@ -45,6 +45,7 @@ import tensorflow.compat.v1 as tf
 from object_detection.core import standard_fields
 from object_detection.utils import label_map_util
 from object_detection.utils import metrics
+from object_detection.utils import np_mask_ops
 from object_detection.utils import per_image_evaluation
 
 
@@ -1220,7 +1221,7 @@ class ObjectDetectionEvaluation(object):
         that no boxes are groups-of, it is by default set as None.
       groundtruth_masks: uint8 numpy array of shape [num_boxes, height, width]
         containing `num_boxes` groundtruth masks. The mask values range from 0
-        to 1.
+        to 1. The masks are stored run-length encoded.
     """
     if image_key in self.groundtruth_boxes:
       logging.warning(
@@ -1230,6 +1231,11 @@ class ObjectDetectionEvaluation(object):
 
     self.groundtruth_boxes[image_key] = groundtruth_boxes
     self.groundtruth_class_labels[image_key] = groundtruth_class_labels
+    if groundtruth_masks is not None and not np_mask_ops.is_encoded(
+        groundtruth_masks):
+      # Only the run-length encodings are kept until the detections of the
+      # image are added, which is much smaller than the dense masks.
+      groundtruth_masks = np_mask_ops.encode(groundtruth_masks)
     self.groundtruth_masks[image_key] = groundtruth_masks
     if groundtruth_is_difficult_list is None:
       num_boxes = groundtruth_boxes.shape[0]
@@ -1243,8 +1249,7 @@ class ObjectDetectionEvaluation(object):
       num_boxes = groundtruth_boxes.shape[0]
       mask_presence_indicator = np.zeros(num_boxes, dtype=bool)
     else:
-      mask_presence_indicator = (np.sum(groundtruth_masks,
-                                        axis=(1, 2)) == 0).astype(dtype=bool)
+      mask_presence_indicator = np_mask_ops.area(groundtruth_masks) == 0
 
     self.groundtruth_is_group_of_list[
         image_key] = groundtruth_is_group_of_list.astype(dtype=bool)
@@ -1274,7 +1279,8 @@ class ObjectDetectionEvaluation(object):
         0-indexed detection classes for the boxes.
       detected_masks: np.uint8 numpy array of shape [num_boxes, height, width]
         containing `num_boxes` detection masks with values ranging between 0 and
-        1.
+        1. The overlaps with the groundtruth masks are computed on their
+        run-length encodings.
 
     Raises:
       ValueError: if the number of boxes, scores and class labels differ in
@@ -1295,6 +1301,9 @@ class ObjectDetectionEvaluation(object):
       return
 
     self.detection_keys.add(image_key)
+    if detected_masks is not None and not np_mask_ops.is_encoded(
+        detected_masks):
+      detected_masks = np_mask_ops.encode(detected_masks)
     if image_key in self.groundtruth_boxes:
       groundtruth_boxes = self.groundtruth_boxes[image_key]
       groundtruth_class_labels = self.groundtruth_class_labels[image_key]
@@ -1311,7 +1320,7 @@ class ObjectDetectionEvaluation(object):
       if detected_masks is None:
         groundtruth_masks = None
       else:
-        groundtruth_masks = np.empty(shape=[0, 1, 1], dtype=float)
+        groundtruth_masks = np.empty(shape=[0], dtype=object)
       groundtruth_is_difficult_list = np.array([], dtype=bool)
       groundtruth_is_group_of_list = np.array([], dtype=bool)
     scores, tp_fp_labels, is_class_correctly_detected_in_image = (
@@ -31,6 +31,7 @@ from object_detection.utils import np_box_list
 from object_detection.utils import np_box_list_ops
 from object_detection.utils import np_box_mask_list
 from object_detection.utils import np_box_mask_list_ops
+from object_detection.utils import np_mask_ops
 
 
 class PerImageEvaluation(object):
@@ -96,6 +97,9 @@ class PerImageEvaluation(object):
         width]. If not None, the metrics will be computed based on masks.
       groundtruth_masks: (optional) A uint8 numpy array of shape [M, height,
         width]. Can have empty masks, i.e. where all values are 0.
+        Both detected_masks and groundtruth_masks can also be numpy object
+        arrays of shape [N] and [M] holding run-length encoded masks, see
+        `np_mask_ops.encode`.
 
     Returns:
       scores: A list of C float numpy arrays. Each numpy array is of
@@ -293,6 +297,13 @@ class PerImageEvaluation(object):
       raise ValueError(
           'Groundtruth masks is available but detected masks is not.')
 
+    # In box mode, the detections of all classes are suppressed in one call.
+    detections_suppressed = detected_masks is None
+    if detections_suppressed:
+      detected_boxes, detected_scores, detected_class_labels = (
+          self._batch_non_max_suppression(detected_boxes, detected_scores,
+                                          detected_class_labels))
+
     result_scores = []
     result_tp_fp_labels = []
     for i in range(self.num_groundtruth_classes):
@@ -313,11 +324,43 @@ class PerImageEvaluation(object):
           groundtruth_is_difficult_list=groundtruth_is_difficult_list_at_ith_class,
           groundtruth_is_group_of_list=groundtruth_is_group_of_list_at_ith_class,
           detected_masks=detected_masks_at_ith_class,
-          groundtruth_masks=gt_masks_at_ith_class)
+          groundtruth_masks=gt_masks_at_ith_class,
+          apply_nms=not detections_suppressed)
       result_scores.append(scores)
       result_tp_fp_labels.append(tp_fp_labels)
     return result_scores, result_tp_fp_labels
 
+  def _batch_non_max_suppression(self, detected_boxes, detected_scores,
+                                 detected_class_labels):
+    """Applies non maximum suppression to the detections of each class.
+
+    Args:
+      detected_boxes: A float numpy array of shape [N, 4].
+      detected_scores: A float numpy array of shape [N].
+      detected_class_labels: An integer numpy array of shape [N].
+
+    Returns:
+      The boxes, scores and class labels of the retained detections of the
+      groundtruth classes, grouped by class and sorted by decreasing score
+      within each class.
+    """
+    is_evaluated_class = np.logical_and(
+        detected_class_labels >= 0,
+        detected_class_labels < self.num_groundtruth_classes)
+    order = np.flatnonzero(is_evaluated_class)
+    order = order[np.argsort(detected_class_labels[order], kind='stable')]
+    row_splits = np.concatenate([[0], np.cumsum(np.bincount(
+        detected_class_labels[order],
+        minlength=self.num_groundtruth_classes))])
+    selected_indices, _ = np_box_list_ops.batch_non_max_suppression(
+        detected_boxes[order], detected_scores[order], row_splits,
+        max_output_size=self.nms_max_output_boxes,
+        iou_threshold=self.nms_iou_threshold)
+    selected_indices = order[selected_indices]
+    return (detected_boxes[selected_indices],
+            detected_scores[selected_indices],
+            detected_class_labels[selected_indices])
+
   def _get_overlaps_and_scores_mask_mode(self, detected_boxes, detected_scores,
                                          detected_masks, groundtruth_boxes,
                                          groundtruth_masks,
@@ -366,7 +409,8 @@ class PerImageEvaluation(object):
 
   def _get_overlaps_and_scores_box_mode(self, detected_boxes, detected_scores,
                                         groundtruth_boxes,
-                                        groundtruth_is_group_of_list):
+                                        groundtruth_is_group_of_list,
+                                        apply_nms=True):
     """Computes overlaps and scores between detected and groudntruth boxes.
 
     Args:
@@ -379,6 +423,8 @@ class PerImageEvaluation(object):
       groundtruth_is_group_of_list: A boolean numpy array of length M denoting
         whether a ground truth box has group-of tag. If a groundtruth box is
         group-of box, every detection matching this box is ignored.
+      apply_nms: Whether to apply non maximum suppression to the detections.
+        False if they were already suppressed.
 
     Returns:
       iou: A float numpy array of size [num_detected_boxes, num_gt_boxes]. If
@@ -390,8 +436,9 @@ class PerImageEvaluation(object):
     """
     detected_boxlist = np_box_list.BoxList(detected_boxes)
     detected_boxlist.add_field('scores', detected_scores)
-    detected_boxlist = np_box_list_ops.non_max_suppression(
-        detected_boxlist, self.nms_max_output_boxes, self.nms_iou_threshold)
+    if apply_nms:
+      detected_boxlist = np_box_list_ops.non_max_suppression(
+          detected_boxlist, self.nms_max_output_boxes, self.nms_iou_threshold)
     gt_non_group_of_boxlist = np_box_list.BoxList(
         groundtruth_boxes[~groundtruth_is_group_of_list])
     gt_group_of_boxlist = np_box_list.BoxList(
@@ -410,7 +457,8 @@ class PerImageEvaluation(object):
                                       groundtruth_is_difficult_list,
                                       groundtruth_is_group_of_list,
                                       detected_masks=None,
-                                      groundtruth_masks=None):
+                                      groundtruth_masks=None,
+                                      apply_nms=True):
     """Labels boxes detected with the same class from the same image as tp/fp.
 
     Args:
@@ -431,6 +479,8 @@ class PerImageEvaluation(object):
         width]. If not None, the scores will be computed based on masks.
       groundtruth_masks: (optional) A uint8 numpy array of shape [M, height,
         width].
+      apply_nms: Whether to apply non maximum suppression to the detected
+        boxes. False if they were already suppressed.
 
     Returns:
       Two arrays of the same size, containing all boxes that were evaluated as
@@ -457,7 +507,7 @@ class PerImageEvaluation(object):
       # instances have corresponding segmentation annotations. Those boxes that
       # dont have segmentation annotations are represented as empty masks in
       # groundtruth_masks nd array.
-      mask_presence_indicator = (np.sum(groundtruth_masks, axis=(1, 2)) > 0)
+      mask_presence_indicator = np_mask_ops.area(groundtruth_masks) > 0
 
       (iou_mask, ioa_mask, scores,
        num_detected_boxes) = self._get_overlaps_and_scores_mask_mode(
@@ -465,7 +515,7 @@ class PerImageEvaluation(object):
            detected_scores=detected_scores,
            detected_masks=detected_masks,
            groundtruth_boxes=groundtruth_boxes[mask_presence_indicator, :],
-           groundtruth_masks=groundtruth_masks[mask_presence_indicator, :],
+           groundtruth_masks=groundtruth_masks[mask_presence_indicator],
            groundtruth_is_group_of_list=groundtruth_is_group_of_list[
                mask_presence_indicator])
       if sum(mask_presence_indicator) < len(mask_presence_indicator):
@@ -486,7 +536,8 @@ class PerImageEvaluation(object):
            detected_boxes=detected_boxes,
            detected_scores=detected_scores,
            groundtruth_boxes=groundtruth_boxes,
-           groundtruth_is_group_of_list=groundtruth_is_group_of_list)
+           groundtruth_is_group_of_list=groundtruth_is_group_of_list,
+           apply_nms=apply_nms)
 
     if groundtruth_boxes.size == 0:
       return scores, np.zeros(num_detected_boxes, dtype=bool)